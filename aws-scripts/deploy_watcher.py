@@ -356,6 +356,7 @@ class WatcherDeployer:
             # Copy our lambda code into temp dir
             shutil.copy('aws-scripts/twitch_watcher_lambda.py', os.path.join(build_dir, 'twitch_watcher_lambda.py'))
             shutil.copy('aws-scripts/twitch_monitor.py', os.path.join(build_dir, 'twitch_monitor.py'))
+            shutil.copy('aws-scripts/twitch_batch.py', os.path.join(build_dir, 'twitch_batch.py'))
 
             # Zip everything up
             zip_buffer = io.BytesIO()
@@ -12,10 +12,12 @@ import time
 import argparse
 import logging
 from logging.handlers import RotatingFileHandler
-import threading  # noqa: F401 (reserved for future parallel features)
+import threading
 import subprocess
+import contextlib
 from pathlib import Path
 from typing import Dict, Optional, List
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta  # noqa: F401 (timedelta reserved for future use)
 import signal
 import psutil
@@ -38,7 +40,10 @@ from youtube_trigger import (
     send_youtube_trigger,
     sync_metadata_to_s3,
 )
-from utils.job_tracker import JobTracker, JobStatus  # DynamoDB job lock/heartbeat
+from utils.job_tracker import AsyncJobTracker, JobTracker, JobStatus  # DynamoDB job lock/heartbeat
+import pipeline_runner  # warm in-process workers + step DAG
+import job_scheduler  # typed resource tokens + local queue stand-in
+from utils import metrics  # spans/counters, Prometheus endpoint, per-VOD trace
 try:
     # Resolve YouTube channels for uploads
     from src.youtube_channels import resolve_channels_for_vod
@@ -103,6 +108,12 @@ for _handler in logging.getLogger().handlers:
     if isinstance(_handler, logging.StreamHandler):
         _handler.addFilter(_AsciiLogFilter(_allow_unicode_console))
 
+# Orchestrator metrics served on METRICS_PORT (default 9464, 0 disables) next to the span histograms
+_JOBS_TOTAL = metrics.counter('orchestrator_jobs_total', 'Finished jobs by type and outcome')
+_ACTIVE_JOBS = metrics.gauge('orchestrator_active_jobs', 'Jobs currently running')
+_TOKEN_WAIT = metrics.histogram('orchestrator_token_wait_seconds', 'Time steps waited for resource tokens')
+_HOST_READINGS = metrics.gauge('orchestrator_host_reading', 'Latest host capacity readings (cpu, memory, gpu)')
+
 class GPUResourceMonitor:
     """Monitor GPU and system resources"""
     
@@ -174,6 +185,29 @@ class GPUResourceMonitor:
             logger.warning(f"System resource check failed: {e}")
             return True  # Assume available if check fails
     
+    def readings(self) -> Dict[str, float]:
+        """Snapshot of host capacity used to size the scheduler's resource tokens."""
+        out: Dict[str, float] = {'cpu_count': float(os.cpu_count() or 1)}
+        try:
+            memory = psutil.virtual_memory()
+            out['mem_total_mb'] = memory.total / (1024 * 1024)
+            out['mem_available_mb'] = memory.available / (1024 * 1024)
+            out['cpu_percent'] = psutil.cpu_percent(interval=None)
+        except Exception:
+            pass
+        try:
+            result = subprocess.run(['nvidia-smi', '--query-gpu=utilization.gpu,memory.used,memory.total',
+                                     '--format=csv,noheader,nounits'],
+                                    capture_output=True, text=True, timeout=10)
+            rows = [r.split(', ') for r in result.stdout.strip().split('\n') if r.strip()] if result.returncode == 0 else []
+            out['gpu_count'] = float(len(rows))
+            if rows:
+                out['gpu_util'] = max(float(r[0]) for r in rows)
+                out['gpu_mem_free_mb'] = sum(float(r[2]) - float(r[1]) for r in rows)
+        except Exception:
+            out['gpu_count'] = 0.0
+        return out
+
     def wait_for_resources(self, timeout_minutes: int = 30) -> bool:
         """Wait for resources to become available"""
         logger.info("Waiting for GPU and system resources to become available...")
@@ -193,7 +227,8 @@ class GPUResourceMonitor:
 class JobProcessor:
     """Process individual jobs (clip or render)"""
     
-    def __init__(self, job_type: str, manifest_uri: str, vod_id: str, channel: Optional[str] = None):
+    def __init__(self, job_type: str, manifest_uri: str, vod_id: str, channel: Optional[str] = None,
+                 tokens: Optional['job_scheduler.ResourceTokens'] = None, worker_share: Optional[int] = None):
         self.job_type = job_type
         self.manifest_uri = manifest_uri
         self.vod_id = vod_id
@@ -212,8 +247,16 @@ class JobProcessor:
         self.jobs_dir.mkdir(parents=True, exist_ok=True)
         self.log_file = self.jobs_dir / f"full_{self.run_id}.log"
         
+        # Shared resource tokens when several jobs run at once (None = unconstrained)
+        self.tokens = tokens
+        # This job's lease on the shared warm worker pool (created on first python step)
+        self.worker_share = worker_share
+        self._workers: Optional['pipeline_runner.WorkerLease'] = None
         self.child_pid: Optional[int] = None
         self.child_pid_file: Optional[Path] = None
+        # Every live child/worker PID; DAG steps can run concurrently
+        self.child_pids: Dict[str, int] = {}
+        self._pid_lock = threading.Lock()
         # Propagate conservative network/concurrency defaults to child processes unless already set
         self.env_overrides: Dict[str, str] = {}
         # Respect user overrides if provided; otherwise set safe defaults
@@ -234,6 +277,30 @@ class JobProcessor:
             self.env_overrides['DOWNLOAD_QUALITY_PREF'] = os.getenv('DOWNLOAD_QUALITY_PREF', '1080p')
 
     def _run_subprocess(self, cmd: List[str], timeout_seconds: int, step_name: str, env: dict = None) -> bool:
+        """Run a pipeline step, holding the resource tokens its stage needs."""
+        with metrics.span("pipeline.step", step=step_name) as sp:
+            if self.tokens is None:
+                ok = self._run_step(cmd, timeout_seconds, step_name, env)
+            else:
+                # Wait for a warm worker first so a queued step does not sit on tokens others could use
+                with self._worker_slot(cmd):
+                    t0 = time.monotonic()
+                    with self.tokens.acquire(job_scheduler.demand_for(cmd), f"{self.vod_id}:{step_name}"):
+                        wait = time.monotonic() - t0
+                        _TOKEN_WAIT.observe(wait)
+                        sp.set(token_wait_s=round(wait, 3))
+                        ok = self._run_step(cmd, timeout_seconds, step_name, env)
+            if not ok:
+                sp.status = "failed"
+            return ok
+
+    def _worker_slot(self, cmd: List[str]):
+        """Reserve this thread's warm worker for cmd if it will run in-process, else a no-op."""
+        if pipeline_runner.in_process_enabled() and pipeline_runner.spec_from_cmd(cmd) is not None:
+            return self.workers.reserved()
+        return contextlib.nullcontext()
+
+    def _run_step(self, cmd: List[str], timeout_seconds: int, step_name: str, env: dict = None) -> bool:
         """Run a subprocess with streaming logs and unique run-id filenames."""
         # Log to main orchestrator log for immediate visibility
         logger.info(f"Running {step_name}: {' '.join(cmd)}")
@@ -250,7 +317,13 @@ class JobProcessor:
                 fout.write(f"Started: {datetime.now().isoformat()}\n")
                 fout.write("=" * 50 + "\n\n")
                 fout.flush()
-                
+
+            if pipeline_runner.in_process_enabled():
+                spec = pipeline_runner.spec_from_cmd(cmd)
+                if spec is not None:
+                    return self._run_in_worker(spec, timeout_seconds, step_name, self._child_env(env))
+
+            with self.log_file.open('a', encoding='utf-8', errors='replace') as fout:
                 # Ensure child Python processes flush output immediately so logs stream
                 patched_cmd = list(cmd)
                 try:
@@ -261,28 +334,7 @@ class JobProcessor:
                 except Exception:
                     pass
 
-                disable_s3 = self._should_disable_s3_uploads()
-                upload_videos = self._should_upload_videos()
-
-                # Merge environment overrides for child process
-                child_env = {
-                    **os.environ,
-                    **self.env_overrides,
-                    'PYTHONUNBUFFERED': '1',
-                    'PYTHONIOENCODING': 'utf-8',
-                    'JOB_RUN_ID': self.run_id,
-                    'VOD_ID': self.vod_id,
-                    'JOB_TYPE': self.job_type,
-                    'RUN_ID': self.run_id,
-                    'DISABLE_S3_UPLOADS': 'true' if disable_s3 else 'false',
-                    'LOCAL_TEST_MODE': 'true' if disable_s3 else 'false',
-                    'CONTAINER_MODE': 'false' if disable_s3 else 'true',
-                    'UPLOAD_VIDEOS': 'true' if upload_videos else 'false',
-                }
-                
-                # Add custom environment variables if provided
-                if env:
-                    child_env.update(env)
+                child_env = self._child_env(env)
 
                 proc = subprocess.Popen(
                     patched_cmd,
@@ -296,6 +348,8 @@ class JobProcessor:
                 )
                 # Expose PID for external termination and write PID file
                 self.child_pid = proc.pid
+                with self._pid_lock:
+                    self.child_pids[step_name] = proc.pid
                 self.child_pid_file = self.jobs_dir / f"{base_name}.pid"
                 try:
                     with self.child_pid_file.open('w', encoding='utf-8') as pf:
@@ -337,6 +391,8 @@ class JobProcessor:
                 pass
             return False
         finally:
+            with self._pid_lock:
+                self.child_pids.pop(step_name, None)
             # Best-effort remove PID file when done
             try:
                 if self.child_pid_file and self.child_pid_file.exists():
@@ -344,11 +400,114 @@ class JobProcessor:
             except Exception:
                 pass
 
+    def _child_env(self, env: Optional[dict] = None) -> Dict[str, str]:
+        """Environment for a pipeline step (subprocess or warm worker)."""
+        disable_s3 = self._should_disable_s3_uploads()
+        upload_videos = self._should_upload_videos()
+
+        # Merge environment overrides for child process
+        child_env = {
+            **os.environ,
+            **self.env_overrides,
+            'PYTHONUNBUFFERED': '1',
+            'PYTHONIOENCODING': 'utf-8',
+            'JOB_RUN_ID': self.run_id,
+            'VOD_ID': self.vod_id,
+            'JOB_TYPE': self.job_type,
+            'RUN_ID': self.run_id,
+            'DISABLE_S3_UPLOADS': 'true' if disable_s3 else 'false',
+            'LOCAL_TEST_MODE': 'true' if disable_s3 else 'false',
+            'CONTAINER_MODE': 'false' if disable_s3 else 'true',
+            'UPLOAD_VIDEOS': 'true' if upload_videos else 'false',
+        }
+        # Spans recorded by the step hang under the orchestrator span that launched it
+        parent_span = metrics.current_span_id()
+        if parent_span:
+            child_env['TRACE_PARENT'] = parent_span
+
+        # Add custom environment variables if provided
+        if env:
+            child_env.update(env)
+        return child_env
+
+    def _run_in_worker(self, spec: Dict, timeout_seconds: int, step_name: str, child_env: Dict[str, str]) -> bool:
+        """Run a python step on a warm pipeline worker; a crash only loses that step."""
+        spec = {**spec, 'env': child_env, 'log_path': str(self.log_file)}
+        retries = max(0, int(os.getenv('PIPELINE_CRASH_RETRIES', '1') or 0))
+
+        def _on_start(pid: int) -> None:
+            self.child_pid = pid
+            with self._pid_lock:
+                self.child_pids[step_name] = pid
+
+        start_time = time.time()
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    code = self.workers.run(spec, timeout_seconds, on_start=_on_start)
+                    break
+                except pipeline_runner.StepCrashed as e:
+                    logger.error(f"💥 {step_name} crashed its worker: {e}")
+                    self._append_log(f"\n\n=== WORKER CRASH ===\n{e}\n")
+                    if attempt >= retries:
+                        return False
+                    logger.info(f"🔁 Retrying {step_name} on a fresh worker ({attempt + 1}/{retries})")
+                except TimeoutError:
+                    logger.error(f"{step_name} timed out after {timeout_seconds}s")
+                    self._append_log(f"\n\n=== TIMEOUT after {timeout_seconds}s ===\n")
+                    return False
+        except Exception as e:
+            logger.error(f"💥 {step_name} error: {e}")
+            self._append_log(f"\n\n=== ERROR ===\n{e}\n")
+            return False
+        finally:
+            with self._pid_lock:
+                self.child_pids.pop(step_name, None)
+
+        self._append_log(
+            "\n\n=== COMPLETED ===\n"
+            f"Ended: {datetime.now().isoformat()}\n"
+            f"Duration: {time.time() - start_time:.2f}s (warm worker)\n"
+            f"Exit code: {code}\n"
+        )
+        if code == 0:
+            logger.info(f"✅ {step_name} completed successfully")
+            return True
+        logger.error(f"❌ {step_name} failed (exit {code})")
+        return False
+
+    @property
+    def workers(self) -> 'pipeline_runner.WorkerLease':
+        with self._pid_lock:
+            if self._workers is None:
+                self._workers = pipeline_runner.get_pool().lease(f"{self.vod_id}:{self.run_id}:{id(self)}", self.worker_share)
+            return self._workers
+
+    def _append_log(self, text: str) -> None:
+        try:
+            with self.log_file.open('a', encoding='utf-8', errors='replace') as fout:
+                fout.write(text)
+        except Exception:
+            pass
+
     def kill_child_tree(self) -> None:
-        """Terminate the active child process and its tree (Windows-friendly)."""
-        pid = self.child_pid
-        if not pid:
-            return
+        """Terminate active child processes/warm workers and their trees (Windows-friendly)."""
+        with self._pid_lock:
+            pids = set(self.child_pids.values())
+            lease = self._workers
+        if self.child_pid:
+            pids.add(self.child_pid)
+        # Only this job's leased workers; other jobs share the pool
+        if lease is not None:
+            try:
+                lease.kill()
+            except Exception:
+                pass
+        for pid in pids:
+            self._kill_pid_tree(pid)
+
+    @staticmethod
+    def _kill_pid_tree(pid: int) -> None:
         try:
             if os.name == 'nt':
                 subprocess.run(['taskkill', '/PID', str(pid), '/T', '/F'], capture_output=True)
@@ -623,8 +782,8 @@ class JobProcessor:
                         has_chat = False
                     if has_chat:
                         logger.info("On-stream chat detected; will disable chat overlay for arcs")
-                        # Set a flag in process environment so downstream steps honor it
-                        os.environ['ARC_NO_CHAT'] = '1'
+                        # Flag this job's steps only; other concurrent jobs keep their overlay
+                        self.env_overrides['ARC_NO_CHAT'] = '1'
             except Exception as _e:
                 logger.warning(f"Webcam gate probe failed; continuing: {_e}")
 
@@ -730,6 +889,227 @@ class JobProcessor:
             logger.error(f"[JOB END] type=render vod_id={self.vod_id} status=error duration={duration} error={e}")
             return False
 
+    def _run_full_dag(self, vod_id: str, storage, s3_bucket: str) -> Dict[str, 'pipeline_runner.Step']:
+        """Build and run the full-job step graph; returns per-step results."""
+        Step = pipeline_runner.Step
+        ai_dir = Path('data/ai_data') / vod_id
+        vs_dir = Path('data/vector_stores') / vod_id
+        raw_ai = ai_dir / f"{vod_id}_ai_data.json"
+        filtered_ai = ai_dir / f"{vod_id}_filtered_ai_data.json"
+        chapters = ai_dir / f"{vod_id}_chapters.json"
+        metadata_db = vs_dir / 'metadata.db'
+
+        try:
+            force_public = os.getenv('UPLOAD_YOUTUBE_PUBLIC', 'false').lower() in ('1', 'true', 'yes')
+        except Exception:
+            force_public = False
+
+        def _py(*args: str, timeout: int = 1800, label: Optional[str] = None, env: Optional[dict] = None):
+            cmd = [sys.executable, '-u', *args]
+            return lambda: self._run_subprocess(cmd, timeout_seconds=timeout,
+                                                step_name=label or f"Pipeline: {' '.join(cmd[-2:])}", env=env)
+
+        # Vector store + RAG pipeline (clips foundation): builds metadata.db with
+        # chat_rate_z, burst_score, etc. Used by BOTH clips and arc videos.
+        # NOTE: rag.narrative_analyzer and rag.index_narrative are REPLACED by Gemini arc detection
+        steps: List[pipeline_runner.Step] = [
+            Step('filter_transcript_boundaries', _py('processing-scripts/filter_transcript_boundaries.py', vod_id),
+                 inputs=[raw_ai, chapters], outputs=[filtered_ai]),
+            Step('full_vod_documenter', _py('vector_store/full_vod_documenter.py', vod_id),
+                 deps=['filter_transcript_boundaries'], inputs=[filtered_ai], outputs=[metadata_db]),
+            Step('vod_quality_gate', _py('vector_store/vod_quality_gate.py', vod_id),
+                 deps=['full_vod_documenter']),
+            Step('burst_summarize', _py('vector_store/burst_summarize.py', vod_id),
+                 deps=['full_vod_documenter']),
+        ]
+
+        # Gemini Arc Detection (replaces rag.narrative_analyzer for video creation)
+        use_gemini_arcs = os.getenv('USE_GEMINI_ARCS', 'true').lower() in ('1', 'true', 'yes')
+        if use_gemini_arcs:
+            def _arc_manifests() -> bool:
+                if self._convert_gemini_arcs_to_manifests(vod_id):
+                    return True
+                logger.warning("Gemini arc manifest conversion failed; falling back to legacy arc creation")
+                if not self._run_subprocess([sys.executable, '-u', '-m', 'rag.enhanced_director_cut_selector', vod_id],
+                                            timeout_seconds=1800, step_name='Legacy: enhanced_director_cut_selector'):
+                    logger.warning("Legacy arc fallback also failed")
+                    return False
+                return True
+
+            steps += [
+                Step('gemini_arc_detection', lambda: self._run_gemini_arc_detection(vod_id),
+                     deps=['vod_quality_gate'], inputs=[filtered_ai, chapters],
+                     outputs=[vs_dir / 'gemini_arc_manifest.json'], required=False),
+                Step('arc_manifests', _arc_manifests, deps=['gemini_arc_detection'], required=False),
+            ]
+        else:
+            logger.info("Gemini arcs disabled; using legacy RAG pipeline for videos")
+
+            def _legacy_arcs() -> bool:
+                ok = True
+                for args in (('-m', 'rag.narrative_analyzer'), ('-m', 'rag.index_narrative'),
+                             ('-m', 'rag.enhanced_director_cut_selector')):
+                    if not _py(*args, vod_id, label=f"Legacy: {args[-1]} {vod_id}")():
+                        logger.warning(f"Legacy step failed: {args[-1]}")
+                        ok = False
+                return ok
+
+            steps.append(Step('arc_manifests', _legacy_arcs, deps=['burst_summarize'], required=False))
+
+        # Clips (cache-gated on S3) -> metadata + local YouTube upload
+        def _clips() -> bool:
+            if not self._generate_clips_manifest(vod_id):
+                logger.warning("Clip manifest failed; continuing without clips")
+                return False
+            return self._produce_clips(vod_id, storage, s3_bucket)
+
+        def _clip_publish() -> bool:
+            self._generate_clip_metadata(vod_id)
+            if self._upload_clips_local(vod_id, force_public):
+                return True
+            logger.warning(f"Local clip uploads failed or skipped for VOD {vod_id}")
+            return False
+
+        steps += [
+            # Clip selection reads burst summaries; a failed upstream step must stop clips and every upload after it
+            Step('clips', _clips, deps=['vod_quality_gate', 'burst_summarize'], required=True),
+            Step('clip_publish', _clip_publish, deps=['clips']),
+            # Arch workflow pools cam crops from clips, so it waits for clip creation (not uploads)
+            Step('arch_videos', lambda: self._run_arch_workflow(vod_id, force_public),
+                 deps=['clips', 'arc_manifests', 'burst_summarize'], required=False),
+            # Cleanup deletes chunks the arch renderer reads; run it last
+            Step('cleanup_after_upload', lambda: self._cleanup_after_upload(vod_id),
+                 deps=['clip_publish', 'arch_videos']),
+        ]
+
+        parallel = max(1, int(os.getenv('PIPELINE_WORKERS', '2') or 2))
+        results = pipeline_runner.run_dag(steps, max_parallel=parallel,
+                                          checkpoint_path=self.jobs_dir / 'dag_checkpoints.json')
+        logger.info(pipeline_runner.summarize(results))
+        try:
+            logger.info(metrics.format_report(metrics.critical_path_report(vod_id, self.run_id)))
+        except Exception as e:
+            logger.warning(f"Critical path report failed: {e}")
+        return results
+
+    def _produce_clips(self, vod_id: str, storage, s3_bucket: str) -> bool:
+        """Create clips unless S3 already holds a complete set (manifest present and mp4 count >= manifest count)."""
+        # Force local-only clip production to keep files on disk and skip S3
+        env = self._build_local_processing_env()
+        try:
+            prefix = f"s3://{s3_bucket}/clips/{vod_id}/"
+            s3_files = storage.list_files(prefix)
+        except Exception:
+            s3_files = []
+        manifest_key = f"s3://{s3_bucket}/clips/{vod_id}/.clips_manifest.json"
+        manifest_ok = False
+        manifest_count = 0
+        try:
+            from tempfile import TemporaryDirectory
+            with TemporaryDirectory() as td:
+                local_manifest = Path(td) / ".clips_manifest.json"
+                if storage.exists(manifest_key):
+                    storage.download_file(manifest_key, str(local_manifest))
+                    if local_manifest.exists():
+                        try:
+                            data = json.loads(local_manifest.read_text(encoding='utf-8'))
+                            manifest_count = int(data.get('count') or 0)
+                            manifest_ok = manifest_count >= 0
+                        except Exception:
+                            manifest_ok = False
+        except Exception:
+            manifest_ok = False
+
+        mp4_count = sum(1 for f in s3_files if isinstance(f, str) and f.lower().endswith('.mp4'))
+        cache_complete = bool(manifest_ok and mp4_count >= max(1, manifest_count))
+        if cache_complete:
+            logger.info(f"Clips already complete on S3; skipping generation (mp4={mp4_count}, manifest_count={manifest_count})")
+            return True
+        if s3_files:
+            logger.info(f"Clip cache incomplete on S3 (mp4={mp4_count}, manifest_count={manifest_count}); regenerating clips")
+        else:
+            logger.info("No clips found on S3; generating clips")
+        clips_success = self._create_individual_clips(vod_id, env)
+        if not clips_success:
+            # Clean up partial clip artifacts on failure
+            self._run_subprocess(
+                [sys.executable, '-u', 'processing-scripts/cleanup_local_files.py', vod_id, '--keep-ai-data', '--clips-only', '--sweep-ttl-days', '7'],
+                timeout_seconds=300,
+                step_name='Clean up partial clip files after failure'
+            )
+        return clips_success
+
+    def _run_arch_workflow(self, vod_id: str, force_public: bool) -> bool:
+        """Arch (story arc) videos: metadata -> cam crops/rating/thumbnails -> render -> upload."""
+        arch_env = self._build_local_processing_env()
+
+        # Propagate ARC_NO_CHAT flag if set by chat probe
+        try:
+            if self.env_overrides.get('ARC_NO_CHAT') == '1' or os.getenv('ARC_NO_CHAT') in ('1', 'true', 'True', 'YES', 'yes'):
+                arch_env['ARC_NO_CHAT'] = '1'
+        except Exception:
+            pass
+
+        # Check if Gemini arc manifests exist (created by the arc_manifests step)
+        arcs_index_path = Path(f"data/vector_stores/{vod_id}/arcs/arcs_index.json")
+        if not arcs_index_path.exists():
+            logger.warning("No Gemini arc manifests found; skipping arch pipeline")
+            return False
+        logger.info("Found Gemini arc manifests; proceeding with video generation")
+
+        # 1. Generate metadata/titles FIRST so thumbnails can use them
+        metadata_ok = self._generate_arch_metadata(vod_id)
+        if not metadata_ok:
+            logger.warning("Arch metadata generation failed; thumbnails might lack titles")
+        else:
+            logger.info("Generated arch titles and metadata")
+
+        # Optional: Generate arc cam crops + rate + render thumbnails
+        try:
+            arch_env['WEBCAM_GATE'] = os.getenv('WEBCAM_GATE', 'true')
+            arch_env['WEBCAM_DET_SAMPLES'] = os.getenv('WEBCAM_DET_SAMPLES', '4')
+            arch_env['WEBCAM_DET_WINDOW_S'] = os.getenv('WEBCAM_DET_WINDOW_S', '6')
+            arch_env['WEBCAM_DET_MAJORITY_K'] = os.getenv('WEBCAM_DET_MAJORITY_K', '3')
+            arch_env['WEBCAM_DET_QUALITY'] = os.getenv('WEBCAM_DET_QUALITY', '1080p')
+            arch_env['SNAP_OFFSETS'] = os.getenv('SNAP_OFFSETS', '-1,-0.5,0,0.5,1,2')
+            # Enable Gemini 3 Pro thumbnail refinement by default
+            arch_env['GEMINI_REFINE_THUMBNAILS'] = os.getenv('GEMINI_REFINE_THUMBNAILS', 'true')
+            arch_env['GEMINI_THUMB_RESOLUTION'] = os.getenv('GEMINI_THUMB_RESOLUTION', '2K')
+        except Exception:
+            pass
+
+        # a) Extract arc cam crops (optional, for thumbnails)
+        self._run_subprocess(
+            [sys.executable, '-u', '-m', 'thumbnail.extract_arc_cam_crops', vod_id, '--quality', '1080p'],
+            timeout_seconds=1800,
+            step_name='Extract arc cam crops',
+            env=arch_env,
+        )
+        # b) Rate cams (pool from clips + arcs)
+        self._run_subprocess(
+            [sys.executable, '-u', '-m', 'thumbnail.rate_cams', vod_id, '--top-k', '24'],
+            timeout_seconds=900,
+            step_name='Rate cam crops',
+            env=arch_env,
+        )
+        # c) Render arch thumbnails (1 variant per arc)
+        self._run_subprocess(
+            [sys.executable, '-u', '-m', 'thumbnail.render_arch_thumbnails', vod_id, '--variants', '1'],
+            timeout_seconds=900,
+            step_name='Render arch thumbnails',
+            env=arch_env,
+        )
+
+        # Render arc videos
+        if not self._render_arch_videos(vod_id, arch_env):
+            logger.warning("Arch rendering failed; skipping arch upload")
+            return False
+        if not metadata_ok:
+            logger.warning("Skipping arch upload due to missing metadata")
+            return False
+        # Upload arch videos to YouTube (respect same public toggle as clips)
+        return self._upload_arch_videos(vod_id, force_public)
+
     def process_full_job(self) -> bool:
         """Process a full local workflow job (AI data -> vector store -> render -> clips/metadata/upload)."""
         logger.info(f"[JOB START] type=full vod_id={self.vod_id}")
@@ -752,7 +1132,7 @@ class JobProcessor:
                         has_chat = False
                     if has_chat:
                         logger.info("On-stream chat detected; will disable chat overlay for arcs")
-                        os.environ['ARC_NO_CHAT'] = '1'
+                        self.env_overrides['ARC_NO_CHAT'] = '1'
             except Exception as _e:
                 logger.warning(f"Webcam gate probe failed; continuing: {_e}")
 
@@ -802,188 +1182,15 @@ class JobProcessor:
             self._run_subprocess([sys.executable, '-u', 'processing-scripts/cleanup_audio_chunks.py', vod_id, '--sweep-ttl-days', '7'],
                                  timeout_seconds=300, step_name='Clean up temp audio chunks')
 
-            # 2) Vector store + RAG pipeline (clips foundation)
-            # These steps build the metadata.db with chat_rate_z, burst_score, etc.
-            # Used by BOTH clips (data-driven climax) and videos (arc context)
-            pipeline_steps: List[List[str]] = [
-                [sys.executable, '-u', 'processing-scripts/filter_transcript_boundaries.py', vod_id],
-                [sys.executable, '-u', 'vector_store/full_vod_documenter.py', vod_id],
-                [sys.executable, '-u', 'vector_store/vod_quality_gate.py', vod_id],
-                [sys.executable, '-u', 'vector_store/burst_summarize.py', vod_id],
-                # NOTE: rag.narrative_analyzer and rag.index_narrative are REPLACED by Gemini arc detection
-                # They are no longer needed for the video pipeline
-            ]
-            for cmd in pipeline_steps:
-                if not self._run_subprocess(cmd, timeout_seconds=1800, step_name=f"Pipeline: {' '.join(cmd[-2:])}"):
-                    self.end_time = datetime.now()
-                    logger.error(f"[JOB END] type=full vod_id={vod_id} status=fail at pipeline")
-                    return False
-            
-            # 2b) Gemini Arc Detection (replaces rag.narrative_analyzer for video creation)
-            # Runs hour-by-hour transcript analysis to detect intro/climax/resolution arcs
-            use_gemini_arcs = os.getenv('USE_GEMINI_ARCS', 'true').lower() in ('1', 'true', 'yes')
-            if use_gemini_arcs:
-                if not self._run_gemini_arc_detection(vod_id):
-                    logger.warning("Gemini arc detection failed; videos may not be generated")
-                else:
-                    # Convert Gemini arcs to manifests for video rendering
-                    if not self._convert_gemini_arcs_to_manifests(vod_id):
-                        logger.warning("Gemini arc manifest conversion failed; falling back to legacy arc creation")
-                        # Fallback: use legacy enhanced_director_cut_selector + create_story_archs
-                        if not self._run_subprocess([sys.executable, '-u', '-m', 'rag.enhanced_director_cut_selector', vod_id],
-                                                    timeout_seconds=1800, step_name='Legacy: enhanced_director_cut_selector'):
-                            logger.warning("Legacy arc fallback also failed")
-            else:
-                # Legacy path: use rag.narrative_analyzer + enhanced_director_cut_selector
-                logger.info("Gemini arcs disabled; using legacy RAG pipeline for videos")
-                legacy_steps = [
-                    [sys.executable, '-u', '-m', 'rag.narrative_analyzer', vod_id],
-                    [sys.executable, '-u', '-m', 'rag.index_narrative', vod_id],
-                    [sys.executable, '-u', '-m', 'rag.enhanced_director_cut_selector', vod_id],
-                ]
-                for cmd in legacy_steps:
-                    if not self._run_subprocess(cmd, timeout_seconds=1800, step_name=f"Legacy: {' '.join(cmd[-2:])}"):
-                        logger.warning(f"Legacy step failed: {cmd[-1]}")
-
-            # 3) Clips Processing (First - takes less time) with cache gate
-            clips_created = False
-            if not self._generate_clips_manifest(vod_id):
-                logger.warning("Clip manifest failed; continuing without clips")
-            else:
-                # Force local-only clip production to keep files on disk and skip S3
-                env = self._build_local_processing_env()
-
-                # Robust cache gate: only skip when S3 manifest exists and mp4 count >= manifest count
-                try:
-                    prefix = f"s3://{s3_bucket}/clips/{vod_id}/"
-                    s3_files = storage.list_files(prefix)
-                except Exception:
-                    s3_files = []
-                manifest_key = f"s3://{s3_bucket}/clips/{vod_id}/.clips_manifest.json"
-                manifest_ok = False
-                manifest_count = 0
-                try:
-                    from tempfile import TemporaryDirectory
-                    with TemporaryDirectory() as td:
-                        local_manifest = Path(td) / ".clips_manifest.json"
-                        if storage.exists(manifest_key):
-                            storage.download_file(manifest_key, str(local_manifest))
-                            if local_manifest.exists():
-                                try:
-                                    data = json.loads(local_manifest.read_text(encoding='utf-8'))
-                                    manifest_count = int(data.get('count') or 0)
-                                    manifest_ok = manifest_count >= 0
-                                except Exception:
-                                    manifest_ok = False
-                except Exception:
-                    manifest_ok = False
-
-                mp4_count = sum(1 for f in s3_files if isinstance(f, str) and f.lower().endswith('.mp4'))
-                cache_complete = bool(manifest_ok and mp4_count >= max(1, manifest_count))
-                if cache_complete:
-                    logger.info(f"Clips already complete on S3; skipping generation (mp4={mp4_count}, manifest_count={manifest_count})")
-                    clips_created = True
-                else:
-                    if s3_files:
-                        logger.info(f"Clip cache incomplete on S3 (mp4={mp4_count}, manifest_count={manifest_count}); regenerating clips")
-                    else:
-                        logger.info("No clips found on S3; generating clips")
-                    clips_success = self._create_individual_clips(vod_id, env)
-                    clips_created = clips_success
-                    if not clips_success:
-                        # Clean up partial clip artifacts on failure
-                        self._run_subprocess(
-                            [sys.executable, '-u', 'processing-scripts/cleanup_local_files.py', vod_id, '--keep-ai-data', '--clips-only', '--sweep-ttl-days', '7'],
-                            timeout_seconds=300,
-                            step_name='Clean up partial clip files after failure'
-                        )
-
-            # 4) Clips Metadata and Local YouTube Upload (remote queue deprecated)
-            if clips_created:
-                # Generate clip metadata
-                self._generate_clip_metadata(vod_id)
-
-                # Local YouTube uploads
-                try:
-                    force_public = os.getenv('UPLOAD_YOUTUBE_PUBLIC', 'false').lower() in ('1', 'true', 'yes')
-                except Exception:
-                    force_public = False
-                clips_uploaded = self._upload_clips_local(vod_id, force_public)
-                if clips_uploaded:
-                    self._cleanup_after_upload(vod_id)
-                else:
-                    logger.warning(f"Local clip uploads failed or skipped for VOD {vod_id}")
-
-                # -------------------- ARCH (VIDEO) WORKFLOW --------------------
-                # Run after clip generation and uploads
-                # Uses Gemini arc detection results from step 2b
-                arch_env = self._build_local_processing_env()
-                
-                # Propagate ARC_NO_CHAT flag if set by chat probe
-                try:
-                    if os.getenv('ARC_NO_CHAT') in ('1', 'true', 'True', 'YES', 'yes'):
-                        arch_env['ARC_NO_CHAT'] = '1'
-                except Exception:
-                    pass
-                
-                # Check if Gemini arc manifests exist (created in step 2b)
-                arcs_index_path = Path(f"data/vector_stores/{vod_id}/arcs/arcs_index.json")
-                if not arcs_index_path.exists():
-                    logger.warning("No Gemini arc manifests found; skipping arch pipeline")
-                else:
-                    logger.info("Found Gemini arc manifests; proceeding with video generation")
-                    
-                    # 1. Generate metadata/titles FIRST so thumbnails can use them
-                    metadata_ok = self._generate_arch_metadata(vod_id)
-                    if not metadata_ok:
-                        logger.warning("Arch metadata generation failed; thumbnails might lack titles")
-                    else:
-                        logger.info("Generated arch titles and metadata")
-                    
-                    # Optional: Generate arc cam crops + rate + render thumbnails
-                    try:
-                        arch_env['WEBCAM_GATE'] = os.getenv('WEBCAM_GATE', 'true')
-                        arch_env['WEBCAM_DET_SAMPLES'] = os.getenv('WEBCAM_DET_SAMPLES', '4')
-                        arch_env['WEBCAM_DET_WINDOW_S'] = os.getenv('WEBCAM_DET_WINDOW_S', '6')
-                        arch_env['WEBCAM_DET_MAJORITY_K'] = os.getenv('WEBCAM_DET_MAJORITY_K', '3')
-                        arch_env['WEBCAM_DET_QUALITY'] = os.getenv('WEBCAM_DET_QUALITY', '1080p')
-                        arch_env['SNAP_OFFSETS'] = os.getenv('SNAP_OFFSETS', '-1,-0.5,0,0.5,1,2')
-                        # Enable Gemini 3 Pro thumbnail refinement by default
-                        arch_env['GEMINI_REFINE_THUMBNAILS'] = os.getenv('GEMINI_REFINE_THUMBNAILS', 'true')
-                        arch_env['GEMINI_THUMB_RESOLUTION'] = os.getenv('GEMINI_THUMB_RESOLUTION', '2K')
-                    except Exception:
-                        pass
-
-                    # a) Extract arc cam crops (optional, for thumbnails)
-                    self._run_subprocess(
-                        [sys.executable, '-u', '-m', 'thumbnail.extract_arc_cam_crops', vod_id, '--quality', '1080p'],
-                        timeout_seconds=1800,
-                        step_name='Extract arc cam crops',
-                        env=arch_env,
-                    )
-                    # b) Rate cams (pool from clips + arcs)
-                    self._run_subprocess(
-                        [sys.executable, '-u', '-m', 'thumbnail.rate_cams', vod_id, '--top-k', '24'],
-                        timeout_seconds=900,
-                        step_name='Rate cam crops',
-                        env=arch_env,
-                    )
-                    # c) Render arch thumbnails (1 variant per arc)
-                    self._run_subprocess(
-                        [sys.executable, '-u', '-m', 'thumbnail.render_arch_thumbnails', vod_id, '--variants', '1'],
-                        timeout_seconds=900,
-                        step_name='Render arch thumbnails',
-                        env=arch_env,
-                    )
-
-                    # Render arc videos
-                    if not self._render_arch_videos(vod_id, arch_env):
-                        logger.warning("Arch rendering failed; skipping arch upload")
-                    elif metadata_ok:
-                        # Upload arch videos to YouTube (respect same public toggle as clips)
-                        self._upload_arch_videos(vod_id, force_public)
-                    else:
-                        logger.warning("Skipping arch upload due to missing metadata")
+            # 2-4) Vector store/RAG, arcs, clips and arch videos as a DAG.
+            # Python steps run on warm workers (models stay loaded between steps);
+            # independent branches (arc detection vs. clips) run concurrently.
+            results = self._run_full_dag(vod_id, storage, s3_bucket)
+            chain = ('filter_transcript_boundaries', 'full_vod_documenter', 'vod_quality_gate', 'burst_summarize')
+            if any(results[name].status not in ('ok', 'cached') for name in chain):
+                self.end_time = datetime.now()
+                logger.error(f"[JOB END] type=full vod_id={vod_id} status=fail at pipeline")
+                return False
 
             # 5) Director's Cut title and render (DISABLED LOCALLY)
             # logger.info("Director's Cut steps are disabled locally; skipping DC title, render, and metadata")
@@ -1049,15 +1256,21 @@ class JobProcessor:
     
     def process(self) -> bool:
         """Process the job based on type"""
-        if self.job_type == "clip":
-            return self.process_clip_job()
-        elif self.job_type == "render":
-            return self.process_render_job()
-        elif self.job_type == "full":
-            return self.process_full_job()
-        else:
-            logger.error(f"Unknown job type: {self.job_type}")
-            return False
+        with metrics.bind(vod_id=self.vod_id, run_id=self.run_id), \
+                metrics.span("job", job_type=self.job_type) as sp:
+            if self.job_type == "clip":
+                ok = self.process_clip_job()
+            elif self.job_type == "render":
+                ok = self.process_render_job()
+            elif self.job_type == "full":
+                ok = self.process_full_job()
+            else:
+                logger.error(f"Unknown job type: {self.job_type}")
+                ok = False
+            if not ok:
+                sp.status = "failed"
+            _JOBS_TOTAL.inc(job_type=self.job_type, status="ok" if ok else "failed")
+            return ok
 
 class GPUOrchestratorDaemon:
     """Main orchestrator daemon that manages both queues"""
@@ -1075,20 +1288,31 @@ class GPUOrchestratorDaemon:
         
         # Initialize AWS clients
         try:
-            self.sqs_client = boto3.client('sqs', region_name=region)
+            if is_truthy(os.getenv('ORCH_LOCAL_QUEUE'), default=False):
+                # Local in-memory stand-in for SQS (development / dry runs)
+                logger.info("ORCH_LOCAL_QUEUE enabled - using in-memory queues instead of SQS")
+                self.sqs_client = job_scheduler.InMemoryQueue()
+            else:
+                self.sqs_client = boto3.client('sqs', region_name=region)
             self.s3_client = boto3.client('s3', region_name=region)
         except NoCredentialsError:
             logger.error("X AWS credentials not configured")
             sys.exit(1)
         
-        # Job tracking
-        self.current_job = None
+        # Job tracking: several jobs may run at once, each with its own SQS
+        # receipt handle, visibility extension clock and DynamoDB heartbeat.
+        self.max_concurrent_jobs = max(1, int(os.getenv('ORCH_MAX_CONCURRENT_JOBS', '2')))
+        self.tokens = job_scheduler.ResourceTokens.from_monitor(self.resource_monitor)
+        self.worker_share = job_scheduler.worker_share(pipeline_runner.get_pool().size, self.max_concurrent_jobs)
+        self.active_jobs: Dict[int, Dict] = {}
+        self._active_lock = threading.Lock()
         self.job_history = []
-        self.current_receipt_handle: Optional[str] = None
-        self.current_queue_url: Optional[str] = None
-        self._last_visibility_extend: float = 0.0
         self._visibility_extend_seconds: int = int(os.getenv('ORCH_VIS_EXT_SECONDS', '300'))  # 5 minutes
-        self._tracker = JobTracker(table_name=os.getenv('DYNAMODB_TABLE', 'streamsniped_jobs'), region=os.getenv('DYNAMODB_REGION', region))
+        # Locks stay synchronous; lease heartbeats run on the tracker's own timer thread
+        self._tracker = AsyncJobTracker(
+            JobTracker(table_name=os.getenv('DYNAMODB_TABLE', 'streamsniped_jobs'), region=os.getenv('DYNAMODB_REGION', region)),
+            heartbeat_interval=self.sleep_seconds,
+        )
         # Testing mode: disable retries and never re-run failed/interrupted items
         self.no_retries: bool = is_truthy(os.getenv('ORCH_NO_RETRIES'), default=False)
         
@@ -1096,6 +1320,73 @@ class GPUOrchestratorDaemon:
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
     
+    @property
+    def current_job(self) -> Optional[JobProcessor]:
+        """Most recently started active job (kept for status output)."""
+        with self._active_lock:
+            jobs = [a['job'] for a in self.active_jobs.values()]
+        return jobs[-1] if jobs else None
+
+    def _register_active(self, job: JobProcessor, queue_url: Optional[str], receipt_handle: Optional[str]) -> None:
+        with self._active_lock:
+            self.active_jobs[id(job)] = {
+                'job': job,
+                'queue_url': queue_url,
+                'receipt_handle': receipt_handle,
+                'last_visibility_extend': time.time(),
+            }
+            _ACTIVE_JOBS.set(len(self.active_jobs))
+        self._tracker.track_heartbeat(job.vod_id, lease_seconds=max(300, self._visibility_extend_seconds*2))
+
+    def _unregister_active(self, job: JobProcessor) -> None:
+        with self._active_lock:
+            self.active_jobs.pop(id(job), None)
+            _ACTIVE_JOBS.set(len(self.active_jobs))
+        self._tracker.untrack_heartbeat(job.vod_id)
+
+    def _keep_alive_active_jobs(self) -> None:
+        """Extend each running job's SQS message visibility (lease heartbeats come from the tracker's timer)."""
+        with self._active_lock:
+            active = list(self.active_jobs.values())
+        now = time.time()
+        for entry in active:
+            job = entry['job']
+            # Extend message visibility while processing to prevent redelivery
+            try:
+                if entry['queue_url'] and entry['receipt_handle'] and (now - entry['last_visibility_extend']) >= max(30, self.sleep_seconds):
+                    self.sqs_client.change_message_visibility(
+                        QueueUrl=entry['queue_url'],
+                        ReceiptHandle=entry['receipt_handle'],
+                        VisibilityTimeout=self._visibility_extend_seconds,
+                    )
+                    entry['last_visibility_extend'] = now
+                    logger.debug(f"Extended SQS message visibility for {job.vod_id}")
+            except Exception as _e:
+                logger.warning(f"Could not extend SQS visibility for {job.vod_id}: {_e}")
+
+    def _poll_and_process(self) -> bool:
+        """Take one job from the queues (priority FULL > clip > render > pending uploads) and run it."""
+        # Full workflow
+        if self.process_full_queue():
+            logger.info("Full job processed")
+            return True
+        # Try clip queue next
+        if self.process_clip_queue():
+            logger.info("Clip job processed")
+            return True
+        # Try render queue if no clip jobs
+        if self.process_render_queue():
+            logger.info("Render job processed")
+            return True
+        # Try pending uploads if no queue jobs
+        try:
+            if self._retry_pending_uploads():
+                logger.info("Pending uploads processed")
+                return True
+        except Exception as e:
+            logger.error(f"Error checking pending uploads: {e}")
+        return False
+
     def signal_handler(self, signum, frame):
         """Handle shutdown signals"""
         logger.info(f"Received signal {signum}, shutting down gracefully...")
@@ -1210,35 +1501,33 @@ class GPUOrchestratorDaemon:
                 return False
 
             # Create and process clip job
-            job = JobProcessor("clip", manifest_uri, vod_id)
-            self.current_job = job
-            self.current_queue_url = self.clip_queue_url
-            self.current_receipt_handle = message['ReceiptHandle']
-            
-            success = job.process()
-            
-            # Mark status and delete message regardless of success (to avoid infinite retries)
+            job = JobProcessor("clip", manifest_uri, vod_id, tokens=self.tokens, worker_share=self.worker_share)
+            self._register_active(job, self.clip_queue_url, message['ReceiptHandle'])
             try:
-                final_status = JobStatus.COMPLETED if success else JobStatus.FAILED
-                self._tracker.release_and_mark(vod_id, final_status)
-            except Exception:
-                pass
-            self.delete_message(self.clip_queue_url, message['ReceiptHandle'])
-            
-            # Record job history (cap to last 100 items to avoid memory growth)
-            self.job_history.append({
-                'type': 'clip',
-                'vod_id': vod_id,
-                'success': success,
-                'start_time': job.start_time.isoformat() if job.start_time else None,
-                'end_time': job.end_time.isoformat() if job.end_time else None
-            })
-            if len(self.job_history) > 100:
-                self.job_history = self.job_history[-100:]
-            
-            self.current_job = None
-            self.current_queue_url = None
-            self.current_receipt_handle = None
+                try:
+                    success = job.process()
+                except Exception as e:
+                    logger.error(f"💥 clip job {vod_id} raised: {e}")
+                    success = False
+                # Mark status and delete message regardless of success (to avoid infinite retries)
+                try:
+                    final_status = JobStatus.COMPLETED if success else JobStatus.FAILED
+                    self._tracker.release_and_mark(vod_id, final_status)
+                except Exception:
+                    pass
+                self.delete_message(self.clip_queue_url, message['ReceiptHandle'])
+                # Record job history (cap to last 100 items to avoid memory growth)
+                self.job_history.append({
+                    'type': 'clip',
+                    'vod_id': vod_id,
+                    'success': success,
+                    'start_time': job.start_time.isoformat() if job.start_time else None,
+                    'end_time': job.end_time.isoformat() if job.end_time else None
+                })
+                if len(self.job_history) > 100:
+                    self.job_history = self.job_history[-100:]
+            finally:
+                self._unregister_active(job)
             return True
             
         except json.JSONDecodeError as e:
@@ -1330,27 +1619,29 @@ class GPUOrchestratorDaemon:
                 self.delete_message(self.full_queue_url, message['ReceiptHandle'])
                 return False
 
-            job = JobProcessor("full", None, vod_id, channel=channel)
-            self.current_job = job
-            self.current_queue_url = self.full_queue_url
-            self.current_receipt_handle = message['ReceiptHandle']
-            success = job.process()
+            job = JobProcessor("full", None, vod_id, channel=channel, tokens=self.tokens, worker_share=self.worker_share)
+            self._register_active(job, self.full_queue_url, message['ReceiptHandle'])
             try:
-                final_status = JobStatus.COMPLETED if success else JobStatus.FAILED
-                self._tracker.release_and_mark(vod_id, final_status)
-            except Exception:
-                pass
-            self.delete_message(self.full_queue_url, message['ReceiptHandle'])
-            self.job_history.append({
-                'type': 'full', 'vod_id': vod_id, 'success': success,
-                'start_time': job.start_time.isoformat() if job.start_time else None,
-                'end_time': job.end_time.isoformat() if job.end_time else None
-            })
-            if len(self.job_history) > 100:
-                self.job_history = self.job_history[-100:]
-            self.current_job = None
-            self.current_queue_url = None
-            self.current_receipt_handle = None
+                try:
+                    success = job.process()
+                except Exception as e:
+                    logger.error(f"💥 full job {vod_id} raised: {e}")
+                    success = False
+                try:
+                    final_status = JobStatus.COMPLETED if success else JobStatus.FAILED
+                    self._tracker.release_and_mark(vod_id, final_status)
+                except Exception:
+                    pass
+                self.delete_message(self.full_queue_url, message['ReceiptHandle'])
+                self.job_history.append({
+                    'type': 'full', 'vod_id': vod_id, 'success': success,
+                    'start_time': job.start_time.isoformat() if job.start_time else None,
+                    'end_time': job.end_time.isoformat() if job.end_time else None
+                })
+                if len(self.job_history) > 100:
+                    self.job_history = self.job_history[-100:]
+            finally:
+                self._unregister_active(job)
             return True
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON in full message: {e}")
@@ -1406,35 +1697,33 @@ class GPUOrchestratorDaemon:
                 return False
 
             # Create and process render job
-            job = JobProcessor("render", manifest_uri, vod_id)
-            self.current_job = job
-            self.current_queue_url = self.render_queue_url
-            self.current_receipt_handle = message['ReceiptHandle']
-            
-            success = job.process()
-            
-            # Mark and delete message regardless of success (to avoid infinite retries)
+            job = JobProcessor("render", manifest_uri, vod_id, tokens=self.tokens, worker_share=self.worker_share)
+            self._register_active(job, self.render_queue_url, message['ReceiptHandle'])
             try:
-                final_status = JobStatus.COMPLETED if success else JobStatus.FAILED
-                self._tracker.release_and_mark(vod_id, final_status)
-            except Exception:
-                pass
-            self.delete_message(self.render_queue_url, message['ReceiptHandle'])
-            
-            # Record job history (cap to last 100 items to avoid memory growth)
-            self.job_history.append({
-                'type': 'render',
-                'vod_id': vod_id,
-                'success': success,
-                'start_time': job.start_time.isoformat() if job.start_time else None,
-                'end_time': job.end_time.isoformat() if job.end_time else None
-            })
-            if len(self.job_history) > 100:
-                self.job_history = self.job_history[-100:]
-            
-            self.current_job = None
-            self.current_queue_url = None
-            self.current_receipt_handle = None
+                try:
+                    success = job.process()
+                except Exception as e:
+                    logger.error(f"💥 render job {vod_id} raised: {e}")
+                    success = False
+                # Mark and delete message regardless of success (to avoid infinite retries)
+                try:
+                    final_status = JobStatus.COMPLETED if success else JobStatus.FAILED
+                    self._tracker.release_and_mark(vod_id, final_status)
+                except Exception:
+                    pass
+                self.delete_message(self.render_queue_url, message['ReceiptHandle'])
+                # Record job history (cap to last 100 items to avoid memory growth)
+                self.job_history.append({
+                    'type': 'render',
+                    'vod_id': vod_id,
+                    'success': success,
+                    'start_time': job.start_time.isoformat() if job.start_time else None,
+                    'end_time': job.end_time.isoformat() if job.end_time else None
+                })
+                if len(self.job_history) > 100:
+                    self.job_history = self.job_history[-100:]
+            finally:
+                self._unregister_active(job)
             return True
             
         except json.JSONDecodeError as e:
@@ -1451,76 +1740,52 @@ class GPUOrchestratorDaemon:
         """Check and retry any pending uploads that are ready."""
         try:
             from utils.upload_scheduler import UploadScheduler
-            scheduler = UploadScheduler()
-            
-            # Clean up old entries first (older than 7 days)
-            try:
-                scheduler.clear_old_entries(days=7)
-            except Exception:
-                pass
-            
-            MAX_RETRIES = 3
-            ready_uploads = scheduler.get_ready_uploads(max_retries=MAX_RETRIES)
-            if not ready_uploads:
-                return False
-            
-            logger.info(f"Found {len(ready_uploads)} pending uploads ready to retry")
-            
-            any_success = False
-            for upload in ready_uploads:
-                vod_id = upload.get('vod_id')
-                arc_idx = upload.get('arc_index')
-                channel = upload.get('channel')
-                retry_count = upload.get('retry_count', 0)
-                
-                # Double-check retry count (safety guard)
-                if retry_count >= MAX_RETRIES:
-                    logger.warning(f"VOD {vod_id} arc {arc_idx} exceeded max retries ({retry_count}/{MAX_RETRIES}), marking as permanently failed")
-                    scheduler.mark_upload_permanently_failed(
-                        vod_id=vod_id,
-                        arc_index=arc_idx,
-                        channel=channel,
-                        reason=f"Max retries exceeded ({retry_count}/{MAX_RETRIES})"
+            with UploadScheduler() as scheduler:
+                # Clean up old entries first (older than 7 days)
+                try:
+                    scheduler.clear_old_entries(days=7)
+                except Exception:
+                    pass
+
+                MAX_RETRIES = 3
+                RETRY_TIMEOUT_S = 3600
+
+                def attempt(upload: Dict) -> bool:
+                    vod_id = upload.get('vod_id')
+                    arc_idx = upload.get('arc_index')
+                    channel = upload.get('channel')
+                    retry_count = upload.get('retry_count', 0)
+                    logger.info(f"Retrying upload for VOD {vod_id} arc {arc_idx} on {channel} (attempt #{retry_count + 1}/{MAX_RETRIES})")
+
+                    # Create a temporary JobProcessor for this retry
+                    job = JobProcessor("full", None, vod_id, tokens=self.tokens, worker_share=self.worker_share)
+
+                    # Build retry command
+                    cmd = [sys.executable, '-u', 'processing-scripts/auto_youtube_upload_arch.py', vod_id]
+                    if arc_idx is not None:
+                        cmd += ['--arc', str(arc_idx)]
+                    if channel and channel != 'default':
+                        cmd += ['--channels', channel]
+
+                    success = job._run_subprocess(
+                        cmd,
+                        timeout_seconds=RETRY_TIMEOUT_S,
+                        step_name=f'Retry upload VOD {vod_id} arc {arc_idx}'
                     )
-                    continue
-                
-                logger.info(f"Retrying upload for VOD {vod_id} arc {arc_idx} on {channel} (attempt #{retry_count + 1}/{MAX_RETRIES})")
-                
-                # Create a temporary JobProcessor for this retry
-                job = JobProcessor("full", None, vod_id)
-                
-                # Build retry command
-                cmd = [sys.executable, '-u', 'processing-scripts/auto_youtube_upload_arch.py', vod_id]
-                if arc_idx is not None:
-                    cmd += ['--arc', str(arc_idx)]
-                if channel and channel != 'default':
-                    cmd += ['--channels', channel]
-                
-                success = job._run_subprocess(
-                    cmd, 
-                    timeout_seconds=3600, 
-                    step_name=f'Retry upload VOD {vod_id} arc {arc_idx}'
-                )
-                
-                if success:
-                    any_success = True
-                    logger.info(f"✅ Successfully uploaded VOD {vod_id} arc {arc_idx} on retry")
-                else:
-                    # Check if this was the last retry attempt
-                    new_retry_count = retry_count + 1
-                    if new_retry_count >= MAX_RETRIES:
-                        logger.warning(f"❌ Retry failed for VOD {vod_id} arc {arc_idx} - max retries reached, marking as permanently failed")
-                        scheduler.mark_upload_permanently_failed(
-                            vod_id=vod_id,
-                            arc_index=arc_idx,
-                            channel=channel,
-                            reason=f"Failed after {new_retry_count} retry attempts"
-                        )
+                    if success:
+                        logger.info(f"✅ Successfully uploaded VOD {vod_id} arc {arc_idx} on retry")
                     else:
-                        logger.warning(f"⚠️ Retry failed for VOD {vod_id} arc {arc_idx} - will retry again later ({new_retry_count}/{MAX_RETRIES})")
-            
-            return any_success
-            
+                        logger.warning(f"⚠️ Retry failed for VOD {vod_id} arc {arc_idx} ({retry_count + 1}/{MAX_RETRIES})")
+                    return success
+
+                # One row leased at a time, for one subprocess run plus slack, so another daemon
+                # draining the same queue can't pick it up mid-upload; failed or timed-out
+                # attempts are rescheduled (or failed for good at MAX_RETRIES)
+                successes = scheduler.drain_ready_uploads(
+                    attempt, max_retries=MAX_RETRIES, lease_seconds=RETRY_TIMEOUT_S + 600,
+                )
+                return successes > 0
+
         except Exception as e:
             logger.error(f"Error processing pending uploads: {e}")
             return False
@@ -1573,16 +1838,18 @@ class GPUOrchestratorDaemon:
         if 'full' in status:
             print(f"Full Queue: {status['full']['pending']} pending, {status['full']['processing']} processing")
         
-        if self.current_job:
-            job_type = self.current_job.job_type.upper()
-            vod_id = self.current_job.vod_id
-            duration = ""
-            if self.current_job.start_time:
-                elapsed = datetime.now() - self.current_job.start_time
-                duration = f" (running for {elapsed})"
-            print(f"Current Job: {job_type} for VOD {vod_id}{duration}")
+        with self._active_lock:
+            active = [a['job'] for a in self.active_jobs.values()]
+        if active:
+            for job in active:
+                duration = ""
+                if job.start_time:
+                    elapsed = datetime.now() - job.start_time
+                    duration = f" (running for {elapsed})"
+                print(f"Current Job: {job.job_type.upper()} for VOD {job.vod_id}{duration}")
         else:
             print("Current Job: None")
+        print("Resource tokens: " + ", ".join(f"{k}={v}" for k, v in self.tokens.snapshot().items()))
         
         # Show recent job history
         if self.job_history:
@@ -1602,11 +1869,19 @@ class GPUOrchestratorDaemon:
             logger.info(f"Full Queue: {self.full_queue_url}")
         logger.info(f"Thresholds: GPU>{self.resource_monitor.gpu_usage_threshold}% | RAM>{self.resource_monitor.memory_threshold}% | CPU>{self.resource_monitor.cpu_threshold}%")
         logger.info(f"Sleep interval: {self.sleep_seconds}s")
+        logger.info(f"Max concurrent jobs: {self.max_concurrent_jobs} (warm workers per job: {self.worker_share})")
         
+        metrics.start_http_server(int(os.getenv('METRICS_PORT', '9464') or 0))
         self.running = True
         iteration = 0
         max_iterations = 10000  # Reset counter to prevent unbounded growth
         last_pending_check = 0.0  # Track last time we checked for pending uploads
+        last_keep_alive = 0.0
+        idle_until = 0.0  # Back off polling after an empty poll
+        tick = max(1, min(5, self.sleep_seconds))
+        # Each worker thread polls the queues once and, if it gets a message, runs that job to completion
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrent_jobs, thread_name_prefix='orch-job')
+        inflight: List[Future] = []
         
         while self.running:
             try:
@@ -1616,10 +1891,10 @@ class GPUOrchestratorDaemon:
                     iteration = 1
                     logger.info(f"Reset iteration counter (was {max_iterations})")
                 
-                logger.info(f"Iteration {iteration}")
+                logger.debug(f"Iteration {iteration}")
                 
-                # Print status every 10 iterations
-                if iteration % 10 == 0:
+                # Print status periodically
+                if iteration % max(10, 10 * self.sleep_seconds // tick) == 0:
                     self.print_status()
                 
                 # Check for pending uploads every hour (when not busy)
@@ -1627,36 +1902,43 @@ class GPUOrchestratorDaemon:
                 if now - last_pending_check > 3600:  # 1 hour
                     try:
                         from utils.upload_scheduler import UploadScheduler
-                        scheduler = UploadScheduler()
-                        pending_count = scheduler.get_pending_count()
+                        with UploadScheduler() as scheduler:
+                            pending_count = scheduler.get_pending_count()
                         if pending_count > 0:
                             logger.info(f"📋 {pending_count} uploads pending retry")
                     except Exception:
                         pass
-                    last_pending_check = now
-                
-                # Check if we're already processing a job
-                if self.current_job:
-                    # Heartbeat to keep lease and optionally extend SQS visibility timeout
                     try:
-                        self._tracker.heartbeat(self.current_job.vod_id, lease_seconds=max(300, self._visibility_extend_seconds*2))
+                        readings = self.resource_monitor.readings()
+                        for key, value in readings.items():
+                            _HOST_READINGS.set(value, reading=key)
+                        self.tokens.resize(job_scheduler.capacities_from_readings(readings))
                     except Exception:
                         pass
-                    # Extend message visibility while processing to prevent redelivery
+                    last_pending_check = now
+                
+                # Extend SQS visibility for every running job
+                if now - last_keep_alive >= self.sleep_seconds:
+                    self._keep_alive_active_jobs()
+                    last_keep_alive = now
+                
+                # Reap finished job threads; an empty poll means the queues are drained
+                for fut in [f for f in inflight if f.done()]:
+                    inflight.remove(fut)
                     try:
-                        now = time.time()
-                        if self.current_queue_url and self.current_receipt_handle and (now - self._last_visibility_extend) >= max(30, self.sleep_seconds):
-                            self.sqs_client.change_message_visibility(
-                                QueueUrl=self.current_queue_url,
-                                ReceiptHandle=self.current_receipt_handle,
-                                VisibilityTimeout=self._visibility_extend_seconds,
-                            )
-                            self._last_visibility_extend = now
-                            logger.debug("Extended SQS message visibility")
-                    except Exception as _e:
-                        logger.warning(f"Could not extend SQS visibility: {_e}")
-                    logger.info("Job in progress, waiting...")
-                    time.sleep(self.sleep_seconds)
+                        if not fut.result():
+                            idle_until = time.time() + self.sleep_seconds
+                    except Exception as e:
+                        logger.error(f"Job thread failed: {e}")
+                
+                with self._active_lock:
+                    running_jobs = len(self.active_jobs)
+                # Only one thread polls at a time so queue priority is preserved
+                polling = len(inflight) > running_jobs
+                if len(inflight) >= self.max_concurrent_jobs or polling or time.time() < idle_until:
+                    if running_jobs and iteration % max(1, self.sleep_seconds // tick) == 0:
+                        logger.info(f"{running_jobs} job(s) in progress; tokens {self.tokens.snapshot()}")
+                    time.sleep(tick)
                     continue
                 
                 # Check resources before starting any job
@@ -1670,34 +1952,7 @@ class GPUOrchestratorDaemon:
                     time.sleep(self.sleep_seconds)
                     continue
                 
-                # Priority: Process FULL first, then clips, then renders, then pending uploads
-                job_processed = False
-                # Full workflow
-                if self.process_full_queue():
-                    job_processed = True
-                    logger.info("Full job processed")
-                else:
-                    # Try clip queue next
-                    if self.process_clip_queue():
-                        job_processed = True
-                        logger.info("Clip job processed")
-                    else:
-                        # Try render queue if no clip jobs
-                        if self.process_render_queue():
-                            job_processed = True
-                            logger.info("Render job processed")
-                        else:
-                            # Try pending uploads if no queue jobs
-                            try:
-                                if self._retry_pending_uploads():
-                                    job_processed = True
-                                    logger.info("Pending uploads processed")
-                            except Exception as e:
-                                logger.error(f"Error checking pending uploads: {e}")
-                
-                if not job_processed:
-                    logger.info("No jobs available, sleeping...")
-                    time.sleep(self.sleep_seconds)
+                inflight.append(executor.submit(self._poll_and_process))
                 
             except KeyboardInterrupt:
                 logger.info("Received keyboard interrupt")
@@ -1711,6 +1966,10 @@ class GPUOrchestratorDaemon:
                 else:
                     time.sleep(self.sleep_seconds)
         
+        if inflight:
+            logger.info(f"Waiting for {len(inflight)} running job(s) to finish...")
+        executor.shutdown(wait=True)
+        self._tracker.close()
         logger.info("GPU Orchestrator Daemon stopped")
 
 def main():
@@ -1735,6 +1994,8 @@ def main():
                        help='Max allowed CPU utilization percent before deferring work (default 90)')
     parser.add_argument('--sleep-seconds', type=int, default=int(os.getenv('ORCH_SLEEP_SECONDS', '30')),
                        help='Seconds to sleep between loops or when busy/idle (default 30)')
+    parser.add_argument('--enqueue-full', nargs='*', default=[],
+                       help='VOD IDs to enqueue as full jobs on the in-memory queue (requires ORCH_LOCAL_QUEUE=1)')
     
     args = parser.parse_args()
     
@@ -1768,6 +2029,14 @@ def main():
         orchestrator.print_status()
         return
     
+    if args.enqueue_full:
+        if not isinstance(orchestrator.sqs_client, job_scheduler.InMemoryQueue) or not orchestrator.full_queue_url:
+            print("X --enqueue-full requires ORCH_LOCAL_QUEUE=1 and a full queue URL")
+            sys.exit(1)
+        for vod in args.enqueue_full:
+            orchestrator.sqs_client.send_message(QueueUrl=orchestrator.full_queue_url,
+                                                 MessageBody=json.dumps({'vod_id': vod, 'source': 'local'}))
+    
     # Run the daemon
     orchestrator.run()
 
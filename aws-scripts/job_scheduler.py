@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Typed resource tokens and a local queue stand-in for the GPU orchestrator.
+
+Pipeline stages are bound by different resources: network (downloads and
+uploads), CPU (transcription, vector store), GPU encoder sessions
+(rendering) and LLM request quota. ResourceTokens holds one counter per kind,
+sized from GPUResourceMonitor.readings(), and every stage acquires the tokens
+it needs (all-or-nothing) for as long as it runs. Several VOD jobs can then
+run at once without oversubscribing any single resource.
+
+Token kinds:
+  download   concurrent network transfers       ORCH_DOWNLOAD_SLOTS (default 2)
+  cpu        CPU cores                          cpu_count
+  encoder    NVENC sessions / CPU encode slots  CLIP_NVENC_SESSIONS (default 3) or cores // 4
+  llm        concurrent LLM-bound stages        ORCH_LLM_SLOTS (default 4)
+  memory_mb  RAM budget                         ORCH_MEMORY_BUDGET_FRACTION (default 0.8) of total RAM
+
+A demand larger than a kind's capacity is clamped to the capacity so the
+stage still runs (alone) instead of waiting forever.
+
+Warm pipeline workers are partitioned rather than tokenised: each job leases
+worker_share() of the pool (pipeline_runner.WorkerLease), so concurrent jobs
+never queue behind each other's steps or kill each other's workers.
+
+InMemoryQueue mimics the subset of the boto3 SQS client the daemon uses so
+the scheduler can be exercised locally (ORCH_LOCAL_QUEUE=1).
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.env import env_int
+
+logger = logging.getLogger(__name__)
+
+TOKEN_KINDS = ("download", "cpu", "encoder", "llm", "memory_mb")
+
+# First matching substring of the step command wins
+STAGE_DEMANDS: List[Tuple[str, Dict[str, int]]] = [
+    ("generate_ai_data_cloud", {"download": 1, "cpu": 4, "memory_mb": 6000}),
+    ("full_vod_documenter", {"cpu": 2, "memory_mb": 4000}),
+    ("filter_transcript_boundaries", {"cpu": 1, "memory_mb": 1000}),
+    ("burst_summarize", {"llm": 1, "cpu": 1, "memory_mb": 1000}),
+    ("gemini_arc_detection", {"llm": 1, "cpu": 1, "memory_mb": 1000}),
+    ("narrative_analyzer", {"llm": 1, "cpu": 1, "memory_mb": 1000}),
+    ("enhanced_director_cut_selector", {"llm": 1, "cpu": 1, "memory_mb": 1500}),
+    ("metadata", {"llm": 1, "cpu": 1, "memory_mb": 500}),
+    ("generate_director_cut_name", {"llm": 1, "cpu": 1, "memory_mb": 500}),
+    ("cli_generate", {"cpu": 1, "memory_mb": 2000}),
+    ("create_individual_clips", {"download": 1, "encoder": 1, "cpu": 4, "memory_mb": 4000}),
+    ("create_arch_videos", {"download": 1, "encoder": 1, "cpu": 4, "memory_mb": 4000}),
+    ("create_cloud_video", {"download": 1, "encoder": 1, "cpu": 4, "memory_mb": 4000}),
+    ("extract_arc_cam_crops", {"download": 1, "cpu": 2, "memory_mb": 1500}),
+    ("rate_cams", {"cpu": 4, "memory_mb": 3000}),
+    ("render_arch_thumbnails", {"llm": 1, "cpu": 1, "memory_mb": 1000}),
+    ("cleanup", {"cpu": 1, "memory_mb": 500}),
+    ("upload", {"download": 1, "cpu": 1, "memory_mb": 500}),
+]
+DEFAULT_DEMAND: Dict[str, int] = {"cpu": 1, "memory_mb": 500}
+
+
+def demand_for(cmd: Sequence[str]) -> Dict[str, int]:
+    """Token demand for a pipeline step command line."""
+    joined = " ".join(str(c) for c in cmd)
+    for needle, demand in STAGE_DEMANDS:
+        if needle in joined:
+            return dict(demand)
+    return dict(DEFAULT_DEMAND)
+
+
+def capacities_from_readings(readings: Dict[str, float]) -> Dict[str, int]:
+    """Size each token kind from a GPUResourceMonitor.readings() snapshot."""
+    cores = int(readings.get("cpu_count") or os.cpu_count() or 1)
+    try:
+        fraction = float(os.getenv("ORCH_MEMORY_BUDGET_FRACTION", "0.8"))
+    except ValueError:
+        fraction = 0.8
+    mem_total = float(readings.get("mem_total_mb") or 0)
+    if readings.get("gpu_count"):
+        encoder = max(1, env_int("CLIP_NVENC_SESSIONS", 3))
+    else:
+        encoder = max(1, cores // 4)
+    return {
+        "download": max(1, env_int("ORCH_DOWNLOAD_SLOTS", 2)),
+        "cpu": max(1, cores),
+        "encoder": encoder,
+        "llm": max(1, env_int("ORCH_LLM_SLOTS", 4)),
+        "memory_mb": max(1024, int(mem_total * fraction)) if mem_total else 8192,
+    }
+
+
+def worker_share(pool_size: int, max_jobs: int) -> int:
+    """Warm workers one job may hold at once when max_jobs jobs share a pool of pool_size."""
+    return max(1, int(pool_size) // max(1, int(max_jobs)))
+
+
+class ResourceTokens:
+    """Counting tokens per resource kind with atomic multi-kind acquisition."""
+
+    def __init__(self, capacities: Dict[str, int]):
+        self._cond = threading.Condition()
+        self._capacity: Dict[str, int] = {k: int(capacities.get(k, 1)) for k in TOKEN_KINDS}
+        self._in_use: Dict[str, int] = {k: 0 for k in TOKEN_KINDS}
+        self._holders: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_monitor(cls, monitor) -> "ResourceTokens":
+        caps = capacities_from_readings(monitor.readings())
+        logger.info("Resource tokens: " + ", ".join(f"{k}={v}" for k, v in caps.items()))
+        return cls(caps)
+
+    def _clamp(self, demand: Dict[str, int]) -> Dict[str, int]:
+        return {k: min(int(v), self._capacity[k]) for k, v in demand.items() if k in self._capacity and v > 0}
+
+    def _fits(self, demand: Dict[str, int]) -> bool:
+        return all(self._in_use[k] + v <= self._capacity[k] for k, v in demand.items())
+
+    def release(self, label: str) -> None:
+        with self._cond:
+            need = self._holders.pop(label, {})
+            for k, v in need.items():
+                self._in_use[k] = max(0, self._in_use[k] - v)
+            self._cond.notify_all()
+
+    @contextmanager
+    def acquire(self, demand: Dict[str, int], label: str) -> Iterator[None]:
+        """Block until every token in demand is free, hold them for the block."""
+        label = f"{label}#{uuid.uuid4().hex[:6]}"
+        t0 = time.monotonic()
+        with self._cond:
+            need = self._clamp(demand)
+            while not self._fits(need):
+                self._cond.wait(5.0)
+            for k, v in need.items():
+                self._in_use[k] += v
+            self._holders[label] = need
+        waited = time.monotonic() - t0
+        if waited >= 1.0:
+            logger.info(f"⏳ {label.split('#')[0]} waited {waited:.1f}s for tokens {need}")
+        try:
+            yield
+        finally:
+            self.release(label)
+
+    def resize(self, capacities: Dict[str, int]) -> None:
+        """Apply fresh capacities; holders above a shrunk capacity keep their tokens until release."""
+        with self._cond:
+            for k in TOKEN_KINDS:
+                if k in capacities:
+                    self._capacity[k] = max(int(capacities[k]), 1)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, str]:
+        with self._cond:
+            return {k: f"{self._in_use[k]}/{self._capacity[k]}" for k in TOKEN_KINDS}
+
+
+class InMemoryQueue:
+    """
+    In-process stand-in for the SQS client methods used by the daemon.
+
+    Messages become invisible for VisibilityTimeout seconds after receipt and
+    reappear unless deleted, like SQS. Any QueueUrl string names a queue.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues: Dict[str, List[Dict]] = {}
+        self._ids = itertools.count(1)
+
+    def send_message(self, QueueUrl: str, MessageBody: str, **_kw) -> Dict:
+        with self._lock:
+            msg_id = f"local-{next(self._ids)}"
+            self._queues.setdefault(QueueUrl, []).append(
+                {"MessageId": msg_id, "Body": MessageBody, "visible_at": 0.0, "receipt": None}
+            )
+        return {"MessageId": msg_id}
+
+    def receive_message(self, QueueUrl: str, MaxNumberOfMessages: int = 1, WaitTimeSeconds: int = 0,
+                        VisibilityTimeout: int = 30, **_kw) -> Dict:
+        deadline = time.monotonic() + max(0, WaitTimeSeconds)
+        while True:
+            now = time.time()
+            out: List[Dict] = []
+            with self._lock:
+                for m in self._queues.get(QueueUrl, []):
+                    if len(out) >= max(1, MaxNumberOfMessages):
+                        break
+                    if m["visible_at"] <= now:
+                        m["receipt"] = uuid.uuid4().hex
+                        m["visible_at"] = now + VisibilityTimeout
+                        out.append({"MessageId": m["MessageId"], "Body": m["Body"], "ReceiptHandle": m["receipt"]})
+            if out:
+                return {"Messages": out}
+            if time.monotonic() >= deadline:
+                return {}
+            time.sleep(0.2)
+
+    def delete_message(self, QueueUrl: str, ReceiptHandle: str, **_kw) -> Dict:
+        with self._lock:
+            q = self._queues.get(QueueUrl, [])
+            self._queues[QueueUrl] = [m for m in q if m["receipt"] != ReceiptHandle]
+        return {}
+
+    def change_message_visibility(self, QueueUrl: str, ReceiptHandle: str, VisibilityTimeout: int, **_kw) -> Dict:
+        with self._lock:
+            for m in self._queues.get(QueueUrl, []):
+                if m["receipt"] == ReceiptHandle:
+                    m["visible_at"] = time.time() + VisibilityTimeout
+        return {}
+
+    def get_queue_attributes(self, QueueUrl: str, AttributeNames: Optional[Sequence[str]] = None, **_kw) -> Dict:
+        now = time.time()
+        with self._lock:
+            q = self._queues.get(QueueUrl, [])
+            visible = sum(1 for m in q if m["visible_at"] <= now)
+        return {"Attributes": {
+            "ApproximateNumberOfMessages": str(visible),
+            "ApproximateNumberOfMessagesNotVisible": str(len(q) - visible),
+        }}
@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+"""
+In-process pipeline runner for the GPU orchestrator.
+
+Two pieces:
+
+- WarmWorkerPool: long-lived Python worker processes that import the heavy
+  libraries once (torch, sentence-transformers, ...) and then execute pipeline
+  scripts/modules in-process via runpy. Third-party libraries stay imported
+  across steps and VODs; repo modules a step imports are dropped from
+  sys.modules when it finishes, so the next step re-imports them with fresh
+  module state (env read at import, module-level caches). Modules listed in
+  PIPELINE_KEEP_MODULES are exempt, which is how memoized models (e.g. the
+  embedding model in vector_store.vector_index) stay loaded. A step that crashes or hangs only takes down its worker;
+  the pool respawns it and the rest of the VOD keeps going. Concurrent jobs
+  each run through their own WorkerLease (a capped share of the pool), so one
+  job can neither starve another nor kill its workers on cancellation.
+
+- run_dag: dependency-driven scheduler for Step objects with explicit inputs
+  and outputs. Independent steps run concurrently; a failed required step
+  skips its dependents only. Successful steps are checkpointed with an input
+  fingerprint so re-running a VOD after a crash resumes instead of starting
+  over.
+
+Environment:
+  PIPELINE_IN_PROCESS        run python steps in warm workers (default true)
+  PIPELINE_WORKERS           warm worker processes / concurrent steps (default 2)
+  PIPELINE_WARM_IMPORTS      modules imported at worker start
+  PIPELINE_WORKER_MAX_STEPS  recycle a worker after N steps (default 40)
+  PIPELINE_CRASH_RETRIES     re-run a step on a fresh worker after a crash (default 1)
+  PIPELINE_ISOLATED_STEPS    comma list of script/module names forced to plain subprocesses
+  PIPELINE_KEEP_MODULES      comma list of repo module prefixes kept warm between steps
+                             (default vector_store.vector_index)
+  PIPELINE_RESUME            skip checkpointed steps whose inputs are unchanged (default true)
+
+Each executed step is recorded as a `dag.step` span (utils.metrics) with its
+deps, which is what the per-VOD critical-path report walks.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+# Repo root, so utils/ resolves when this file runs as a warm worker (pipeline_runner.py --worker)
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+from utils.env import env_flag, env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARM_IMPORTS = "numpy,torch,sentence_transformers,faiss"
+DEFAULT_KEEP_MODULES = "vector_store.vector_index"
+
+
+def in_process_enabled() -> bool:
+    return env_flag("PIPELINE_IN_PROCESS", True)
+
+
+# -------------------- Worker side --------------------
+
+def _purge_step_modules(before: set, root: str) -> None:
+    """Drop repo modules first imported by the last step so the next one starts clean."""
+    keep = tuple(m.strip() for m in os.getenv("PIPELINE_KEEP_MODULES", DEFAULT_KEEP_MODULES).split(",") if m.strip())
+    for name in [n for n in sys.modules if n not in before]:
+        if any(name == k or name.startswith(k + ".") for k in keep):
+            continue
+        path = getattr(sys.modules.get(name), "__file__", None) or ""
+        if path and "site-packages" not in path and os.path.abspath(path).startswith(root + os.sep):
+            sys.modules.pop(name, None)
+
+
+def _logging_handlers() -> Dict[str, list]:
+    """Handlers currently attached to the root logger and every existing named logger."""
+    loggers = {"": logging.getLogger()}
+    for name, lg in list(logging.Logger.manager.loggerDict.items()):
+        if isinstance(lg, logging.Logger):
+            loggers[name] = lg
+    return {name: list(lg.handlers) for name, lg in loggers.items()}
+
+
+def _drop_step_handlers(before: Dict[str, list]) -> None:
+    """Remove and close handlers added by the last step; they point at its (now closed) log file."""
+    for name, handlers in _logging_handlers().items():
+        kept = before.get(name, [])
+        lg = logging.getLogger(name or None)
+        for h in handlers:
+            if h in kept:
+                continue
+            lg.removeHandler(h)
+            try:
+                h.close()
+            except Exception:
+                pass
+
+
+def _run_entry(spec: Dict) -> int:
+    """Execute one script/module as __main__ with the step's argv, env and log file."""
+    import runpy
+
+    saved_argv = list(sys.argv)
+    saved_path = list(sys.path)
+    saved_env = dict(os.environ)
+    saved_out, saved_err = sys.stdout, sys.stderr
+    saved_fds = (os.dup(1), os.dup(2))
+    saved_modules = set(sys.modules)
+    saved_handlers = _logging_handlers()
+    root = os.path.abspath(os.getcwd())
+    code = 0
+    log = open(spec["log_path"], "a", encoding="utf-8", errors="replace", buffering=1)
+    try:
+        # Point fd 1/2 at the job log so native libraries and grandchild processes land there too
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        sys.stdout = sys.stderr = log
+        os.environ.clear()
+        os.environ.update(spec.get("env") or saved_env)
+        sys.argv = [spec["target"], *spec.get("args", [])]
+        try:
+            # The step env carries VOD_ID/JOB_RUN_ID/TRACE_PARENT, so this span joins the VOD trace
+            try:
+                from utils import metrics
+                entry_span = metrics.span("worker.entry", target=spec["target"])
+            except ImportError:
+                from contextlib import nullcontext
+                entry_span = nullcontext()
+            with entry_span:
+                if spec["kind"] == "module":
+                    runpy.run_module(spec["target"], run_name="__main__", alter_sys=True)
+                else:
+                    script = str(Path(spec["target"]).resolve())
+                    sys.argv[0] = script
+                    sys.path.insert(0, str(Path(script).parent))
+                    runpy.run_path(script, run_name="__main__")
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+        except Exception:
+            pass
+        _drop_step_handlers(saved_handlers)
+        sys.stdout, sys.stderr = saved_out, saved_err
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        os.close(saved_fds[0])
+        os.close(saved_fds[1])
+        log.close()
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+        os.environ.clear()
+        os.environ.update(saved_env)
+        _purge_step_modules(saved_modules, root)
+    return code
+
+
+def _worker_main() -> None:
+    """Worker loop: one JSON spec per stdin line, one JSON result per line on the private channel."""
+    import importlib
+
+    # Keep the protocol on a private fd; stray prints from imports/steps never reach the parent's pipe
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    sys.stdout = open(os.devnull, "w")
+
+    cwd = os.getcwd()
+    if cwd not in sys.path:
+        sys.path.insert(0, cwd)
+    warm = [m.strip() for m in os.getenv("PIPELINE_WARM_IMPORTS", DEFAULT_WARM_IMPORTS).split(",") if m.strip()]
+    for name in warm:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+    proto.write(_PROTO_PREFIX + json.dumps({"ready": True}) + "\n")
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        spec = json.loads(line)
+        if spec.get("stop"):
+            break
+        proto.write(_PROTO_PREFIX + json.dumps({"code": _run_entry(spec)}) + "\n")
+
+
+# -------------------- Parent side --------------------
+
+_PROTO_PREFIX = "@@pipeline@@ "
+
+
+class _Worker:
+    def __init__(self, warm_imports: Sequence[str]):
+        env = {**os.environ, "PIPELINE_WARM_IMPORTS": ",".join(warm_imports), "PYTHONUNBUFFERED": "1"}
+        self.proc = subprocess.Popen(
+            [sys.executable, "-u", str(Path(__file__).resolve()), "--worker"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            env=env,
+        )
+        self.replies: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+        self.steps = 0
+
+    def _read(self) -> None:
+        try:
+            for line in self.proc.stdout:
+                if line.startswith(_PROTO_PREFIX):
+                    try:
+                        self.replies.put(json.loads(line[len(_PROTO_PREFIX):]))
+                    except ValueError:
+                        pass
+        except Exception:
+            pass
+        self.replies.put(None)
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.proc.pid
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def send(self, spec: Dict) -> None:
+        self.proc.stdin.write(json.dumps(spec) + "\n")
+        self.proc.stdin.flush()
+
+    def kill(self) -> None:
+        try:
+            import psutil
+            parent = psutil.Process(self.proc.pid)
+            for child in parent.children(recursive=True):
+                try:
+                    child.kill()
+                except Exception:
+                    pass
+        except Exception:
+            pass
+        try:
+            self.proc.kill()
+            self.proc.wait(5)
+        except Exception:
+            pass
+
+    def stop(self) -> None:
+        try:
+            self.send({"stop": True})
+            self.proc.wait(10)
+        except Exception:
+            pass
+        if self.alive():
+            self.kill()
+
+
+class StepCrashed(RuntimeError):
+    """The worker process died while running a step (segfault, OOM kill, ...)."""
+
+
+class WarmWorkerPool:
+    """Fixed-size pool of warm Python workers; one step per worker at a time."""
+
+    def __init__(self, size: int, warm_imports: Optional[Sequence[str]] = None, max_steps: int = 40):
+        self._size = max(1, size)
+        self._warm = list(warm_imports if warm_imports is not None else [
+            m.strip() for m in os.getenv("PIPELINE_WARM_IMPORTS", DEFAULT_WARM_IMPORTS).split(",") if m.strip()
+        ])
+        self._max_steps = max(1, max_steps)
+        self._idle: List[_Worker] = []
+        self._busy: Dict[int, _Worker] = {}
+        self._owners: Dict[int, Optional[str]] = {}  # id(worker) -> lease owner while busy
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _owned(self, owner: Optional[str]) -> int:
+        return sum(1 for o in self._owners.values() if o == owner)
+
+    def _lease(self, owner: Optional[str] = None, limit: Optional[int] = None) -> _Worker:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("worker pool is shut down")
+                if owner is None or limit is None or self._owned(owner) < limit:
+                    while self._idle:
+                        w = self._idle.pop()
+                        if w.alive():
+                            self._busy[id(w)] = w
+                            self._owners[id(w)] = owner
+                            return w
+                    if len(self._busy) < self._size:
+                        w = _Worker(self._warm)
+                        self._busy[id(w)] = w
+                        self._owners[id(w)] = owner
+                        return w
+                self._cond.wait()
+
+    def _release(self, w: _Worker, healthy: bool) -> None:
+        w.steps += 1
+        if not healthy or w.steps >= self._max_steps:
+            if healthy:
+                w.stop()
+            else:
+                w.kill()
+            healthy = False
+        with self._cond:
+            self._busy.pop(id(w), None)
+            self._owners.pop(id(w), None)
+            if healthy and not self._closed:
+                self._idle.append(w)
+            elif healthy:
+                w.stop()
+            self._cond.notify_all()
+
+    def lease(self, owner: str, limit: Optional[int] = None) -> "WorkerLease":
+        """A job's share of the pool: at most limit workers at once (default: whole pool)."""
+        return WorkerLease(self, owner, limit if limit is not None else self._size)
+
+    def run(self, spec: Dict, timeout_seconds: int, on_start: Optional[Callable[[int], None]] = None,
+            owner: Optional[str] = None, limit: Optional[int] = None, worker: Optional[_Worker] = None) -> int:
+        """
+        Run spec on a warm worker and return its exit code.
+
+        owner/limit cap how many workers one lease holder may use at once; worker
+        is one already taken with _lease (it is released here either way).
+        Raises TimeoutError (worker killed) or StepCrashed (worker died). In both
+        cases the worker is discarded and a fresh one is spawned on next use.
+        """
+        w = worker if worker is not None else self._lease(owner, limit)
+        healthy = False
+        try:
+            if on_start and w.pid:
+                on_start(w.pid)
+            try:
+                w.send(spec)
+            except OSError:
+                raise StepCrashed(f"worker {w.pid} exited (code {w.proc.poll()})")
+            deadline = time.monotonic() + max(1, timeout_seconds)
+            while True:
+                try:
+                    reply = w.replies.get(timeout=1.0)
+                except queue.Empty:
+                    reply = {}
+                if reply is None:
+                    raise StepCrashed(f"worker {w.pid} exited (code {w.proc.poll()})")
+                if "code" in reply:
+                    healthy = True
+                    return int(reply["code"])
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"step exceeded {timeout_seconds}s")
+        finally:
+            self._release(w, healthy)
+
+    def kill_all(self) -> None:
+        """Hard-stop every busy worker (daemon shutdown)."""
+        with self._cond:
+            busy = list(self._busy.values())
+        for w in busy:
+            w.kill()
+
+    def kill_owner(self, owner: str) -> None:
+        """Hard-stop only the busy workers leased to owner (job cancellation)."""
+        with self._cond:
+            busy = [w for key, w in self._busy.items() if self._owners.get(key) == owner]
+        for w in busy:
+            w.kill()
+
+    def busy_pids(self, owner: Optional[str] = None) -> List[int]:
+        with self._cond:
+            return [w.pid for key, w in self._busy.items()
+                    if w.pid and (owner is None or self._owners.get(key) == owner)]
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            busy = list(self._busy.values())
+            self._cond.notify_all()
+        for w in idle:
+            w.stop()
+        for w in busy:
+            w.kill()
+
+
+class WorkerLease:
+    """One job's view of the shared pool: capped concurrency and job-scoped kill."""
+
+    def __init__(self, pool: WarmWorkerPool, owner: str, limit: int):
+        self.pool = pool
+        self.owner = owner
+        self.limit = max(1, int(limit))
+        self._reserved = threading.local()
+
+    @contextmanager
+    def reserved(self) -> Iterator[None]:
+        """
+        Hold a worker for the calling thread until the block exits.
+
+        The next run() on this thread uses it, so a step can wait for a worker
+        before it takes resource tokens instead of sitting on tokens in the pool queue.
+        """
+        self._reserved.worker = self.pool._lease(self.owner, self.limit)
+        try:
+            yield
+        finally:
+            unused = getattr(self._reserved, "worker", None)
+            self._reserved.worker = None
+            if unused is not None:
+                self.pool._release(unused, unused.alive())
+
+    def run(self, spec: Dict, timeout_seconds: int, on_start: Optional[Callable[[int], None]] = None) -> int:
+        worker = getattr(self._reserved, "worker", None)
+        self._reserved.worker = None
+        return self.pool.run(spec, timeout_seconds, on_start=on_start, owner=self.owner, limit=self.limit,
+                             worker=worker)
+
+    def pids(self) -> List[int]:
+        return self.pool.busy_pids(self.owner)
+
+    def kill(self) -> None:
+        self.pool.kill_owner(self.owner)
+
+
+_pool: Optional[WarmWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> WarmWorkerPool:
+    """Process-wide warm pool, shared by every job the daemon runs."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WarmWorkerPool(
+                size=max(1, env_int("PIPELINE_WORKERS", 2)),
+                max_steps=env_int("PIPELINE_WORKER_MAX_STEPS", 40),
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def spec_from_cmd(cmd: Sequence[str]) -> Optional[Dict]:
+    """
+    Translate `[python, -u, script.py, args...]` or `[python, -u, -m, module, args...]`
+    into a worker spec. Returns None for commands that must stay subprocesses.
+    """
+    if not cmd or cmd[0] != sys.executable:
+        return None
+    rest = list(cmd[1:])
+    while rest and rest[0] == "-u":
+        rest.pop(0)
+    if not rest:
+        return None
+    if rest[0] == "-m" and len(rest) >= 2:
+        kind, target, args = "module", rest[1], rest[2:]
+    elif rest[0].endswith(".py"):
+        kind, target, args = "script", rest[0], rest[1:]
+    else:
+        return None
+    isolated = [s.strip() for s in os.getenv("PIPELINE_ISOLATED_STEPS", "").split(",") if s.strip()]
+    if any(s in target for s in isolated):
+        return None
+    return {"kind": kind, "target": target, "args": list(args)}
+
+
+# -------------------- DAG --------------------
+
+@dataclass
+class Step:
+    """
+    One pipeline node.
+
+    run returns True on success. inputs/outputs are file paths used for resume:
+    a checkpointed step is skipped when its outputs exist and its inputs have
+    the same size/mtime as when it last succeeded. Steps without outputs always run.
+    required=False means a failure is logged but dependents still run.
+    """
+    name: str
+    run: Callable[[], bool]
+    deps: Sequence[str] = ()
+    inputs: Sequence[Path] = ()
+    outputs: Sequence[Path] = ()
+    required: bool = True
+    status: str = field(default="pending", init=False)
+    seconds: float = field(default=0.0, init=False)
+
+
+def _fingerprint(paths: Sequence[Path]) -> Dict[str, str]:
+    fp: Dict[str, str] = {}
+    for p in paths:
+        try:
+            st = Path(p).stat()
+            fp[str(p)] = f"{st.st_size}|{st.st_mtime_ns}"
+        except OSError:
+            fp[str(p)] = "missing"
+    return fp
+
+
+class _Checkpoints:
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data: Dict[str, Dict] = {}
+        if path is not None:
+            try:
+                self.data = json.loads(path.read_text(encoding="utf-8"))
+            except Exception:
+                self.data = {}
+
+    def fresh(self, step: Step) -> bool:
+        if self.path is None or not step.outputs:
+            return False
+        rec = self.data.get(step.name)
+        if not rec or not all(Path(p).exists() for p in step.outputs):
+            return False
+        return rec.get("inputs") == _fingerprint(step.inputs)
+
+    def mark(self, step: Step) -> None:
+        if self.path is None or not step.outputs:
+            return
+        with self._lock:
+            self.data[step.name] = {"inputs": _fingerprint(step.inputs), "at": time.time()}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(".tmp")
+                tmp.write_text(json.dumps(self.data, indent=2), encoding="utf-8")
+                os.replace(tmp, self.path)
+            except Exception:
+                pass
+
+
+def run_dag(steps: Sequence[Step], max_parallel: int = 2, checkpoint_path: Optional[Path] = None) -> Dict[str, Step]:
+    """
+    Execute steps respecting deps, up to max_parallel at once.
+
+    Final status per step: ok, failed, skipped (a required step upstream
+    failed, directly or through a skipped dependency) or cached (resumed from checkpoint).
+    """
+    by_name = {s.name: s for s in steps}
+    for s in steps:
+        for d in s.deps:
+            if d not in by_name:
+                raise ValueError(f"step {s.name} depends on unknown step {d}")
+    ckpt = _Checkpoints(checkpoint_path if env_flag("PIPELINE_RESUME", True) else None)
+    from utils import metrics
+
+    def _execute(step: Step) -> None:
+        t0 = time.monotonic()
+        with metrics.span("dag.step", step=step.name, deps=list(step.deps)) as sp:
+            try:
+                ok = bool(step.run())
+            except Exception as e:
+                logger.error(f"💥 DAG step {step.name} raised: {e}")
+                ok = False
+            if not ok:
+                sp.status = "failed"
+        step.seconds = time.monotonic() - t0
+        step.status = "ok" if ok else "failed"
+        if ok:
+            ckpt.mark(step)
+
+    def _blocked(step: Step) -> bool:
+        # A skipped dep means a required step upstream failed, whatever the dep's own flag
+        return any(by_name[d].status == "skipped" or (by_name[d].status == "failed" and by_name[d].required)
+                   for d in step.deps)
+
+    def _ready(step: Step) -> bool:
+        return all(by_name[d].status in ("ok", "cached", "failed", "skipped") for d in step.deps)
+
+    running: Dict[object, Step] = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel), thread_name_prefix="dag") as executor:
+        while True:
+            progressed = True
+            while progressed:
+                progressed = False
+                for step in steps:
+                    if step.status != "pending" or not _ready(step):
+                        continue
+                    if _blocked(step):
+                        step.status = "skipped"
+                        logger.warning(f"⏭️ DAG step {step.name} skipped (dependency failed)")
+                        progressed = True
+                    elif ckpt.fresh(step):
+                        step.status = "cached"
+                        logger.info(f"♻️ DAG step {step.name} resumed from checkpoint")
+                        progressed = True
+                    elif len(running) < max(1, max_parallel):
+                        step.status = "running"
+                        logger.info(f"▶️ DAG step {step.name} started")
+                        # Each step thread inherits the caller's metrics context (vod/run binding, parent span)
+                        running[executor.submit(contextvars.copy_context().run, _execute, step)] = step
+            if not running:
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                step = running.pop(fut)
+                mark = "✅" if step.status == "ok" else "❌"
+                logger.info(f"{mark} DAG step {step.name} {step.status} in {step.seconds:.1f}s")
+    return by_name
+
+
+def summarize(results: Dict[str, Step]) -> str:
+    lines = ["DAG summary:"]
+    for s in results.values():
+        lines.append(f"   {s.name:<28} {s.status:<8} {s.seconds:8.1f}s")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv[1:]:
+        _worker_main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Batched Twitch Helix and DynamoDB reads for the watcher Lambda.
+
+The watcher used to make one users call, one streams call and one or two
+DynamoDB reads per streamer, in sequence. Helix accepts up to 100 logins /
+user ids / video ids per request and DynamoDB BatchGetItem up to 100 keys,
+so a whole watch list resolves in a handful of round trips:
+
+- HelixBatchClient.user_ids(logins)      login -> user id (cached per warm container)
+- HelixBatchClient.live_streams(ids)     user id -> live stream object
+- HelixBatchClient.videos_by_id(ids)     video id -> video object
+- batch_get_items(resource, table, key, values)
+
+The app access token is also cached across warm invocations and refreshed
+on expiry or a 401.
+
+Environment:
+  TWITCH_CLIENT_ID / TWITCH_CLIENT_SECRET   app credentials (same as TwitchMonitor)
+  HELIX_BASE_URL          Helix root (default https://api.twitch.tv/helix)
+  TWITCH_TOKEN_URL        OAuth token endpoint (default https://id.twitch.tv/oauth2/token)
+  USER_ID_CACHE_SECONDS   login -> id cache lifetime (default 86400)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+HELIX_BATCH = 100  # max logins / ids per Helix request
+DYNAMO_BATCH = 100  # max keys per BatchGetItem
+
+# Module-level so warm Lambda containers reuse them across invocations
+_TOKEN_CACHE: Dict[str, object] = {}
+_USER_ID_CACHE: Dict[str, tuple] = {}  # login -> (user_id, cached_at)
+_CACHE_LOCK = threading.Lock()
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    seen = set()
+    out = []
+    for v in values:
+        if v and v not in seen:
+            seen.add(v)
+            out.append(v)
+    return out
+
+
+class HelixBatchClient:
+    """Minimal Helix client issuing multi-value requests (up to 100 per call)."""
+
+    def __init__(self, client_id: str, client_secret: str, base_url: Optional[str] = None,
+                 token_url: Optional[str] = None, timeout: float = 10.0):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.base_url = (base_url or os.getenv('HELIX_BASE_URL', 'https://api.twitch.tv/helix')).rstrip('/')
+        self.token_url = token_url or os.getenv('TWITCH_TOKEN_URL', 'https://id.twitch.tv/oauth2/token')
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    @classmethod
+    def from_env(cls) -> Optional["HelixBatchClient"]:
+        client_id = os.getenv('TWITCH_CLIENT_ID')
+        client_secret = os.getenv('TWITCH_CLIENT_SECRET')
+        if not client_id or not client_secret:
+            return None
+        return cls(client_id, client_secret)
+
+    # ---- auth ----
+
+    def _token(self, refresh: bool = False) -> str:
+        with _CACHE_LOCK:
+            token = _TOKEN_CACHE.get('access_token')
+            fresh = token and _TOKEN_CACHE.get('client_id') == self.client_id and time.time() < float(_TOKEN_CACHE.get('expires_at', 0))
+            if fresh and not refresh:
+                return str(token)
+            resp = self.http.post(
+                self.token_url,
+                data={'client_id': self.client_id, 'client_secret': self.client_secret, 'grant_type': 'client_credentials'},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            body = resp.json() or {}
+            token = body.get('access_token')
+            if not token:
+                raise RuntimeError("Twitch token response missing access_token")
+            _TOKEN_CACHE.update({
+                'access_token': token,
+                'client_id': self.client_id,
+                # Refresh a minute early
+                'expires_at': time.time() + max(0, int(body.get('expires_in', 3600)) - 60),
+            })
+            return str(token)
+
+    def _get(self, path: str, params: List[tuple]) -> Optional[List[Dict]]:
+        """GET a Helix endpoint; data list, or None on 404. Other errors raise."""
+        url = f"{self.base_url}/{path}"
+        for attempt in range(2):
+            headers = {'Client-ID': self.client_id, 'Authorization': f"Bearer {self._token(refresh=attempt > 0)}"}
+            resp = self.http.get(url, params=params, headers=headers, timeout=self.timeout)
+            if resp.status_code == 401 and attempt == 0:
+                continue
+            if resp.status_code == 404:
+                return None
+            resp.raise_for_status()
+            return (resp.json() or {}).get('data') or []
+        return []
+
+    # ---- batched lookups ----
+
+    def user_ids(self, logins: Iterable[str]) -> Dict[str, str]:
+        """login -> user id for logins that exist (keys lowercased)."""
+        ttl = float(os.getenv('USER_ID_CACHE_SECONDS', '86400'))
+        now = time.time()
+        wanted = _unique(l.strip().lower() for l in logins)
+        out: Dict[str, str] = {}
+        missing: List[str] = []
+        with _CACHE_LOCK:
+            for login in wanted:
+                hit = _USER_ID_CACHE.get(login)
+                if hit and now - hit[1] < ttl:
+                    out[login] = hit[0]
+                else:
+                    missing.append(login)
+        for chunk in _chunks(missing, HELIX_BATCH):
+            for user in self._get('users', [('login', l) for l in chunk]) or []:
+                login = str(user.get('login', '')).lower()
+                if login and user.get('id'):
+                    out[login] = str(user['id'])
+                    with _CACHE_LOCK:
+                        _USER_ID_CACHE[login] = (str(user['id']), now)
+        return out
+
+    def live_streams(self, user_ids: Iterable[str]) -> Dict[str, Dict]:
+        """user id -> stream object, for users currently live."""
+        out: Dict[str, Dict] = {}
+        for chunk in _chunks(_unique(user_ids), HELIX_BATCH):
+            params = [('user_id', u) for u in chunk] + [('type', 'live'), ('first', str(HELIX_BATCH))]
+            for stream in self._get('streams', params) or []:
+                if stream.get('user_id'):
+                    out[str(stream['user_id'])] = stream
+        return out
+
+    def videos_by_id(self, video_ids: Iterable[str]) -> Dict[str, Dict]:
+        """video id -> video object; ids that no longer exist are left out."""
+        out: Dict[str, Dict] = {}
+        for chunk in _chunks(_unique(video_ids), HELIX_BATCH):
+            self._videos_into(chunk, out)
+        return out
+
+    def _videos_into(self, ids: List[str], out: Dict[str, Dict]) -> None:
+        data = self._get('videos', [('id', v) for v in ids])
+        if data is None:
+            # Helix 404s the whole request when an id is gone; split until the missing ids are isolated
+            if len(ids) > 1:
+                mid = len(ids) // 2
+                self._videos_into(ids[:mid], out)
+                self._videos_into(ids[mid:], out)
+            return
+        for video in data:
+            if video.get('id'):
+                out[str(video['id'])] = video
+
+
+def batch_get_items(dynamodb, table_name: str, key_name: str, values: Iterable[str],
+                    consistent: bool = True, max_attempts: int = 5) -> Dict[str, Dict]:
+    """key value -> item for every existing row, via BatchGetItem (100 keys per call).
+
+    Unprocessed keys are retried with exponential backoff; raises if any are
+    still unprocessed after max_attempts.
+    """
+    out: Dict[str, Dict] = {}
+    for chunk in _chunks(_unique(values), DYNAMO_BATCH):
+        request = {table_name: {'Keys': [{key_name: v} for v in chunk], 'ConsistentRead': consistent}}
+        for attempt in range(max_attempts):
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            for item in resp.get('Responses', {}).get(table_name, []):
+                out[str(item[key_name])] = item
+            request = resp.get('UnprocessedKeys') or {}
+            if not request:
+                break
+            time.sleep(min(1.0, 0.05 * (2 ** attempt)))
+        if request:
+            raise RuntimeError(f"BatchGetItem on {table_name} left keys unprocessed after {max_attempts} attempts")
+    return out
@@ -6,12 +6,24 @@ This function is triggered by an EventBridge rule. It checks for new VODs
 from a predefined list of streamers, and for each new VOD, it launches an
 ECS task to process it. It uses DynamoDB to track which VODs have already
 been processed.
+
+Scheduled runs resolve the whole watch list up front with batched reads
+(twitch_batch: Helix users/streams/videos, up to 100 per request, and one
+DynamoDB BatchGetItem for sessions), then run the per-streamer session
+transitions concurrently. If the batch path is unavailable (no Twitch app
+credentials, or a batched read fails) the run falls back to checking
+streamers one by one.
+
+Environment (polling):
+  WATCHER_WORKERS   concurrent per-streamer session transitions (default 8)
 """
 
 import boto3
 import os
+import threading
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 
 def get_aws_account_id():
@@ -33,6 +45,12 @@ except ImportError:
     # Allow function to work without TwitchMonitor for manual triggers
     TwitchMonitor = None
 
+try:
+    from twitch_batch import HelixBatchClient, batch_get_items
+except ImportError:
+    HelixBatchClient = None
+    batch_get_items = None
+
 # Environment variables
 ECS_CLUSTER = os.getenv('ECS_CLUSTER', 'streamsniped-dev-cluster')
 ECS_TASK_DEFINITION = os.getenv('ECS_TASK_DEFINITION', 'streamsniped-fargate')  # Fargate default
@@ -50,6 +68,7 @@ GPU_ENABLED = os.getenv('GPU_ENABLED', 'true').lower() == 'true'
 USE_GPU_FOR_ALL_STEPS = os.getenv('USE_GPU_FOR_ALL_STEPS', 'true').lower() == 'true'
 GPU_PROCESSING_MODE = os.getenv('GPU_PROCESSING_MODE', 'hybrid')  # hybrid, local_only, cloud_only
 FULL_QUEUE_URL = os.getenv('FULL_QUEUE_URL', '')
+WATCHER_WORKERS = int(os.getenv('WATCHER_WORKERS', '8'))
 
 ecs = boto3.client('ecs')
 dynamodb = boto3.resource('dynamodb')
@@ -179,7 +198,19 @@ def lambda_handler(event, context):
     state_table = dynamodb.Table(STATE_TABLE_NAME)
     session_table = dynamodb.Table(SESSION_TABLE_NAME)
 
-    for streamer_name in STREAMERS:
+    streamers = [s.strip() for s in STREAMERS if s.strip()]
+    snapshot = prefetch_watch_list(streamers)
+    if snapshot is None:
+        check_streamers_sequential(twitch_monitor, session_table, job_table, state_table, streamers)
+    else:
+        check_streamers_concurrent(twitch_monitor, streamers, snapshot)
+
+    print("VOD check finished.")
+    return {'statusCode': 200, 'body': 'Stateful VOD check finished successfully.'}
+
+def check_streamers_sequential(twitch_monitor, session_table, job_table, state_table, streamers) -> None:
+    """One streamer at a time, one Helix/DynamoDB round trip per lookup."""
+    for streamer_name in streamers:
         print(f"Checking streamer: {streamer_name}")
         user_id = twitch_monitor.get_user_id(streamer_name)
         if not user_id:
@@ -196,14 +227,88 @@ def lambda_handler(event, context):
             streamer_name=streamer_name
         )
 
-    print("VOD check finished.")
-    return {'statusCode': 200, 'body': 'Stateful VOD check finished successfully.'}
+def prefetch_watch_list(streamers) -> dict:
+    """
+    Batched reads for the whole watch list: user ids, live streams, sessions, and the
+    videos FINALIZING sessions will re-check. Returns None if the batch path is unavailable.
+    """
+    if HelixBatchClient is None:
+        return None
+    helix = HelixBatchClient.from_env()
+    if helix is None:
+        return None
+    try:
+        ids = helix.user_ids(streamers)
+        user_ids = list(ids.values())
+        streams = helix.live_streams(user_ids)
+        sessions = batch_get_items(dynamodb, SESSION_TABLE_NAME, 'streamer_id', user_ids)
+        # Offline streamers with a tracked VOD go through the FINALIZING duration check
+        finalizing_vods = [
+            str(sessions[u]['vod_id']) for u in user_ids
+            if u not in streams and u in sessions and sessions[u].get('vod_id')
+        ]
+        videos = helix.videos_by_id(finalizing_vods)
+    except Exception as e:
+        print(f"⚠️ Batched watch-list prefetch failed ({e}); checking streamers one by one")
+        return None
+    print(f"📦 Prefetched {len(ids)} users, {len(streams)} live, {len(sessions)} sessions, {len(videos)} videos")
+    return {'user_ids': ids, 'streams': streams, 'sessions': sessions, 'videos': videos}
+
+_thread_local = threading.local()
+
+def _thread_tables():
+    """(job, state, session) tables on a per-thread boto3 resource (resources are not thread-safe)."""
+    tables = getattr(_thread_local, 'tables', None)
+    if tables is None:
+        resource = boto3.session.Session().resource('dynamodb')
+        tables = (resource.Table(DYNAMODB_TABLE), resource.Table(STATE_TABLE_NAME), resource.Table(SESSION_TABLE_NAME))
+        _thread_local.tables = tables
+    return tables
+
+def check_streamers_concurrent(twitch_monitor, streamers, snapshot: dict) -> None:
+    """Run each streamer's session transition on a worker pool, seeded with prefetched state."""
+    def check(streamer_name: str, user_id: str) -> None:
+        job_table, state_table, session_table = _thread_tables()
+        try:
+            manage_stream_session(
+                twitch_monitor=twitch_monitor,
+                session_table=session_table,
+                job_table=job_table,
+                state_table=state_table,
+                user_id=user_id,
+                streamer_name=streamer_name,
+                prefetched={
+                    'session': snapshot['sessions'].get(user_id),
+                    'stream': snapshot['streams'].get(user_id),
+                    'videos': snapshot['videos'],
+                },
+            )
+        except Exception as e:
+            print(f"X Error checking {streamer_name}: {e}")
+
+    jobs = []
+    for streamer_name in streamers:
+        user_id = snapshot['user_ids'].get(streamer_name.lower())
+        if not user_id:
+            print(f"Could not find user ID for {streamer_name}")
+            continue
+        jobs.append((streamer_name, user_id))
+
+    workers = max(1, min(WATCHER_WORKERS, len(jobs)))
+    print(f"Checking {len(jobs)} streamers with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for streamer_name, user_id in jobs:
+            pool.submit(check, streamer_name, user_id)
 
-def manage_stream_session(twitch_monitor, session_table, job_table, state_table, user_id: str, streamer_name: str) -> None:
+def manage_stream_session(twitch_monitor, session_table, job_table, state_table, user_id: str, streamer_name: str,
+                          prefetched: dict = None) -> None:
     """
     Maintain a per-streamer session to avoid triggering on baby VODs.
     Transitions: PENDING/RECORDING -> FINALIZING -> READY -> COMPLETED (delete)
     
+    prefetched (from prefetch_watch_list) supplies the session row, live stream and
+    video lookups instead of per-streamer reads.
+    
     Enhanced with:
     - Session timeout watchdog (prevents FINALIZING lockup)
     - VOD-level deduplication (catches VODs from session gaps)
@@ -212,10 +317,13 @@ def manage_stream_session(twitch_monitor, session_table, job_table, state_table,
     now_ts = int(time.time())
 
     # Load current session if exists
-    session = get_session(session_table, user_id)
-
-    # Check live status
-    stream = twitch_monitor.get_stream(user_id)
+    if prefetched is not None:
+        session = prefetched.get('session')
+        stream = prefetched.get('stream')
+    else:
+        session = get_session(session_table, user_id)
+        # Check live status
+        stream = twitch_monitor.get_stream(user_id)
     is_live = stream is not None
     stream_id = stream.get('id') if is_live else None
 
@@ -283,7 +391,10 @@ def manage_stream_session(twitch_monitor, session_table, job_table, state_table,
             put_session(session_table, session)
             # Continue to trigger below
         elif vod_id:
-            vid = twitch_monitor.get_video_by_id(vod_id)
+            if prefetched is not None and vod_id in prefetched.get('videos', {}):
+                vid = prefetched['videos'][vod_id]
+            else:
+                vid = twitch_monitor.get_video_by_id(vod_id)
             if vid:
                 dur_sec = twitch_monitor.parse_duration_to_seconds(vid.get('duration'))
                 if dur_sec > session.get('last_vod_duration_seconds', 0):
@@ -28,6 +28,8 @@ def update_lambda_function():
             # Add any dependencies if they exist
             if Path('twitch_monitor.py').exists():
                 zip_file.write('twitch_monitor.py', 'twitch_monitor.py')
+            if Path('aws-scripts/twitch_batch.py').exists():
+                zip_file.write('aws-scripts/twitch_batch.py', 'twitch_batch.py')
         
         try:
             # Update the Lambda function
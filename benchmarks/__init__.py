@@ -0,0 +1 @@
+# StreamSniped benchmark suite (synthetic fixtures + timed hot paths)
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic VOD fixtures for the benchmark suite.
+
+Everything is generated from a seed into a working directory laid out like
+the real pipeline (data/ai_data/<vod>/..., data/vector_stores/<vod>/...), so
+benchmarked functions read their usual relative paths unchanged.
+
+Chat follows a Poisson baseline plus decaying bursts (hype moments) that are
+emote-heavy, with a sprinkling of sub/resub notices for clean_chat to drop.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import pickle
+import random
+import re
+import shutil
+import sqlite3
+import subprocess
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EMOTES = ["KEKW", "OMEGALUL", "PogChamp", "LUL", "monkaS", "Pog", "Kappa", "5Head", "Sadge", "EZ"]
+WORDS = (
+    "okay so the boss is right there we need to go left actually no wait chat is this the "
+    "right way I think we should try again that was insane did you see that clip it bro"
+).split()
+SUB_LINES = ["subscribed at Tier 1. They've subscribed for 3 months!", "is gifting 5 Tier 1 Subs to the community!"]
+CATEGORIES = ["Just Chatting", "Elden Ring", "Just Chatting", "Valorant"]
+
+
+@dataclass(frozen=True)
+class Scale:
+    vod_seconds: int         # synthetic VOD length
+    segment_seconds: int     # transcript segment length
+    base_chat_rate: float    # messages per second outside bursts
+    bursts_per_hour: float
+    windows: int             # rows in the standalone window DB
+    label_rows: int          # rows labelled by update_burst_labels (sleeps 0.1s per row)
+    embeddings: int          # vectors in the search fixture
+    queries: int             # VectorIndex.search calls per run
+    videos: int              # ffmpeg test clips
+    video_seconds: int
+    clips: int               # clips classified per run (stub LLM with fixed latency)
+
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale(1800, 10, 0.8, 6, 600, 10, 2_000, 20, 3, 4, 40),
+    "medium": Scale(3 * 3600, 10, 1.5, 8, 3_000, 25, 20_000, 50, 4, 8, 150),
+    "large": Scale(8 * 3600, 10, 2.5, 10, 10_000, 50, 100_000, 100, 6, 15, 400),
+}
+
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _burst_times(rng: random.Random, scale: Scale) -> List[float]:
+    n = max(1, int(scale.vod_seconds / 3600.0 * scale.bursts_per_hour))
+    return sorted(rng.uniform(60.0, scale.vod_seconds - 60.0) for _ in range(n))
+
+
+def chat_messages(scale: Scale, seed: int = 0) -> List[Dict]:
+    """Simple-format chat ({timestamp, content, emotes, username}) sorted by time."""
+    rng = random.Random(seed)
+    bursts = _burst_times(rng, scale)
+    users = [f"viewer{i:04d}" for i in range(500)]
+    out: List[Dict] = []
+    for sec in range(scale.vod_seconds):
+        # Each burst adds up to 12x the baseline, decaying with a ~20s time constant
+        hype = sum(12.0 * math.exp(-(sec - t) / 20.0) for t in bursts if 0 <= sec - t < 120)
+        lam = scale.base_chat_rate * (1.0 + hype)
+        # Knuth Poisson sampler is fine for the small lambdas used here
+        k, p, limit = 0, 1.0, math.exp(-lam)
+        while True:
+            p *= rng.random()
+            if p <= limit:
+                break
+            k += 1
+        for _ in range(k):
+            ts = sec + rng.random()
+            user = rng.choice(users)
+            if rng.random() < 0.01:
+                out.append({"timestamp": ts, "content": f"{user} {rng.choice(SUB_LINES)}", "emotes": [], "username": user})
+                continue
+            emote_p = 0.7 if hype > 1.0 else 0.15
+            emotes = [rng.choice(EMOTES) for _ in range(rng.randint(1, 3))] if rng.random() < emote_p else []
+            content = " ".join([_text(rng, rng.randint(0, 6))] + emotes).strip() or rng.choice(EMOTES)
+            out.append({"timestamp": ts, "content": content, "emotes": emotes, "username": user})
+    return out
+
+
+def twitch_downloader_comments(messages: Sequence[Dict]) -> Dict:
+    """The same chat in TwitchDownloaderCLI's {"comments": [...]} layout."""
+    comments = []
+    for m in messages:
+        fragments = [{"text": m["content"], "emoticon": None}]
+        fragments += [{"text": e, "emoticon": {"emoticon_id": e}} for e in m["emotes"]]
+        comments.append({
+            "content_offset_seconds": m["timestamp"],
+            "commenter": {"display_name": m["username"]},
+            "message": {"body": m["content"], "fragments": fragments, "emoticons": []},
+        })
+    return {"comments": comments}
+
+
+def chapters(scale: Scale) -> List[Dict]:
+    n = len(CATEGORIES)
+    step = scale.vod_seconds / n
+    return [
+        {
+            "id": f"chapter_{i + 1:03d}",
+            "category": CATEGORIES[i],
+            "start_time": round(i * step, 3),
+            "end_time": round((i + 1) * step, 3),
+            "duration": round(step, 3),
+            "excluded": False,
+        }
+        for i in range(n)
+    ]
+
+
+def segments(scale: Scale, messages: Sequence[Dict], seed: int = 0) -> List[Dict]:
+    """Transcript segments with the chat that falls inside each one attached."""
+    rng = random.Random(seed + 1)
+    out: List[Dict] = []
+    j = 0
+    for start in range(0, scale.vod_seconds, scale.segment_seconds):
+        end = min(scale.vod_seconds, start + scale.segment_seconds)
+        chat: List[Dict] = []
+        while j < len(messages) and messages[j]["timestamp"] < end:
+            chat.append(messages[j])
+            j += 1
+        transcript = _text(rng, rng.randint(8, 30))
+        out.append({
+            "start_time": float(start),
+            "end_time": float(end),
+            "duration": float(end - start),
+            "transcript": transcript,
+            "text": transcript,
+            "chat_messages": chat,
+        })
+    return out
+
+
+def write_vod(root: Path, vod_id: str, scale: Scale, seed: int = 0) -> Dict[str, Path]:
+    """ai_data, chapters and raw chat JSON for one VOD under root/data/ai_data/<vod_id>."""
+    d = root / "data" / "ai_data" / vod_id
+    d.mkdir(parents=True, exist_ok=True)
+    messages = chat_messages(scale, seed)
+    paths = {
+        "ai_data": d / f"{vod_id}_ai_data.json",
+        "chapters": d / f"{vod_id}_chapters.json",
+        "chat": d / f"{vod_id}_chat.json",
+    }
+    paths["ai_data"].write_text(json.dumps({"vod_id": vod_id, "segments": segments(scale, messages, seed)}), encoding="utf-8")
+    paths["chapters"].write_text(json.dumps({"chapters": chapters(scale)}), encoding="utf-8")
+    paths["chat"].write_text(json.dumps(twitch_downloader_comments(messages)), encoding="utf-8")
+    return paths
+
+
+# Same columns VectorIndex._setup_metadata_db creates (plus peak_block_id, read by clip_generation)
+_DOCUMENTS_DDL = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY, vod_id TEXT NOT NULL, start_time REAL NOT NULL, end_time REAL NOT NULL,
+    duration REAL NOT NULL, chapter_id TEXT, category TEXT, excluded INTEGER DEFAULT 0, mode TEXT,
+    text TEXT, chat_text TEXT, chat_rate REAL DEFAULT 0, chat_rate_z REAL DEFAULT 0,
+    burst_score REAL DEFAULT 0, reaction_hits TEXT, section_context TEXT, summary TEXT, topic TEXT,
+    energy TEXT, role TEXT, role_confidence REAL DEFAULT 0, same_topic_prev INTEGER DEFAULT 0,
+    topic_thread INTEGER DEFAULT 0, topic_key TEXT, link_type TEXT, link_evidence TEXT,
+    confidence REAL DEFAULT 0, section_id TEXT, section_title TEXT, section_role TEXT,
+    peak_block_id TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def write_window_db(root: Path, vod_id: str, n_windows: int, window_seconds: float = 30.0, seed: int = 0) -> Path:
+    """A data/vector_stores/<vod_id>/metadata.db with n_windows bursty window documents."""
+    rng = np.random.default_rng(seed)
+    d = root / "data" / "vector_stores" / vod_id
+    d.mkdir(parents=True, exist_ok=True)
+    db = d / "metadata.db"
+    if db.exists():
+        db.unlink()
+
+    # AR(1) chat z-score with occasional spikes gives contiguous burst runs
+    z = np.zeros(n_windows)
+    for i in range(1, n_windows):
+        z[i] = 0.8 * z[i - 1] + rng.normal(0.0, 0.5)
+    spikes = rng.random(n_windows) < 0.02
+    z[spikes] += rng.uniform(2.5, 5.0, spikes.sum())
+    n_ch = len(CATEGORIES)
+    rows = []
+    text_rng = random.Random(seed)
+    for i in range(n_windows):
+        ch = min(n_ch - 1, i * n_ch // max(1, n_windows))
+        mode = "jc" if "chatting" in CATEGORIES[ch].lower() else "game"
+        hits = {e: int(rng.poisson(3 * max(0.0, z[i]))) for e in EMOTES[:3]}
+        start = i * window_seconds
+        rows.append((
+            f"{vod_id}_w{i:06d}", vod_id, start, start + window_seconds, window_seconds,
+            f"chapter_{ch + 1:03d}", CATEGORIES[ch], 0, mode,
+            _text(text_rng, 40), " ".join(text_rng.choice(EMOTES) for _ in range(10)),
+            float(max(0.0, 1.0 + z[i] * 0.4)), float(z[i]), float(max(0.0, z[i]) * 1.5),
+            json.dumps(hits), "high" if z[i] > 2.0 else ("medium" if z[i] > 0.8 else "low"),
+        ))
+    conn = sqlite3.connect(str(db))
+    conn.execute(_DOCUMENTS_DDL)
+    conn.executemany(
+        "INSERT INTO documents (id, vod_id, start_time, end_time, duration, chapter_id, category, excluded, mode, "
+        "text, chat_text, chat_rate, chat_rate_z, burst_score, reaction_hits, energy) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+    return db
+
+
+def embedding_matrix(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Unit-norm float32 vectors drawn around a few topic centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.normal(size=(16, dim))
+    vecs = centroids[rng.integers(0, 16, n)] + 0.5 * rng.normal(size=(n, dim))
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs.astype(np.float32)
+
+
+def write_vector_store(root: Path, vod_id: str, n: int, dim: int, seed: int = 0) -> Path:
+    """Window DB plus vectors.pkl/vector_ids.pkl (and index.faiss when faiss is installed)."""
+    db = write_window_db(root, vod_id, n, seed=seed)
+    d = db.parent
+    vecs = embedding_matrix(n, dim, seed)
+    conn = sqlite3.connect(str(db))
+    ids = [r[0] for r in conn.execute("SELECT id FROM documents ORDER BY created_at, rowid")]
+    conn.close()
+    with open(d / "vectors.pkl", "wb") as f:
+        pickle.dump(vecs, f)
+    with open(d / "vector_ids.pkl", "wb") as f:
+        pickle.dump(ids, f)
+    try:
+        import faiss
+        index = faiss.IndexHNSWFlat(dim, 32)
+        index.add(vecs)
+        faiss.write_index(index, str(d / "index.faiss"))
+    except ImportError:
+        pass
+    return d
+
+
+def write_test_videos(out_dir: Path, count: int, seconds: int, size: str = "640x360", fps: int = 30) -> List[Path]:
+    """Short H.264/AAC clips (testsrc2 + sine tone) made with ffmpeg."""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise FileNotFoundError("ffmpeg not found on PATH")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths: List[Path] = []
+    for i in range(count):
+        p = out_dir / f"clip_{i:02d}.mp4"
+        if not p.exists():
+            cmd = [
+                ffmpeg, "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}",
+                "-f", "lavfi", "-i", f"sine=frequency={330 + 110 * i}:sample_rate=48000",
+                "-t", str(seconds), "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+                "-c:a", "aac", "-b:a", "96k", "-shortest", str(p),
+            ]
+            subprocess.run(cmd, check=True, capture_output=True)
+        paths.append(p)
+    return paths
+
+
+def stub_llm_response(prompt: str, seed: Optional[int] = None) -> str:
+    """Valid burst-label JSON for either the JC or gameplay prompt, derived from the prompt text."""
+    h = zlib.crc32(prompt.encode("utf-8")) if seed is None else seed
+    topic = ["boss fight", "chat banter", "clip review", "ranked match"][h % 4]
+    return json.dumps({
+        "summary": f"Streamer talks about the {topic}.",
+        "topic": topic,
+        "topic_key": topic.replace(" ", "_"),
+        "energy": ["low", "medium", "high"][h % 3],
+        "same_topic_prev": bool(h % 2),
+        "role": ["build_up", "conflict", "peak", "filler"][h % 4],
+        "confidence": 0.8,
+    })
+
+
+def clip_classification_items(n: int, seed: int = 0) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+    """(clips_data, chat_contexts) in the shape ContentClassifier.classify_clips expects."""
+    rng = random.Random(seed)
+    clips: List[Dict] = []
+    contexts: Dict[str, List[Dict]] = {}
+    t = 0
+    for i in range(n):
+        t += rng.randint(30, 300)
+        dur = rng.randint(20, 90)
+        path = f"data/clips/bench_vod/clip_{i:04d}.mp4"
+        clips.append({"clip_path": path, "transcript": _text(rng, rng.randint(40, 160)),
+                      "start_time": t, "end_time": t + dur, "vod_id": "bench_vod"})
+        contexts[path] = [
+            {"timestamp": t + rng.randint(0, dur), "content": f"{_text(rng, 3)} {rng.choice(EMOTES)}",
+             "emotes": [rng.choice(EMOTES)] if rng.random() < 0.5 else []}
+            for _ in range(rng.randint(0, 25))
+        ]
+    return clips, contexts
+
+
+def stub_classifier_response(prompt: str) -> str:
+    """Classification JSON for a single-item prompt, or a JSON array for a batch prompt (one per ITEM)."""
+    def judgement(h: int) -> Dict:
+        return {
+            "label": ["reaction", "banter", "setup", "low_energy", "gameplay"][h % 5],
+            "score": float(h % 11),
+            "clip_title": f"Clip {h % 997}",
+            "keep": h % 11 > 5,
+            "tags": ["bench"],
+            "reasoning": "stub",
+        }
+    item_ids = [int(x) for x in re.findall(r"=== ITEM (\d+) ===", prompt)]
+    if not item_ids:
+        out = {"start": "00:00:00", "end": "00:00:20", "transcript": ""}
+        out.update(judgement(zlib.crc32(prompt.encode("utf-8"))))
+        return json.dumps(out)
+    return json.dumps([dict(item_id=i, **judgement(zlib.crc32(f"{prompt[:64]}{i}".encode("utf-8")))) for i in item_ids])
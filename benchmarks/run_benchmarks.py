@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark runner over synthetic VOD fixtures.
+
+Generates fixtures (benchmarks/fixtures.py) into a scratch working directory,
+times each hot path, appends one JSON line per run to the history file and
+flags cases whose median got slower than the stored baseline.
+
+Cases whose dependencies are missing here (cv2, ffmpeg, faiss, pandas, ...)
+are reported as skipped with the reason instead of failing the run.
+
+Usage:
+  python -m benchmarks.run_benchmarks                       # all cases, small scale
+  python -m benchmarks.run_benchmarks --scale medium --only clip_scoring,vector_search
+  python -m benchmarks.run_benchmarks --save-baseline       # accept current timings
+
+Environment:
+  BENCH_HISTORY      JSONL history file (default data/benchmarks/history.jsonl)
+  BENCH_BASELINE     baseline JSON (default data/benchmarks/baseline.json)
+  BENCH_TOLERANCE    allowed slowdown vs baseline median (default 0.20 = +20%)
+  BENCH_MIN_DELTA_S  ignore slowdowns smaller than this many seconds (default 0.05)
+  BENCH_WORKDIR      parent dir for the scratch working dir (default system temp)
+  BENCH_LLM_LATENCY_S  simulated latency per stub LLM request in classify_* cases (default 0.05)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks import fixtures  # noqa: E402
+
+
+class Skip(Exception):
+    """Raised by a case when a dependency is unavailable in this environment."""
+
+
+@dataclass
+class Context:
+    root: Path
+    scale_name: str
+    scale: fixtures.Scale
+    seed: int
+    _done: Dict[str, object]
+
+    def once(self, key: str, make: Callable[[], object]) -> object:
+        """Build a fixture the first time a case asks for it."""
+        if key not in self._done:
+            self._done[key] = make()
+        return self._done[key]
+
+    def videos(self) -> List[Path]:
+        if not shutil.which("ffmpeg"):
+            raise Skip("ffmpeg not found on PATH")
+        return self.once("videos", lambda: fixtures.write_test_videos(
+            self.root / "videos", self.scale.videos, self.scale.video_seconds))
+
+
+# A case does its (untimed) setup and returns (timed callable, items processed per call)
+CaseFn = Callable[[Context], Tuple[Callable[[], object], int]]
+CASES: Dict[str, CaseFn] = {}
+
+
+def case(name: str):
+    def register(fn: CaseFn) -> CaseFn:
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def _require(module: str):
+    import importlib
+    try:
+        return importlib.import_module(module)
+    except Exception as e:  # ImportError, or module-level errors from missing optional deps
+        raise Skip(f"{module}: {type(e).__name__}: {e}")
+
+
+@case("vector_store_build")
+def _bench_vector_store_build(ctx: Context):
+    mod = _require("vector_store.full_vod_documenter")
+    vod = "bench_build"
+    ctx.once("vod_build", lambda: fixtures.write_vod(ctx.root, vod, ctx.scale, ctx.seed))
+    n_segments = ctx.scale.vod_seconds // ctx.scale.segment_seconds
+    return (lambda: mod.build_full_vod_vector_store(vod)), n_segments
+
+
+@case("vector_search")
+def _bench_vector_search(ctx: Context):
+    mod = _require("vector_store.vector_index")
+    vod = "bench_search"
+    index_dir = ctx.root / "data" / "vector_stores" / vod
+    # Match the dimension of whatever embedder (real or stub) VectorIndex will use
+    dim = int(mod.VectorIndex(str(index_dir)).create_embeddings(["probe"]).shape[1])
+    ctx.once("vector_store", lambda: fixtures.write_vector_store(ctx.root, vod, ctx.scale.embeddings, dim, ctx.seed))
+    index = mod.VectorIndex(str(index_dir))
+    queries = [f"{w} moment" for w in fixtures.WORDS][: ctx.scale.queries]
+    queries += [queries[i % len(queries)] for i in range(ctx.scale.queries - len(queries))]
+
+    def run():
+        for q in queries:
+            index.search(q, k=10)
+    return run, len(queries)
+
+
+@case("clean_chat")
+def _bench_clean_chat(ctx: Context):
+    import importlib.util
+    path = REPO_ROOT / "processing-scripts" / "generate_ai_data_cloud.py"
+    spec = importlib.util.spec_from_file_location("generate_ai_data_cloud", path)
+    mod = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(mod)
+    except Exception as e:
+        raise Skip(f"generate_ai_data_cloud: {type(e).__name__}: {e}")
+    paths = ctx.once("vod_chat", lambda: fixtures.write_vod(ctx.root, "bench_chat", ctx.scale, ctx.seed))
+    chat = json.loads(Path(paths["chat"]).read_text(encoding="utf-8"))
+    return (lambda: mod.clean_chat(chat)), len(chat["comments"])
+
+
+@case("burst_labels")
+def _bench_burst_labels(ctx: Context):
+    mod = _require("vector_store.burst_summarize")
+    vod = "bench_labels"
+    ctx.once("vod_labels", lambda: fixtures.write_vod(ctx.root, vod, ctx.scale, ctx.seed))
+    ctx.once("db_labels", lambda: fixtures.write_window_db(ctx.root, vod, ctx.scale.label_rows, seed=ctx.seed))
+    # Stub LLM: valid JSON immediately, so the timing covers prompt building, parsing and DB writes
+    mod.call_llm = lambda prompt, *args, **kwargs: fixtures.stub_llm_response(prompt)
+    return (lambda: mod.update_burst_labels(vod)), ctx.scale.label_rows
+
+
+def _stub_classifier(ctx: Context, bulk: bool):
+    mod = _require("src.classifier")
+    latency = float(os.getenv("BENCH_LLM_LATENCY_S", "0.05"))
+    clips, contexts = fixtures.clip_classification_items(ctx.scale.clips, seed=ctx.seed)
+    classifier = mod.ContentClassifier()
+
+    def call_gpt(prompt: str, max_tokens: int = 1000) -> str:
+        time.sleep(latency)
+        return fixtures.stub_classifier_response(prompt)
+    classifier._call_gpt = call_gpt
+    return (lambda: classifier.classify_clips(clips, contexts, bulk=bulk)), len(clips)
+
+
+@case("classify_clips_serial")
+def _bench_classify_clips_serial(ctx: Context):
+    return _stub_classifier(ctx, bulk=False)
+
+
+@case("classify_clips_bulk")
+def _bench_classify_clips_bulk(ctx: Context):
+    return _stub_classifier(ctx, bulk=True)
+
+
+@case("clip_scoring")
+def _bench_clip_scoring(ctx: Context):
+    pipeline = _require("clip_generation.pipeline")
+    vod = "bench_windows"
+    ctx.once("db_windows", lambda: fixtures.write_window_db(ctx.root, vod, ctx.scale.windows, seed=ctx.seed))
+
+    class _NoIndex:
+        have_index = False
+
+    def run():
+        # Fresh pipeline per call: includes load_docs and index construction
+        return pipeline.ClipPipeline(vod, retriever=_NoIndex()).generate_candidates(use_semantics=False)
+    return run, ctx.scale.windows
+
+
+@case("sample_frames")
+def _bench_sample_frames(ctx: Context):
+    try:
+        import cv2  # noqa: F401
+    except ImportError:
+        raise Skip("cv2 not installed")
+    mod = _require("clip_creation.frame_utils")
+    videos = ctx.videos()
+
+    def run():
+        for v in videos:
+            mod.sample_frames(v, num_samples=5)
+    return run, len(videos)
+
+
+@case("render_transitions")
+def _bench_render_transitions(ctx: Context):
+    mod = _require("directors_cut.render")
+    videos = ctx.videos()
+    out = ctx.root / "renders" / "joined.mp4"
+
+    def run():
+        if not mod.render_with_transitions(videos, out, seed=ctx.seed, use_nvenc=False):
+            raise RuntimeError("render_with_transitions returned False")
+    return run, len(videos)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(name: str, ctx: Context, repeat: int, warmup: int) -> Dict:
+    t0 = time.perf_counter()
+    try:
+        fn, items = CASES[name](ctx)
+    except Skip as e:
+        return {"status": "skipped", "reason": str(e)}
+    except Exception as e:
+        return {"status": "error", "reason": f"setup: {type(e).__name__}: {e}"}
+    setup_s = time.perf_counter() - t0
+
+    times: List[float] = []
+    try:
+        for i in range(warmup + repeat):
+            start = time.perf_counter()
+            fn()
+            if i >= warmup:
+                times.append(time.perf_counter() - start)
+    except Skip as e:
+        return {"status": "skipped", "reason": str(e)}
+    except SystemExit as e:
+        return {"status": "error", "reason": f"exited with {e.code}"}
+    except Exception as e:
+        return {"status": "error", "reason": f"{type(e).__name__}: {e}"}
+
+    median = statistics.median(times)
+    return {
+        "status": "ok",
+        "median_s": round(median, 6),
+        "min_s": round(min(times), 6),
+        "max_s": round(max(times), 6),
+        "runs": len(times),
+        "setup_s": round(setup_s, 3),
+        "items": items,
+        "items_per_s": round(items / median, 2) if median > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, min_delta_s: float) -> List[str]:
+    """Names of cases whose median exceeds baseline * (1 + tolerance) by more than min_delta_s."""
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if res.get("status") != "ok" or not base:
+            continue
+        limit = base["median_s"] * (1.0 + tolerance)
+        if res["median_s"] > limit and res["median_s"] - base["median_s"] > min_delta_s:
+            regressions.append(name)
+    return regressions
+
+
+def _resolve(p: str) -> Path:
+    path = Path(p)
+    return path if path.is_absolute() else REPO_ROOT / path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark StreamSniped hot paths on synthetic fixtures")
+    parser.add_argument("--scale", choices=sorted(fixtures.SCALES), default="small")
+    parser.add_argument("--only", help="Comma-separated case names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (median is reported)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history", default=os.getenv("BENCH_HISTORY", "data/benchmarks/history.jsonl"))
+    parser.add_argument("--baseline", default=os.getenv("BENCH_BASELINE", "data/benchmarks/baseline.json"))
+    parser.add_argument("--tolerance", type=float, default=float(os.getenv("BENCH_TOLERANCE", "0.20")))
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run's medians as the baseline")
+    parser.add_argument("--no-fail", action="store_true", help="Exit 0 even when regressions are found")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch working dir")
+    parser.add_argument("--list", action="store_true", help="List case names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    history_path = _resolve(args.history)
+    baseline_path = _resolve(args.baseline)
+    min_delta_s = float(os.getenv("BENCH_MIN_DELTA_S", "0.05"))
+
+    workdir = Path(tempfile.mkdtemp(prefix="streamsniped_bench_", dir=os.getenv("BENCH_WORKDIR") or None))
+    cwd = os.getcwd()
+    ctx = Context(workdir, args.scale, fixtures.SCALES[args.scale], args.seed, {})
+    results: Dict[str, Dict] = {}
+    print(f"🏁 Benchmarks: scale={args.scale} repeat={args.repeat} workdir={workdir}")
+    try:
+        # Pipeline code resolves data/... relative to the working directory
+        os.chdir(workdir)
+        for name in names:
+            print(f"⏱️  {name} ...", flush=True)
+            results[name] = run_case(name, ctx, args.repeat, args.warmup)
+    finally:
+        os.chdir(cwd)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_rev": _git_rev(),
+        "scale": args.scale,
+        "seed": args.seed,
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+    try:
+        baselines = json.loads(baseline_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        baselines = {}
+    baseline = baselines.get(args.scale, {})
+    regressions = compare(results, baseline, args.tolerance, min_delta_s)
+
+    print()
+    for name, res in results.items():
+        if res["status"] != "ok":
+            print(f"  {'⏭️ ' if res['status'] == 'skipped' else '❌'} {name:<20} {res['status']}: {res['reason']}")
+            continue
+        base = baseline.get(name, {}).get("median_s")
+        delta = f" ({(res['median_s'] / base - 1.0) * 100:+.1f}% vs baseline)" if base else ""
+        flag = "🔺" if name in regressions else "✅"
+        print(f"  {flag} {name:<20} {res['median_s']:.4f}s  {res['items_per_s'] or 0:.1f} items/s{delta}")
+    print(f"\n📝 History appended to {history_path}")
+
+    if args.save_baseline:
+        baselines[args.scale] = {
+            **baseline,
+            **{n: {"median_s": r["median_s"], "git_rev": record["git_rev"], "timestamp": record["timestamp"]}
+               for n, r in results.items() if r["status"] == "ok"},
+        }
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(baselines, indent=2), encoding="utf-8")
+        print(f"📌 Baseline saved to {baseline_path}")
+
+    if regressions:
+        print(f"🔺 Regressions (> +{args.tolerance * 100:.0f}%): {', '.join(regressions)}")
+        return 0 if args.no_fail else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
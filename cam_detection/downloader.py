@@ -6,6 +6,8 @@ import subprocess
 from pathlib import Path
 from typing import Optional
 
+from utils import metrics
+
 
 def _resolve_twitch_cli_executable() -> str:
     override = os.getenv("TWITCH_DOWNLOADER_PATH", "").strip()
@@ -83,7 +85,7 @@ def download_small_chunk_1080p(
 
     try:
         print(f"Running command: {' '.join(cmd)}")
-        res = subprocess.run(cmd, capture_output=True, text=True, timeout=900)
+        res = metrics.run_subprocess(cmd, capture_output=True, text=True, timeout=900)
         print(f"Command exit code: {res.returncode}")
         if res.stdout:
             print(f"STDOUT: {res.stdout}")
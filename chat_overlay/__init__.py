@@ -4,6 +4,8 @@ Exports:
 - render_chat_segment: Render chat color/mask videos for a VOD time range
 - ensure_chat_json: Prefetch chat JSON for a time range
 - overlay_chat_on_video: Overlay rendered chat onto a segment video
+
+Chat renders are cached by chat content + render settings (see render_cache).
 """
 
 from .renderer import render_chat_segment, ensure_chat_json  # noqa: F401
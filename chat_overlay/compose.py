@@ -10,6 +10,8 @@ import subprocess
 from pathlib import Path
 from typing import Optional, Tuple
 
+from utils.media_probe import probe_media
+
 
 def _resolve_ffmpeg_bin() -> str:
     if os.name == "nt":
@@ -20,83 +22,19 @@ def _resolve_ffmpeg_bin() -> str:
 
 
 def _probe_video_meta(path: Path) -> Tuple[int, int, float]:
-    """Return (width, height, fps) using ffprobe. Fallbacks are sensible defaults.
+    """Return (width, height, fps) from the shared ffprobe cache. Fallbacks are sensible defaults.
 
-    We prefer avg_frame_rate, then r_frame_rate. Values are returned as floats.
+    fps prefers avg_frame_rate, then r_frame_rate.
     """
-    try:
-        ffprobe = _resolve_ffmpeg_bin().replace("ffmpeg", "ffprobe")
-        # Query width,height, and frame rates
-        result = subprocess.run(
-            [
-                ffprobe,
-                "-v",
-                "error",
-                "-select_streams",
-                "v:0",
-                "-show_entries",
-                "stream=width,height,avg_frame_rate,r_frame_rate",
-                "-of",
-                "csv=p=0",
-                str(path),
-            ],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        out = (result.stdout or "").strip().split("\n")[0]
-        # Expected format: width,height,avg,rf
-        parts = out.split(",") if out else []
-        w = int(parts[0]) if len(parts) >= 1 and parts[0].isdigit() else 1920
-        h = int(parts[1]) if len(parts) >= 2 and parts[1].isdigit() else 1080
-
-        def _to_fps(s: str) -> float:
-            if not s:
-                return 30.0
-            if "/" in s:
-                num, den = s.split("/", 1)
-                try:
-                    n = float(num)
-                    d = float(den)
-                    return n / d if d else 30.0
-                except Exception:
-                    return 30.0
-            try:
-                return float(s)
-            except Exception:
-                return 30.0
-
-        avg = _to_fps(parts[2] if len(parts) >= 3 else "")
-        rf = _to_fps(parts[3] if len(parts) >= 4 else "")
-        fps = avg if avg > 0.1 else (rf if rf > 0.1 else 30.0)
-        return (w, h, fps)
-    except Exception:
-        return (1920, 1080, 30.0)
+    info = probe_media(path)
+    w = info.width or 1920
+    h = info.height or 1080
+    fps = info.fps if info.fps > 0.1 else 30.0
+    return (w, h, fps)
 
 
 def _probe_has_audio(path: Path) -> bool:
-    try:
-        ffprobe = _resolve_ffmpeg_bin().replace("ffmpeg", "ffprobe")
-        r = subprocess.run(
-            [
-                ffprobe,
-                "-v",
-                "error",
-                "-select_streams",
-                "a",
-                "-show_entries",
-                "stream=index",
-                "-of",
-                "csv=p=0",
-                str(path),
-            ],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        return bool((r.stdout or "").strip())
-    except Exception:
-        return False
+    return probe_media(path).has_audio
 
 
 def overlay_chat_on_video(
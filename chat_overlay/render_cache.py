@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for TwitchDownloaderCLI chat renders.
+
+Entries are keyed by a hash of the chat subset JSON plus every render setting
+that changes pixels (size, font, fps, update rate, colors, outline, mask), so
+identical windows across clips, arc videos and retries reuse one render.
+
+Each entry also records the VOD and the chat time window it covers. A request
+whose window lies inside a cached render with the same settings is served by
+trimming that longer render instead of running chatrender again. Renders of
+chat the renderer downloaded itself are additionally keyed by
+(vod_id, window, settings, CHAT_SOURCE_VERSION), so a repeat request is served
+before chatdownload runs at all; bump CHAT_SOURCE_VERSION when the download
+options change.
+
+Entry files are written to a temp name and renamed into place, and index
+updates hold a cross-process file lock, so concurrent pipeline processes can
+share the cache. Callers always get private copies, never links to entries.
+
+The cache is capped at CHAT_RENDER_CACHE_MAX_GB (default 20, 0 = unbounded).
+Every hit touches the entry's mtime; each store() prunes least recently used
+entries under the index lock until the cache fits again.
+
+Layout (override root with CHAT_RENDER_CACHE_DIR, disable with CHAT_RENDER_CACHE=0):
+  data/cache/chat_renders/index.json
+  data/cache/chat_renders/index.lock
+  data/cache/chat_renders/<key>.mp4
+  data/cache/chat_renders/<key>_mask.mp4
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from utils.file_lock import file_lock
+
+_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return os.getenv("CHAT_RENDER_CACHE", "1").lower() in ("1", "true", "yes")
+
+
+def _cache_dir() -> Path:
+    return Path(os.getenv("CHAT_RENDER_CACHE_DIR", "data/cache/chat_renders"))
+
+
+def _max_bytes() -> int:
+    try:
+        return int(float(os.getenv("CHAT_RENDER_CACHE_MAX_GB", "20")) * 1024 ** 3)
+    except ValueError:
+        return 20 * 1024 ** 3
+
+
+def _index_path() -> Path:
+    return _cache_dir() / "index.json"
+
+
+def _source_version() -> str:
+    return os.getenv("CHAT_SOURCE_VERSION", "1")
+
+
+def params_key(params: Dict) -> str:
+    """Stable hash of render settings."""
+    blob = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def content_key(chat_json: Path, pkey: str) -> str:
+    """Hash of the chat subset bytes combined with the render settings key."""
+    h = hashlib.sha256()
+    with open(chat_json, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    h.update(pkey.encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def source_key(vod_id: str, start: float, end: float, pkey: str) -> str:
+    """Key for a render of self-downloaded chat, known before chatdownload runs."""
+    blob = f"{vod_id}|{float(start):.3f}|{float(end):.3f}|{pkey}|{_source_version()}"
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+def chat_window(chat_json: Path, default: Tuple[float, float]) -> Tuple[float, float]:
+    """Return the (start, end) VOD seconds a chat JSON covers, from its video block if present."""
+    try:
+        data = json.loads(chat_json.read_text(encoding="utf-8", errors="ignore"))
+        video = data.get("video") if isinstance(data, dict) else None
+        if isinstance(video, dict) and video.get("start") is not None and video.get("end") is not None:
+            return float(video["start"]), float(video["end"])
+    except Exception:
+        pass
+    return default
+
+
+def _load_index() -> Dict[str, Dict]:
+    try:
+        obj = json.loads(_index_path().read_text(encoding="utf-8"))
+        entries = obj.get("entries") if isinstance(obj, dict) else None
+        return entries if isinstance(entries, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_index(entries: Dict[str, Dict]) -> None:
+    path = _index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"index.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps({"entries": entries}, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _entry_files(key: str) -> Tuple[Path, Path]:
+    root = _cache_dir()
+    return root / f"{key}.mp4", root / f"{key}_mask.mp4"
+
+
+def _entry_valid(key: str, entry: Dict) -> bool:
+    color, mask = _entry_files(key)
+    if not (color.exists() and color.stat().st_size > 0):
+        return False
+    return (not entry.get("has_mask")) or mask.exists()
+
+
+def _unlink(p: Path) -> None:
+    try:
+        if p.exists():
+            p.unlink()
+    except Exception:
+        pass
+
+
+def _touch(key: str) -> None:
+    """Mark an entry as just used; its color file's mtime is the LRU clock."""
+    try:
+        os.utime(_entry_files(key)[0])
+    except OSError:
+        pass
+
+
+def _prune(entries: Dict[str, Dict], keep: str) -> None:
+    """Drop least recently used entries (never keep) until the cache fits the size cap. Index lock held."""
+    cap = _max_bytes()
+    if cap <= 0:
+        return
+    sized = []
+    total = 0
+    for key in list(entries):
+        size, used = 0, 0.0
+        for i, p in enumerate(_entry_files(key)):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            size += st.st_size
+            if i == 0:
+                used = st.st_mtime
+        total += size
+        sized.append((used, key, size))
+    for used, key, size in sorted(sized):
+        if total <= cap:
+            break
+        if key == keep:
+            continue
+        for p in _entry_files(key):
+            _unlink(p)
+        entries.pop(key, None)
+        total -= size
+
+
+def _place(src: Path, dst: Path) -> None:
+    """Copy src to dst via a temp name + rename, so readers never see a partial file."""
+    tmp = dst.with_name(f"{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        _unlink(tmp)
+
+
+def materialize(key: str, raw_out: Path) -> bool:
+    """Copy cached color/mask to the paths render_chat_segment callers expect."""
+    with _lock:
+        entry = _load_index().get(key)
+    if not entry or not _entry_valid(key, entry):
+        return False
+    color, mask = _entry_files(key)
+    raw_out.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        _place(color, raw_out)
+        if entry.get("has_mask"):
+            _place(mask, raw_out.with_name(raw_out.stem + "_mask" + raw_out.suffix))
+    except OSError:
+        # Entry pruned or replaced by another process mid-copy; render fresh instead
+        return False
+    _touch(key)
+    return True
+
+
+def find_source(skey: str) -> Optional[str]:
+    """Content key of a valid entry rendered from self-downloaded chat with this source key."""
+    with _lock:
+        entries = _load_index()
+    for key, entry in entries.items():
+        if entry.get("source_key") == skey and _entry_valid(key, entry):
+            return key
+    return None
+
+
+def find_covering(vod_id: str, pkey: str, start: float, end: float) -> Optional[Tuple[str, Dict]]:
+    """Smallest cached render of the same VOD/settings whose window covers [start, end]."""
+    with _lock:
+        entries = _load_index()
+    best: Optional[Tuple[str, Dict]] = None
+    for key, entry in entries.items():
+        if entry.get("vod_id") != vod_id or entry.get("params_key") != pkey:
+            continue
+        if float(entry.get("start", 0)) <= start + 1e-3 and float(entry.get("end", 0)) >= end - 1e-3:
+            if not _entry_valid(key, entry):
+                continue
+            span = float(entry["end"]) - float(entry["start"])
+            if best is None or span < float(best[1]["end"]) - float(best[1]["start"]):
+                best = (key, entry)
+    return best
+
+
+def release(raw_out: Path) -> None:
+    """Unlink stale render outputs before a fresh chatrender."""
+    _unlink(raw_out)
+    _unlink(raw_out.with_name(raw_out.stem + "_mask" + raw_out.suffix))
+    _unlink(raw_out.with_name(raw_out.stem + ".mask" + raw_out.suffix))
+
+
+def store(
+    key: str,
+    vod_id: str,
+    pkey: str,
+    start: float,
+    end: float,
+    raw_out: Path,
+    mask_path: Optional[Path],
+    skey: Optional[str] = None,
+) -> None:
+    """Copy a fresh render into the cache and index it (skey: source_key of self-downloaded chat)."""
+    try:
+        color, mask = _entry_files(key)
+        color.parent.mkdir(parents=True, exist_ok=True)
+        has_mask = bool(mask_path is not None and mask_path.exists())
+        # Files first (atomic renames), then the index entry that points at them
+        _place(raw_out, color)
+        if has_mask:
+            _place(mask_path, mask)
+        with _lock, file_lock(_cache_dir() / "index.lock"):
+            entries = _load_index()
+            entry = {
+                "vod_id": vod_id,
+                "params_key": pkey,
+                "start": float(start),
+                "end": float(end),
+                "has_mask": has_mask,
+            }
+            if skey:
+                entry["source_key"] = skey
+            elif entries.get(key, {}).get("source_key"):
+                entry["source_key"] = entries[key]["source_key"]
+            entries[key] = entry
+            _prune(entries, keep=key)
+            _save_index(entries)
+    except Exception as e:
+        print(f" Chat render cache store failed: {e}")
+
+
+def trim_from(
+    key: str,
+    entry: Dict,
+    start: float,
+    end: float,
+    raw_out: Path,
+    ffmpeg_bin: str = "ffmpeg",
+    timeout: int = 600,
+) -> bool:
+    """Cut [start, end] out of a cached longer render into raw_out (+ mask)."""
+    offset = max(0.0, float(start) - float(entry["start"]))
+    duration = max(0.1, float(end) - float(start))
+    color, mask = _entry_files(key)
+    jobs = [(color, raw_out)]
+    if entry.get("has_mask"):
+        jobs.append((mask, raw_out.with_name(raw_out.stem + "_mask" + raw_out.suffix)))
+    raw_out.parent.mkdir(parents=True, exist_ok=True)
+    _touch(key)
+    for src, dst in jobs:
+        _unlink(dst)
+        cmd = [
+            ffmpeg_bin, "-y", "-v", "error",
+            "-ss", f"{offset:.3f}", "-i", str(src), "-t", f"{duration:.3f}",
+            "-an", "-c:v", "libx264", "-preset", "veryfast", "-crf", "14", "-pix_fmt", "yuv420p",
+            str(dst),
+        ]
+        try:
+            res = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except Exception as e:
+            print(f" Chat render cache trim failed: {e}")
+            return False
+        if res.returncode != 0 or not dst.exists():
+            tail = (res.stderr or "")[-500:]
+            print(f" Chat render cache trim failed: {tail}")
+            return False
+    return True
@@ -13,10 +13,24 @@ import subprocess
 from pathlib import Path
 from typing import Optional
 import json
+import threading
+
+from . import render_cache
+
+_cli_lock = threading.Lock()
+_cli_path: Optional[str] = None
 
 
 def _resolve_twitch_cli_executable() -> str:
-    """Resolve TwitchDownloaderCLI executable path"""
+    """Resolve TwitchDownloaderCLI executable path (probed once per process)"""
+    global _cli_path
+    with _cli_lock:
+        if _cli_path is None:
+            _cli_path = _probe_twitch_cli_executable()
+        return _cli_path
+
+
+def _probe_twitch_cli_executable() -> str:
     override = os.getenv("TWITCH_DOWNLOADER_PATH")
     if override and Path(override).exists():
         return override
@@ -137,15 +151,6 @@ def render_chat_segment(
                 print(f"X chatdownload invalid JSON (attempt {attempt}): {tail}")
             return _is_valid_json(chat_json)
 
-        if chat_json_override is None and (force_redl or not _is_valid_json(chat_json)):
-            if not _download_chat_json():
-                print("X chatdownload produced invalid chat JSON; skipping chat overlay")
-                return False
-        elif chat_json_override is not None:
-            if not _is_valid_json(chat_json):
-                print("X provided chat_json_override is invalid; skipping chat overlay")
-                return False
-
         try:
             font_size = int(os.getenv("CHAT_FONT_PX", "14"))
         except Exception:
@@ -167,6 +172,68 @@ def render_chat_segment(
         if (not force_rerender) and raw_out.exists() and (existing_mask is not None):
             return True
 
+        framerate = int(os.getenv("CHAT_FRAMERATE", "30"))
+        update_rate = float(os.getenv("CHAT_UPDATE_RATE", "0.5"))
+        outline = os.getenv("CHAT_OUTLINE", "0").lower() in ("1", "true", "yes")
+        gen_mask = os.getenv("CHAT_GENERATE_MASK", "1").lower() in ("1", "true", "yes")
+
+        use_cache = render_cache.cache_enabled() and not force_rerender
+        cache_key = pkey = src_key = None
+        if use_cache:
+            pkey = render_cache.params_key({
+                "w": int(chat_w), "h": int(chat_h), "font": font_size, "fps": framerate,
+                "update": update_rate, "bg": bg_hex, "alt_bg": alt_bg_hex, "msg": "#FFFFFFFF",
+                "outline": outline, "mask": gen_mask,
+            })
+
+        def _serve_cached(key: Optional[str], start: float, end: float) -> bool:
+            """Exact cache hit on key, else trim a longer cached render covering [start, end]."""
+            if key and render_cache.materialize(key, raw_out):
+                print(f"♻️ chatrender cache hit: {raw_out.name}")
+                return True
+            covering = render_cache.find_covering(vod_id, pkey, start, end)
+            if covering is None:
+                return False
+            ffmpeg_bin = "ffmpeg"
+            if os.name == "nt":
+                candidate = Path(__file__).parent.parent / "executables" / "ffmpeg.exe"
+                if candidate.exists():
+                    ffmpeg_bin = str(candidate)
+            if not render_cache.trim_from(covering[0], covering[1], start, end, raw_out, ffmpeg_bin=ffmpeg_bin):
+                return False
+            print(f"♻️ chatrender served by trimming cached {covering[1]['start']:.0f}-{covering[1]['end']:.0f}s render")
+            store_key = key or src_key
+            if store_key:
+                trimmed_mask = raw_out.with_name(raw_out.stem + "_mask" + raw_out.suffix)
+                render_cache.store(store_key, vod_id, pkey, start, end, raw_out,
+                                   trimmed_mask if trimmed_mask.exists() else None, skey=src_key)
+            return True
+
+        # Chat we download ourselves is keyed by VOD + window, so a cached render skips chatdownload too
+        if use_cache and chat_json_override is None and not force_redl:
+            src_key = render_cache.source_key(vod_id, safe_start, int(end_time), pkey)
+            if _serve_cached(render_cache.find_source(src_key), float(safe_start), float(int(end_time))):
+                return True
+
+        if chat_json_override is None and (force_redl or not _is_valid_json(chat_json)):
+            if not _download_chat_json():
+                print("X chatdownload produced invalid chat JSON; skipping chat overlay")
+                return False
+        elif chat_json_override is not None:
+            if not _is_valid_json(chat_json):
+                print("X provided chat_json_override is invalid; skipping chat overlay")
+                return False
+
+        # Render cache: exact hit on chat content + settings, else trim a longer cached render
+        win_start, win_end = render_cache.chat_window(chat_json, (float(safe_start), float(int(end_time))))
+        if use_cache:
+            try:
+                cache_key = render_cache.content_key(chat_json, pkey)
+            except Exception:
+                cache_key = None
+            if _serve_cached(cache_key, win_start, win_end):
+                return True
+
         render_cmd = [
             twitch_cli,
             "chatrender",
@@ -177,9 +244,9 @@ def render_chat_segment(
             "-w",
             str(chat_w),
             "--framerate",
-            str(int(os.getenv("CHAT_FRAMERATE", "30"))),
+            str(framerate),
             "--update-rate",
-            str(float(os.getenv("CHAT_UPDATE_RATE", "0.5"))),
+            str(update_rate),
             "--font-size",
             str(font_size),
             "--background-color",
@@ -198,10 +265,11 @@ def render_chat_segment(
             str(raw_out),
         ]
         # Optional outline for readability; disabled by default for speed
-        if os.getenv("CHAT_OUTLINE", "0").lower() in ("1", "true", "yes"):
+        if outline:
             render_cmd.insert(render_cmd.index("--sub-messages"), "--outline")
-        if os.getenv("CHAT_GENERATE_MASK", "1").lower() in ("1", "true", "yes"):
+        if gen_mask:
             render_cmd.insert(render_cmd.index("--collision"), "--generate-mask")
+        render_cache.release(raw_out)
         print(f"🎛️ chatrender size request: {chat_w}x{chat_h}, font={font_size}")
         res2 = subprocess.run(render_cmd, capture_output=True, text=True, timeout=1800)
         if res2.returncode != 0 or not raw_out.exists():
@@ -215,6 +283,8 @@ def render_chat_segment(
             if cand.exists():
                 mask_path = cand
                 break
+        if use_cache and cache_key and pkey:
+            render_cache.store(cache_key, vod_id, pkey, win_start, win_end, raw_out, mask_path, skey=src_key)
         if mask_path is None:
             print(" Mask not found; using raw chat without alpha")
             return True
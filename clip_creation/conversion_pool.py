@@ -0,0 +1,248 @@
+"""Bounded worker pool for vertical-format clip conversion.
+
+- Encoder capabilities (`ffmpeg -encoders`) are probed once per host and
+  cached in data/cache/encoder_caps.json, keyed by hostname and ffmpeg binary.
+- Conversions run in a pool sized to CPU cores / FFMPEG_THREADS (capped by
+  CLIP_NVENC_SESSIONS when NVENC is used); override with CLIP_CONVERT_WORKERS.
+- Work is submitted with dependencies (download, chat prefetch) and starts as
+  soon as they finish, instead of waiting for the next loop iteration.
+- At most CLIP_MAX_INFLIGHT clips (default 2x convert workers) are between
+  download start and conversion end, so fast downloads cannot pile up temp
+  files ahead of slow conversions.
+- Every stage records busy time so a run can report per-stage utilization.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+_caps_lock = threading.Lock()
+_caps_memo: Dict[str, List[str]] = {}
+
+
+def _caps_cache_path() -> Path:
+    return Path(os.getenv("ENCODER_CAPS_CACHE", "data/cache/encoder_caps.json"))
+
+
+def _binary_fingerprint(ffmpeg_bin: str) -> str:
+    resolved = shutil.which(ffmpeg_bin) or ffmpeg_bin
+    try:
+        st = Path(resolved).stat()
+        return f"{socket.gethostname()}|{resolved}|{st.st_size}|{int(st.st_mtime)}"
+    except OSError:
+        return f"{socket.gethostname()}|{resolved}"
+
+
+def probe_encoders(ffmpeg_bin: str = "ffmpeg") -> List[str]:
+    """Return encoder names supported by ffmpeg_bin, probing at most once per host/binary."""
+    key = _binary_fingerprint(ffmpeg_bin)
+    with _caps_lock:
+        if key in _caps_memo:
+            return _caps_memo[key]
+        path = _caps_cache_path()
+        disk: Dict[str, List[str]] = {}
+        try:
+            disk = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            disk = {}
+        if isinstance(disk.get(key), list):
+            _caps_memo[key] = disk[key]
+            return _caps_memo[key]
+
+        encoders: List[str] = []
+        try:
+            probe = subprocess.run([ffmpeg_bin, "-hide_banner", "-encoders"], capture_output=True, text=True, timeout=15)
+            for line in ((probe.stdout or "") + (probe.stderr or "")).splitlines():
+                parts = line.split()
+                # Encoder rows look like: " V....D h264_nvenc   NVIDIA NVENC H.264 encoder"
+                if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] in "VAS":
+                    encoders.append(parts[1])
+        except Exception:
+            # Do not persist a failed probe; try again next process
+            _caps_memo[key] = []
+            return []
+        _caps_memo[key] = encoders
+        try:
+            disk[key] = encoders
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(disk, indent=2), encoding="utf-8")
+        except Exception:
+            pass
+        return encoders
+
+
+def has_encoder(name: str, ffmpeg_bin: str = "ffmpeg") -> bool:
+    return name in probe_encoders(ffmpeg_bin)
+
+
+def default_convert_workers(use_nvenc: bool) -> int:
+    """Pool size from CPU cores and per-ffmpeg thread count (all cores on CPU-only hosts)."""
+    override = os.getenv("CLIP_CONVERT_WORKERS", "").strip()
+    if override:
+        try:
+            return max(1, int(override))
+        except ValueError:
+            pass
+    cores = os.cpu_count() or 1
+    try:
+        ff_threads = max(1, int(os.getenv("FFMPEG_THREADS", "2")))
+    except ValueError:
+        ff_threads = 2
+    workers = max(1, cores // ff_threads)
+    if use_nvenc:
+        try:
+            workers = min(workers, max(1, int(os.getenv("CLIP_NVENC_SESSIONS", "3"))))
+        except ValueError:
+            workers = min(workers, 3)
+    return workers
+
+
+class _StageStats:
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self.busy = 0.0
+        self.jobs = 0
+        self.failures = 0
+
+
+class ConversionScheduler:
+    """Dependency-driven executor for the download → convert → upload pipeline."""
+
+    def __init__(self, convert_workers: int, download_workers: int = 1, chat_workers: int = 2, max_inflight: int = 0):
+        self._started = time.monotonic()
+        if max_inflight <= 0:
+            try:
+                max_inflight = int(os.getenv("CLIP_MAX_INFLIGHT", "0"))
+            except ValueError:
+                max_inflight = 0
+        self.max_inflight = max_inflight if max_inflight > 0 else 2 * max(1, convert_workers)
+        self._window = threading.Semaphore(self.max_inflight)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _StageStats] = {}
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        for stage, n in (("download", download_workers), ("chat", chat_workers), ("convert", convert_workers)):
+            self._pools[stage] = ThreadPoolExecutor(max_workers=max(1, n), thread_name_prefix=f"clip-{stage}")
+            self._stats[stage] = _StageStats(n)
+
+    def _timed(self, stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        t0 = time.monotonic()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = result is not False
+            return result
+        finally:
+            with self._lock:
+                st = self._stats.setdefault(stage, _StageStats(1))
+                st.busy += time.monotonic() - t0
+                st.jobs += 1
+                st.failures += 0 if ok else 1
+
+    def submit(self, stage: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        return self._pools[stage].submit(self._timed, stage, fn, *args, **kwargs)
+
+    def wait_for_slot(self) -> None:
+        """Block until fewer than max_inflight clips are in flight; pair with release_slot_when_done."""
+        self._window.acquire()
+
+    def release_slot_when_done(self, fut: Future) -> None:
+        """Free the slot taken by wait_for_slot once fut resolves (success, failure or cancel)."""
+        fut.add_done_callback(lambda _f: self._window.release())
+
+    def submit_when_ready(self, stage: str, deps: Sequence[Future], fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Run fn on stage's pool once every dependency is done.
+
+        The first dependency gates execution: if it raised or returned False the
+        returned future resolves to False without running fn.
+        """
+        proxy: Future = Future()
+        remaining = [len(deps)]
+        lock = threading.Lock()
+
+        def _launch() -> None:
+            gate = deps[0] if deps else None
+            try:
+                if gate is not None and (gate.exception() is not None or gate.result() is False):
+                    proxy.set_result(False)
+                    return
+            except Exception:
+                proxy.set_result(False)
+                return
+            try:
+                inner = self.submit(stage, fn, *args, **kwargs)
+            except Exception as e:
+                # Pool already shut down: fail the proxy instead of leaving it pending forever
+                proxy.set_exception(e)
+                return
+
+            def _relay(f: Future) -> None:
+                if f.cancelled():
+                    proxy.cancel()
+                    return
+                exc = f.exception()
+                if exc is not None:
+                    proxy.set_exception(exc)
+                else:
+                    proxy.set_result(f.result())
+
+            inner.add_done_callback(_relay)
+
+        def _on_done(_f: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                fire = remaining[0] == 0
+            if fire:
+                _launch()
+
+        if not deps:
+            _launch()
+        for d in deps:
+            d.add_done_callback(_on_done)
+        return proxy
+
+    def record(self, stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn inline on the caller's thread, counting it toward stage utilization."""
+        with self._lock:
+            self._stats.setdefault(stage, _StageStats(1))
+        return self._timed(stage, fn, *args, **kwargs)
+
+    def utilization(self) -> Dict[str, Dict[str, float]]:
+        wall = max(1e-6, time.monotonic() - self._started)
+        with self._lock:
+            return {
+                stage: {
+                    "workers": st.workers,
+                    "jobs": st.jobs,
+                    "failures": st.failures,
+                    "busy_s": round(st.busy, 2),
+                    "utilization": round(st.busy / (wall * st.workers), 3),
+                }
+                for stage, st in self._stats.items()
+            }
+
+    def report(self) -> str:
+        wall = time.monotonic() - self._started
+        lines = [f"⏱️ Clip pipeline wall time: {wall:.1f}s"]
+        for stage, u in self.utilization().items():
+            lines.append(
+                f"   {stage:<9} workers={u['workers']:<2} jobs={u['jobs']:<3} fail={u['failures']:<2} "
+                f"busy={u['busy_s']:.1f}s util={u['utilization'] * 100:.0f}%"
+            )
+        return "\n".join(lines)
+
+    def shutdown(self, wait: bool = True) -> None:
+        for pool in self._pools.values():
+            try:
+                pool.shutdown(wait=wait, cancel_futures=not wait)
+            except Exception:
+                pass
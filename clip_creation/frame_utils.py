@@ -33,9 +33,15 @@ def sample_frames(input_path: Path, num_samples: int = 3) -> Tuple[int, int, Lis
         return 0, 0, []
 
     try:
-        fps = max(1.0, cap.get(cv2.CAP_PROP_FPS) or 30.0)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or int(fps * 2))
-        duration = max(1e-3, frame_count / fps)
+        # fps/duration from the shared ffprobe cache (the conversion step reuses it); OpenCV as fallback
+        from utils.media_probe import probe_media
+        info = probe_media(input_path)
+        fps = max(1.0, info.fps or cap.get(cv2.CAP_PROP_FPS) or 30.0)
+        duration = info.video_duration or info.format_duration
+        if duration <= 0:
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or int(fps * 2))
+            duration = frame_count / fps
+        duration = max(1e-3, duration)
 
         # Evenly spaced times, avoiding first/last 0.5s when possible
         if num_samples <= 1:
@@ -220,31 +220,33 @@ def upload_results_to_s3(vod_id: str) -> bool:
     storage = StorageManager()
     s3_bucket = os.getenv('S3_BUCKET', 'streamsniped-dev-videos')
     
-    # Upload clips directory
+    pairs = []
+    # Clips directory
     clips_dir = Path(f"data/clips/{vod_id}")
     if clips_dir.exists():
-        try:
-            for clip_file in clips_dir.rglob("*.mp4"):
-                relative_path = clip_file.relative_to(Path("data/clips"))
-                s3_key = f"clips/{relative_path}"
-                s3_uri = f"s3://{s3_bucket}/{s3_key}"
-                storage.upload_file(str(clip_file), s3_uri)
-                print(f"📤 Uploaded clip: {s3_key}")
-        except Exception as e:
-            print(f" Failed to upload clips: {e}")
+        for clip_file in clips_dir.rglob("*.mp4"):
+            relative_path = clip_file.relative_to(Path("data/clips"))
+            pairs.append((str(clip_file), f"s3://{s3_bucket}/clips/{relative_path.as_posix()}"))
     
-    # Upload AI data files
+    # AI data files
     ai_data_dir = config.get_ai_data_dir(vod_id)
     if ai_data_dir.exists():
-        try:
-            for json_file in ai_data_dir.glob("*.json"):
-                if "clip" in json_file.name or "youtube" in json_file.name:
-                    s3_key = f"ai_data/{vod_id}/{json_file.name}"
-                    s3_uri = f"s3://{s3_bucket}/{s3_key}"
-                    storage.upload_file(str(json_file), s3_uri)
-                    print(f"📤 Uploaded metadata: {s3_key}")
-        except Exception as e:
-            print(f" Failed to upload metadata: {e}")
+        for json_file in ai_data_dir.glob("*.json"):
+            if "clip" in json_file.name or "youtube" in json_file.name:
+                pairs.append((str(json_file), f"s3://{s3_bucket}/ai_data/{vod_id}/{json_file.name}"))
+    
+    # One concurrent batch; unchanged objects are skipped by content hash
+    try:
+        report = storage.upload_batch(pairs)
+    except Exception as e:
+        print(f" Failed to upload results: {e}")
+        return True
+    for outcome in report.outcomes:
+        if outcome.status == "uploaded":
+            print(f"📤 Uploaded: {outcome.destination}")
+        elif outcome.status == "failed":
+            print(f" Failed to upload {outcome.source}: {outcome.error}")
+    print(f"🪣 {report.summary()}")
     
     return True
 
@@ -0,0 +1,168 @@
+"""
+Columnar container for window documents.
+
+DocTable stores one numpy array per numeric field and one list per string
+field instead of one WindowDoc object per row. The JSON `reaction_hits`
+column is kept as the raw database strings and only decoded when a row (or
+the reaction-total column) is first needed. Indexing and iteration still
+yield WindowDoc rows, built on demand, so code written against
+`List[WindowDoc]` keeps working. Building a row costs far more than reading
+a field, so hot loops read whole columns through `column()` or single
+fields through `field()` instead.
+
+Rows are views: mutating a returned WindowDoc does not write back.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .types import WindowDoc
+
+
+FLOAT_FIELDS = ("start", "end", "chat_rate", "chat_rate_z", "burst_score")
+BOOL_FIELDS = ("excluded", "same_topic_prev")
+STR_FIELDS = ("id", "chapter_id", "mode", "energy", "role", "text", "chat_text")
+
+
+def _reaction_total(hits: Dict[str, int]) -> int:
+    if not hits:
+        return 0
+    try:
+        return int(sum(int(v) for v in hits.values()))
+    except Exception:
+        return len(hits)
+
+
+class DocTable(Sequence[WindowDoc]):
+    """Struct-of-arrays WindowDoc collection with lazily decoded reaction hits."""
+
+    def __init__(
+        self,
+        columns: Dict[str, Sequence],
+        reaction_hits_raw: Sequence,
+        decode_hits: Callable[[object], Dict[str, int]],
+    ):
+        n = len(columns["start"])
+        for name in FLOAT_FIELDS:
+            setattr(self, name, np.asarray(columns[name], dtype=np.float64))
+        for name in BOOL_FIELDS:
+            setattr(self, name, np.asarray(columns[name], dtype=bool))
+        for name in STR_FIELDS:
+            setattr(self, name, list(columns[name]))
+        threads = list(columns["topic_thread"])
+        self.has_topic_thread = np.array([t is not None for t in threads], dtype=bool)
+        self.topic_thread = np.array([t if t is not None else -1 for t in threads], dtype=np.int64)
+        self.peak_block_id: List[Optional[str]] = list(columns["peak_block_id"])
+        self._hits_raw = list(reaction_hits_raw)
+        self._hits: List[Optional[Dict[str, int]]] = [None] * n
+        self._decode = decode_hits
+        self._reaction_totals: Optional[np.ndarray] = None
+        self._n = n
+        self.doc_index = None  # DocIndex, built on first use by interval_index.index_for
+
+    @classmethod
+    def from_docs(cls, docs: Sequence[WindowDoc]) -> "DocTable":
+        cols = {name: [getattr(d, name) for d in docs] for name in FLOAT_FIELDS + BOOL_FIELDS + STR_FIELDS}
+        cols["topic_thread"] = [d.topic_thread for d in docs]
+        cols["peak_block_id"] = [d.peak_block_id for d in docs]
+        return cls(cols, [d.reaction_hits for d in docs], lambda hits: dict(hits or {}))
+
+    def __len__(self) -> int:
+        return self._n
+
+    def reaction_hits(self, i: int) -> Dict[str, int]:
+        hits = self._hits[i]
+        if hits is None:
+            hits = self._decode(self._hits_raw[i])
+            self._hits[i] = hits
+            self._hits_raw[i] = None
+        return hits
+
+    @property
+    def reaction_totals(self) -> np.ndarray:
+        """Per-row sum of reaction hits (decodes the column once)."""
+        if self._reaction_totals is None:
+            self._reaction_totals = np.array(
+                [_reaction_total(self.reaction_hits(i)) for i in range(self._n)], dtype=np.int64
+            )
+        return self._reaction_totals
+
+    def _row(self, i: int) -> WindowDoc:
+        return WindowDoc(
+            id=self.id[i],
+            start=float(self.start[i]),
+            end=float(self.end[i]),
+            chapter_id=self.chapter_id[i],
+            mode=self.mode[i],
+            excluded=bool(self.excluded[i]),
+            chat_rate=float(self.chat_rate[i]),
+            chat_rate_z=float(self.chat_rate_z[i]),
+            burst_score=float(self.burst_score[i]),
+            reaction_hits=self.reaction_hits(i),
+            energy=self.energy[i],
+            role=self.role[i],
+            same_topic_prev=bool(self.same_topic_prev[i]),
+            topic_thread=int(self.topic_thread[i]) if self.has_topic_thread[i] else None,
+            text=self.text[i],
+            chat_text=self.chat_text[i],
+            peak_block_id=self.peak_block_id[i],
+        )
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return [self._row(i) for i in range(*key.indices(self._n))]
+        i = int(key)
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("DocTable index out of range")
+        return self._row(i)
+
+    def __iter__(self) -> Iterator[WindowDoc]:
+        for i in range(self._n):
+            yield self._row(i)
+
+    def mask(self, field: str, value: str) -> np.ndarray:
+        """Boolean column: lower-cased string field equals value."""
+        return np.array([(v or "").lower() == value for v in getattr(self, field)], dtype=bool)
+
+
+def column(docs: Sequence[WindowDoc], name: str) -> np.ndarray:
+    """A numeric field (or "reaction_total") as an array, zero-copy for DocTable."""
+    if isinstance(docs, DocTable):
+        if name == "reaction_total":
+            return docs.reaction_totals
+        return np.asarray(getattr(docs, name))
+    if name == "reaction_total":
+        return np.array([_reaction_total(d.reaction_hits) for d in docs], dtype=np.int64)
+    return np.array([getattr(d, name) for d in docs], dtype=np.float64)
+
+
+class _FieldView(Sequence):
+    """Per-row field access on a plain WindowDoc list, shaped like a DocTable column."""
+
+    __slots__ = ("_docs", "_name")
+
+    def __init__(self, docs: Sequence[WindowDoc], name: str):
+        self._docs = docs
+        self._name = name
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __getitem__(self, i):
+        return getattr(self._docs[i], self._name)
+
+
+def field(docs: Sequence[WindowDoc], name: str) -> Sequence:
+    """One field indexable by row: the DocTable column itself, or a lazy view over a list."""
+    if isinstance(docs, DocTable):
+        return getattr(docs, name)
+    return _FieldView(docs, name)
+
+
+def mode_buckets(docs: Sequence[WindowDoc]) -> np.ndarray:
+    """Boolean array, True where the row is gameplay ("game"), False for chat/other."""
+    modes = docs.mode if isinstance(docs, DocTable) else [d.mode for d in docs]
+    return np.array([(m or "").lower() == "game" for m in modes], dtype=bool)
@@ -12,7 +12,10 @@ import json
 from typing import List, Tuple, Optional, Dict
 from dataclasses import dataclass
 
+import numpy as np
+
 from .types import WindowDoc
+from .doc_table import column, field
 
 # -----------------------------------------------------------------------------
 # Prompt Template
@@ -93,28 +96,30 @@ def _format_transcript_window(docs: List[WindowDoc], start_window: float, end_wi
     current_block_text = []
     current_block_start = -1.0
     
-    # Filter docs first
-    relevant_docs = [d for d in docs if d.end >= start_window and d.start <= end_window]
+    # Filter docs first (column reads: building WindowDoc rows for the whole VOD is the slow part)
+    starts, ends = column(docs, "start"), column(docs, "end")
+    texts = field(docs, "text")
+    relevant = np.flatnonzero((ends >= start_window) & (starts <= end_window)).tolist()
     
-    if not relevant_docs:
+    if not relevant:
         return ""
         
-    current_block_start = relevant_docs[0].start
+    current_block_start = float(starts[relevant[0]])
 
-    for d in relevant_docs:
-        text = (d.text or "").strip()
+    for i in relevant:
+        text = (texts[i] or "").strip()
         if not text:
             continue
             
         # If this segment pushes us past the chunk size, flush the buffer
-        if (d.end - current_block_start) > chunk_size_seconds and current_block_text:
+        if (float(ends[i]) - current_block_start) > chunk_size_seconds and current_block_text:
             # Flush current block
             block_content = " ".join(current_block_text)
             lines.append(f"({current_block_start:.1f}s) {block_content}")
             
             # Reset for next block
             current_block_text = []
-            current_block_start = d.start
+            current_block_start = float(starts[i])
             
         current_block_text.append(text)
         
@@ -6,6 +6,8 @@ from typing import List, Optional
 
 from .types import WindowDoc
 from .config import ClipConfig
+from .doc_table import field
+from .interval_index import index_for
 
 
 def build_reaction_arcs(
@@ -97,18 +99,22 @@ def extend_group_by_semantics(
         return group
     
     selected = set(group)
+    # Read fields directly; building WindowDoc rows dominates this loop on a DocTable
+    starts, ends = field(docs, "start"), field(docs, "end")
+    ids, chapters = field(docs, "id"), field(docs, "chapter_id")
     # Compute group temporal bounds
-    gstart = min(docs[i].start for i in group)
-    gend = max(docs[i].end for i in group)
+    gstart = min(starts[i] for i in group)
+    gend = max(ends[i] for i in group)
     
     # Candidates: windows within ±time_window of edges
-    for i, d in enumerate(docs):
+    chapter_id = chapters[group[0]]
+    for i in index_for(docs).starting_in(gstart - time_window, gend + time_window):
         if i in selected:
             continue
-        if (d.start >= gstart - time_window and d.end <= gend + time_window and d.chapter_id == docs[group[0]].chapter_id):
+        if (ends[i] <= gend + time_window and chapters[i] == chapter_id):
             # Check similarity vs any selected id
             for j in list(selected):
-                if retriever.sim(docs[j].id, d.id) >= sim_thr:
+                if retriever.sim(ids[j], ids[i]) >= sim_thr:
                     selected.add(i)
                     break
     
@@ -0,0 +1,208 @@
+"""
+Sorted interval index over window documents.
+
+Overlap queries (`d.start < end and d.end > start`) are answered with two
+binary searches instead of a scan of every doc: docs are sorted by start, so
+`start < end` is a prefix, and a running maximum of `end` bounds the first
+doc that can still reach past `start`. Additive per-doc metrics are kept as
+prefix sums and the positive chat z-score as a sparse table, so range sums,
+means and maxima over a window cost O(1) when the overlapping docs form a
+contiguous run (the normal case: windows do not nest).
+
+index_for() shares one index per docs collection. A DocTable (immutable)
+carries its own index, so the two are freed together; plain lists are
+re-validated against the identity of their elements on every lookup, so
+replacing, adding or removing docs rebuilds the index. Code that edits doc
+fields in place must call invalidate(docs).
+"""
+
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .types import WindowDoc
+from .doc_table import DocTable, column
+
+
+# Additive metrics available to range_sum / range_mean
+METRICS = ("chat_rate", "chat_z_pos", "reactions", "high_energy", "mode_chat", "mode_game")
+
+
+def _metric_columns(docs: Sequence[WindowDoc]) -> Dict[str, np.ndarray]:
+    """Whole-column metric arrays, read straight from a DocTable when possible."""
+    if isinstance(docs, DocTable):
+        high = docs.mask("energy", "high")
+        chat = docs.mask("mode", "chat")
+        game = docs.mask("mode", "game")
+    else:
+        high = np.array([(d.energy or "").lower() == "high" for d in docs], dtype=bool)
+        chat = np.array([(d.mode or "").lower() == "chat" for d in docs], dtype=bool)
+        game = np.array([(d.mode or "").lower() == "game" for d in docs], dtype=bool)
+    return {
+        "chat_rate": column(docs, "chat_rate"),
+        "chat_z_pos": np.maximum(0.0, column(docs, "chat_rate_z")),
+        "reactions": column(docs, "reaction_total").astype(np.float64),
+        "high_energy": high.astype(np.float64),
+        "mode_chat": chat.astype(np.float64),
+        "mode_game": game.astype(np.float64),
+    }
+
+
+class DocIndex:
+    """Interval index with prefix sums over a list of WindowDoc sorted by start."""
+
+    def __init__(self, docs: Sequence[WindowDoc]):
+        starts = column(docs, "start")
+        ends = column(docs, "end")
+        order = np.argsort(starts, kind="stable") if np.any(np.diff(starts) < 0) else np.arange(len(starts))
+        starts, ends = starts[order], ends[order]
+        self.docs = docs
+        self.order: List[int] = order.tolist()  # sorted position -> index into docs
+        # Plain lists: bisect and scalar indexing on them beat numpy for single lookups
+        self.starts: List[float] = starts.tolist()
+        self.ends: List[float] = ends.tolist()
+        self.max_end: List[float] = np.maximum.accumulate(ends).tolist() if len(ends) else []
+        # True when ends never decrease, i.e. every overlap set is contiguous
+        self.contiguous = bool(np.all(np.diff(ends) >= 0))
+
+        metrics = _metric_columns(docs)
+        self._prefix: Dict[str, List[float]] = {
+            name: np.concatenate(([0.0], np.cumsum(metrics[name][order]))).tolist() for name in METRICS
+        }
+        self._sparse_max = self._build_sparse(metrics["chat_z_pos"][order])
+        self._chapter_cache: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    @staticmethod
+    def _build_sparse(values: np.ndarray) -> List[List[float]]:
+        table = [values]
+        k = 1
+        while (1 << k) <= len(values):
+            prev = table[-1]
+            half = 1 << (k - 1)
+            table.append(np.maximum(prev[:-half], prev[half:]))
+            k += 1
+        return [row.tolist() for row in table]
+
+    def _span(self, start: float, end: float) -> Tuple[int, int]:
+        """Sorted positions [lo, hi) that may overlap (start, end); exact when contiguous."""
+        hi = bisect.bisect_left(self.starts, end)
+        lo = bisect.bisect_right(self.max_end, start, 0, hi)
+        return lo, hi
+
+    def positions(self, start: float, end: float) -> List[int]:
+        lo, hi = self._span(start, end)
+        if self.contiguous:
+            return list(range(lo, hi))
+        return [p for p in range(lo, hi) if self.ends[p] > start]
+
+    def indices(self, start: float, end: float) -> List[int]:
+        """Indices into docs overlapping (start, end), in start order."""
+        return [self.order[p] for p in self.positions(start, end)]
+
+    def overlapping(self, start: float, end: float) -> List[WindowDoc]:
+        """Same result as `[d for d in docs if d.start < end and d.end > start]`."""
+        return [self.docs[self.order[p]] for p in self.positions(start, end)]
+
+    def starting_in(self, lo_time: float, hi_time: float) -> List[int]:
+        """Indices of docs with lo_time <= start <= hi_time."""
+        lo = bisect.bisect_left(self.starts, lo_time)
+        hi = bisect.bisect_right(self.starts, hi_time)
+        return [self.order[p] for p in range(lo, hi)]
+
+    def count(self, start: float, end: float) -> int:
+        if self.contiguous:
+            lo, hi = self._span(start, end)
+            return max(0, hi - lo)
+        return len(self.positions(start, end))
+
+    def range_sum(self, metric: str, start: float, end: float) -> float:
+        prefix = self._prefix[metric]
+        if self.contiguous:
+            lo, hi = self._span(start, end)
+            return prefix[hi] - prefix[lo] if hi > lo else 0.0
+        return sum(prefix[p + 1] - prefix[p] for p in self.positions(start, end))
+
+    def range_mean(self, metric: str, start: float, end: float) -> float:
+        n = self.count(start, end)
+        return self.range_sum(metric, start, end) / n if n else 0.0
+
+    def range_max_chat_z(self, start: float, end: float) -> float:
+        """Max of max(0, chat_rate_z) over docs overlapping (start, end)."""
+        if self.contiguous:
+            lo, hi = self._span(start, end)
+            if hi <= lo:
+                return 0.0
+            k = (hi - lo).bit_length() - 1
+            row = self._sparse_max[k]
+            return max(row[lo], row[hi - (1 << k)])
+        vals = self._sparse_max[0]
+        return max((vals[p] for p in self.positions(start, end)), default=0.0)
+
+    def window_stats(self, start: float, end: float) -> Dict[str, float]:
+        """Counts and aggregates used by candidate scoring and quality gates."""
+        n = self.count(start, end)
+        if n == 0:
+            return {"count": 0, "mean_chat_z": 0.0, "max_chat_z": 0.0, "total_reactions": 0.0,
+                    "high_energy_frac": 0.0, "chat_count": 0, "game_count": 0}
+        return {
+            "count": n,
+            "mean_chat_z": self.range_sum("chat_z_pos", start, end) / n,
+            "max_chat_z": self.range_max_chat_z(start, end),
+            "total_reactions": self.range_sum("reactions", start, end),
+            "high_energy_frac": self.range_sum("high_energy", start, end) / n,
+            "chat_count": int(self.range_sum("mode_chat", start, end)),
+            "game_count": int(self.range_sum("mode_game", start, end)),
+        }
+
+    def chapter_series(self, chapter_id: str, smooth) -> Tuple[List[int], List[float]]:
+        """Memoized (indices, smooth(positive chat z)) for one chapter."""
+        cached = self._chapter_cache.get(chapter_id)
+        if cached is None:
+            docs = self.docs
+            chapters = docs.chapter_id if isinstance(docs, DocTable) else [d.chapter_id for d in docs]
+            idxs = [i for i, c in enumerate(chapters) if c == chapter_id]
+            series = np.maximum(0.0, column(docs, "chat_rate_z")[idxs]).tolist() if idxs else []
+            cached = (idxs, smooth(series))
+            self._chapter_cache[chapter_id] = cached
+        return cached
+
+
+# Plain lists: (docs, elements, element ids, index), most recent first. Holding the
+# elements keeps their ids from being reused while the entry is cached.
+_LIST_INDEXES: List[Tuple[Sequence[WindowDoc], Tuple[WindowDoc, ...], Tuple[int, ...], DocIndex]] = []
+_LIST_CACHE_SIZE = 4
+
+
+def index_for(docs: Sequence[WindowDoc]) -> DocIndex:
+    """Shared DocIndex for a docs collection, rebuilt when its contents change."""
+    if isinstance(docs, DocTable):
+        idx = docs.doc_index
+        if idx is None:
+            idx = docs.doc_index = DocIndex(docs)
+        return idx
+    ids = tuple(map(id, docs))
+    for pos, (owner, _, owner_ids, idx) in enumerate(_LIST_INDEXES):
+        if owner is docs:
+            if owner_ids == ids:
+                return idx
+            del _LIST_INDEXES[pos]
+            break
+    idx = DocIndex(docs)
+    _LIST_INDEXES.insert(0, (docs, tuple(docs), ids, idx))
+    del _LIST_INDEXES[_LIST_CACHE_SIZE:]
+    return idx
+
+
+def invalidate(docs: Optional[Sequence[WindowDoc]] = None) -> None:
+    """Drop the cached index for docs (every cached list index when None)."""
+    if isinstance(docs, DocTable):
+        docs.doc_index = None
+        return
+    if docs is None:
+        _LIST_INDEXES.clear()
+        return
+    _LIST_INDEXES[:] = [entry for entry in _LIST_INDEXES if entry[0] is not docs]
@@ -8,7 +8,7 @@ import re
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-from .types import WindowDoc
+from .doc_table import DocTable
 
 
 def ensure_float(x, default: float = 0.0) -> float:
@@ -42,8 +42,8 @@ def parse_reaction_hits(raw: Optional[str | Dict]) -> Dict[str, int]:
     return cleaned
 
 
-def load_docs(vod_id: str) -> List[WindowDoc]:
-    """Load window documents from vector store database."""
+def load_docs(vod_id: str) -> DocTable:
+    """Load window documents from vector store database as a columnar DocTable."""
     db_path = Path(f"data/vector_stores/{vod_id}/metadata.db")
     if not db_path.exists():
         raise FileNotFoundError(f"DB not found: {db_path}")
@@ -71,34 +71,26 @@ def load_docs(vod_id: str) -> List[WindowDoc]:
     rows = cur.fetchall()
     conn.close()
 
-    out: List[WindowDoc] = []
-    for row in rows:
-        rid = str(row[0])
-        start = ensure_float(row[1])
-        end = ensure_float(row[2])
-        chapter_id = str(row[3]) if row[3] is not None else "chapter_001"
-        mode = (row[4] or "unknown").lower()
-        excluded = bool(int(row[5] or 0))
-        chat_rate = ensure_float(row[6])
-        chat_rate_z = ensure_float(row[7])
-        burst_score = ensure_float(row[8])
-        reaction_hits = parse_reaction_hits(row[9])
-        energy = (row[10] or "").lower()
-        role = (row[11] or "").lower()
-        same_topic_prev = bool(int(row[12] or 0))
-        topic_thread = int(row[13]) if row[13] is not None else None
-        text = row[14] or ""
-        chat_text = row[15] or ""
-        peak_block_id = str(row[16]) if row[16] is not None else None
-        
-        out.append(WindowDoc(
-            id=rid, start=start, end=end, chapter_id=chapter_id, mode=mode, excluded=excluded,
-            chat_rate=chat_rate, chat_rate_z=chat_rate_z, burst_score=burst_score,
-            reaction_hits=reaction_hits, energy=energy, role=role,
-            same_topic_prev=same_topic_prev, topic_thread=topic_thread,
-            text=text, chat_text=chat_text, peak_block_id=peak_block_id
-        ))
-    return out
+    # Columnar: numeric fields become numpy arrays, reaction_hits stays raw JSON until read
+    columns: Dict[str, list] = {
+        "id": [str(r[0]) for r in rows],
+        "start": [ensure_float(r[1]) for r in rows],
+        "end": [ensure_float(r[2]) for r in rows],
+        "chapter_id": [str(r[3]) if r[3] is not None else "chapter_001" for r in rows],
+        "mode": [(r[4] or "unknown").lower() for r in rows],
+        "excluded": [bool(int(r[5] or 0)) for r in rows],
+        "chat_rate": [ensure_float(r[6]) for r in rows],
+        "chat_rate_z": [ensure_float(r[7]) for r in rows],
+        "burst_score": [ensure_float(r[8]) for r in rows],
+        "energy": [(r[10] or "").lower() for r in rows],
+        "role": [(r[11] or "").lower() for r in rows],
+        "same_topic_prev": [bool(int(r[12] or 0)) for r in rows],
+        "topic_thread": [int(r[13]) if r[13] is not None else None for r in rows],
+        "text": [r[14] or "" for r in rows],
+        "chat_text": [r[15] or "" for r in rows],
+        "peak_block_id": [str(r[16]) if r[16] is not None else None for r in rows],
+    }
+    return DocTable(columns, [r[9] for r in rows], parse_reaction_hits)
 
 
 def load_retriever(vod_id: str):
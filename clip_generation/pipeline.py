@@ -8,7 +8,7 @@ from typing import List, Optional
 from .types import ClipCandidate, FinalClip, ClipManifestMeta, WindowDoc, format_hms
 from .config import ClipConfig, DEFAULT_CONFIG
 from .loader import load_docs, load_retriever, load_sponsor_spans
-from .seeding import create_seed_groups, reaction_total
+from .seeding import create_seed_groups
 from .grouping import build_reaction_arcs, extend_groups
 from .windowing import (
     apply_dynamic_padding, 
@@ -28,6 +28,7 @@ from .scoring import (
 from .selection import deduplicate_and_select, append_sequence_numbers_to_adjacent_titles
 from .title_llm import generate_titles_for_clips
 from .gemini_refiner import refine_clip_boundaries
+from .interval_index import index_for
 
 
 class ClipPipeline:
@@ -87,6 +88,7 @@ class ClipPipeline:
         
         # Build candidates
         candidates: List[ClipCandidate] = []
+        doc_index = index_for(self.docs)
         
         for g in extended_groups:
             if not g:
@@ -118,17 +120,15 @@ class ClipPipeline:
                 end = start + win_len
             
             # Tighten window dynamically (target 35–120s) using signals
-            ctx_docs = [d for d in self.docs if d.start < end and d.end > start]
-            inner = ctx_docs
-            if inner:
+            ctx_docs = doc_index.overlapping(start, end)
+            stats = doc_index.window_stats(start, end)
+            if ctx_docs:
                 # Mode majority inside window
-                chat_count = sum(1 for d in inner if (d.mode or "").lower() == "chat")
-                game_count = sum(1 for d in inner if (d.mode or "").lower() == "game")
-                mode_major = "chat" if chat_count >= game_count else "game"
-                high_energy_frac = sum(1 for d in inner if (d.energy or "").lower() == "high") / float(len(inner))
-                mean_chat_z = sum(max(0.0, d.chat_rate_z) for d in inner) / max(1, len(inner))
-                max_chat_z = max(max(0.0, d.chat_rate_z) for d in inner)
-                total_reacts = sum(reaction_total(d) for d in inner)
+                mode_major = "chat" if stats["chat_count"] >= stats["game_count"] else "game"
+                high_energy_frac = stats["high_energy_frac"]
+                mean_chat_z = stats["mean_chat_z"]
+                max_chat_z = stats["max_chat_z"]
+                total_reacts = stats["total_reactions"]
 
                 # Base targets by mode
                 desired_len = self.config.expected_clip_chat if mode_major == "chat" else self.config.expected_clip_game
@@ -165,7 +165,7 @@ class ClipPipeline:
                     start, end = vstart, min(end, vstart + max(30.0, min(179.0, vend - vstart)))
 
             # Quality gates
-            if looks_like_goodbye([d for d in self.docs if d.start < end and d.end > start]):
+            if looks_like_goodbye(self.docs, doc_index.indices(start, end)):
                 continue
             if low_energy_reject(self.docs, start, end, self.config):
                 continue
@@ -233,6 +233,7 @@ class ClipPipeline:
     ) -> List[FinalClip]:
         """Finalize clips with padding and score filtering."""
         final_clips: List[FinalClip] = []
+        doc_index = index_for(self.docs)
         
         for candidate in candidates:
             if candidate.score < min_score:
@@ -248,7 +249,7 @@ class ClipPipeline:
             )
             
             # Re-snap to transcript boundaries if needed
-            ctx_docs = [d for d in self.docs if d.start < vend and d.end > vstart]
+            ctx_docs = doc_index.overlapping(vstart, vend)
             if ctx_docs:
                 vstart, vend = snap_to_transcript_boundaries(
                     vstart, vend, ctx_docs, candidate.start, candidate.end, candidate.anchor_time
@@ -2,10 +2,12 @@
 Scoring and quality gate functions for clip generation.
 """
 
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 from .types import WindowDoc
 from .config import ClipConfig
+from .doc_table import field
+from .interval_index import index_for
 
 
 # Goodbye terms for detection
@@ -35,31 +37,33 @@ def reaction_total(doc: WindowDoc) -> int:
 
 def compute_quality_score(docs: List[WindowDoc], start: float, end: float) -> Tuple[float, float, float]:
     """Compute quality score for a clip window."""
-    inner = [d for d in docs if d.start < end and d.end > start]
-    if not inner:
+    stats = index_for(docs).window_stats(start, end)
+    if not stats["count"]:
         return (0.0, 0.0, 0.0)
     
-    mean_chat_z = sum(max(0.0, d.chat_rate_z) for d in inner) / max(1, len(inner))
-    max_chat_z = max(max(0.0, d.chat_rate_z) for d in inner)
-    total_reacts = sum(reaction_total(d) for d in inner)
+    mean_chat_z = stats["mean_chat_z"]
+    max_chat_z = stats["max_chat_z"]
+    total_reacts = stats["total_reactions"]
     
     # Chat-centric score used elsewhere in the codebase
     score = 0.75 * mean_chat_z + 0.25 * max_chat_z
     return (score, mean_chat_z, float(total_reacts))
 
 
-def looks_like_goodbye(docs: List[WindowDoc]) -> bool:
-    """Check if docs contain goodbye/outro content."""
-    if not docs:
+def looks_like_goodbye(docs: Sequence[WindowDoc], indices: Optional[Sequence[int]] = None) -> bool:
+    """Check if docs (or just the rows at indices) contain goodbye/outro content."""
+    rows = range(len(docs)) if indices is None else indices
+    if not rows:
         return False
+    roles, chat_texts, texts = field(docs, "role"), field(docs, "chat_text"), field(docs, "text")
     
     # Heuristic: if >= 3 chat lines match goodbye-like terms, or any role suggests ending
     goodbye_hits = 0
-    for d in docs:
-        role = (d.role or "").strip().lower()
+    for i in rows:
+        role = (roles[i] or "").strip().lower()
         if role in {"goodbye", "ending", "outro"}:
             return True
-        text = (d.chat_text or "") + "\n" + (d.text or "")
+        text = (chat_texts[i] or "") + "\n" + (texts[i] or "")
         low = text.lower()
         for kw in GOODBYE_TERMS:
             if kw in low:
@@ -71,12 +75,13 @@ def looks_like_goodbye(docs: List[WindowDoc]) -> bool:
 
 def low_energy_reject(docs: List[WindowDoc], start: float, end: float, config: ClipConfig) -> bool:
     """Check if window should be rejected for low energy/signals."""
-    inner = [d for d in docs if d.start < end and d.end > start]
-    if not inner:
+    stats = index_for(docs).window_stats(start, end)
+    if not stats["count"]:
         return True
     
-    high_energy_frac = sum(1 for d in inner if (d.energy or "").lower() == "high") / float(len(inner))
-    score, mean_chat_z, total_reacts = compute_quality_score(docs, start, end)
+    high_energy_frac = stats["high_energy_frac"]
+    mean_chat_z = stats["mean_chat_z"]
+    total_reacts = stats["total_reactions"]
     
     # Reject very low energy/signals groups
     if (high_energy_frac < config.low_energy_energy_frac and 
@@ -107,6 +112,6 @@ def anchor_center_for_group(docs: List[WindowDoc], group: List[int]) -> float:
 
 def build_preview_text(docs: List[WindowDoc], start: float, end: float, limit: int = 140) -> str:
     """Build preview text for a clip window."""
-    inner = [d for d in docs if d.start < end and d.end > start]
+    inner = index_for(docs).overlapping(start, end)
     joined = " ".join((d.text or "").replace("\n", " ") for d in inner)
     return (joined[:limit]).strip()
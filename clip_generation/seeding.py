@@ -4,8 +4,11 @@ Reaction-based seeding for clip generation.
 
 from typing import List, Optional
 
+import numpy as np
+
 from .types import WindowDoc, SeedGroup
 from .config import ClipConfig
+from .doc_table import column, mode_buckets
 
 
 def reaction_total(doc: WindowDoc) -> int:
@@ -53,18 +56,20 @@ def pick_top_reaction_groups(
     if k <= 0:
         return []
 
-    ranked = []
-    for i, d in enumerate(docs):
-        if mode_filter and mode_bucket(d.mode) != mode_filter:
-            continue
-        ranked.append((i, reaction_total(d)))
-    ranked.sort(key=lambda t: t[1], reverse=True)
+    # Rank whole columns instead of materializing every row
+    totals = column(docs, "reaction_total")
+    starts = column(docs, "start")
+    if mode_filter:
+        keep = np.flatnonzero(mode_buckets(docs) == (mode_filter == "game"))
+    else:
+        keep = np.arange(len(totals))
+    ranked = keep[np.argsort(-totals[keep], kind="stable")].tolist()
     groups: List[List[int]] = []
     taken_starts: List[float] = []
-    for idx, cnt in ranked:
-        if cnt < min_reactions:
+    for idx in ranked:
+        if totals[idx] < min_reactions:
             break
-        start_time = docs[idx].start
+        start_time = float(starts[idx])
         if any(abs(start_time - s) < min_spacing for s in taken_starts):
             continue
         groups.append([idx])  # single-window group
@@ -83,8 +88,10 @@ def create_seed_groups(
     
     # Calculate mode distribution
     total_docs = max(1, len(docs))
-    chat_docs = sum(1 for d in docs if mode_bucket(d.mode) == "chat")
-    game_docs = sum(1 for d in docs if mode_bucket(d.mode) == "game")
+    is_game = mode_buckets(docs)
+    totals = column(docs, "reaction_total")
+    game_docs = int(is_game.sum())
+    chat_docs = len(is_game) - game_docs
     share_chat = chat_docs / total_docs
     share_game = game_docs / total_docs
 
@@ -111,8 +118,8 @@ def create_seed_groups(
         k_game = max(1, max(1, seeds_total - k_chat))
 
     # Per-mode reaction thresholds
-    r_chat = [max(0, reaction_total(d)) for d in docs if mode_bucket(d.mode) == "chat"]
-    r_game = [max(0, reaction_total(d)) for d in docs if mode_bucket(d.mode) == "game"]
+    r_chat = np.maximum(0, totals[~is_game]).tolist()
+    r_game = np.maximum(0, totals[is_game]).tolist()
     thr_chat = max(config.min_chat_reactions, int(round(quantile(r_chat, config.chat_reaction_quantile)))) if r_chat else config.min_chat_reactions
     thr_game = max(config.min_game_reactions, int(round(quantile(r_game, config.game_reaction_quantile)))) if r_game else config.min_game_reactions
 
@@ -131,11 +138,11 @@ def create_seed_groups(
     # Convert to SeedGroup objects
     seed_groups = []
     for group in seed_chat:
-        total_reacts = sum(reaction_total(docs[i]) for i in group)
+        total_reacts = int(totals[group].sum())
         seed_groups.append(SeedGroup(indices=group, total_reactions=total_reacts, mode="chat"))
     
     for group in seed_game:
-        total_reacts = sum(reaction_total(docs[i]) for i in group)
+        total_reacts = int(totals[group].sum())
         seed_groups.append(SeedGroup(indices=group, total_reactions=total_reacts, mode="game"))
 
     return seed_groups
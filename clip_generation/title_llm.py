@@ -8,10 +8,13 @@ high-quality title generation.
 import json
 import re
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dataclasses import dataclass, asdict
 
+import numpy as np
+
 from .types import FinalClip, WindowDoc
+from .doc_table import column, field
 
 # Import centralized title service
 try:
@@ -115,32 +118,36 @@ def build_clip_context(
     # Get docs within the clip window plus padding for context
     context_start = max(0, start - context_padding_s)
     context_end = end + context_padding_s
-    clip_docs = [d for d in docs if d.start < context_end and d.end > context_start]
+    # Column reads instead of WindowDoc rows: this scans every doc of the VOD
+    starts, ends = column(docs, "start"), column(docs, "end")
+    texts, chat_texts = field(docs, "text"), field(docs, "chat_text")
+    clip_rows = np.flatnonzero((starts < context_end) & (ends > context_start)).tolist()
     
     # Build transcript segments with context markers
     transcript_segments = []
-    for d in clip_docs:
+    for i in clip_rows:
+        d_start, d_end = float(starts[i]), float(ends[i])
         segment_type = "before"
-        if d.start >= start and d.end <= end:
+        if d_start >= start and d_end <= end:
             segment_type = "clip"
-        elif d.start < start and d.end > start:
+        elif d_start < start and d_end > start:
             segment_type = "transition_in"
-        elif d.start < end and d.end > end:
+        elif d_start < end and d_end > end:
             segment_type = "transition_out"
-        elif d.start >= end:
+        elif d_start >= end:
             segment_type = "after"
             
         transcript_segments.append({
-            "start_time": round(float(d.start), 3),
-            "end_time": round(float(d.end), 3),
-            "text": (d.text or "").replace("\n", " "),
+            "start_time": round(d_start, 3),
+            "end_time": round(d_end, 3),
+            "text": (texts[i] or "").replace("\n", " "),
             "context": segment_type
         })
     
     # Build chat lines
     chat_lines = []
-    for d in clip_docs:
-        chat_lines.extend(select_top_chat_lines(d.chat_text, k=8))
+    for i in clip_rows:
+        chat_lines.extend(select_top_chat_lines(chat_texts[i], k=8))
     
     # Get streamer context if available (same as generate_clips_manifest.py)
     streamer_context = ""
@@ -444,6 +451,34 @@ def log_title_candidates(
         print(f"⚠️  Failed to log candidates: {e}")
 
 
+def _streamer_name_for_vod(vod_id: str) -> str:
+    """Streamer name from the stream context file, falling back to the VOD id."""
+    streamer_name = str(vod_id)
+    try:
+        sc_path = Path(f"data/ai_data/{vod_id}/{vod_id}_stream_context.json")
+        if sc_path.exists():
+            sc = json.loads(sc_path.read_text(encoding='utf-8'))
+            name = str(sc.get('streamer') or '').strip()
+            if name:
+                streamer_name = name
+    except Exception:
+        pass
+    return streamer_name
+
+
+def _finalize_title(vod_id: str, clip: FinalClip, title: str) -> Optional[str]:
+    """Title-case a generated title and log it; None if it is invalid."""
+    if title and not _is_invalid_title_text(title):
+        final_title = _to_title_case_preserve_acronyms(title)
+        print(f"✨ Generated: '{final_title}'")
+        
+        # Log for analysis
+        log_title_candidates(vod_id, clip.start, [TitleCandidate(title=final_title, style_approach="gemini_3_flash", score=10.0)], final_title)
+        
+        return final_title
+    return None
+
+
 def generate_title_for_clip(
     clip: FinalClip,
     docs: List[WindowDoc],
@@ -460,18 +495,7 @@ def generate_title_for_clip(
     """
     
     # Extract streamer name from stream context
-    streamer_name = str(vod_id)
-    try:
-        import json
-        from pathlib import Path
-        sc_path = Path(f"data/ai_data/{vod_id}/{vod_id}_stream_context.json")
-        if sc_path.exists():
-            sc = json.loads(sc_path.read_text(encoding='utf-8'))
-            name = str(sc.get('streamer') or '').strip()
-            if name:
-                streamer_name = name
-    except Exception:
-        pass
+    streamer_name = _streamer_name_for_vod(vod_id)
     
     # Use centralized TitleService with Gemini 3 Flash
     # Load transcript directly from ai_data files using clip time range
@@ -483,13 +507,8 @@ def generate_title_for_clip(
             # Use the new range-based method that loads transcript from ai_data files
             title = service.generate_clip_title_for_range(clip.start, clip.end, streamer_name)
             
-            if title and not _is_invalid_title_text(title):
-                final_title = _to_title_case_preserve_acronyms(title)
-                print(f"✨ Generated: '{final_title}'")
-                
-                # Log for analysis
-                log_title_candidates(vod_id, clip.start, [TitleCandidate(title=final_title, style_approach="gemini_3_flash", score=10.0)], final_title)
-                
+            final_title = _finalize_title(vod_id, clip, title)
+            if final_title:
                 return final_title
                 
         except Exception as e:
@@ -509,7 +528,27 @@ def generate_titles_for_clips(
     concurrent: bool = False,
     max_workers: int = 4
 ) -> List[FinalClip]:
-    """Generate titles for multiple clips."""
+    """Generate titles for multiple clips.
+    
+    All clips are titled through one TitleService using batched prompts (many
+    clips per request, near-duplicate transcripts deduplicated, rejected titles
+    re-sent); see src.title_service. `concurrent`/`max_workers` only apply to
+    the per-clip fallback path; batch concurrency is set by TITLE_WORKERS.
+    """
+    if not clips:
+        return clips
+    
+    if TitleService is not None:
+        try:
+            streamer_name = _streamer_name_for_vod(vod_id)
+            print(f"🎯 Generating titles with Gemini 3 Flash for {len(clips)} clips...")
+            service = TitleService(vod_id)
+            titles = service.generate_clip_titles_for_ranges([(clip.start, clip.end) for clip in clips], streamer_name)
+            for clip, title in zip(clips, titles):
+                clip.title = _finalize_title(vod_id, clip, title) or "Highlight Clip"
+            return clips
+        except Exception as e:
+            print(f"⚠️ Batched title generation failed, titling clips one by one: {e}")
     
     if not concurrent:
         # Sequential processing
@@ -525,4 +564,4 @@ def generate_titles_for_clips(
         return clip
     
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        return list(executor.map(process_clip, clips))
\ No newline at end of file
+        return list(executor.map(process_clip, clips))
@@ -7,6 +7,7 @@ from typing import List, Tuple
 
 from .types import WindowDoc
 from .config import ClipConfig
+from .interval_index import index_for
 
 
 def unitize(values: List[float]) -> List[float]:
@@ -24,14 +25,14 @@ def moving_average(xs: List[float], window: int = 5) -> List[float]:
     n = len(xs)
     if n == 0:
         return []
+    prefix = [0.0]
+    for x in xs:
+        prefix.append(prefix[-1] + x)
     out = []
     for i in range(n):
         lo = max(0, i - window)
         hi = min(n, i + window + 1)
-        if lo >= hi:
-            out.append(xs[i])
-        else:
-            out.append(sum(xs[lo:hi]) / max(1, (hi - lo)))
+        out.append((prefix[hi] - prefix[lo]) / (hi - lo))
     return out
 
 
@@ -48,10 +49,8 @@ def clamp_window(start: float, end: float, min_dur: float = 30.0, max_dur: float
 
 
 def smoothed_positive_chat(docs: List[WindowDoc], chapter_id: str) -> Tuple[List[int], List[float]]:
-    """Get smoothed positive chat rate for a chapter."""
-    idxs = [i for i, d in enumerate(docs) if d.chapter_id == chapter_id]
-    series = [max(0.0, docs[i].chat_rate_z) for i in idxs]
-    return idxs, moving_average(series, window=3)
+    """Get smoothed positive chat rate for a chapter (memoized per docs list)."""
+    return index_for(docs).chapter_series(chapter_id, lambda series: moving_average(series, window=3))
 
 
 def apply_dynamic_padding(docs: List[WindowDoc], chapter_id: str, start_guess: float, end_guess: float) -> Tuple[float, float]:
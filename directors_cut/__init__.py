@@ -6,6 +6,7 @@ Modules:
 - downloader: concurrent Twitch segment downloader (1080p default)
 - ffmpeg_graph: FFmpeg xfade/audiograph builders with NVENC encode
 - render: high-level render orchestration with micro-batching
+- smart_render: transition-only rendering with stream-copied GOP interiors
 - title: helpers for generating a Director's Cut title
 """
 
@@ -14,6 +15,7 @@ __all__ = [
     "downloader",
     "ffmpeg_graph",
     "render",
+    "smart_render",
     "title",
 ]
 
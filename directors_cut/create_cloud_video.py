@@ -58,6 +58,7 @@ def main() -> None:
     parser.add_argument("--v-maxrate", type=str, default=None, help="Video maxrate, e.g. '5M'")
     parser.add_argument("--v-bufsize", type=str, default=None, help="Video bufsize, e.g. '10M'")
     parser.add_argument("--v-cq", type=str, default=None, help="NVENC constant quality, e.g. '22'")
+    parser.add_argument("--smart-render", dest="smart_render", action="store_true", default=None, help="Stream-copy untouched GOPs and re-encode only transitions (env DC_SMART_RENDER)")
     parser.set_defaults(audio_crossfade=True, use_existing=True, chat=True, keep_temp=False)
     args = parser.parse_args()
 
@@ -104,26 +105,8 @@ def main() -> None:
             print("No segments available (downloaded or existing)")
             raise SystemExit(1)
 
-    # Determine canvas size from first segment or env overrides
-    def _probe_resolution(p: Path) -> tuple[int, int]:
-        try:
-            ffprobe = 'ffprobe'
-            if os.name == 'nt' and (Path('executables/ffmpeg.exe')).exists():
-                ffprobe = str(Path('executables/ffmpeg.exe'))
-                ffprobe = ffprobe.replace('ffmpeg.exe', 'ffprobe.exe')
-            result = __import__('subprocess').run([
-                ffprobe, '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=width,height',
-                '-of', 'csv=p=0:s=x', str(p)
-            ], capture_output=True, text=True, timeout=10)
-            out = (result.stdout or '').strip()
-            if 'x' in out:
-                w_str, h_str = out.split('x')
-                w = max(2, int(w_str))
-                h = max(2, int(h_str))
-                return (w, h)
-        except Exception:
-            pass
-        return (1920, 1080)
+    # Determine canvas size from first segment or env overrides (shared ffprobe cache)
+    from directors_cut.ffmpeg_graph import _probe_resolution
 
     # Configure chat overlay
     env_enable = (os.getenv('DC_CHAT_ENABLE', '1').lower() in ('1', 'true', 'yes'))
@@ -400,13 +383,8 @@ def main() -> None:
         else:
             # Fallback: probe
             try:
-                ffprobe = 'ffprobe'
-                if os.name == 'nt' and (Path('executables/ffmpeg.exe')).exists():
-                    ffprobe = str(Path('executables/ffmpeg.exe')).replace('ffmpeg.exe', 'ffprobe.exe')
-                res = __import__('subprocess').run([
-                    ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', str(per_group_outputs[len(group_durations)])
-                ], capture_output=True, text=True, timeout=10)
-                d = float((res.stdout or '').strip() or '0')
+                from utils.media_probe import probe_media  # type: ignore
+                d = probe_media(per_group_outputs[len(group_durations)]).format_duration
                 group_durations.append(max(0.1, round(d, 3)))
             except Exception:
                 group_durations.append(0.1)
@@ -442,6 +420,7 @@ def main() -> None:
         v_maxrate=args.v_maxrate,
         v_bufsize=args.v_bufsize,
         v_cq=args.v_cq,
+        smart=args.smart_render,
     )
     if not ok:
         print("Render failed")
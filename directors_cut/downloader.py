@@ -9,12 +9,12 @@ from __future__ import annotations
 
 import concurrent.futures
 import os
-import subprocess
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional
 
 from src.config import config
+from utils import metrics
 
 
 def _resolve_twitch_cli() -> str:
@@ -102,7 +102,7 @@ def _download_one(vod_id: str, plan: SegmentPlan, quality_prefs: List[str]) -> b
         for attempt in range(1, 3):
             cmd = list(base_cmd)
             try:
-                res = subprocess.run(cmd, capture_output=True, text=True, timeout=1800, env=env)
+                res = metrics.run_subprocess(cmd, capture_output=True, text=True, timeout=1800, env=env)
             except FileNotFoundError:
                 return False
             if res.returncode == 0 and plan.out_path.exists() and plan.out_path.stat().st_size > 0:
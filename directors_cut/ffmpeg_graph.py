@@ -16,6 +16,9 @@ import subprocess
 from pathlib import Path
 from typing import List, Tuple
 
+from utils import metrics
+from utils.media_probe import probe_media, probe_many
+
 
 def _resolve_ffmpeg() -> str:
     try:
@@ -29,58 +32,126 @@ def _resolve_ffmpeg() -> str:
 
 def _probe_stream_duration_seconds(path: Path, selector: str) -> float:
     """Return stream duration seconds for selector like 'a:0' or 'v:0', 0.0 if unknown."""
-    try:
-        ffprobe = _resolve_ffmpeg().replace('ffmpeg', 'ffprobe')
-        res = subprocess.run(
-            [ffprobe, '-v', 'error', '-select_streams', selector, '-show_entries', 'stream=duration', '-of', 'default=noprint_wrappers=1:nokey=1', str(path)],
-            capture_output=True, text=True, timeout=10,
-        )
-        out = (res.stdout or '').strip()
-        return float(out) if out else 0.0
-    except Exception:
-        return 0.0
+    info = probe_media(path)
+    return info.audio_duration if selector.startswith('a') else info.video_duration
 
 
 def _probe_best_duration_seconds(path: Path) -> float:
     """Prefer audio stream duration, then video stream, then container format duration."""
-    try:
-        # Prefer audio stream
-        a = _probe_stream_duration_seconds(path, 'a:0')
-        if a and a > 0:
-            return a
-        # Then video stream
-        v = _probe_stream_duration_seconds(path, 'v:0')
-        if v and v > 0:
-            return v
-        # Finally, container format duration
-        ffprobe = _resolve_ffmpeg().replace('ffmpeg', 'ffprobe')
-        res = subprocess.run(
-            [ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', str(path)],
-            capture_output=True, text=True, timeout=10,
-        )
-        out = (res.stdout or '').strip()
-        fmt = float(out) if out else 0.0
-        return fmt if fmt > 0 else 0.0
-    except Exception:
-        return 0.0
+    return probe_media(path).best_duration()
 
 
 def _probe_resolution(path: Path) -> Tuple[int, int]:
     """Return (width,height) using ffprobe; fallback 1920x1080."""
+    info = probe_media(path)
+    if info.width and info.height:
+        return max(2, info.width), max(2, info.height)
+    return (1920, 1080)
+
+
+def encoder_args(
+    use_nvenc: bool,
+    v_bitrate: str | None = None,
+    v_maxrate: str | None = None,
+    v_bufsize: str | None = None,
+    v_cq: str | None = None,
+) -> List[str]:
+    """Video/audio encoder arguments shared by the Director's Cut render paths."""
+    if use_nvenc:
+        # Allow overriding NVENC rate control via CLI/env
+        vb = v_bitrate or os.getenv('DC_VBITRATE') or '5M'
+        mr = v_maxrate or os.getenv('DC_MAXRATE') or '10M'
+        bs = v_bufsize or os.getenv('DC_BUFSIZE') or '10M'
+        cq = v_cq or os.getenv('DC_CQ') or '18'
+        return [
+            '-c:v', 'h264_nvenc',
+            '-preset', 'p5',
+            '-rc', 'vbr',
+            '-cq', str(cq),
+            '-b:v', str(vb),
+            '-maxrate', str(mr),
+            '-bufsize', str(bs),
+            '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac',
+            '-b:a', '128k',
+            '-movflags', '+faststart',
+        ]
+    return [
+        '-c:v', 'libx264',
+        '-preset', 'veryfast',
+        '-crf', '20',
+        '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac',
+        '-b:a', '128k',
+        '-movflags', '+faststart',
+    ]
+
+
+def parse_segment_times(path: Path) -> Tuple[float, float] | None:
+    """Parse start and end times from segment filename like seg_0001_123-456.mp4"""
     try:
-        ffprobe = _resolve_ffmpeg().replace('ffmpeg', 'ffprobe')
-        res = subprocess.run(
-            [ffprobe, '-v', 'error', '-select_streams', 'v:0',
-             '-show_entries', 'stream=width,height', '-of', 'csv=p=0:s=x', str(path)],
-            capture_output=True, text=True, timeout=10,
-        )
-        out = (res.stdout or '').strip()
-        if 'x' in out:
-            w, h = map(int, out.split('x'))
-            return max(2, w), max(2, h)
+        name = path.stem
+        # Match pattern like seg_0001_123-456 or seg_0001_123-456_chat
+        m = re.search(r"_(\d+)-(\d+)(?:_chat)?$", name)
+        if not m:
+            return None
+        start = float(m.group(1))
+        end = float(m.group(2))
+        return (start, end)
     except Exception:
-        pass
-    return (1920, 1080)
+        return None
+
+
+def calculate_proper_offsets(inputs: List[Path], transition_duration: float) -> List[float]:
+    """
+    Calculate xfade offsets for merged groups - transitions only between groups.
+
+    Shared with smart_render so both render paths place transitions identically.
+    A negative entry means "use cumulative timing" for that transition.
+    """
+    if len(inputs) < 2:
+        return []
+
+    offsets = []
+
+    for i in range(1, len(inputs)):
+        prev_times = parse_segment_times(inputs[i-1])
+        curr_times = parse_segment_times(inputs[i])
+
+        if prev_times and curr_times:
+            prev_start, prev_end = prev_times
+            curr_start, curr_end = curr_times
+
+            # Calculate the time gap between merged groups
+            time_gap = curr_start - prev_end
+
+            # Treat as distinct groups only when time gap exceeds manifest merge threshold (15s)
+            if time_gap > 15.0:
+                # Start transition near the end of the first merged group
+                offset = max(0, (prev_end - prev_start) - transition_duration)
+            else:
+                # Flag to indicate we should fallback to cumulative timing
+                # (i.e., let original logic place the transition at the end of the previous
+                #  segment rather than the very start, which caused visible glitches).
+                offset = -1.0
+        else:
+            # Fallback: unknown timing — signal to use cumulative fallback instead of 0s
+            offset = -1.0
+
+        offsets.append(offset)
+
+    return offsets
+
+
+def normalize_video_filter(width: int, height: int) -> str:
+    """Per-input video normalisation used by every transition render (30fps, letterboxed to width x height)."""
+    return (
+        f"fps=30,scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,format=yuv420p,setsar=1"
+    )
+
+
+AUDIO_NORMALIZE_FILTER = "aformat=sample_fmts=s16:channel_layouts=stereo,aresample=48000:async=1:first_pts=0"
 
 
 def build_xfade_command(
@@ -104,6 +175,9 @@ def build_xfade_command(
         # Fast path: copy stream
         return [ffmpeg, '-y', '-i', str(inputs[0]), '-c', 'copy', str(output)]
 
+    # Probe all inputs once up front (cached by path/size/mtime across render paths)
+    probe_many(inputs)
+
     # Probe durations separately for video and audio; prefer stream durations
     def _probe_v(path: Path) -> float:
         v = _probe_stream_duration_seconds(path, 'v:0')
@@ -126,56 +200,6 @@ def build_xfade_command(
     choices = ['fade']
     selected = [rng.choice(choices) for _ in range(len(inputs) - 1)]
 
-    # Calculate proper offsets that account for time gaps between segments
-    def parse_segment_times(path: Path) -> Tuple[float, float] | None:
-        """Parse start and end times from segment filename like seg_0001_123-456.mp4"""
-        try:
-            name = path.stem
-            # Match pattern like seg_0001_123-456 or seg_0001_123-456_chat
-            m = re.search(r"_(\d+)-(\d+)(?:_chat)?$", name)
-            if not m:
-                return None
-            start = float(m.group(1))
-            end = float(m.group(2))
-            return (start, end)
-        except Exception:
-            return None
-
-    def calculate_proper_offsets(inputs: List[Path], transition_duration: float) -> List[float]:
-        """Calculate xfade offsets for merged groups - transitions only between groups."""
-        if len(inputs) < 2:
-            return []
-        
-        offsets = []
-        
-        for i in range(1, len(inputs)):
-            prev_times = parse_segment_times(inputs[i-1])
-            curr_times = parse_segment_times(inputs[i])
-            
-            if prev_times and curr_times:
-                prev_start, prev_end = prev_times
-                curr_start, curr_end = curr_times
-                
-                # Calculate the time gap between merged groups
-                time_gap = curr_start - prev_end
-                
-                # Treat as distinct groups only when time gap exceeds manifest merge threshold (15s)
-                if time_gap > 15.0:
-                    # Start transition near the end of the first merged group
-                    offset = max(0, (prev_end - prev_start) - transition_duration)
-                else:
-                    # Flag to indicate we should fallback to cumulative timing
-                    # (i.e., let original logic place the transition at the end of the previous
-                    #  segment rather than the very start, which caused visible glitches).
-                    offset = -1.0
-            else:
-                # Fallback: unknown timing — signal to use cumulative fallback instead of 0s
-                offset = -1.0
-            
-            offsets.append(offset)
-        
-        return offsets
-
     # Normalize streams and build xfade chain
     v_parts: List[str] = []
     a_parts: List[str] = []
@@ -187,28 +211,24 @@ def build_xfade_command(
         if i == 0:
             # First clip also gets trimmed to start earlier for consistent timing
             v_parts.append(
-                f"[{i}:v]trim=start={transition_duration},setpts=PTS-STARTPTS,fps=30,"
-                f"scale={tgt_w}:{tgt_h}:force_original_aspect_ratio=decrease,pad={tgt_w}:{tgt_h}:(ow-iw)/2:(oh-ih)/2,"
-                f"format=yuv420p,setsar=1[v{i}]"
+                f"[{i}:v]trim=start={transition_duration},setpts=PTS-STARTPTS,"
+                f"{normalize_video_filter(tgt_w, tgt_h)}[v{i}]"
             )
             a_parts.append(
                 f"[{i}:a]"
                 f"atrim=start={transition_duration},asetpts=PTS-STARTPTS,"
-                f"aformat=sample_fmts=s16:channel_layouts=stereo,"
-                f"aresample=48000:async=1:first_pts=0[a{i}]"
+                f"{AUDIO_NORMALIZE_FILTER}[a{i}]"
             )
         else:
             # Trim the first 'transition_duration' seconds so that this clip begins earlier and aligns post wipe
             v_parts.append(
-                f"[{i}:v]trim=start={transition_duration},setpts=PTS-STARTPTS,fps=30,"
-                f"scale={tgt_w}:{tgt_h}:force_original_aspect_ratio=decrease,pad={tgt_w}:{tgt_h}:(ow-iw)/2:(oh-ih)/2,"
-                f"format=yuv420p,setsar=1[v{i}]"
+                f"[{i}:v]trim=start={transition_duration},setpts=PTS-STARTPTS,"
+                f"{normalize_video_filter(tgt_w, tgt_h)}[v{i}]"
             )
             a_parts.append(
                 f"[{i}:a]"
                 f"atrim=start={transition_duration},asetpts=PTS-STARTPTS,"
-                f"aformat=sample_fmts=s16:channel_layouts=stereo,"
-                f"aresample=48000:async=1:first_pts=0[a{i}]"
+                f"{AUDIO_NORMALIZE_FILTER}[a{i}]"
             )
 
     prev_v = '[v0]'
@@ -325,35 +345,7 @@ def build_xfade_command(
         '-stats',
         '-stats_period', str(stats_period),
     ]
-    if use_nvenc:
-        # Allow overriding NVENC rate control via CLI/env
-        vb = v_bitrate or os.getenv('DC_VBITRATE') or '5M'
-        mr = v_maxrate or os.getenv('DC_MAXRATE') or '10M'
-        bs = v_bufsize or os.getenv('DC_BUFSIZE') or '10M'
-        cq = v_cq or os.getenv('DC_CQ') or '18'
-        cmd += [
-            '-c:v', 'h264_nvenc',
-            '-preset', 'p5',
-            '-rc', 'vbr',
-            '-cq', str(cq),
-            '-b:v', str(vb),
-            '-maxrate', str(mr),
-            '-bufsize', str(bs),
-            '-pix_fmt', 'yuv420p',
-            '-c:a', 'aac',
-            '-b:a', '128k',
-            '-movflags', '+faststart',
-        ]
-    else:
-        cmd += [
-            '-c:v', 'libx264',
-            '-preset', 'veryfast',
-            '-crf', '20',
-            '-pix_fmt', 'yuv420p',
-            '-c:a', 'aac',
-            '-b:a', '128k',
-            '-movflags', '+faststart',
-        ]
+    cmd += encoder_args(use_nvenc, v_bitrate=v_bitrate, v_maxrate=v_maxrate, v_bufsize=v_bufsize, v_cq=v_cq)
     cmd += [str(output)]
     return cmd
 
@@ -361,9 +353,9 @@ def build_xfade_command(
 def run_ffmpeg(cmd: List[str], timeout: int | None = None) -> Tuple[bool, str, str]:
     try:
         if timeout is None or timeout <= 0:
-            res = subprocess.run(cmd, capture_output=True, text=True)
+            res = metrics.run_subprocess(cmd, capture_output=True, text=True)
         else:
-            res = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            res = metrics.run_subprocess(cmd, capture_output=True, text=True, timeout=timeout)
         return (res.returncode == 0, res.stdout or '', res.stderr or '')
     except subprocess.TimeoutExpired:
         return (False, '', 'timeout')
@@ -376,6 +368,14 @@ def run_ffmpeg_streaming(cmd: List[str], timeout: int | None = None) -> Tuple[bo
 
     Returns (ok, '', '') to keep signature compatibility with callers that ignore output.
     """
+    with metrics.span("ffmpeg.stream") as s:
+        result = _run_ffmpeg_streaming(cmd, timeout)
+        if not result[0]:
+            s.status = "failed"
+        return result
+
+
+def _run_ffmpeg_streaming(cmd: List[str], timeout: int | None) -> Tuple[bool, str, str]:
     try:
         proc = subprocess.Popen(
             cmd,
@@ -13,6 +13,8 @@ from pathlib import Path
 import os
 from typing import Any, Dict, List, Optional
 
+from utils.interval_nms import merge_runs
+
 
 def _fix_timing_boundaries(ranges: List[Dict[str, Any]], gap_epsilon_s: float = 0.25) -> List[Dict[str, Any]]:
     if not ranges or len(ranges) <= 1:
@@ -37,20 +39,18 @@ def _merge_overlaps(ranges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     if not ranges or len(ranges) <= 1:
         return ranges
     merged: List[Dict[str, Any]] = []
-    for i, r in enumerate(ranges):
-        cur = dict(r)
-        if i > 0:
-            prev = merged[-1]
-            if float(cur["start"]) < float(prev["end"]):
-                prev["end"] = max(float(prev["end"]), float(cur["end"]))
-                prev["duration"] = float(prev["end"]) - float(prev["start"])
-                # best-effort carry keys
-                if prev.get("summary") and cur.get("summary"):
-                    prev["summary"] = f"{prev['summary']} → {cur['summary']}"
-                if prev.get("burst_ids") and cur.get("burst_ids"):
-                    prev["burst_ids"] = list(prev["burst_ids"]) + list(cur["burst_ids"])
-                continue
-        merged.append(cur)
+    for run in merge_runs([(float(r["start"]), float(r["end"])) for r in ranges]):
+        prev = dict(ranges[run[0]])
+        for i in run[1:]:
+            cur = ranges[i]
+            prev["end"] = max(float(prev["end"]), float(cur["end"]))
+            prev["duration"] = float(prev["end"]) - float(prev["start"])
+            # best-effort carry keys
+            if prev.get("summary") and cur.get("summary"):
+                prev["summary"] = f"{prev['summary']} → {cur['summary']}"
+            if prev.get("burst_ids") and cur.get("burst_ids"):
+                prev["burst_ids"] = list(prev["burst_ids"]) + list(cur["burst_ids"])
+        merged.append(prev)
     return merged
 
 
@@ -5,6 +5,7 @@ Render orchestrator for Director's Cut.
 Supports:
 - Direct single-graph xfade render
 - Micro-batch merging to avoid giant filter graphs
+- Smart render: stream-copy GOP interiors, re-encode only transitions
 """
 
 from __future__ import annotations
@@ -13,9 +14,10 @@ import os
 from pathlib import Path
 from typing import List, Optional
 
-import subprocess
+from utils.media_probe import probe_media, probe_many
 
 from .ffmpeg_graph import build_xfade_command, run_ffmpeg, run_ffmpeg_streaming
+from .smart_render import render_smart
 
 
 def _concat_copy(inputs: List[Path], output: Path, timeout: int | None = None) -> bool:
@@ -46,32 +48,10 @@ def _concat_copy(inputs: List[Path], output: Path, timeout: int | None = None) -
 def _concat_encode(inputs: List[Path], output: Path, use_nvenc: bool = True, timeout: int | None = None) -> bool:
     try:
         ffmpeg = 'executables/ffmpeg.exe' if os.name == 'nt' and Path('executables/ffmpeg.exe').exists() else 'ffmpeg'
-        ffprobe = str(Path('executables/ffmpeg.exe')).replace('ffmpeg.exe', 'ffprobe.exe') if os.name == 'nt' and Path('executables/ffmpeg.exe').exists() else 'ffprobe'
 
         def _probe_fps(p: Path) -> float:
-            try:
-                import subprocess
-                r = subprocess.run([ffprobe, '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=avg_frame_rate,r_frame_rate', '-of', 'csv=p=0', str(p)], capture_output=True, text=True, timeout=10)
-                out = (r.stdout or '').strip().split('\n')[0]
-                parts = out.split(',') if out else []
-                def _to(s: str) -> float:
-                    if not s:
-                        return 30.0
-                    if '/' in s:
-                        a, b = s.split('/', 1)
-                        try:
-                            return float(a) / float(b)
-                        except Exception:
-                            return 30.0
-                    try:
-                        return float(s)
-                    except Exception:
-                        return 30.0
-                avg = _to(parts[0] if len(parts) >= 1 else '')
-                rf = _to(parts[1] if len(parts) >= 2 else '')
-                return avg if avg > 0.1 else (rf if rf > 0.1 else 30.0)
-            except Exception:
-                return 30.0
+            fps = probe_media(p).fps
+            return fps if fps > 0.1 else 30.0
 
         native_fps = _probe_fps(inputs[0]) if inputs else 30.0
         rounded_fps = int(round(native_fps))
@@ -115,21 +95,7 @@ def _concat_encode(inputs: List[Path], output: Path, use_nvenc: bool = True, tim
 
 def _has_audio(path: Path) -> bool:
     """Return True if the file contains at least one audio stream."""
-    try:
-        # Resolve ffprobe path correctly on Windows
-        if os.name == 'nt' and Path('executables/ffmpeg.exe').exists():
-            ffprobe = str(Path('executables/ffmpeg.exe')).replace('ffmpeg.exe', 'ffprobe.exe')
-        else:
-            ffprobe = 'ffprobe'
-        # check for any audio stream; csv output is empty when none found
-        res = subprocess.run(
-            [ffprobe, '-v', 'error', '-select_streams', 'a', '-show_entries', 'stream=index',
-             '-of', 'csv=p=0', str(path)],
-            capture_output=True, text=True, timeout=10,
-        )
-        return bool((res.stdout or '').strip())
-    except Exception:
-        return False
+    return probe_media(path).has_audio
 
 
 def render_with_transitions(
@@ -149,12 +115,23 @@ def render_with_transitions(
     v_maxrate: Optional[str] = None,
     v_bufsize: Optional[str] = None,
     v_cq: Optional[str] = None,
+    smart: Optional[bool] = None,
 ) -> bool:
+    """
+    Render inputs joined by xfade transitions.
+
+    smart=True (or env DC_SMART_RENDER=true) first tries render_smart, which
+    stream-copies untouched GOPs and re-encodes only transition windows; any
+    failure there falls back to the full xfade path below.
+    """
     if not inputs:
         return False
+    if smart is None:
+        smart = os.getenv('DC_SMART_RENDER', 'false').lower() in ('1', 'true', 'yes')
     # ------------------------------------------------------------
     # Disable audio cross-fade automatically when any clip lacks audio
     # ------------------------------------------------------------
+    probe_many(inputs)
     if audio_crossfade and any(not _has_audio(p) for p in inputs):
         print("⚠️  At least one input has no audio track – disabling audio cross-fades to avoid xfade failure")
         audio_crossfade = False
@@ -162,6 +139,11 @@ def render_with_transitions(
     if len(inputs) == 1:
         return _concat_copy(inputs, output, timeout=timeout)
 
+    if smart:
+        if render_smart(inputs, output, transition_duration=transition_duration, audio_crossfade=audio_crossfade, use_nvenc=use_nvenc, durations_override=durations_override, audio_transition_duration=audio_transition_duration, timeout=timeout, v_bitrate=v_bitrate, v_maxrate=v_maxrate, v_bufsize=v_bufsize, v_cq=v_cq):
+            return True
+        print("⚠️  Smart render unavailable – falling back to full xfade render")
+
     # If manageable number of inputs, try single graph first
     if not batch_size or len(inputs) <= batch_size:
         cmd = build_xfade_command(inputs, output, seed=seed, transition_duration=transition_duration, audio_crossfade=audio_crossfade, use_nvenc=use_nvenc, durations_override=durations_override, debug=debug, audio_transition_duration=audio_transition_duration, debug_pts=debug_pts, v_bitrate=v_bitrate, v_maxrate=v_maxrate, v_bufsize=v_bufsize, v_cq=v_cq)
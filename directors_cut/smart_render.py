@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Transition-only ("smart") rendering for Director's Cut.
+
+Instead of pushing every frame through one xfade graph, each input is split
+at keyframes:
+
+  - the GOP-aligned interior is stream-copied untouched
+  - only the transition windows (tail of one input + head of the next) and the
+    partial GOPs around them are re-encoded
+
+All pieces are written as MPEG-TS (in-band SPS/PPS) and stitched with a
+concat copy, so render time scales with the number of transitions instead of
+total duration.
+
+Timeline semantics match build_xfade_command: every input drops its first
+`transition_duration` seconds, consecutive inputs overlap by
+`transition_duration` with a fade, and filename-derived offsets
+(calculate_proper_offsets) move a transition exactly as they do there.
+Re-encoded pieces go through the same 30fps / scale+pad / 48k stereo
+normalisation as the full path.
+
+Stream-copied GOPs are spliced next to re-encoded ones, so every input must
+already look like the full path's output: h264 yuv420p at 30fps with one
+shared resolution, profile and level (the encoder is pinned to that profile
+and level so the parameter sets agree), and aac 48k stereo audio. Anything
+else makes render_smart return False and the caller falls back to the full
+xfade render.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.media_probe import MediaInfo, probe_many
+
+from .ffmpeg_graph import (
+    AUDIO_NORMALIZE_FILTER,
+    _resolve_ffmpeg,
+    calculate_proper_offsets,
+    encoder_args,
+    normalize_video_filter,
+    run_ffmpeg,
+)
+
+
+# Interiors shorter than this are folded into the neighbouring transition chunk
+MIN_COPY_SECONDS = float(os.getenv('DC_SMART_MIN_COPY', '1.0'))
+
+# ffprobe profile name -> encoder -profile:v value
+_H264_PROFILES = {
+    'Constrained Baseline': 'baseline',
+    'Baseline': 'baseline',
+    'Main': 'main',
+    'High': 'high',
+}
+
+
+@dataclass
+class _Part:
+    """A [start, end) slice of one input, in source seconds."""
+    idx: int
+    start: float
+    end: float
+
+    @property
+    def length(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class _Piece:
+    """One output piece: either a stream copy of a single part or an encoded xfade chain."""
+    kind: str  # 'copy' | 'encode'
+    parts: List[_Part]
+
+
+def _stream_layout(info: MediaInfo) -> Dict:
+    """Codec/profile/size/fps/audio layout that must match across inputs for a concat copy."""
+    layout: Dict = {}
+    if info.video_codec:
+        layout['video'] = {
+            'codec': info.video_codec,
+            'profile': info.profile,
+            'level': info.level,
+            'pix_fmt': info.pix_fmt,
+            'width': info.width,
+            'height': info.height,
+            'fps': info.fps_rational or '30/1',
+        }
+    if info.has_audio:
+        layout['audio'] = {
+            'codec': info.audio_codec,
+            'sample_rate': info.sample_rate or '48000',
+            'channels': info.channels or 2,
+        }
+    return layout
+
+
+def _compatible(infos: List[Dict]) -> bool:
+    """
+    All inputs must be identical h264 streams in the full path's output format
+    (yuv420p, 30fps, known profile and level) with aac 48k stereo audio, so
+    copied GOPs and re-encoded pieces can share one stream.
+    """
+    if not infos or any('video' not in i for i in infos):
+        return False
+    v0 = infos[0]['video']
+    if v0.get('codec') != 'h264' or v0.get('profile') not in _H264_PROFILES or not v0.get('level'):
+        return False
+    if v0.get('pix_fmt') != 'yuv420p' or v0.get('fps') != '30/1':
+        return False
+    a0 = infos[0].get('audio')
+    for info in infos[1:]:
+        if info['video'] != v0:
+            return False
+        a = info.get('audio')
+        if (a is None) != (a0 is None):
+            return False
+        if a is not None and (a.get('sample_rate'), a.get('channels')) != (a0.get('sample_rate'), a0.get('channels')):
+            return False
+    if a0 is not None and (a0.get('codec'), a0.get('sample_rate'), a0.get('channels')) != ('aac', '48000', 2):
+        return False
+    return True
+
+
+def plan_pieces(
+    durations: List[float],
+    keyframes: List[List[float]],
+    transition_duration: float,
+    min_copy: float = MIN_COPY_SECONDS,
+    offsets: Optional[List[float]] = None,
+) -> Optional[List[_Piece]]:
+    """
+    Split the timeline into copy and encode pieces.
+
+    Input i contributes [td, e_i] in its own seconds (keyframes must be
+    relative to the start of the file, as -ss is). e_i is the end of the input
+    (d_i) unless offsets[i] >= 0 places transition i+1 earlier on the output
+    timeline, as calculate_proper_offsets does for the full path. Its interior
+    copy window runs from the first keyframe after its incoming transition to
+    the last keyframe before its outgoing one (the last input copies to its
+    end). Everything between two interiors becomes one encoded chunk of
+    xfaded parts.
+
+    Returns None when an input is too short to carry its transitions or an
+    offset would need more of an input than it has.
+    """
+    td = float(transition_duration)
+    n = len(durations)
+    pieces: List[_Piece] = []
+    pending: List[_Part] = []
+
+    def _flush() -> None:
+        parts = [p for p in pending if p.length > 1e-3]
+        if parts:
+            pieces.append(_Piece('encode', parts))
+        pending.clear()
+
+    # Where each input stops contributing, following the full path's xfade offsets
+    ends: List[float] = []
+    placed = 0.0  # output time at which the current input starts
+    for i in range(n):
+        length = float(durations[i]) - td
+        if i == n - 1:
+            ends.append(float(durations[i]))
+            break
+        off = offsets[i] if offsets and i < len(offsets) and offsets[i] >= 0 else placed + length - td
+        visible = off + td - placed
+        if visible > length + 1e-3:
+            return None
+        ends.append(td + visible)
+        placed = off
+
+    for i in range(n):
+        start, end = td, ends[i]
+        has_in = i > 0
+        has_out = i < n - 1
+        needed = td * (int(has_in) + int(has_out))
+        if end - start < max(needed, td):
+            return None
+
+        lo = start + (td if has_in else 0.0)
+        hi = end - td if has_out else end
+        keys = keyframes[i] if i < len(keyframes) else []
+        a = next((k for k in keys if k >= lo - 1e-3), None)
+        if has_out:
+            b = next((k for k in reversed(keys) if k <= hi + 1e-3), None)
+        else:
+            b = end
+
+        if a is None or b is None or b - a < min_copy:
+            pending.append(_Part(i, start, end))
+            continue
+
+        pending.append(_Part(i, start, a))
+        _flush()
+        pieces.append(_Piece('copy', [_Part(i, a, b)]))
+        if has_out:
+            pending.append(_Part(i, b, end))
+    _flush()
+    return pieces
+
+
+def _copy_cmd(src: Path, part: _Part, out: Path, has_audio: bool) -> List[str]:
+    cmd = [_resolve_ffmpeg(), '-y', '-v', 'error',
+           # Nudge past the keyframe so the demuxer never lands on the previous GOP
+           '-ss', f"{part.start + 0.001:.3f}", '-i', str(src),
+           '-t', f"{part.length:.3f}", '-map', '0:v:0']
+    if has_audio:
+        cmd += ['-map', '0:a:0']
+    cmd += ['-c', 'copy', '-bsf:v', 'h264_mp4toannexb', '-avoid_negative_ts', 'make_zero',
+            '-f', 'mpegts', str(out)]
+    return cmd
+
+
+def _encode_cmd(
+    inputs: List[Path],
+    parts: List[_Part],
+    out: Path,
+    transition_duration: float,
+    audio_crossfade: bool,
+    audio_transition_duration: float,
+    info: Dict,
+    use_nvenc: bool,
+    enc_kwargs: Dict,
+) -> List[str]:
+    """Encode an xfade chain over parts, normalised like the full path and matching the source h264 profile."""
+    td = float(transition_duration)
+    vinfo = info['video']
+    ainfo = info.get('audio')
+    cmd: List[str] = [_resolve_ffmpeg(), '-y', '-v', 'error']
+    for p in parts:
+        cmd += ['-ss', f"{p.start:.3f}", '-t', f"{p.length:.3f}", '-i', str(inputs[p.idx])]
+
+    filters: List[str] = []
+    for k in range(len(parts)):
+        # Same normalisation as build_xfade_command (inputs are already 30fps at this size)
+        filters.append(f"[{k}:v]setpts=PTS-STARTPTS,{normalize_video_filter(vinfo['width'], vinfo['height'])}[v{k}]")
+        if ainfo is not None:
+            filters.append(f"[{k}:a]asetpts=PTS-STARTPTS,{AUDIO_NORMALIZE_FILTER}[a{k}]")
+
+    prev_v, prev_a = '[v0]', '[a0]'
+    composite = parts[0].length
+    hard_cut_audio: List[str] = []
+    for k in range(1, len(parts)):
+        offset = max(0.0, composite - td)
+        filters.append(f"{prev_v}[v{k}]xfade=transition=fade:duration={td}:offset={offset:.3f}[vx{k}]")
+        prev_v = f"[vx{k}]"
+        if ainfo is not None:
+            if audio_crossfade:
+                filters.append(f"{prev_a}[a{k}]acrossfade=d={audio_transition_duration}[ax{k}]")
+                prev_a = f"[ax{k}]"
+            else:
+                # Hard cut where the fade starts so audio stays aligned to the xfade offset
+                keep = max(0.0, parts[k - 1].length - td)
+                filters.append(f"[a{k - 1}]atrim=0:{keep:.3f},asetpts=PTS-STARTPTS[at{k - 1}]")
+                hard_cut_audio.append(f"[at{k - 1}]")
+        composite += parts[k].length - td
+    if ainfo is not None and not audio_crossfade and len(parts) > 1:
+        labels = ''.join(hard_cut_audio) + f"[a{len(parts) - 1}]"
+        filters.append(f"{labels}concat=n={len(parts)}:v=0:a=1[aout]")
+        prev_a = '[aout]'
+
+    cmd += ['-filter_complex', ';'.join(filters), '-map', prev_v]
+    if ainfo is not None:
+        cmd += ['-map', prev_a, '-ar', '48000', '-ac', '2']
+    cmd += ['-r', '30']
+    cmd += encoder_args(use_nvenc, **enc_kwargs)
+    # Pin profile/level to the source so the in-band SPS/PPS agree with the copied GOPs
+    level = int(vinfo['level'])
+    cmd += ['-profile:v', _H264_PROFILES[vinfo['profile']], '-level', f"{level // 10}.{level % 10}"]
+    cmd += ['-bsf:v', 'h264_mp4toannexb', '-f', 'mpegts', str(out)]
+    return cmd
+
+
+def _concat_pieces(pieces: List[Path], output: Path, has_audio: bool, timeout: Optional[int]) -> bool:
+    concat_list = output.parent / f"{output.stem}_smart_concat.txt"
+    with concat_list.open('w', encoding='utf-8') as f:
+        for p in pieces:
+            f.write(f"file '{p.absolute()}'\n")
+    cmd = [_resolve_ffmpeg(), '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', str(concat_list), '-c', 'copy']
+    if has_audio:
+        cmd += ['-bsf:a', 'aac_adtstoasc']
+    cmd += ['-movflags', '+faststart', str(output)]
+    ok, _, err = run_ffmpeg(cmd, timeout=timeout)
+    try:
+        concat_list.unlink()
+    except Exception:
+        pass
+    if not ok:
+        print(f"❌ smart render concat failed: {err[-400:]}")
+    return ok and output.exists()
+
+
+def render_smart(
+    inputs: List[Path],
+    output: Path,
+    transition_duration: float = 1.0,
+    audio_crossfade: bool = False,
+    use_nvenc: bool = True,
+    durations_override: Optional[List[float]] = None,
+    audio_transition_duration: Optional[float] = None,
+    timeout: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    **enc_kwargs,
+) -> bool:
+    """
+    Stream-copy GOP-aligned interiors and re-encode only transition windows.
+
+    Returns False (without touching output) when inputs are incompatible or any
+    piece fails, so callers can fall back to render_with_transitions' full path.
+    """
+    if len(inputs) < 2:
+        return False
+    # One combined probe per input (streams + keyframes), shared with the other render paths
+    probed = probe_many(inputs, keyframes=True)
+    media = [probed[Path(p)] for p in inputs]
+    infos = [_stream_layout(m) for m in media]
+    if not _compatible(infos):
+        print("ℹ️  Smart render: inputs differ in codec/profile/size/fps/audio or are not 30fps h264 – using full render")
+        return False
+    if durations_override and len(durations_override) == len(inputs):
+        durations = [max(0.1, float(d)) for d in durations_override]
+    else:
+        durations = [max(0.1, m.best_duration()) for m in media]
+    # Never copy past the real end of a file
+    durations = [min(d, m.best_duration() or d) for d, m in zip(durations, media)]
+    # ffprobe reports absolute pts; -ss seeks relative to the file's start_time
+    keyframes = [[k - m.start_time for k in (m.keyframes or [])] for m in media]
+    offsets = calculate_proper_offsets(inputs, transition_duration)
+
+    pieces = plan_pieces(durations, keyframes, transition_duration, offsets=offsets)
+    if not pieces:
+        print("ℹ️  Smart render: an input is shorter than its transitions/offsets – using full render")
+        return False
+
+    has_audio = infos[0].get('audio') is not None
+    audio_td = float(audio_transition_duration) if audio_transition_duration is not None else float(transition_duration)
+    work_dir = output.parent / f"{output.stem}_smart"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    piece_paths = [work_dir / f"piece_{k:04d}.ts" for k in range(len(pieces))]
+
+    encoded = sum(1 for p in pieces if p.kind == 'encode')
+    copied = sum(p.parts[0].length for p in pieces if p.kind == 'copy')
+    total = sum(part.length for p in pieces for part in p.parts) - transition_duration * (len(inputs) - 1)
+    print(f"✂️  Smart render: {len(pieces)} pieces, {encoded} re-encoded, "
+          f"{copied:.1f}s of {max(total, 0.0):.1f}s stream-copied")
+
+    def _run_piece(k: int) -> bool:
+        piece = pieces[k]
+        out = piece_paths[k]
+        if piece.kind == 'copy':
+            part = piece.parts[0]
+            cmd = _copy_cmd(inputs[part.idx], part, out, has_audio)
+        else:
+            cmd = _encode_cmd(inputs, piece.parts, out, transition_duration, audio_crossfade,
+                              audio_td, infos[0], use_nvenc, enc_kwargs)
+        ok, _, err = run_ffmpeg(cmd, timeout=timeout)
+        if not ok and piece.kind == 'encode' and use_nvenc:
+            cmd = _encode_cmd(inputs, piece.parts, out, transition_duration, audio_crossfade,
+                              audio_td, infos[0], False, enc_kwargs)
+            ok, _, err = run_ffmpeg(cmd, timeout=timeout)
+        if not ok:
+            print(f"❌ smart render piece {k} ({piece.kind}) failed: {err[-400:]}")
+        return ok and out.exists()
+
+    # NVENC sessions are limited on consumer GPUs; keep encode parallelism small by default
+    workers = max(1, int(max_workers or os.getenv('DC_SMART_WORKERS', '2')))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_run_piece, range(len(pieces))))
+
+    ok = all(results) and _concat_pieces(piece_paths, output, has_audio, timeout)
+    for p in piece_paths:
+        try:
+            if p.exists():
+                p.unlink()
+        except Exception:
+            pass
+    try:
+        work_dir.rmdir()
+    except Exception:
+        pass
+    return ok
@@ -99,8 +99,8 @@ def upload_arc_with_error_tracking(
                 # Mark as completed in scheduler
                 try:
                     from utils.upload_scheduler import UploadScheduler
-                    scheduler = UploadScheduler()
-                    scheduler.mark_upload_completed(vod_id, arc_idx, ch)
+                    with UploadScheduler() as scheduler:
+                        scheduler.mark_upload_completed(vod_id, arc_idx, ch)
                 except Exception:
                     pass
             else:
@@ -132,15 +132,15 @@ def upload_arc_with_error_tracking(
             if last_error_type in ("quota_exceeded", "retriable"):
                 try:
                     from utils.upload_scheduler import UploadScheduler
-                    scheduler = UploadScheduler()
-                    retry_hours = 24 if last_error_type == "quota_exceeded" else 6
-                    scheduler.add_failed_upload(
-                        vod_id=vod_id,
-                        arc_index=arc_idx,
-                        reason=last_error_message,
-                        channel=ch,
-                        retry_after_hours=retry_hours
-                    )
+                    with UploadScheduler() as scheduler:
+                        retry_hours = 24 if last_error_type == "quota_exceeded" else 6
+                        scheduler.add_failed_upload(
+                            vod_id=vod_id,
+                            arc_index=arc_idx,
+                            reason=last_error_message,
+                            channel=ch,
+                            retry_after_hours=retry_hours
+                        )
                 except Exception as sched_err:
                     print(f"⚠️  Failed to schedule retry: {sched_err}")
     
@@ -249,14 +249,14 @@ def main() -> None:
                         for ch in channel_keys:
                             try:
                                 from utils.upload_scheduler import UploadScheduler
-                                scheduler = UploadScheduler()
-                                scheduler.add_failed_upload(
-                                    vod_id=vod_id,
-                                    arc_index=remaining_idx,
-                                    reason="Quota exceeded on previous arc",
-                                    channel=ch,
-                                    retry_after_hours=24
-                                )
+                                with UploadScheduler() as scheduler:
+                                    scheduler.add_failed_upload(
+                                        vod_id=vod_id,
+                                        arc_index=remaining_idx,
+                                        reason="Quota exceeded on previous arc",
+                                        channel=ch,
+                                        retry_after_hours=24
+                                    )
                             except Exception:
                                 pass
                 break  # Stop trying more arcs
@@ -51,7 +51,7 @@ import subprocess
 import os
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, Future
+from concurrent.futures import Future
 # Shared chat utilities (rendering and JSON prefetch). These supersede legacy functions below.
 from chat_overlay.renderer import render_chat_segment, ensure_chat_json  # type: ignore
 
@@ -81,6 +81,9 @@ except ImportError as e:
     print(f"🔧 DEBUG: Python path: {sys.path[:5]}")
     sys.exit(1)
 
+from utils import metrics
+from utils.clip_catalog import ClipCatalog, clip_file_stem
+
 
 def apply_clips_per_hour_limit(clips: List[Dict]) -> List[Dict]:
     """Apply maximum clips per hour limit to prevent excessive clip generation"""
@@ -724,14 +727,12 @@ def convert_to_shorts_format(input_path: Path, output_path: Path, vod_id: Option
         except Exception:
             pass
 
-        # Auto-detect NVENC availability once per run; disable if not present
+        # Auto-detect NVENC availability (probed once per host, cached); disable if not present
         nvenc_available = False
         if not force_cpu:
             try:
-                probe_cmd = [ffmpeg_bin, "-hide_banner", "-encoders"]
-                probe = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=15)
-                enc_list = (probe.stdout or "") + (probe.stderr or "")
-                nvenc_available = ("h264_nvenc" in enc_list or "nvenc" in enc_list.lower())
+                from clip_creation.conversion_pool import has_encoder
+                nvenc_available = has_encoder("h264_nvenc", ffmpeg_bin)
             except Exception:
                 nvenc_available = False
         if not nvenc_available:
@@ -775,7 +776,7 @@ def convert_to_shorts_format(input_path: Path, output_path: Path, vod_id: Option
                 str(output_path)
             ]
             try:
-                result_nvenc = subprocess.run(nvenc_cmd, capture_output=True, text=True, timeout=300)
+                result_nvenc = metrics.run_subprocess(nvenc_cmd, capture_output=True, text=True, timeout=300)
             except FileNotFoundError:
                 result_nvenc = subprocess.CompletedProcess(nvenc_cmd, returncode=127, stdout="", stderr="ffmpeg not found")
             if result_nvenc.returncode == 0:
@@ -817,7 +818,7 @@ def convert_to_shorts_format(input_path: Path, output_path: Path, vod_id: Option
         ]
         try:
             # Robust timeout to avoid hanging runs during local tests
-            result_cpu = subprocess.run(cpu_cmd, capture_output=True, text=True, timeout=600)
+            result_cpu = metrics.run_subprocess(cpu_cmd, capture_output=True, text=True, timeout=600)
         except FileNotFoundError as e:
             print(f"X FFmpeg not found: {e}")
             return False
@@ -834,46 +835,9 @@ def convert_to_shorts_format(input_path: Path, output_path: Path, vod_id: Option
         return False
 
 def _resolve_twitch_cli_executable() -> str:
-    """Resolve TwitchDownloaderCLI executable path"""
-    # Try environment variable first
-    override = os.getenv("TWITCH_DOWNLOADER_PATH")
-    if override and Path(override).exists():
-        return override
-    
-    # Try common locations
-    possible_paths = [
-        os.getenv("TWITCH_DOWNLOADER_PATH", ""),
-        str(Path(__file__).parent.parent / "executables" / "TwitchDownloaderCLI.exe"),
-        "C:/Users/bread/Documents/StreamSniped/TwitchDownloaderCLI.exe",
-        "TwitchDownloaderCLI.exe",
-        "./TwitchDownloaderCLI.exe",
-        "TwitchDownloaderCLI",
-        "./TwitchDownloaderCLI",
-        "twitch-downloader",
-        "./twitch-downloader"
-    ]
-    
-    for path in possible_paths:
-        try:
-            if not path:
-                continue
-            result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10)
-            if "TwitchDownloaderCLI" in result.stdout or "TwitchDownloaderCLI" in result.stderr:
-                print(f" Found TwitchDownloaderCLI: {path}")
-                return path
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            continue
-    
-    # Try with shell=True for Windows
-    try:
-        result = subprocess.run("TwitchDownloaderCLI --version", shell=True, capture_output=True, text=True, timeout=10)
-        if "TwitchDownloaderCLI" in result.stdout or "TwitchDownloaderCLI" in result.stderr:
-            print(" Found TwitchDownloaderCLI via shell")
-            return "TwitchDownloaderCLI"
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        pass
-    
-    raise FileNotFoundError("TwitchDownloaderCLI not found. Please install it first.")
+    """Resolve TwitchDownloaderCLI executable path (shared, memoized resolver)"""
+    from chat_overlay.renderer import _resolve_twitch_cli_executable as _resolve_shared
+    return _resolve_shared()
 
 
 def download_single_clip(vod_id: str, start_time: float, end_time: float, output_path: Path, quality: str = "1080p") -> bool:
@@ -935,7 +899,7 @@ def download_single_clip(vod_id: str, start_time: float, end_time: float, output
         last_err = ""
         while attempts < 3:
             attempts += 1
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=1800, env=env)
+            result = metrics.run_subprocess(cmd, capture_output=True, text=True, timeout=1800, env=env)
             if result.returncode == 0 and output_path.exists():
                 file_size = output_path.stat().st_size / (1024 * 1024)
                 print(f" Clip downloaded: {output_path.name} ({file_size:.1f}MB)")
@@ -1077,11 +1041,35 @@ def create_individual_clips(
     
     created_clips = 0
     produced_files: list[str] = []
-    
-    # Pipelined download + convert with chat prefetch
-    dl_pool = ThreadPoolExecutor(max_workers=1)
-    chat_pool = ThreadPoolExecutor(max_workers=int(os.getenv("CHAT_PREFETCH_WORKERS", "2")))
-    pending: Optional[Tuple[Future, Dict]] = None
+    # Title/index -> file catalog used by the upload step (updated per clip below)
+    catalog = ClipCatalog.load(vod_id, clips_dir)
+
+    # Treat disable-s3 or local test mode as local workflow too
+    local_mode = (
+        os.getenv('GPU_PROCESSING_MODE', 'hybrid') == 'local_only' or
+        os.getenv('DISABLE_S3_UPLOADS', '').lower() in ('1', 'true', 'yes') or
+        os.getenv('LOCAL_TEST_MODE', '').lower() in ('1', 'true', 'yes')
+    )
+
+    # Pipelined download → convert → upload. Downloads stay serial (bandwidth-bound);
+    # each conversion starts as soon as its download and chat prefetch finish and
+    # runs in a pool sized to the host (see clip_creation.conversion_pool).
+    from clip_creation.conversion_pool import ConversionScheduler, default_convert_workers, has_encoder
+    force_cpu = os.getenv('FORCE_CPU_ENCODING', 'false').lower() in ['true', '1', 'yes']
+    ffmpeg_bin = "ffmpeg"
+    if os.name == 'nt':
+        candidate = Path(__file__).parent.parent / "executables" / "ffmpeg.exe"
+        if candidate.exists():
+            ffmpeg_bin = str(candidate)
+    use_nvenc = (not force_cpu) and has_encoder("h264_nvenc", ffmpeg_bin)
+    convert_workers = default_convert_workers(use_nvenc)
+    print(f"🧵 Conversion pool: {convert_workers} workers ({'NVENC' if use_nvenc else 'CPU'}, FFMPEG_THREADS={os.getenv('FFMPEG_THREADS', '2')})")
+    scheduler = ConversionScheduler(
+        convert_workers=convert_workers,
+        download_workers=int(os.getenv("CLIP_DL_WORKERS", "1")),
+        chat_workers=int(os.getenv("CHAT_PREFETCH_WORKERS", "2")),
+    )
+    jobs: List[Tuple[Future, Dict]] = []
     try:
         for i, (title_data, clip_data) in enumerate(zip(clip_titles, clips_data), 1):
             if max_clips is not None and i > max_clips:
@@ -1106,9 +1094,7 @@ def create_individual_clips(
             print(f"📝 Title: {clip_title}")
             print(f"⏱️ Duration: {duration:.1f}s (score: {score:.1f})")
             
-            safe_filename = "".join(c for c in clip_title if c.isalnum() or c in (' ', '_', '-')).rstrip()
-            safe_filename = safe_filename.replace(' ', '_')
-            clip_filename = f"{safe_filename}.mp4"
+            clip_filename = f"{clip_file_stem(clip_title)}.mp4"
             clip_path = clips_dir / clip_filename
             try:
                 if clip_path.exists():
@@ -1122,93 +1108,61 @@ def create_individual_clips(
             except Exception:
                 pass
 
-            # Start prefetch of chat JSON in background
+            # Prefetch chat JSON and download in background; convert once both are done.
+            # Wait for a slot first so downloads never run far ahead of conversions.
+            scheduler.wait_for_slot()
             chat_dir = clips_dir / "chat_segments"
-            _ = chat_pool.submit(ensure_chat_json, vod_id, start_time, end_time, chat_dir)
-
-            if pending is None:
-                fut = dl_pool.submit(download_single_clip, vod_id, start_time, end_time, temp_path, quality)
-                pending = (fut, {"clip_path": clip_path, "temp_path": temp_path, "clip_title": clip_title, "start_time": start_time, "end_time": end_time, "anchor_time": anchor_time})
-                continue
-
-            # Process previous while downloading current
-            prev_fut, ctx = pending
-            fut = dl_pool.submit(download_single_clip, vod_id, start_time, end_time, temp_path, quality)
-            ok = prev_fut.result()
-            if ok:
-                if convert_to_shorts_format(ctx["temp_path"], ctx["clip_path"], vod_id=vod_id, start_time=ctx["start_time"], end_time=ctx["end_time"], anchor_time=ctx.get("anchor_time")):
-                    if upload_clip_to_s3(ctx["clip_path"], vod_id, ctx["clip_title"]):
-                        # Only clean up local files if not in local mode
-                        # Treat disable-s3 or local test mode as local workflow too
-                        local_mode = (
-                            os.getenv('GPU_PROCESSING_MODE', 'hybrid') == 'local_only' or
-                            os.getenv('DISABLE_S3_UPLOADS', '').lower() in ('1', 'true', 'yes') or
-                            os.getenv('LOCAL_TEST_MODE', '').lower() in ('1', 'true', 'yes')
-                        )
-                        if not local_mode:
-                            # Remove local artifacts to save disk space
-                            try:
-                                ctx["temp_path"].unlink()
-                            except Exception:
-                                pass
-                            try:
-                                ctx["clip_path"].unlink()
-                            except Exception:
-                                pass
-                        else:
-                            print(f"📁 Keeping local clip: {ctx['clip_path'].name} (local mode)")
-                    created_clips += 1
-                    print(f" Clip {i-1} created successfully")
-                    produced_files.append(ctx["clip_path"].name)
+            chat_fut = scheduler.submit("chat", ensure_chat_json, vod_id, start_time, end_time, chat_dir)
+            dl_fut = scheduler.submit("download", download_single_clip, vod_id, start_time, end_time, temp_path, quality)
+            conv_fut = scheduler.submit_when_ready(
+                "convert", [dl_fut, chat_fut], convert_to_shorts_format,
+                temp_path, clip_path, vod_id=vod_id, start_time=start_time, end_time=end_time, anchor_time=anchor_time,
+            )
+            scheduler.release_slot_when_done(conv_fut)
+            catalog.discard(clip_path, save=False)
+            jobs.append((conv_fut, {"index": i, "dl": dl_fut, "clip_path": clip_path, "temp_path": temp_path, "clip_title": clip_title}))
+
+        # Upload in clip order while later conversions are still running
+        for conv_fut, ctx in jobs:
+            try:
+                converted = bool(conv_fut.result())
+            except Exception as e:
+                print(f"X Clip {ctx['index']} conversion error: {e}")
+                converted = False
+            if not converted:
+                try:
+                    downloaded = bool(ctx["dl"].result())
+                except Exception:
+                    downloaded = False
+                if downloaded:
+                    print(f"X Clip {ctx['index']} conversion failed; skipping upload")
                 else:
-                    print(f"X Clip {i-1} conversion failed; skipping upload")
-            else:
-                print(f"X Failed to create clip {i-1}")
-            pending = (fut, {"clip_path": clip_path, "temp_path": temp_path, "clip_title": clip_title, "start_time": start_time, "end_time": end_time, "anchor_time": anchor_time})
-
-        # Drain last pending
-        if pending is not None:
-            prev_fut, ctx = pending
-            ok = prev_fut.result()
-            if ok:
-                if convert_to_shorts_format(ctx["temp_path"], ctx["clip_path"], vod_id=vod_id, start_time=ctx["start_time"], end_time=ctx["end_time"], anchor_time=ctx.get("anchor_time")):
-                    if upload_clip_to_s3(ctx["clip_path"], vod_id, ctx["clip_title"]):
-                        # Only clean up local files if not in local mode
-                        # Treat disable-s3 or local test mode as local workflow too
-                        local_mode = (
-                            os.getenv('GPU_PROCESSING_MODE', 'hybrid') == 'local_only' or
-                            os.getenv('DISABLE_S3_UPLOADS', '').lower() in ('1', 'true', 'yes') or
-                            os.getenv('LOCAL_TEST_MODE', '').lower() in ('1', 'true', 'yes')
-                        )
-                        if not local_mode:
-                            # Remove local artifacts to save disk space
-                            try:
-                                ctx["temp_path"].unlink()
-                            except Exception:
-                                pass
-                            try:
-                                if not local_mode:
-                                    ctx["clip_path"].unlink()
-                            except Exception:
-                                pass
-                        else:
-                            print(f"📁 Keeping local clip: {ctx['clip_path'].name} (local mode)")
-                    created_clips += 1
-                    print(f" Clip {len(produced_files)+1} created successfully")
-                    produced_files.append(ctx["clip_path"].name)
+                    print(f"X Failed to create clip {ctx['index']}")
+                continue
+            if scheduler.record("upload", upload_clip_to_s3, ctx["clip_path"], vod_id, ctx["clip_title"]):
+                # Only clean up local files if not in local mode
+                if not local_mode:
+                    # Remove local artifacts to save disk space
+                    try:
+                        ctx["temp_path"].unlink()
+                    except Exception:
+                        pass
+                    try:
+                        ctx["clip_path"].unlink()
+                    except Exception:
+                        pass
                 else:
-                    print(f"X Final clip conversion failed; skipping upload")
-            else:
-                print(f"X Final clip download failed")
+                    print(f"📁 Keeping local clip: {ctx['clip_path'].name} (local mode)")
+            # Only clips still on disk are catalogued; uploaded-and-removed ones resolve via S3.
+            # Written once in the finally below rather than per clip.
+            catalog.record(ctx["clip_path"], ctx["clip_title"], ctx["index"], save=False)
+            created_clips += 1
+            print(f" Clip {ctx['index']} created successfully")
+            produced_files.append(ctx["clip_path"].name)
     finally:
-        try:
-            dl_pool.shutdown(wait=False, cancel_futures=False)
-        except Exception:
-            pass
-        try:
-            chat_pool.shutdown(wait=False, cancel_futures=False)
-        except Exception:
-            pass
+        scheduler.shutdown(wait=False)
+        print(scheduler.report())
+        catalog.save()
     
     # Write manifest for cache robustness (and upload to S3 so cache works across machines)
     try:
@@ -50,6 +50,7 @@ def transcribe_audio_file(audio_path: Path) -> Dict:
     else:
         return transcribe_whisper(audio_path)
 from utils.chapter_merge import merge_short_chapters
+from utils import metrics
 
 # Ensure project env is loaded (including config/streamsniped.env with ASSEMBLYAI_API_KEY)
 try:
@@ -643,7 +644,7 @@ def download_vod_chunk(vod_id: str, start_time: int, end_time: int, output_path:
                         print(f"📡 Command: {cmd[0]} {cmd[1]} --id ... -q {q} -t {threads} --trim-mode {trim_mode}")
 
                     try:
-                        result = subprocess.run(cmd, capture_output=True, text=True, timeout=1800, env=env)
+                        result = metrics.run_subprocess(cmd, capture_output=True, text=True, timeout=1800, env=env)
                     except subprocess.TimeoutExpired:
                         result = None
 
@@ -17,7 +17,7 @@ import re
 import sys
 import requests
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import importlib.util
 
 # Ensure project imports resolve BEFORE any 'src.' imports
@@ -582,6 +582,55 @@ def _llm_generate_thumbnail_text(vod_id: str, arc_idx: int, man: Dict) -> str:
     return "HIGHLIGHTS"
 
 
+def _arc_summary_text(man: Dict, default: str = "") -> str:
+    """First few range summaries joined, as used for arc titles/thumbnails."""
+    summaries = []
+    for r in (man.get("ranges") or [])[:5]:
+        s = str(r.get("summary") or "").strip()
+        if s:
+            summaries.append(s)
+    return " | ".join(summaries) if summaries else default
+
+
+def _batch_arc_titles_and_thumbnails(vod_id: str, arcs: List[Tuple[Path, Dict]]) -> Tuple[Dict[Path, str], Dict[Path, str]]:
+    """Arc titles (for arcs without one) and thumbnail texts for all arcs, batched across arcs.
+
+    Returns ({manifest: title}, {manifest: thumbnail text}); arcs missing from
+    either map fall back to the per-arc generators.
+    """
+    titles: Dict[Path, str] = {}
+    thumbs: Dict[Path, str] = {}
+    if not (USE_TITLE_SERVICE and TitleService is not None) or not arcs:
+        return titles, thumbs
+    try:
+        from utils.transcript_loader import load_transcript_for_range
+        service = TitleService(vod_id)
+
+        need_title = [(mp, man) for mp, man in arcs if not str(man.get("title") or "").strip()]
+        if need_title:
+            inputs = []
+            for _, man in need_title:
+                start_abs = int(man.get("start_abs", 0))
+                end_abs = int(man.get("end_abs", 0))
+                # Same inputs as _llm_generate_arc_title: arc transcript, else range summaries
+                if end_abs > start_abs:
+                    inputs.append(load_transcript_for_range(vod_id, start_abs, end_abs))
+                else:
+                    inputs.append(_arc_summary_text(man))
+            print(f"🎯 Generating {len(need_title)} arc titles with Gemini 3 Flash...")
+            for (mp, _), title in zip(need_title, service.generate_arc_titles(inputs)):
+                if title and len(title) >= 5:
+                    titles[mp] = title
+
+        print(f"Generating thumbnail text for {len(arcs)} arcs")
+        thumb_inputs = [_arc_summary_text(man, str(man.get("summary") or "")) for _, man in arcs]
+        for (mp, _), text in zip(arcs, service.generate_thumbnail_texts(thumb_inputs)):
+            thumbs[mp] = text
+    except Exception as e:
+        print(f"⚠️ Batched arc title generation failed, generating per arc: {e}")
+    return titles, thumbs
+
+
 def _build_metadata_for_arc(vod_id: str, arc_idx: int, man: Dict, streamer: str, vod_title: str, generated_title: Optional[str] = None, timestamps: Optional[str] = None, thumbnail_text: Optional[str] = None) -> Dict:
     """Build metadata for arc with enhanced timestamps."""
     start_hms = str(man.get("start_hms") or _format_hms(man.get("start_abs", 0)))
@@ -695,15 +744,21 @@ def main() -> None:
     streamer = info.get("streamer", "").strip()
     vod_title = info.get("vod_title", "").strip()
 
+    arcs: List[Tuple[Path, Dict]] = []
     for mp in manifests:
-        # Per-arc guard so a single failure doesn't halt the whole run
         try:
-            try:
-                man = json.loads(mp.read_text(encoding="utf-8"))
-            except Exception as e:
-                print(f"Failed reading {mp}: {e}")
-                continue
+            arcs.append((mp, json.loads(mp.read_text(encoding="utf-8"))))
+        except Exception as e:
+            print(f"Failed reading {mp}: {e}")
+
+    # Titles and thumbnail texts for all arcs in batched requests; timestamps
+    # stay one request per arc (each is already a multi-segment prompt)
+    batched_titles, batched_thumbs = _batch_arc_titles_and_thumbnails(vod_id, arcs)
 
+    for mp, man in arcs:
+        # Per-arc guard so a single failure doesn't halt the whole run
+        arc_idx = 0
+        try:
             arc_idx = int(man.get("arc_index") or 0)
 
             # Generate title
@@ -711,7 +766,7 @@ def main() -> None:
             if title_in_manifest:
                 llm_title = title_in_manifest
             else:
-                llm_title = _llm_generate_arc_title(vod_id, arc_idx, man)
+                llm_title = batched_titles.get(mp) or _llm_generate_arc_title(vod_id, arc_idx, man)
                 try:
                     man["title"] = llm_title
                     mp.write_text(json.dumps(man, indent=2), encoding="utf-8")
@@ -723,8 +778,10 @@ def main() -> None:
             timestamps = _generate_timestamps(vod_id, man)
 
             # Generate thumbnail text
-            print(f"Generating thumbnail text for arc {arc_idx}")
-            thumbnail_text = _llm_generate_thumbnail_text(vod_id, arc_idx, man)
+            thumbnail_text = batched_thumbs.get(mp)
+            if not thumbnail_text:
+                print(f"Generating thumbnail text for arc {arc_idx}")
+                thumbnail_text = _llm_generate_thumbnail_text(vod_id, arc_idx, man)
             print(f"✨ Thumbnail text: {thumbnail_text}")
 
             if timestamps:
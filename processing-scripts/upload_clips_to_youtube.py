@@ -2,6 +2,11 @@
 """
 Upload individual clips to YouTube
 Uploads each clip with its own title, description, and metadata
+
+Clips are uploaded through youtube_upload_pipeline: several resumable sessions
+in parallel (YT_UPLOAD_SESSIONS), a shared bandwidth cap (YT_UPLOAD_MAX_MBPS)
+and per-channel quota accounting. Per-upload session files under
+<ai_data>/.yt_sessions let a rerun resume uploads interrupted by a crash.
 """
 
 # --- universal log adapter -----------------------------------------------
@@ -46,6 +51,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.config import config
 from src.youtube_channels import resolve_channels_for_vod, get_channel_credentials_file
 from storage import StorageManager
+from utils.clip_catalog import ClipCatalog, clip_file_stem
 
 
 def load_metadata_index(vod_id: str) -> list[Path]:
@@ -80,40 +86,25 @@ def load_clip_metadata(vod_id: str, clip_index: int) -> Optional[Dict]:
         return json.load(f)
 
 
-def find_clip_file(vod_id: str, clip_title: str) -> Optional[Path]:
-    """Find clip file in clips directory, searching recursively and chapter subfolders."""
+def find_clip_file(vod_id: str, clip_title: str, catalog: Optional[ClipCatalog] = None) -> Optional[Path]:
+    """Find processed clip file via the VOD's clip catalog (rebuilt from the clips directory if stale)."""
     clips_dir = Path(f"data/clips/{vod_id}")
 
     if not clips_dir.exists():
         print(f"X Clips directory not found: {clips_dir}")
         return None
 
-    # Remove any hashtag suffixes (e.g. "title #tag") before normalisation
-    if "#" in clip_title:
-        clip_title = clip_title.split("#", 1)[0].strip()
-
-    # Normalize title
-    safe_title = "".join(c for c in clip_title if c.isalnum() or c in (" ", "_", "-")).rstrip()
-    safe_title = safe_title.replace(" ", "_")
-
-    # Prefer chapter subfolders first to match creation layout
-    # Exclude temp files and prioritize processed clips
-    processed_files = []
-    
-    for file_path in clips_dir.rglob("*.mp4"):
-        stem_lower = file_path.stem.lower()
-        if safe_title.lower() == stem_lower or safe_title.lower() in stem_lower:
-            if not file_path.stem.startswith("temp_"):
-                processed_files.append(file_path)
-    
-    # Only allow processed files; never fall back to temp_ files
-    if processed_files:
-        return processed_files[0]  # Return first processed file found
-    else:
-        print(f"⛔ No processed clip found for title (skipping temp files): {clip_title}")
+    # Catalog keys drop hashtag suffixes and use the clip filename normalization;
+    # temp_ files are never catalogued
+    if catalog is None:
+        catalog = ClipCatalog.load(vod_id, clips_dir)
+    found = catalog.find(clip_title)
+    if found:
+        return found
+    print(f"⛔ No processed clip found for title (skipping temp files): {clip_title}")
 
     # Fallback: flat root (processed files only)
-    candidate = clips_dir / f"{safe_title}.mp4"
+    candidate = clips_dir / f"{clip_file_stem(clip_title.split('#', 1)[0].strip())}.mp4"
     if candidate.exists():
         return candidate
 
@@ -237,92 +228,45 @@ def verify_shorts_format(video_path: Path) -> bool:
         print(" Skipping video format verification")
         return True
 
-def upload_clip_to_youtube(clip_path: Path, metadata: Dict, vod_id: str, clip_index: int, force_public: bool = False, *, channel_key: str = "default") -> Optional[str]:
-    """Upload individual clip to YouTube.
-    
-    For Shorts:
-    - Verifies 9:16 aspect ratio
-    - Verifies ≤60s duration
-    - Adds #Shorts to title if missing
-    """
-    try:
-        # Override privacy status if force_public is True
-        if force_public:
-            metadata['status']['privacyStatus'] = 'public'
-            print("🌍 Uploading clip as public video")
-        else:
-            print(f"🔒 Uploading clip as {metadata['status']['privacyStatus']} video")
+def _clip_result_path(vod_id: str, clip_index: int, channel_key: str) -> Path:
+    return config.get_ai_data_dir(vod_id) / f"{vod_id}_clip_{clip_index:02d}_youtube_upload_result__{channel_key}.json"
 
-        # Verify video format for Shorts (skip for now since clips are pre-formatted)
-        # if not verify_shorts_format(clip_path):
-        #     print("X Video not in proper Shorts format - skipping upload")
-        #     return None
 
-        # Import YouTube uploader
-        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-        from youtube_uploader import YouTubeUploader
-        
-        # Idempotency per-channel: skip if already uploaded
-        ai_data_dir = config.get_ai_data_dir(vod_id)
-        result_path = ai_data_dir / f"{vod_id}_clip_{clip_index:02d}_youtube_upload_result__{channel_key}.json"
-        try:
-            if result_path.exists():
-                with open(result_path, 'r', encoding='utf-8') as f:
-                    existing = json.load(f)
-                if str(existing.get('youtube_video_id') or '').strip():
-                    print(f"⏭️  Clip {clip_index} already uploaded for channel '{channel_key}', skipping")
-                    return existing.get('youtube_video_id')
-        except Exception:
-            pass
+def _clip_session_dir(vod_id: str) -> Path:
+    return config.get_ai_data_dir(vod_id) / ".yt_sessions"
+
+
+def _clip_session_key(clip_index: int, channel_key: str) -> str:
+    return f"clip_{clip_index:02d}__{channel_key}"
+
+
+def _existing_video_id(result_path: Path) -> Optional[str]:
+    """Video id from a previous successful upload result, if any."""
+    try:
+        if result_path.exists():
+            with open(result_path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            return str(existing.get('youtube_video_id') or '').strip() or None
+    except Exception:
+        pass
+    return None
 
-        # Initialize uploader for this channel
-        cred_file = get_channel_credentials_file(channel_key)
-        print(f" Using channel '{channel_key}' (creds: {cred_file})")
-        uploader = YouTubeUploader(credentials_file=cred_file)
-        
-        # Authenticate
-        if not uploader.authenticate():
-            print("X YouTube authentication failed")
-            return None
-        
-        print(f" Uploading clip {clip_index} to YouTube...")
-        print(f"📁 File: {clip_path}")
-        print(f"📝 Title: {metadata['snippet']['title']}")
-        
-        # Upload video
-        video_id = uploader.upload_video(clip_path, metadata)
-        
-        if video_id:
-            print(f" Clip {clip_index} uploaded successfully!")
-            print(f"🎥 YouTube Video ID: {video_id}")
-            print(f"🔗 Video URL: https://www.youtube.com/watch?v={video_id}")
-            
-            # Save upload result
-            result = {
-                "vod_id": vod_id,
-                "clip_index": clip_index,
-                "youtube_video_id": video_id,
-                "youtube_url": f"https://www.youtube.com/watch?v={video_id}",
-                "title": metadata['snippet']['title'],
-                "upload_date": None  # Will be set by uploader
-            }
-            
-            # Save result to file (per-channel)
-            
-            with open(result_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            
-            print(f"💾 Upload result saved: {result_path}")
-            return video_id
-        else:
-            print(f"X Failed to upload clip {clip_index}")
-            return None
-            
-    except Exception as e:
-        print(f"X Error uploading clip {clip_index}: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+
+def _save_clip_result(result_path: Path, vod_id: str, clip_index: int, video_id: str, metadata: Dict) -> None:
+    result = {
+        "vod_id": vod_id,
+        "clip_index": clip_index,
+        "youtube_video_id": video_id,
+        "youtube_url": f"https://www.youtube.com/watch?v={video_id}",
+        "title": metadata['snippet']['title'],
+        "upload_date": None  # Will be set by uploader
+    }
+    
+    # Save result to file (per-channel)
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    
+    print(f"💾 Upload result saved: {result_path}")
 
 
 def load_clip_titles(vod_id: str) -> List[Dict]:
@@ -426,93 +370,151 @@ def main():
             clip_titles = clip_titles  # already loaded above
             iterable = list(enumerate(clip_titles, 1))
 
-        for i, item in iterable:
-            # Initialize per-iteration state
-            clip_path: Optional[Path] = None
-            # Skip if specific clip requested
-            if specific_clip and i != specific_clip:
-                continue
+        # One catalog for the whole run: O(1) title -> file lookups
+        catalog = ClipCatalog.load(vod_id)
+
+        # Parallel resumable uploads; one authenticated uploader per channel as template
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from youtube_uploader import YouTubeUploader
+        from youtube_upload_pipeline import UploadJob, UploadPipeline
+        uploaders: Dict[str, Optional[YouTubeUploader]] = {}
+
+        def channel_uploader(ch: str) -> Optional[YouTubeUploader]:
+            if ch not in uploaders:
+                cred_file = get_channel_credentials_file(ch)
+                print(f" Using channel '{ch}' (creds: {cred_file})")
+                up = YouTubeUploader(credentials_file=cred_file)
+                uploaders[ch] = up if up.authenticate() else None
+                if uploaders[ch] is None:
+                    print(f"X YouTube authentication failed for channel '{ch}'")
+            return uploaders[ch]
+
+        def save_result(clip_index: int, metadata: Dict):
+            def on_uploaded(job, video_id: str) -> None:
+                print(f" Clip {clip_index} uploaded to '{job.channel}': https://www.youtube.com/watch?v={video_id}")
+                _save_clip_result(_clip_result_path(vod_id, clip_index, job.channel), vod_id, clip_index, video_id, metadata)
+            return on_uploaded
+
+        pipeline = UploadPipeline(uploaders)  # filled lazily by channel_uploader
+        print(f"🧵 Upload pipeline: {pipeline.sessions} concurrent sessions")
+        pending: Dict[int, list] = {}  # clip index -> outcome futures
+        already_done: Dict[int, bool] = {}
+
+        try:
+            for i, item in iterable:
+                # Initialize per-iteration state
+                clip_path: Optional[Path] = None
+                # Skip if specific clip requested
+                if specific_clip and i != specific_clip:
+                    continue
             
-            print(f"\n Processing clip {i}/{total_to_upload}")
+                print(f"\n Processing clip {i}/{total_to_upload}")
             
-            # Load clip metadata (from index when available)
-            if using_metadata_index:
-                try:
-                    with open(item, 'r', encoding='utf-8') as mf:
-                        metadata = json.load(mf)
-                except Exception as e:
-                    print(f"X Failed to read metadata file {item}: {e}")
-                    continue
-                # Derive base clip title (strip streamer suffix if present)
-                raw_title = metadata.get('snippet', {}).get('title', f'Clip {i}')
-                clip_title = raw_title.split(' - ')[0]
-                # Remove #Shorts suffix for filename matching
-                if clip_title.endswith(' #Shorts'):
-                    clip_title = clip_title[:-8]  # Remove " #Shorts"
-                # Also remove #shorts if present
-                if clip_title.endswith(' #shorts'):
-                    clip_title = clip_title[:-8]  # Remove " #shorts"
-                # Prefer explicit clip_path in metadata if provided
-                explicit_path = metadata.get('streamsniped_metadata', {}).get('clip_path')
-                if explicit_path:
-                    p = Path(explicit_path)
-                    if p.exists():
-                        clip_path = p
-                        print(f"📁 Using explicit clip path from metadata: {clip_path}")
+                # Load clip metadata (from index when available)
+                if using_metadata_index:
+                    try:
+                        with open(item, 'r', encoding='utf-8') as mf:
+                            metadata = json.load(mf)
+                    except Exception as e:
+                        print(f"X Failed to read metadata file {item}: {e}")
+                        continue
+                    # Derive base clip title (strip streamer suffix if present)
+                    raw_title = metadata.get('snippet', {}).get('title', f'Clip {i}')
+                    clip_title = raw_title.split(' - ')[0]
+                    # Remove #Shorts suffix for filename matching
+                    if clip_title.endswith(' #Shorts'):
+                        clip_title = clip_title[:-8]  # Remove " #Shorts"
+                    # Also remove #shorts if present
+                    if clip_title.endswith(' #shorts'):
+                        clip_title = clip_title[:-8]  # Remove " #shorts"
+                    # Prefer explicit clip_path in metadata if provided
+                    explicit_path = metadata.get('streamsniped_metadata', {}).get('clip_path')
+                    if explicit_path:
+                        p = Path(explicit_path)
+                        if p.exists():
+                            clip_path = p
+                            print(f"📁 Using explicit clip path from metadata: {clip_path}")
+                        else:
+                            # If it's an S3 URI, try to download
+                            if explicit_path.startswith('s3://'):
+                                with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_file:
+                                    tmp_file_path = Path(tmp_file.name)
+                                try:
+                                    storage = StorageManager()
+                                    storage.download_file(explicit_path, str(tmp_file_path))
+                                    clip_path = tmp_file_path
+                                    print(f"📥 Downloaded clip via explicit S3 path: {explicit_path}")
+                                except Exception as _e:
+                                    print(f" Failed explicit S3 download: {explicit_path} ({_e})")
+                                    clip_path = None
+                    # If explicit path succeeded, skip title lookup
+                    if 'clip_path' in locals() and clip_path:
+                        pass
                     else:
-                        # If it's an S3 URI, try to download
-                        if explicit_path.startswith('s3://'):
-                            with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_file:
-                                tmp_file_path = Path(tmp_file.name)
-                            try:
-                                storage = StorageManager()
-                                storage.download_file(explicit_path, str(tmp_file_path))
-                                clip_path = tmp_file_path
-                                print(f"📥 Downloaded clip via explicit S3 path: {explicit_path}")
-                            except Exception as _e:
-                                print(f" Failed explicit S3 download: {explicit_path} ({_e})")
-                                clip_path = None
-                # If explicit path succeeded, skip title lookup
-                if 'clip_path' in locals() and clip_path:
-                    pass
+                        clip_path = None
                 else:
-                    clip_path = None
-            else:
-                metadata = load_clip_metadata(vod_id, i)
-                if not metadata:
-                    print(f" Skipping clip {i} - no metadata found")
-                    continue
-                clip_title = item.get('title', f'Clip {i}')
+                    metadata = load_clip_metadata(vod_id, i)
+                    if not metadata:
+                        print(f" Skipping clip {i} - no metadata found")
+                        continue
+                    clip_title = item.get('title', f'Clip {i}')
             
-            # Find clip file
-            if 'clip_path' not in locals() or not clip_path:
-                print(f"🔍 Looking for clip file with title: {clip_title}")
-                clip_path = find_clip_file(vod_id, clip_title)
-                print(f"🔍 Found clip path: {clip_path}")
+                # Find clip file
+                if 'clip_path' not in locals() or not clip_path:
+                    print(f"🔍 Looking for clip file with title: {clip_title}")
+                    clip_path = find_clip_file(vod_id, clip_title, catalog)
+                    print(f"🔍 Found clip path: {clip_path}")
             
-            if not clip_path:
-                # Try to download from S3
-                with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_file:
-                    tmp_path = Path(tmp_file.name)
-                if download_clip_from_s3(vod_id, clip_title, tmp_path):
-                    clip_path = tmp_path
+                if not clip_path:
+                    # Try to download from S3
+                    with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_file:
+                        tmp_path = Path(tmp_file.name)
+                    if download_clip_from_s3(vod_id, clip_title, tmp_path):
+                        clip_path = tmp_path
             
-            # Skip if no processed clip found
-            if not clip_path:
-                print(f"⛔ Skipping clip {i} - processed clip not found (and temp_ files are disallowed)")
-                continue
+                # Skip if no processed clip found
+                if not clip_path:
+                    print(f"⛔ Skipping clip {i} - processed clip not found (and temp_ files are disallowed)")
+                    continue
 
-            # Upload to all resolved channels
-            any_success = False
-            for ch in channel_keys:
-                video_id = upload_clip_to_youtube(clip_path, metadata, vod_id, i, force_public, channel_key=ch)
-                if video_id:
-                    any_success = True
-            if any_success:
-                uploaded_count += 1
-                print(f" Clip {i} uploaded successfully to at least one channel")
-            else:
-                print(f"X Failed to upload clip {i} to all channels")
+                # Queue uploads to all resolved channels
+                if force_public:
+                    metadata['status']['privacyStatus'] = 'public'
+                print(f"📤 Queueing clip {i} ({metadata['status']['privacyStatus']}): {clip_path}")
+                for ch in channel_keys:
+                    if _existing_video_id(_clip_result_path(vod_id, i, ch)):
+                        print(f"⏭️  Clip {i} already uploaded for channel '{ch}', skipping")
+                        already_done[i] = True
+                        continue
+                    if channel_uploader(ch) is None:
+                        continue
+                    pending.setdefault(i, []).append(pipeline.submit(UploadJob(
+                        key=_clip_session_key(i, ch),
+                        channel=ch,
+                        video_path=clip_path,
+                        metadata=metadata,
+                        session_dir=_clip_session_dir(vod_id),
+                        on_uploaded=save_result(i, metadata),
+                    )))
+                if i not in pending and not already_done.get(i):
+                    print(f"X Failed to upload clip {i} to all channels")
+
+            # Collect outcomes in clip order
+            for i in sorted(set(pending) | set(already_done)):
+                any_success = already_done.get(i, False)
+                for fut in pending.get(i, []):
+                    outcome = fut.result()
+                    if outcome.ok:
+                        any_success = True
+                    else:
+                        print(f"X Clip {i} upload to '{outcome.job.channel}' failed ({outcome.error_type}): {outcome.error}")
+                if any_success:
+                    uploaded_count += 1
+                    print(f" Clip {i} uploaded successfully to at least one channel")
+                else:
+                    print(f"X Failed to upload clip {i} to all channels")
+        finally:
+            pipeline.close()
         
         # Save overall upload summary
         upload_summary = {
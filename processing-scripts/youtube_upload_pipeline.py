@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Concurrent YouTube upload pipeline.
+
+Runs several resumable upload sessions at once instead of one clip after
+another, so uplink bandwidth is not left idle during per-chunk round trips.
+Each upload gets its own session file (see YouTubeUploader._resumable_upload),
+kept until the upload completes, so after a crash re-submitting the same jobs
+resumes every in-flight upload where the server left it.
+
+- Sessions share a BandwidthLimiter (global uplink cap across all of them).
+- A QuotaLedger charges YouTube Data API units per channel per Pacific day
+  (videos.insert 1600, thumbnails.set 50); a job whose channel is out of quota
+  is not started and reports error_type "quota_exceeded". A quota error from
+  the API (reason quotaExceeded / uploadLimitExceeded / dailyLimitExceeded)
+  marks the channel exhausted for the rest of the day.
+- The insert is charged when a new session starts and belongs to that session:
+  resuming a saved session is not charged again, and a failure that leaves no
+  session file behind (nothing to resume) refunds it.
+- Post-upload work (thumbnail, on_uploaded callback such as writing the
+  result file) runs on a separate pool, overlapping with the next upload.
+
+httplib2 is not thread-safe, so every worker uses its own clone of the
+channel's authenticated YouTubeUploader.
+
+Environment:
+  YT_UPLOAD_SESSIONS     concurrent resumable sessions (default 3; 1 = serial)
+  YT_UPLOAD_MAX_MBPS     global uplink cap in MB/s across sessions (default 0 = uncapped)
+  YT_DAILY_QUOTA_UNITS   per-channel daily API quota (default 10000)
+  YT_QUOTA_FILE          quota ledger file (default data/youtube_quota.json)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from utils.env import env_float
+from utils.file_lock import file_lock
+
+# API unit costs (YouTube Data API v3)
+QUOTA_COST = {"videos.insert": 1600, "thumbnails.set": 50}
+# HttpError reasons that mean the channel is out of quota for today
+QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded", "uploadLimitExceeded"}
+
+
+def _quota_day() -> str:
+    """YouTube quotas reset at midnight Pacific time."""
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.now(ZoneInfo("America/Los_Angeles")).date().isoformat()
+    except Exception:
+        return datetime.utcnow().date().isoformat()
+
+
+def _api_error_reasons(e: Exception) -> List[str]:
+    """'reason' codes from a googleapiclient HttpError body (empty for anything else)."""
+    content = getattr(e, "content", None)
+    if not content:
+        return []
+    try:
+        body = json.loads(content.decode("utf-8") if isinstance(content, bytes) else content)
+        return [str(err.get("reason", "")) for err in body.get("error", {}).get("errors", [])]
+    except Exception:
+        return []
+
+
+class BandwidthLimiter:
+    """Global byte-rate cap shared by all sessions (each reservation waits its turn on the wire)."""
+
+    def __init__(self, bytes_per_s: Optional[float] = None):
+        if bytes_per_s is None:
+            bytes_per_s = env_float("YT_UPLOAD_MAX_MBPS", 0.0) * 1024 * 1024
+        self.bytes_per_s = max(0.0, bytes_per_s)
+        self._lock = threading.Lock()
+        self._next_free = 0.0
+
+    def throttle(self, nbytes: int) -> None:
+        if self.bytes_per_s <= 0 or nbytes <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + nbytes / self.bytes_per_s
+        if start > now:
+            time.sleep(start - now)
+
+
+class QuotaLedger:
+    """Per-channel daily API unit accounting, persisted so separate runs share one budget.
+
+    Every read-modify-write holds a file lock next to the ledger, so concurrent
+    upload processes cannot overwrite each other's charges.
+    """
+
+    def __init__(self, path: Optional[str] = None, daily_units: Optional[int] = None):
+        self.path = Path(path or os.getenv("YT_QUOTA_FILE", "data/youtube_quota.json"))
+        self.daily_units = int(daily_units if daily_units is not None else env_float("YT_DAILY_QUOTA_UNITS", 10000))
+        self._lock_path = self.path.with_suffix(".lock")
+
+    def _load(self) -> Dict[str, Dict[str, int]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _save(self, data: Dict[str, Dict[str, int]]) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            day = _quota_day()
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            # Only today's usage matters
+            tmp.write_text(json.dumps({day: data.get(day, {})}, indent=2), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"⚠️ Failed to save quota ledger: {e}")
+
+    def used(self, channel: str) -> int:
+        with file_lock(self._lock_path):
+            return int(self._load().get(_quota_day(), {}).get(channel, 0))
+
+    def remaining(self, channel: str) -> int:
+        return max(0, self.daily_units - self.used(channel))
+
+    def reserve(self, channel: str, units: int) -> bool:
+        """Charge units to channel for today; False (nothing charged) if that would exceed the budget."""
+        with file_lock(self._lock_path):
+            data = self._load()
+            day = data.setdefault(_quota_day(), {})
+            if int(day.get(channel, 0)) + units > self.daily_units:
+                return False
+            day[channel] = int(day.get(channel, 0)) + units
+            self._save(data)
+            return True
+
+    def refund(self, channel: str, units: int) -> None:
+        """Give back units charged by reserve() for a call that never reached the API."""
+        with file_lock(self._lock_path):
+            data = self._load()
+            day = data.setdefault(_quota_day(), {})
+            day[channel] = max(0, int(day.get(channel, 0)) - units)
+            self._save(data)
+
+    def exhaust(self, channel: str) -> None:
+        """Mark channel out of quota for today (the API said so)."""
+        with file_lock(self._lock_path):
+            data = self._load()
+            data.setdefault(_quota_day(), {})[channel] = self.daily_units
+            self._save(data)
+
+
+@dataclass
+class UploadJob:
+    """One video to one channel."""
+    key: str                      # stable id, names the session resume file
+    channel: str
+    video_path: Path
+    metadata: Dict
+    session_dir: Path
+    thumbnail_path: Optional[Path] = None
+    on_uploaded: Optional[Callable[["UploadJob", str], None]] = None  # runs on the post-upload pool
+
+    @property
+    def session_file(self) -> Path:
+        return self.session_dir / f"{self.key}.json"
+
+
+@dataclass
+class UploadOutcome:
+    job: UploadJob
+    video_id: Optional[str] = None
+    error_type: Optional[str] = None  # 'quota_exceeded', 'retriable', 'permanent', 'auth'
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.video_id)
+
+
+class UploadPipeline:
+    """Parallel resumable uploads with per-channel quota and a global bandwidth cap.
+
+    `uploaders` maps channel key -> authenticated YouTubeUploader (used only as a
+    template for per-worker clones). submit() returns a Future[UploadOutcome] that
+    resolves once the upload and its post-upload steps are done.
+    """
+
+    def __init__(self, uploaders: Dict[str, object], sessions: Optional[int] = None,
+                 limiter: Optional[BandwidthLimiter] = None, quota: Optional[QuotaLedger] = None):
+        if sessions is None:
+            sessions = int(env_float("YT_UPLOAD_SESSIONS", 3))
+        self.sessions = max(1, sessions)
+        self.uploaders = uploaders
+        self.limiter = limiter or BandwidthLimiter()
+        self.quota = quota or QuotaLedger()
+        self._uploads = ThreadPoolExecutor(max_workers=self.sessions, thread_name_prefix="yt-upload")
+        self._post = ThreadPoolExecutor(max_workers=2, thread_name_prefix="yt-post")
+
+    def __enter__(self) -> "UploadPipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._uploads.shutdown(wait=True)
+        self._post.shutdown(wait=True)
+
+    def submit(self, job: UploadJob) -> "Future[UploadOutcome]":
+        done: "Future[UploadOutcome]" = Future()
+        self._uploads.submit(self._run_upload, job, done)
+        return done
+
+    def _classify(self, job: UploadJob, e: Exception) -> UploadOutcome:
+        from utils.upload_scheduler import is_quota_exceeded_error, is_retriable_error
+
+        msg = str(e)
+        if QUOTA_REASONS.intersection(_api_error_reasons(e)) or is_quota_exceeded_error(msg):
+            self.quota.exhaust(job.channel)
+            return UploadOutcome(job, error_type="quota_exceeded", error=msg)
+        if is_retriable_error(msg):
+            return UploadOutcome(job, error_type="retriable", error=msg)
+        return UploadOutcome(job, error_type="permanent", error=msg)
+
+    def _run_upload(self, job: UploadJob, done: "Future[UploadOutcome]") -> None:
+        try:
+            template = self.uploaders.get(job.channel)
+            if template is None or getattr(template, "service", None) is None:
+                done.set_result(UploadOutcome(job, error_type="auth", error=f"channel '{job.channel}' not authenticated"))
+                return
+            # A saved session already paid for its insert
+            charged = not job.session_file.exists()
+            if charged and not self.quota.reserve(job.channel, QUOTA_COST["videos.insert"]):
+                print(f"🚫 Quota exhausted for channel '{job.channel}', not starting {job.key}")
+                done.set_result(UploadOutcome(job, error_type="quota_exceeded", error="daily quota exhausted"))
+                return
+            if not charged:
+                print(f"🔁 Resuming {job.key} on channel '{job.channel}' (insert already charged)")
+            uploader = template.clone()
+            job.session_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                video_id = uploader.upload_video(
+                    str(job.video_path), job.metadata,
+                    session_file=str(job.session_file), limiter=self.limiter,
+                )
+                outcome = None
+                if not video_id:
+                    # upload_video gave up (timeout, retries exhausted) and left the reason in last_error
+                    outcome = self._classify(job, RuntimeError(getattr(uploader, "last_error", None) or "Upload returned None"))
+                    if outcome.error_type == "permanent":
+                        outcome.error_type = "retriable"
+            except Exception as e:
+                outcome = self._classify(job, e)
+            if outcome is not None:
+                if charged and outcome.error_type != "quota_exceeded" and not job.session_file.exists():
+                    # No session to resume: this insert is not coming back, don't keep its units
+                    self.quota.refund(job.channel, QUOTA_COST["videos.insert"])
+                done.set_result(outcome)
+                return
+            # Free this session slot; thumbnail/result writing overlap with the next upload
+            self._post.submit(self._run_post, job, video_id, done)
+        except Exception as e:
+            if not done.done():
+                done.set_result(UploadOutcome(job, error_type="permanent", error=str(e)))
+
+    def _run_post(self, job: UploadJob, video_id: str, done: "Future[UploadOutcome]") -> None:
+        try:
+            if job.thumbnail_path and Path(job.thumbnail_path).exists():
+                if self.quota.reserve(job.channel, QUOTA_COST["thumbnails.set"]):
+                    if not self.uploaders[job.channel].clone().set_thumbnail(video_id, str(job.thumbnail_path)):
+                        self.quota.refund(job.channel, QUOTA_COST["thumbnails.set"])
+                else:
+                    print(f"🚫 Quota exhausted for channel '{job.channel}', skipping thumbnail for {video_id}")
+            if job.on_uploaded is not None:
+                job.on_uploaded(job, video_id)
+        except Exception as e:
+            print(f"⚠️ Post-upload step failed for {job.key}: {e}")
+        finally:
+            done.set_result(UploadOutcome(job, video_id=video_id))
@@ -31,6 +31,7 @@ class YouTubeUploader:
         self.credentials_file = credentials_file
         self.service = None
         self.credentials = None
+        self.last_error: Optional[str] = None  # why the last upload_video() returned None
     
     def authenticate(self) -> bool:
         """Authenticate with YouTube API using stored credentials or OAuth flow"""
@@ -97,6 +98,14 @@ class YouTubeUploader:
                 return self._oauth_flow()
             return False
 
+    def clone(self) -> "YouTubeUploader":
+        """Uploader sharing these credentials with its own HTTP client (httplib2 is not thread-safe)"""
+        other = YouTubeUploader(self.client_id, self.client_secret, self.credentials_file)
+        other.credentials = self.credentials
+        if self.credentials is not None:
+            other.service = build('youtube', 'v3', credentials=self.credentials)
+        return other
+
     def get_authenticated_channel_id(self) -> Optional[str]:
         """Return the channel ID for the authenticated account, if available."""
         try:
@@ -193,8 +202,14 @@ class YouTubeUploader:
             print(f"X OAuth flow failed: {e}")
             return False
     
-    def _resumable_upload(self, insert_request, media, file_size: int, vod_id: Optional[str] = None):
-        """Handle resumable upload with progress monitoring, adaptive chunking, and timeout"""
+    def _resumable_upload(self, insert_request, media, file_size: int, vod_id: Optional[str] = None,
+                          *, session_file: Optional[str] = None, limiter=None):
+        """Handle resumable upload with progress monitoring, adaptive chunking, and timeout
+
+        session_file: where the session URI is kept until the upload completes (default
+        data/ai_data/<vod>/.yt_session.json); a later call with the same file resumes it.
+        limiter: optional shared bandwidth limiter (throttle(nbytes)) applied per chunk.
+        """
         import time
         import math
         import random
@@ -219,25 +234,27 @@ class YouTubeUploader:
         media._chunksize = current_chunk_bytes  # type: ignore[attr-defined]
 
         # Session persistence (best effort)
-        session_dir = None
-        session_file = None
-        if vod_id:
-            session_dir = os.path.join('data', 'ai_data', vod_id)
+        if session_file is None and vod_id:
+            session_file = os.path.join('data', 'ai_data', vod_id, '.yt_session.json')
+        if session_file:
             try:
-                os.makedirs(session_dir, exist_ok=True)
-                session_file = os.path.join(session_dir, '.yt_session.json')
+                os.makedirs(os.path.dirname(session_file) or '.', exist_ok=True)
             except Exception:
                 session_file = None
 
-        # Try to resume from previous session URI
+        # Try to resume from previous session URI (only for the same file size)
+        resumed = False
         if session_file and os.path.exists(session_file):
             try:
                 with open(session_file, 'r', encoding='utf-8') as f:
                     sess = json.load(f)
                 uri = sess.get('resumable_uri')
-                if uri:
+                if uri and sess.get('file_size', file_size) == file_size:
                     insert_request.resumable_uri = uri  # type: ignore[attr-defined]
-                    print('🔁 Resuming previous upload session')
+                    # Ask the server how much it already has before sending more
+                    insert_request._in_error_state = True  # type: ignore[attr-defined]
+                    resumed = True
+                    print(f"🔁 Resuming previous upload session ({int(sess.get('uploaded_bytes') or 0) / (1024*1024):.1f} MB sent)")
             except Exception:
                 pass
 
@@ -272,7 +289,8 @@ class YouTubeUploader:
                 # Timeouts
                 now = time.time()
                 if now - start_time > max_upload_time:
-                    print(f"X Upload timeout after {max_upload_time/3600:.1f} hours")
+                    self.last_error = f"Upload timeout after {max_upload_time/3600:.1f} hours"
+                    print(f"X {self.last_error}")
                     return None
                 if now - last_progress_time > progress_timeout:
                     print(f"X Upload stalled - no progress for {int(progress_timeout/60)} minutes")
@@ -283,8 +301,11 @@ class YouTubeUploader:
                         print(f"↘️ Reduced chunk size to {new_mb}MB due to stall; continuing...")
                         last_progress_time = now
                     else:
+                        self.last_error = f"Upload stalled - no progress for {int(progress_timeout/60)} minutes"
                         return None
 
+                if limiter is not None:
+                    limiter.throttle(max(0, min(media._chunksize, file_size - last_progress_bytes)))  # type: ignore[attr-defined]
                 status, response = insert_request.next_chunk()
 
                 if status:
@@ -299,6 +320,7 @@ class YouTubeUploader:
                                 with open(session_file, 'w', encoding='utf-8') as f:
                                     json.dump({
                                         'resumable_uri': getattr(insert_request, 'resumable_uri', None),
+                                        'file_size': file_size,
                                         'uploaded_bytes': uploaded_bytes,
                                         'chunk_bytes': media._chunksize  # type: ignore[attr-defined]
                                     }, f, indent=2)
@@ -326,6 +348,14 @@ class YouTubeUploader:
                     pass
 
             except HttpError as e:
+                if resumed and getattr(e, 'resp', None) and getattr(e.resp, 'status', None) in [404, 410]:
+                    # Saved session expired server-side: start a fresh one
+                    print("⚠️ Previous upload session expired; starting a new one")
+                    resumed = False
+                    insert_request.resumable_uri = None  # type: ignore[attr-defined]
+                    insert_request.resumable_progress = 0  # type: ignore[attr-defined]
+                    insert_request._in_error_state = False  # type: ignore[attr-defined]
+                    continue
                 if getattr(e, 'resp', None) and getattr(e.resp, 'status', None) in [500, 502, 503, 504]:
                     print(f"⚠️ Retriable HTTP {e.resp.status}: {e}")
                 else:
@@ -335,7 +365,8 @@ class YouTubeUploader:
                 retry += 1
                 last_retry_time = time.time()
                 if retry > max_retries:
-                    print(f"X Too many retries ({max_retries}), upload failed")
+                    self.last_error = f"Too many retries ({max_retries}), upload failed"
+                    print(f"X {self.last_error}")
                     return None
                 # Exponential backoff with jitter up to 300s
                 wait_time = min(2 ** retry, 300) + random.uniform(0, 3)
@@ -346,7 +377,8 @@ class YouTubeUploader:
                 retry += 1
                 last_retry_time = time.time()
                 if retry > max_retries:
-                    print(f"X Too many network retries ({max_retries}), upload failed")
+                    self.last_error = f"Too many network retries ({max_retries}), upload failed"
+                    print(f"X {self.last_error}")
                     return None
                 # Reduce chunk size to improve reliability under bad network
                 cur_mb = media._chunksize // (1024*1024)  # type: ignore[attr-defined]
@@ -357,7 +389,8 @@ class YouTubeUploader:
                 wait_time = min(2 ** retry, 180) + random.uniform(0, 2)
                 time.sleep(wait_time)
             except Exception as e:
-                print(f"X Unexpected error during upload: {e}")
+                self.last_error = f"Unexpected error during upload: {e}"
+                print(f"X {self.last_error}")
                 return None
 
         # Success: cleanup session file
@@ -389,10 +422,17 @@ class YouTubeUploader:
             print(f"X Unexpected error setting thumbnail: {e}")
             return False
     
-    def upload_video(self, video_path: str, metadata: Dict) -> Optional[str]:
-        """Upload video to YouTube with given metadata"""
+    def upload_video(self, video_path: str, metadata: Dict, *, session_file: Optional[str] = None,
+                     limiter=None) -> Optional[str]:
+        """Upload video to YouTube with given metadata
+
+        session_file / limiter are passed to _resumable_upload (per-upload resume file,
+        shared bandwidth cap); see youtube_upload_pipeline.
+        """
+        self.last_error = None
         if not self.service:
-            print("X YouTube service not initialized - authenticate first")
+            self.last_error = "YouTube service not initialized - authenticate first"
+            print(f"X {self.last_error}")
             return None
         
         # Normalize to string to accept Path-like inputs
@@ -446,7 +486,8 @@ class YouTubeUploader:
                     storage.download_file(video_path_str, temp_file.name)
                     
                     if not os.path.exists(temp_file.name):
-                        print("X Failed to download video from S3")
+                        self.last_error = "Failed to download video from S3"
+                        print(f"X {self.last_error}")
                         return None
                     
                     # Verify file size
@@ -455,7 +496,8 @@ class YouTubeUploader:
                     video_path_str = temp_file.name
                     
                 except Exception as e:
-                    print(f"X Error downloading from S3: {e}")
+                    self.last_error = f"Error downloading from S3: {e}"
+                    print(f"X {self.last_error}")
                     if temp_file and os.path.exists(temp_file.name):
                         try:
                             os.unlink(temp_file.name)
@@ -463,7 +505,8 @@ class YouTubeUploader:
                             pass
                     return None
         elif not os.path.exists(video_path_str):
-            print(f"X Video file not found: {video_path_str}")
+            self.last_error = f"Video file not found: {video_path_str}"
+            print(f"X {self.last_error}")
             return None
         
         try:
@@ -526,10 +569,12 @@ class YouTubeUploader:
 
             # Execute the upload with resumable upload handling
             print("📤 Starting YouTube upload (optimized for large files)...")
-            response = self._resumable_upload(request, media, file_size, vod_id_for_session)
+            response = self._resumable_upload(request, media, file_size, vod_id_for_session,
+                                              session_file=session_file, limiter=limiter)
             
             if not response:
-                print("X Upload failed")
+                self.last_error = self.last_error or "Upload failed"
+                print(f"X {self.last_error}")
                 return None
                 
             video_id = response.get('id')
@@ -540,7 +585,8 @@ class YouTubeUploader:
                 print(f"🔗 URL: https://www.youtube.com/watch?v={video_id}")
                 return video_id
             else:
-                print("X Upload failed - no video ID returned")
+                self.last_error = "Upload failed - no video ID returned"
+                print(f"X {self.last_error}")
                 return None
                 
         except HttpError as e:
@@ -0,0 +1,262 @@
+"""
+Per-chapter burst timeline for director's cut range aggregation.
+
+Bursts are converted once into columns sorted by start: numeric values
+(start, end, midpoint, positive chat z) as plain lists, and role /
+topic_key / topic_thread as integer category codes. Overlap queries
+(`b.start < end and b.end > start`) take two binary searches, as in
+clip_generation.interval_index: starts bound a prefix and a running maximum
+of ends bounds its first member. Over that run the mean chat z comes from
+prefix sums. Category counts come from per-category cumulative counts when the
+column has few categories (roles): O(categories) per majority. High-cardinality
+columns (topic keys, threads) would make that table n x categories, so they
+keep only per-category position lists. A count there is two bisects, and a
+majority counts the run itself: O(run length). Either way a range query no
+longer scans the whole chapter.
+
+If bursts nest (ends not monotone) or were not given in start order, queries
+walk the overlap run in list order instead, which gives the same result.
+"""
+
+from __future__ import annotations
+
+import bisect
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Role -> flag reported by range_stats
+ROLE_FLAGS = {"peak": "has_peak", "conflict": "has_conflict", "build_up": "has_build", "resolution": "has_resolution"}
+
+
+# Dense cumulative counts only for columns this small (cells = positions x categories)
+DENSE_MAX_CATEGORIES = 64
+DENSE_MAX_CELLS = 1 << 21
+
+
+class CategoryColumn:
+    """Categorical column: codes per position (-1 = absent), positions per category, and
+    cumulative counts per category when the column is low-cardinality."""
+
+    def __init__(self, values: Sequence[Optional[str]], dense: Optional[bool] = None):
+        self.labels: List[str] = []
+        self.index: Dict[str, int] = {}
+        codes: List[int] = []
+        for v in values:
+            if v is None:
+                codes.append(-1)
+                continue
+            c = self.index.get(v)
+            if c is None:
+                c = self.index[v] = len(self.labels)
+                self.labels.append(v)
+            codes.append(c)
+        self.codes = codes
+        # positions[c]: sorted positions holding category c
+        self.positions: List[List[int]] = [[] for _ in self.labels]
+        for p, c in enumerate(codes):
+            if c >= 0:
+                self.positions[c].append(p)
+
+        n, k = len(codes), len(self.labels)
+        if dense is None:
+            dense = k <= DENSE_MAX_CATEGORIES and n * k <= DENSE_MAX_CELLS
+        self._cum: Optional[np.ndarray] = None
+        if dense:
+            onehot = np.zeros((n, k), dtype=np.int32)
+            arr = np.asarray(codes, dtype=np.int64)
+            present = np.flatnonzero(arr >= 0)
+            onehot[present, arr[present]] = 1
+            self._cum = np.vstack([np.zeros((1, k), dtype=np.int32), np.cumsum(onehot, axis=0, dtype=np.int32)])
+
+    def count(self, label: str, lo: int, hi: int) -> int:
+        c = self.index.get(label)
+        if c is None:
+            return 0
+        if self._cum is not None:
+            return int(self._cum[hi, c] - self._cum[lo, c])
+        plist = self.positions[c]
+        return max(0, bisect.bisect_left(plist, hi) - bisect.bisect_left(plist, lo))
+
+    def first_at_or_after(self, code: int, lo: int) -> Optional[int]:
+        plist = self.positions[code]
+        k = bisect.bisect_left(plist, lo)
+        return plist[k] if k < len(plist) else None
+
+    def majority(self, lo: int, hi: int) -> str:
+        """Most frequent label in [lo, hi); ties go to the label seen first in the run."""
+        if hi <= lo or not self.labels:
+            return ""
+        if self._cum is None:
+            # Count the run; insertion order makes max() break ties by first appearance
+            seen: Dict[int, int] = {}
+            for c in self.codes[lo:hi]:
+                if c >= 0:
+                    seen[c] = seen.get(c, 0) + 1
+            return self.labels[max(seen, key=seen.get)] if seen else ""
+        counts = self._cum[hi] - self._cum[lo]
+        top = int(counts.max())
+        if top == 0:
+            return ""
+        tied = np.flatnonzero(counts == top).tolist()
+        if len(tied) == 1:
+            return self.labels[tied[0]]
+        return self.labels[min(tied, key=lambda c: self.first_at_or_after(c, lo))]
+
+
+def _majority(d: Dict[str, int]) -> str:
+    return max(d, key=d.get) if d else ""
+
+
+class BurstTimeline:
+    """Sorted numeric and categorical columns over one chapter's bursts."""
+
+    def __init__(self, bursts: Sequence[Dict]):
+        starts = [float(b.get("start_time", 0.0)) for b in bursts]
+        ends = [float(b.get("end_time", 0.0)) for b in bursts]
+        order = sorted(range(len(bursts)), key=starts.__getitem__)
+        self.bursts = bursts
+        self.order: List[int] = order  # sorted position -> index into bursts
+        self.starts: List[float] = [starts[i] for i in order]
+        self.ends: List[float] = [ends[i] for i in order]
+        self.mids: List[float] = [(s + e) * 0.5 for s, e in zip(self.starts, self.ends)]
+        self.max_end: List[float] = list(accumulate(self.ends, max))
+        self.contiguous = all(a <= b for a, b in zip(self.ends, self.ends[1:]))
+        self.in_order = order == list(range(len(order)))
+
+        ordered = [bursts[i] for i in order]
+        # Mode-adjusted chat z (range means) and raw chat z (buildup scan), both clipped at 0
+        self.chat_mode_pos: List[float] = [
+            max(0.0, float(b.get("_chat_rate_z_mode") or b.get("chat_rate_z") or 0.0)) for b in ordered
+        ]
+        self.chat_pos: List[float] = [max(0.0, float(b.get("chat_rate_z") or 0.0)) for b in ordered]
+        self._chat_mode_prefix: List[float] = [0.0] + list(accumulate(self.chat_mode_pos))
+
+        self.roles = CategoryColumn([(b.get("role") or "").lower() for b in ordered])
+        self.topic_keys = CategoryColumn([(b.get("topic_key") or "").strip() or None for b in ordered])
+        self.threads = CategoryColumn([str(b["topic_thread"]) if b.get("topic_thread") is not None else None for b in ordered])
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    # ---- overlap runs ----
+
+    def _span(self, start: float, end: float) -> Tuple[int, int]:
+        """Sorted positions [lo, hi) that may overlap (start, end); exact when contiguous."""
+        hi = bisect.bisect_left(self.starts, end)
+        lo = bisect.bisect_right(self.max_end, start, 0, hi)
+        return lo, hi
+
+    def positions(self, start: float, end: float) -> List[int]:
+        """Sorted positions overlapping (start, end), in start order."""
+        lo, hi = self._span(start, end)
+        if self.contiguous:
+            return list(range(lo, hi))
+        return [p for p in range(lo, hi) if self.ends[p] > start]
+
+    def _role_codes(self, roles: Iterable[str]) -> List[int]:
+        return [self.roles.index[r] for r in roles if r in self.roles.index]
+
+    # ---- queries ----
+
+    def range_stats(self, start: float, end: float) -> Dict[str, object]:
+        """Mean positive chat z, role majority/presence and topic majorities of bursts overlapping (start, end)."""
+        if not (self.contiguous and self.in_order):
+            return self._range_stats_scan(start, end)
+        lo, hi = self._span(start, end)
+        n = hi - lo
+        stats: Dict[str, object] = {
+            "avg_chat_z": (self._chat_mode_prefix[hi] - self._chat_mode_prefix[lo]) / n if n > 0 else 0.0,
+            "major_role": self.roles.majority(lo, hi),
+        }
+        for role, flag in ROLE_FLAGS.items():
+            stats[flag] = n > 0 and self.roles.count(role, lo, hi) > 0
+        stats["topic_key_major"] = self.topic_keys.majority(lo, hi)
+        stats["topic_thread_major"] = self.threads.majority(lo, hi)
+        return stats
+
+    def _range_stats_scan(self, start: float, end: float) -> Dict[str, object]:
+        # Visit the run in list order so majority ties break as a plain scan would
+        pos_of = sorted(self.positions(start, end), key=self.order.__getitem__)
+        roles: Dict[str, int] = {}
+        topic_keys: Dict[str, int] = {}
+        threads: Dict[str, int] = {}
+        chat_vals: List[float] = []
+        for p in pos_of:
+            r = self.roles.labels[self.roles.codes[p]]
+            roles[r] = roles.get(r, 0) + 1
+            chat_vals.append(self.chat_mode_pos[p])
+            tk = self.topic_keys.codes[p]
+            if tk >= 0:
+                label = self.topic_keys.labels[tk]
+                topic_keys[label] = topic_keys.get(label, 0) + 1
+            th = self.threads.codes[p]
+            if th >= 0:
+                label = self.threads.labels[th]
+                threads[label] = threads.get(label, 0) + 1
+        stats: Dict[str, object] = {
+            "avg_chat_z": (sum(chat_vals) / len(chat_vals)) if chat_vals else 0.0,
+            "major_role": _majority(roles),
+        }
+        for role, flag in ROLE_FLAGS.items():
+            stats[flag] = role in roles
+        stats["topic_key_major"] = _majority(topic_keys)
+        stats["topic_thread_major"] = _majority(threads)
+        return stats
+
+    def buildup_start(self, start: float, max_extend: float, frac: float) -> float:
+        """Scan up to max_extend seconds before start and return an earlier start capturing buildup.
+
+        Heuristic: extend to earliest time within window where chat_z <= frac * local_max, or
+        to the earliest build_up/conflict burst start if present, but not beyond the window.
+        """
+        window_start = max(0.0, start - max_extend)
+        pos = self.positions(window_start, start)
+        if not pos:
+            return start
+        series = [p for p in pos if window_start <= self.mids[p] <= start]
+        if not series:
+            return start
+        build_codes = set(self._role_codes(("build_up", "conflict")))
+        first_build = next((p for p in pos if self.roles.codes[p] in build_codes), None)
+        local_max = max(self.chat_pos[p] for p in series)
+        if local_max <= 0:
+            # If no signal, prefer earliest build/conflict
+            if first_build is not None:
+                return max(window_start, self.starts[first_build])
+            return start
+        thr = frac * local_max
+        candidate = start
+        for p in series:
+            if self.chat_pos[p] <= thr:
+                candidate = min(candidate, self.starts[p])
+                break
+        # Also consider earliest build/conflict
+        if first_build is not None:
+            candidate = min(candidate, self.starts[first_build])
+        return max(window_start, candidate)
+
+    def has_role_starting_in(self, roles: Iterable[str], lo_time: float, hi_time: float) -> bool:
+        """True if a burst with one of `roles` starts within [lo_time, hi_time]."""
+        lo = bisect.bisect_left(self.starts, lo_time)
+        hi = bisect.bisect_right(self.starts, hi_time)
+        for c in self._role_codes(roles):
+            p = self.roles.first_at_or_after(c, lo)
+            if p is not None and p < hi:
+                return True
+        return False
+
+    def last_role_start_before(self, roles: Iterable[str], lo_time: float, hi_time: float) -> Optional[float]:
+        """Latest start in [lo_time, hi_time) among bursts with one of `roles`, else None."""
+        lo = bisect.bisect_left(self.starts, lo_time)
+        hi = bisect.bisect_left(self.starts, hi_time)
+        best: Optional[float] = None
+        for c in self._role_codes(roles):
+            plist = self.roles.positions[c]
+            k = bisect.bisect_left(plist, hi) - 1
+            if k >= 0 and plist[k] >= lo:
+                s = self.starts[plist[k]]
+                if best is None or s > best:
+                    best = s
+        return best
@@ -19,6 +19,7 @@ from rag.retrieval import (
     load_retriever,
     Retriever,
 )
+from rag.burst_timeline import BurstTimeline
 
 
 def load_atomic_segments(vod_id: str) -> List[Tuple[float, float]]:
@@ -684,101 +685,6 @@ def is_jc_chapter(chapter_id: str, ch_bursts: List[Dict], chapters_map: Dict[str
 
 # -------------------- Narrative-aware manifest postprocess --------------------
 
-def _aggregate_range_stats(ch_bursts: List[Dict], start: float, end: float) -> Dict[str, object]:
-    roles: Dict[str, int] = {}
-    chat_vals: List[float] = []
-    topic_keys: Dict[str, int] = {}
-    threads: Dict[str, int] = {}
-    has_peak = False
-    has_conflict = False
-    has_build = False
-    has_resolution = False
-
-    for b in ch_bursts:
-        bs = float(b.get("start_time", 0.0))
-        be = float(b.get("end_time", 0.0))
-        if be <= start or bs >= end:
-            continue
-        r = (b.get("role") or "").lower()
-        roles[r] = roles.get(r, 0) + 1
-        if r == "peak":
-            has_peak = True
-        elif r == "conflict":
-            has_conflict = True
-        elif r == "build_up":
-            has_build = True
-        elif r == "resolution":
-            has_resolution = True
-        czm = float(b.get("_chat_rate_z_mode") or b.get("chat_rate_z") or 0.0)
-        chat_vals.append(max(0.0, czm))
-        tk = (b.get("topic_key") or "").strip()
-        if tk:
-            topic_keys[tk] = topic_keys.get(tk, 0) + 1
-        th = b.get("topic_thread")
-        if th is not None:
-            ths = str(th)
-            threads[ths] = threads.get(ths, 0) + 1
-
-    def _majority(d: Dict[str, int]) -> str:
-        return max(d, key=d.get) if d else ""
-
-    avg_chat = (sum(chat_vals) / len(chat_vals)) if chat_vals else 0.0
-    return {
-        "avg_chat_z": avg_chat,
-        "major_role": _majority(roles),
-        "has_peak": has_peak,
-        "has_conflict": has_conflict,
-        "has_build": has_build,
-        "has_resolution": has_resolution,
-        "topic_key_major": _majority(topic_keys),
-        "topic_thread_major": _majority(threads),
-    }
-
-
-def _find_back_buildup_start(ch_bursts: List[Dict], start: float, max_extend: float, frac: float) -> float:
-    """Scan up to max_extend seconds before start and return an earlier start capturing buildup.
-
-    Heuristic: extend to earliest time within window where chat_z <= frac * local_max, or
-    to the earliest build_up/conflict burst start if present, but not beyond the window.
-    """
-    window_start = max(0.0, start - max_extend)
-    # Collect bursts in [window_start, start]
-    bursts = [b for b in ch_bursts if float(b.get("end_time", 0.0)) > window_start and float(b.get("start_time", 0.0)) < start]
-    if not bursts:
-        return start
-    bursts.sort(key=lambda b: float(b.get("start_time", 0.0)))
-    # Build simple time series of midpoints and chat_z
-    series: List[tuple] = []
-    for b in bursts:
-        bs = float(b.get("start_time", 0.0))
-        be = float(b.get("end_time", 0.0))
-        mid = (bs + be) * 0.5
-        cz = max(0.0, float(b.get("chat_rate_z") or 0.0))
-        if window_start <= mid <= start:
-            series.append((mid, cz, bs))
-    if not series:
-        return start
-    local_max = max(cz for _, cz, _ in series)
-    if local_max <= 0:
-        # If no signal, prefer earliest build/conflict
-        for b in bursts:
-            if (b.get("role") or "").lower() in {"build_up", "conflict"}:
-                return max(window_start, float(b.get("start_time", 0.0)))
-        return start
-    thr = frac * local_max
-    candidate = start
-    for mid, cz, bs in series:
-        if cz <= thr:
-            candidate = min(candidate, bs)
-            break
-    # Also consider earliest build/conflict
-    for b in bursts:
-        if (b.get("role") or "").lower() in {"build_up", "conflict"}:
-            candidate = min(candidate, float(b.get("start_time", 0.0)))
-            break
-    return max(window_start, candidate)
-
-
 def postprocess_manifest_for_chapter(
     ch_bursts: List[Dict],
     ranges: List[Dict],
@@ -797,12 +703,14 @@ def postprocess_manifest_for_chapter(
 
     # Sort ranges by start
     ranges = sorted(ranges, key=lambda r: float(r.get("start") or 0.0))
+    # Bursts are parsed once; every range query below is a lookup on the timeline
+    timeline = BurstTimeline(ch_bursts)
 
     # Enrich ranges with stats
     for r in ranges:
         s = float(r.get("start") or 0.0)
         e = float(r.get("end") or s)
-        stats = _aggregate_range_stats(ch_bursts, s, e)
+        stats = timeline.range_stats(s, e)
         r["_avg_chat_z"] = stats["avg_chat_z"]
         r["_major_role"] = stats["major_role"]
         r["_has_peak"] = stats["has_peak"]
@@ -819,7 +727,7 @@ def postprocess_manifest_for_chapter(
         e = float(r.get("end") or s)
         new_start = s
         if is_game and r.get("_has_peak"):
-            new_start = _find_back_buildup_start(ch_bursts, s, buildup_max_extend, buildup_frac)
+            new_start = timeline.buildup_start(s, buildup_max_extend, buildup_frac)
             # do not cross sponsor spans if present: clamp to not enter a sponsor-only island
             for ss, ee in atomic_spans:
                 if new_start < ss < s < ee:
@@ -841,25 +749,12 @@ def postprocess_manifest_for_chapter(
             continue
         # look back within window for conflict/peak in bursts
         window_start = float(r.get("start") or 0.0) - resolution_guard_window
-        found_cause = False
-        for b in ch_bursts:
-            bs = float(b.get("start_time", 0.0))
-            if window_start <= bs <= float(r.get("start") or 0.0):
-                role = (b.get("role") or "").lower()
-                if role in {"conflict", "peak"}:
-                    found_cause = True
-                    break
+        found_cause = timeline.has_role_starting_in(("conflict", "peak"), window_start, float(r.get("start") or 0.0))
         if found_cause:
             guarded.append(r)
         else:
             # attempt left expansion to include nearest conflict/peak
-            nearest = None
-            for b in ch_bursts:
-                bs = float(b.get("start_time", 0.0))
-                role = (b.get("role") or "").lower()
-                if role in {"conflict", "peak"} and float(r.get("start") or 0.0) - resolution_guard_window <= bs < float(r.get("start") or 0.0):
-                    if nearest is None or bs > nearest:
-                        nearest = bs
+            nearest = timeline.last_role_start_before(("conflict", "peak"), window_start, float(r.get("start") or 0.0))
             if nearest is not None:
                 r["start"] = min(r["start"], nearest)
                 r["duration"] = float(r["end"]) - float(r["start"]) 
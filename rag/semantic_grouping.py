@@ -4,6 +4,10 @@ Semantic Grouping for RAG-based Content Organization
 
 This module uses vector similarity to group semantically related content
 before applying director cut selection, preventing conversation fragmentation.
+
+Clustering works on a sparse neighbor graph (pairs above the similarity
+threshold, computed in row blocks), so memory stays O(n + edges) rather than
+an n x n matrix.
 """
 
 import numpy as np
@@ -35,54 +39,99 @@ def compute_semantic_similarity_matrix(bursts: List[Dict], retriever: Retriever)
     return sim_matrix
 
 
-def find_semantic_clusters(bursts: List[Dict], retriever: Retriever, 
+def semantic_neighbor_graph(bursts: List[Dict], retriever: Retriever,
+                            similarity_threshold: float,
+                            block_rows: int = 1024) -> List[List[int]]:
+    """
+    Sparse thresholded similarity graph over bursts, without the dense matrix.
+
+    Cosine similarities are computed in row blocks of `block_rows` x n, and
+    only pairs at or above the threshold are kept. Bursts without a (non-zero)
+    vector score -1.0 against everything, as in `Retriever.sim`. Pairs within
+    a rounding error of the threshold are re-checked with `Retriever.sim` so the
+    edge set matches the pairwise computation exactly.
+
+    Args:
+        bursts: List of burst data
+        retriever: Vector similarity retriever
+        similarity_threshold: Minimum similarity for an edge
+        block_rows: Rows per similarity block (bounds memory to block_rows x n)
+
+    Returns:
+        For each burst index j, the sorted indices k < j with sim(k, j) >= threshold
+    """
+    n = len(bursts)
+    lower: List[List[int]] = [[] for _ in range(n)]
+    if n < 2 or retriever.vecs is None:
+        return lower
+
+    dim = retriever.vecs.shape[1]
+    vecs = np.zeros((n, dim), dtype=np.float32)
+    for i, b in enumerate(bursts):
+        row = retriever.id_to_idx.get(b["id"])
+        if row is not None:
+            vecs[i] = retriever.vecs[row]
+    norms = np.linalg.norm(vecs, axis=1)
+    valid = norms > 0
+    safe_norms = np.where(valid, norms, 1.0)
+    eps = 1e-5
+
+    for lo in range(0, n, block_rows):
+        hi = min(n, lo + block_rows)
+        # Only the lower triangle (k < j) is needed: columns [0, hi) for rows [lo, hi)
+        sims = (vecs[lo:hi] @ vecs[:hi].T) / np.outer(safe_norms[lo:hi], safe_norms[:hi])
+        sims[~valid[lo:hi], :] = -1.0
+        sims[:, ~valid[:hi]] = -1.0
+        rows, cols = np.nonzero(sims >= similarity_threshold - eps)
+        for r, k in zip(rows.tolist(), cols.tolist()):
+            j = lo + r
+            if k >= j:
+                continue
+            s = float(sims[r, k])
+            if abs(s - similarity_threshold) <= eps:
+                s = retriever.sim(bursts[k]["id"], bursts[j]["id"])
+            if s >= similarity_threshold:
+                lower[j].append(k)
+    return lower
+
+
+def find_semantic_clusters(bursts: List[Dict], retriever: Retriever,
                           similarity_threshold: float = 0.4,
                           min_cluster_size: int = 2) -> List[List[int]]:
     """
     Find semantic clusters of related content using vector similarity.
-    
+
+    Clusters are seeded in burst order; a burst joins the earliest-seeded
+    cluster holding an earlier burst it is similar to, otherwise it seeds its
+    own. This is one sweep over the sparse neighbor graph (O(n + edges)) and
+    reproduces the greedy seed-and-scan grouping exactly. (It is deliberately
+    not connected components: a burst that only links two clusters through a
+    later member stays in its own cluster.)
+
     Args:
         bursts: List of burst data
         retriever: Vector similarity retriever
         similarity_threshold: Minimum similarity for cluster membership
         min_cluster_size: Minimum size for a valid cluster
-        
+
     Returns:
         List of clusters, each containing burst indices
     """
     if not retriever.have_index or len(bursts) < 2:
         return []
-    
-    sim_matrix = compute_semantic_similarity_matrix(bursts, retriever)
+
+    lower = semantic_neighbor_graph(bursts, retriever, similarity_threshold)
     n = len(bursts)
-    visited = set()
-    clusters = []
-    
-    for i in range(n):
-        if i in visited:
-            continue
-            
-        # Start new cluster from burst i
-        cluster = [i]
-        visited.add(i)
-        
-        # Find all bursts similar to this one
-        for j in range(i + 1, n):
-            if j in visited:
-                continue
-                
-            # Check if burst j is similar to any burst in current cluster
-            is_similar = any(sim_matrix[j, k] >= similarity_threshold for k in cluster)
-            
-            if is_similar:
-                cluster.append(j)
-                visited.add(j)
-        
-        # Only keep clusters with minimum size
-        if len(cluster) >= min_cluster_size:
-            clusters.append(cluster)
-    
-    return clusters
+    seed_of = list(range(n))
+    members: Dict[int, List[int]] = {}
+
+    for j in range(n):
+        if lower[j]:
+            seed_of[j] = min(seed_of[k] for k in lower[j])
+        members.setdefault(seed_of[j], []).append(j)
+
+    # Seeds are visited in index order, members were appended in index order
+    return [cluster for seed, cluster in sorted(members.items()) if len(cluster) >= min_cluster_size]
 
 
 def merge_semantic_clusters(bursts: List[Dict], clusters: List[List[int]]) -> List[Dict]:
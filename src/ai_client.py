@@ -7,6 +7,7 @@ Behavior:
 - If all OpenRouter options fail, fallback to Gemini 2.0 Flash (paid model).
 - Vision: Gemini 2.0 Flash first, then OpenRouter fallback.
 - Quiet retry logging by default (toggle via QUIET_RETRY_LOGS=false).
+- Every call and provider attempt is recorded as an `llm.*` span (utils.metrics).
 
 Usage:
     from src.ai_client import call_llm, call_llm_vision
@@ -26,6 +27,8 @@ from dotenv import load_dotenv
 from threading import BoundedSemaphore, Lock
 from contextlib import contextmanager
 
+from utils import metrics
+
 # Load environment variables from config/streamsniped.env
 load_dotenv("config/streamsniped.env")
 
@@ -40,6 +43,7 @@ _LLM_MIN_INTERVAL_S = float(os.getenv("LLM_MIN_INTERVAL_S", "0.0"))
 _LLM_SEM = BoundedSemaphore(max(1, _LLM_MAX_PARALLEL))
 _LLM_LAST_CALL_TS = 0.0
 _LLM_TIME_LOCK = Lock()
+_LLM_SLOT_WAIT = metrics.histogram("llm_slot_wait_seconds", "Time spent waiting for an LLM concurrency slot")
 
 
 
@@ -62,7 +66,8 @@ def _maybe_throttle():
 @contextmanager
 def _llm_slot():
     """Context manager that limits global parallel LLM calls and applies throttle."""
-    _LLM_SEM.acquire()
+    with _LLM_SLOT_WAIT.time():
+        _LLM_SEM.acquire()
     try:
         _maybe_throttle()
         yield
@@ -110,6 +115,7 @@ def _post_openrouter(prompt: str, model: str, api_key: str, max_tokens: int, tem
     return data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
 
 
+@metrics.traced("llm.openrouter", ok=bool)
 def _call_openrouter_round_robin(prompt: str, max_tokens: int, temperature: float, timeout: int) -> Optional[str]:
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
@@ -154,6 +160,7 @@ def _call_openrouter_round_robin(prompt: str, max_tokens: int, temperature: floa
     return None
 
 
+@metrics.traced("llm.openai", ok=bool)
 def _call_openai_direct(prompt: str, max_tokens: int, temperature: float) -> Optional[str]:
     """Call OpenAI API directly as a fallback."""
     api_key = os.getenv("OPENAI_API_KEY")
@@ -284,6 +291,7 @@ def _call_ollama_json(prompt: str,
             print(f" Ollama generate error: {e}")
         return None
 
+@metrics.traced("llm.ollama", ok=bool)
 def _call_ollama(prompt: str, max_tokens: int, temperature: float) -> Optional[str]:
     """Call Ollama API directly."""
     ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
@@ -332,6 +340,7 @@ def _call_ollama(prompt: str, max_tokens: int, temperature: float) -> Optional[s
         return None
 
 
+@metrics.traced("llm.gemini", ok=bool)
 def _call_gemini_direct(prompt: str, max_tokens: int, temperature: float) -> Optional[str]:
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
@@ -363,6 +372,7 @@ def _call_gemini_direct(prompt: str, max_tokens: int, temperature: float) -> Opt
         return None
 
 
+@metrics.traced("llm.gemini_3_flash")
 def call_gemini_3_flash(
     prompt: str,
     max_tokens: int = 500,
@@ -414,6 +424,7 @@ def call_gemini_3_flash(
             raise RuntimeError(f"Gemini 3 Flash failed: {e}")
 
 
+@metrics.traced("llm.gemini_3_flash_vision")
 def call_gemini_3_flash_vision(
     prompt: str,
     images: List[Tuple[str, bytes, str]],
@@ -506,6 +517,7 @@ def call_gemini_3_flash_vision(
             raise RuntimeError(f"Gemini 3 Flash vision failed: {e}")
 
 
+@metrics.traced("llm.call")
 def call_llm(
     prompt: str,
     max_tokens: int = 500,
@@ -539,6 +551,7 @@ def call_llm(
 
 
 
+@metrics.traced("llm.openai_vision", ok=bool)
 def _call_openai_vision(
     prompt: str,
     images: List[Tuple[str, bytes, str]],
@@ -569,6 +582,7 @@ def _call_openai_vision(
         return None
 
 
+@metrics.traced("llm.gemini_vision", ok=bool)
 def _call_gemini_vision(
     prompt: str,
     images: List[Tuple[str, bytes, str]],
@@ -640,6 +654,7 @@ def _call_gemini_vision(
         return None
 
 
+@metrics.traced("llm.call_ollama")
 def call_llm_ollama(
     prompt: str,
     max_tokens: int = 500,
@@ -677,6 +692,7 @@ def call_llm_ollama(
     raise RuntimeError("All AI options failed")
 
 
+@metrics.traced("llm.call_vision", ok=bool)
 def call_llm_vision(
     prompt: str,
     images: List[Tuple[str, bytes, str]],
@@ -2,15 +2,124 @@
 """
 Content classification module for StreamSniped
 Uses GPT to analyze clips/chunks and generate metadata
+
+classify_clips / classify_chunks pack several items into one multi-item
+prompt (sized to a token budget) and send those batches concurrently. Items
+missing or malformed in a batch response are retried one by one with the
+single-item prompt, so results keep the per-item schema either way.
+
+Environment:
+  CLASSIFY_BULK          "0" to classify one item per request (default on)
+  CLASSIFY_BATCH_TOKENS  estimated prompt tokens per batch (default 6000)
+  CLASSIFY_BATCH_ITEMS   max items per batch (default 8)
+  CLASSIFY_WORKERS       concurrent requests (default 4)
 """
 
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from loguru import logger
 
+from utils.env import env_int, estimate_tokens
+
 from .config import config
 
+# Shared by the single-item and batch prompts (kept verbatim so single prompts are unchanged)
+_CLIP_GUIDELINES = """            LABEL GUIDELINES:
+            - reaction: Streamer reacting to something (laugh, shock, rage, excitement)
+            - banter: Casual conversation, jokes, chat interaction, entertaining commentary
+            - setup: Building up to something, preparation, anticipation
+            - low_energy: Quiet, boring, filler content, minimal engagement
+            - gameplay: Pure gameplay without much commentary
+            - other: Doesn't fit other categories
+
+            🔥 CHAT CONTEXT IS THE KEY TO SCORING:
+            - If chat is spamming "LMAO", "KEKW", "🤣", "AHAHAHA" = THIS IS HILARIOUS (7-9/10)
+            - If chat is going wild with reactions = streamer did something worth watching
+            - Chat reactions are MORE important than transcript content for entertainment value
+            - A simple "Oh" with chat going crazy = better than long commentary with no reactions
+
+            SCORING GUIDELINES - Focus on ENTERTAINMENT VALUE:
+            - 0–2 Dead clip: no voice, silence, irrelevant chatter
+            - 3–4 Low energy, filler clip, thanking gifted subs, thanking subscribers, thanking viewers, could be cut
+            - 5–6 Mildly entertaining, filler but passable
+            - 7	Solid moment, has either charm, narrative, or funny interaction
+            - 8	Strong clip: funny joke, memorable interaction, engaging, possibly standalone
+            - 9–10	Gold-tier: iconic line, huge moment, heavy emotion or laughter, clipped by viewers
+
+            keep = true/false. Should this clip survive the purge and go to final output? Be ruthless. You're the bouncer.
+            CONTEXTUAL TIPS (When in doubt, be mean):
+            Ask: "Would I actually share this with a friend?"
+            If streamer is thanking subs, yawning, or just walking in-game, it's a no.
+            A weird rant, hilarious fail, or spicy chat moment? That's the gold.
+            Chat going wild, laughing, emoting, or reacting to something = streamer probably did something worth watching
+            Think like you're curating for a Twitch recap YouTube channel with real standards.
+            Any clip with a score above 5 is a keeper."""
+
+_CHUNK_GUIDELINES = """            LABEL GUIDELINES:
+            - setup: Building tension, introducing conflict, preparing for something
+            - payoff: Resolution, climax, satisfying conclusion to setup
+            - transition: Moving between topics, mood shifts, scene changes
+            - climax: Peak emotional moment, highest tension, most dramatic
+            - character_development: Streamer personality, growth, memorable traits
+            - banter: Casual conversation, jokes, chat interaction
+            - low_energy: Filler content, minimal engagement, skippable
+            - other: Doesn't fit other categories
+
+            NARRATIVE ROLE GUIDELINES:
+            - opening: Sets the scene, introduces characters, establishes mood
+            - rising_action: Builds tension, develops conflict, moves toward climax
+            - climax: Peak moment, highest emotional intensity
+            - falling_action: Resolves tension, provides closure
+            - closing: Wraps up story, provides conclusion
+            - filler: Doesn't advance narrative, can be cut
+
+            STORY ARC GUIDELINES:
+            - beginning: Start of a story arc or narrative thread
+            - middle: Development of ongoing story or conflict
+            - end: Conclusion of a story arc or narrative thread
+            - standalone: Self-contained moment that doesn't need context
+
+            🔥 CHAT CONTEXT IS THE KEY TO SCORING:
+            - If chat is spamming "LMAO", "KEKW", "🤣", "AHAHAHA" = THIS IS HILARIOUS (7-9/10)
+            - If chat is going wild with reactions = streamer did something worth watching
+            - Chat reactions are MORE important than transcript content for entertainment value
+            - A simple "Oh" with chat going crazy = better than long commentary with no reactions
+
+            SCORING GUIDELINES - Focus on ENTERTAINMENT VALUE:
+            - 0–2 Dead chunk: no voice, silence, irrelevant chatter, thanking subs
+            - 3–4 Low energy, filler chunk, thanking gifted subs, thanking subscribers, thanking viewers, could be cut
+            - 5–6 Mildly entertaining, filler but passable
+            - 7	Solid moment, has either charm, narrative, or funny interaction
+            - 8	Strong chunk: funny joke, memorable interaction, engaging, possibly standalone
+            - 9–10	Gold-tier: iconic line, huge moment, heavy emotion or laughter, clipped by viewers
+
+            keep = true/false. Should this chunk survive the purge and go to final output? Be ruthless. You're the bouncer.
+            CONTEXTUAL TIPS (When in doubt, be mean):
+            Ask: "Would I actually share this with a friend?"
+            If streamer is thanking subs, yawning, or just walking in-game, it's a no.
+            A weird rant, hilarious fail, or spicy chat moment? That's the gold.
+            Chat going wild, laughing, emoting, or reacting to something = streamer probably did something worth watching
+            Think like you're curating for a Twitch recap YouTube channel with real standards.
+            Any chunk with a score above 5 is a keeper."""
+
+# Key order of the single-item response schemas
+_RESULT_KEYS = {
+    "clip": ("start", "end", "label", "score", "clip_title", "transcript", "keep", "tags", "reasoning"),
+    "chunk": ("start", "end", "label", "score", "narrative_role", "story_arc", "character_moments",
+              "transcript", "keep", "tags", "reasoning"),
+}
+# Batch responses only carry the judgement; start/end/transcript are filled in from the input
+_LOCAL_KEYS = ("start", "end", "transcript")
+# Output tokens reserved per item in a batch response
+_BATCH_TOKENS_PER_ITEM = 250
+
+
+def _hms(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
 
 class ContentClassifier:
     """Handles content classification using GPT for both clips and chunks"""
@@ -157,36 +266,7 @@ class ContentClassifier:
             🔥 CHAT REACTIONS (THIS IS CRUCIAL FOR SCORING):
             {chat_text}
 
-            LABEL GUIDELINES:
-            - reaction: Streamer reacting to something (laugh, shock, rage, excitement)
-            - banter: Casual conversation, jokes, chat interaction, entertaining commentary
-            - setup: Building up to something, preparation, anticipation
-            - low_energy: Quiet, boring, filler content, minimal engagement
-            - gameplay: Pure gameplay without much commentary
-            - other: Doesn't fit other categories
-
-            🔥 CHAT CONTEXT IS THE KEY TO SCORING:
-            - If chat is spamming "LMAO", "KEKW", "🤣", "AHAHAHA" = THIS IS HILARIOUS (7-9/10)
-            - If chat is going wild with reactions = streamer did something worth watching
-            - Chat reactions are MORE important than transcript content for entertainment value
-            - A simple "Oh" with chat going crazy = better than long commentary with no reactions
-
-            SCORING GUIDELINES - Focus on ENTERTAINMENT VALUE:
-            - 0–2 Dead clip: no voice, silence, irrelevant chatter
-            - 3–4 Low energy, filler clip, thanking gifted subs, thanking subscribers, thanking viewers, could be cut
-            - 5–6 Mildly entertaining, filler but passable
-            - 7	Solid moment, has either charm, narrative, or funny interaction
-            - 8	Strong clip: funny joke, memorable interaction, engaging, possibly standalone
-            - 9–10	Gold-tier: iconic line, huge moment, heavy emotion or laughter, clipped by viewers
-
-            keep = true/false. Should this clip survive the purge and go to final output? Be ruthless. You're the bouncer.
-            CONTEXTUAL TIPS (When in doubt, be mean):
-            Ask: "Would I actually share this with a friend?"
-            If streamer is thanking subs, yawning, or just walking in-game, it's a no.
-            A weird rant, hilarious fail, or spicy chat moment? That's the gold.
-            Chat going wild, laughing, emoting, or reacting to something = streamer probably did something worth watching
-            Think like you're curating for a Twitch recap YouTube channel with real standards.
-            Any clip with a score above 5 is a keeper.
+{_CLIP_GUIDELINES}
             Respond with ONLY the JSON object, no other text.
             """
         return prompt
@@ -229,57 +309,80 @@ class ContentClassifier:
             🔥 CHAT REACTIONS (THIS IS CRUCIAL FOR SCORING):
             {chat_text}
 
-            LABEL GUIDELINES:
-            - setup: Building tension, introducing conflict, preparing for something
-            - payoff: Resolution, climax, satisfying conclusion to setup
-            - transition: Moving between topics, mood shifts, scene changes
-            - climax: Peak emotional moment, highest tension, most dramatic
-            - character_development: Streamer personality, growth, memorable traits
-            - banter: Casual conversation, jokes, chat interaction
-            - low_energy: Filler content, minimal engagement, skippable
-            - other: Doesn't fit other categories
+{_CHUNK_GUIDELINES}
+            Respond with ONLY the JSON object, no other text.
+            """
+        return prompt
 
-            NARRATIVE ROLE GUIDELINES:
-            - opening: Sets the scene, introduces characters, establishes mood
-            - rising_action: Builds tension, develops conflict, moves toward climax
-            - climax: Peak moment, highest emotional intensity
-            - falling_action: Resolves tension, provides closure
-            - closing: Wraps up story, provides conclusion
-            - filler: Doesn't advance narrative, can be cut
+    def _create_batch_item_block(self,
+                                 kind: str,
+                                 item_id: int,
+                                 transcript: str,
+                                 chat_text: str,
+                                 start: int,
+                                 end: int) -> str:
+        """One item section of a batch prompt"""
+        return f"""
+            === ITEM {item_id} ===
+            {kind.upper()} INFO:
+            - Duration: {end - start} seconds
+            - Time: {_hms(start)} - {_hms(end)}
 
-            STORY ARC GUIDELINES:
-            - beginning: Start of a story arc or narrative thread
-            - middle: Development of ongoing story or conflict
-            - end: Conclusion of a story arc or narrative thread
-            - standalone: Self-contained moment that doesn't need context
+            TRANSCRIPT:
+            {transcript}
 
-            🔥 CHAT CONTEXT IS THE KEY TO SCORING:
-            - If chat is spamming "LMAO", "KEKW", "🤣", "AHAHAHA" = THIS IS HILARIOUS (7-9/10)
-            - If chat is going wild with reactions = streamer did something worth watching
-            - Chat reactions are MORE important than transcript content for entertainment value
-            - A simple "Oh" with chat going crazy = better than long commentary with no reactions
+            🔥 CHAT REACTIONS (THIS IS CRUCIAL FOR SCORING):
+            {chat_text}
+"""
 
-            SCORING GUIDELINES - Focus on ENTERTAINMENT VALUE:
-            - 0–2 Dead chunk: no voice, silence, irrelevant chatter, thanking subs
-            - 3–4 Low energy, filler chunk, thanking gifted subs, thanking subscribers, thanking viewers, could be cut
-            - 5–6 Mildly entertaining, filler but passable
-            - 7	Solid moment, has either charm, narrative, or funny interaction
-            - 8	Strong chunk: funny joke, memorable interaction, engaging, possibly standalone
-            - 9–10	Gold-tier: iconic line, huge moment, heavy emotion or laughter, clipped by viewers
+    def _create_batch_classification_prompt(self, kind: str, item_blocks: List[str]) -> str:
+        """Create GPT prompt classifying several clips/chunks at once (one JSON object per item)"""
+        n = len(item_blocks)
+        if kind == "clip":
+            intro = (f"Analyze each of these {n} Twitch clips like a brutally honest Twitch enjoyer. Be ruthless about "
+                     "what's actually entertaining. Rate each one as if you're curating for a highlight reel where "
+                     "boring clips get roasted in the comments.")
+            schema = """{
+                    "item_id": <ITEM number>,
+                    "label": "reaction|banter|setup|low_energy|gameplay|other",
+                    "score": 0.0-10.0,
+                    "clip_title": "Brief descriptive title",
+                    "keep": true/false,
+                    "tags": ["tag1", "tag2", "tag3"],
+                    "reasoning": "Brief explanation of classification"
+                }"""
+            guidelines = _CLIP_GUIDELINES
+        else:
+            intro = (f"Analyze each of these {n} VOD chunks like a brutally honest video editor. Be ruthless about "
+                     "what's actually worth keeping for a narrative. Rate each one as if you're curating for a story "
+                     "where boring chunks get cut immediately.")
+            schema = """{
+                    "item_id": <ITEM number>,
+                    "label": "setup|payoff|transition|climax|character_development|banter|low_energy|other",
+                    "score": 0.0-10.0,
+                    "narrative_role": "opening|rising_action|climax|falling_action|closing|filler",
+                    "story_arc": "beginning|middle|end|standalone",
+                    "character_moments": ["moment1", "moment2"],
+                    "keep": true/false,
+                    "tags": ["tag1", "tag2", "tag3"],
+                    "reasoning": "Brief explanation of classification"
+                }"""
+            guidelines = _CHUNK_GUIDELINES
 
-            keep = true/false. Should this chunk survive the purge and go to final output? Be ruthless. You're the bouncer.
-            CONTEXTUAL TIPS (When in doubt, be mean):
-            Ask: "Would I actually share this with a friend?"
-            If streamer is thanking subs, yawning, or just walking in-game, it's a no.
-            A weird rant, hilarious fail, or spicy chat moment? That's the gold.
-            Chat going wild, laughing, emoting, or reacting to something = streamer probably did something worth watching
-            Think like you're curating for a Twitch recap YouTube channel with real standards.
-            Any chunk with a score above 5 is a keeper.
-            Respond with ONLY the JSON object, no other text.
+        items_text = "".join(item_blocks)
+        prompt = f"""
+            {intro} Judge every {kind} on its own. Respond with a JSON array holding one object per {kind}, in the following format:
+
+            [
+                {schema}
+            ]
+{items_text}
+{guidelines}
+            Respond with ONLY the JSON array ({n} objects, one per ITEM, each with its item_id), no other text.
             """
         return prompt
-    
-    def _call_gpt(self, prompt: str) -> str:
+
+    def _call_gpt(self, prompt: str, max_tokens: int = 1000) -> str:
         """Call GPT API with real OpenAI integration"""
         try:
             from openai import OpenAI
@@ -295,7 +398,7 @@ class ContentClassifier:
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,  # Low temperature for consistent output
-                max_tokens=1000
+                max_tokens=max_tokens
             )
             
             # Extract response content
@@ -337,21 +440,7 @@ class ContentClassifier:
         """Parse and validate GPT classification response"""
         try:
             data = json.loads(classification)
-            
-            # Validate required fields
-            required_fields = ["start", "end", "label", "score", "keep"]
-            for field in required_fields:
-                if field not in data:
-                    data[field] = None
-            
-            # Add metadata
-            data.update({
-                "content_path": str(content_path),
-                "vod_id": vod_id,
-                "classification_model": self.model
-            })
-            
-            return data
+            return self._finalize_classification(data, content_path, vod_id)
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse GPT response: {e}")
@@ -369,117 +458,260 @@ class ContentClassifier:
                 "vod_id": vod_id,
                 "classification_model": self.model
             }
+
+    def _finalize_classification(self, data: Dict, content_path: Path, vod_id: str) -> Dict:
+        """Fill missing required fields and attach source metadata"""
+        # Validate required fields
+        required_fields = ["start", "end", "label", "score", "keep"]
+        for field in required_fields:
+            if field not in data:
+                data[field] = None
+        
+        # Add metadata
+        data.update({
+            "content_path": str(content_path),
+            "vod_id": vod_id,
+            "classification_model": self.model
+        })
+        
+        return data
+
+    def _parse_batch_classification(self, kind: str, classification: str, batch: List[Tuple[int, Dict, str]]) -> Dict[int, Dict]:
+        """Map a batch response back to its items; items that are missing or malformed are left out"""
+        try:
+            data = json.loads(classification)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Batch response is not valid JSON ({len(batch)} {kind}s will be retried): {e}")
+            return {}
+        if isinstance(data, dict):
+            # Tolerate {"items": [...]} / {"results": [...]} wrappers
+            data = data.get("items") or data.get("results") or []
+        if not isinstance(data, list):
+            return {}
+
+        by_id = {idx: (item, transcript) for idx, item, transcript in batch}
+        parsed: Dict[int, Dict] = {}
+        for obj in data:
+            if not isinstance(obj, dict):
+                continue
+            try:
+                idx = int(obj.get("item_id"))
+            except (TypeError, ValueError):
+                continue
+            if idx not in by_id or idx in parsed:
+                continue
+            if any(obj.get(field) is None for field in ("label", "score", "keep")):
+                continue
+            item, transcript = by_id[idx]
+            local = {
+                "start": _hms(int(item['start_time'])),
+                "end": _hms(int(item['end_time'])),
+                "transcript": transcript,
+            }
+            # Same key order as the single-item response
+            result = {key: local[key] if key in _LOCAL_KEYS else obj.get(key) for key in _RESULT_KEYS[kind]}
+            for key, value in obj.items():
+                if key != "item_id" and key not in result:
+                    result[key] = value
+            parsed[idx] = self._finalize_classification(result, Path(item[f'{kind}_path']), item['vod_id'])
+        return parsed
+
+    def _plan_batches(self, kind: str, items_data: List[Dict],
+                      chat_contexts: Optional[Dict[Path, List[Dict]]]) -> List[Tuple[str, List[Tuple[int, Dict, str]]]]:
+        """Pack items (in order) into batch prompts that stay under the token budget"""
+        token_budget = env_int("CLASSIFY_BATCH_TOKENS", 6000)
+        max_items = max(1, env_int("CLASSIFY_BATCH_ITEMS", 8))
+        base_tokens = estimate_tokens(self._create_batch_classification_prompt(kind, []))
+
+        batches: List[Tuple[List[str], List[Tuple[int, Dict, str]]]] = []
+        blocks: List[str] = []
+        members: List[Tuple[int, Dict, str]] = []
+        used = base_tokens
+        for idx, item in enumerate(items_data):
+            chat_snippet = chat_contexts.get(item[f'{kind}_path'], []) if chat_contexts else []
+            block = self._create_batch_item_block(
+                kind, idx, item['transcript'], self._format_chat_snippet(chat_snippet),
+                int(item['start_time']), int(item['end_time'])
+            )
+            cost = estimate_tokens(block)
+            if members and (used + cost > token_budget or len(members) >= max_items):
+                batches.append((blocks, members))
+                blocks, members, used = [], [], base_tokens
+            blocks.append(block)
+            members.append((idx, item, item['transcript']))
+            used += cost
+        if members:
+            batches.append((blocks, members))
+        return [(self._create_batch_classification_prompt(kind, b), m) for b, m in batches]
+
+    def _classify_bulk(self, kind: str, items_data: List[Dict],
+                       chat_contexts: Optional[Dict[Path, List[Dict]]],
+                       classify_one: Callable[[Dict, Optional[Dict[Path, List[Dict]]]], Dict]) -> List[Dict]:
+        """Classify items in concurrent multi-item batches, retrying failed items individually"""
+        workers = max(1, env_int("CLASSIFY_WORKERS", 4))
+        batches = self._plan_batches(kind, items_data, chat_contexts)
+        logger.info(f"Classifying {len(items_data)} {kind}s in {len(batches)} batches ({workers} concurrent)")
+
+        def run_batch(prompt: str, batch: List[Tuple[int, Dict, str]]) -> Dict[int, Dict]:
+            if len(batch) == 1:
+                idx, item, _ = batch[0]
+                return {idx: classify_one(item, chat_contexts)}
+            max_tokens = min(4000, 200 + _BATCH_TOKENS_PER_ITEM * len(batch))
+            return self._parse_batch_classification(kind, self._call_gpt(prompt, max_tokens=max_tokens), batch)
+
+        results: List[Optional[Dict]] = [None] * len(items_data)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_batch, prompt, batch): batch for prompt, batch in batches}
+            retries = {}
+            for fut in as_completed(futures):
+                batch = futures[fut]
+                try:
+                    parsed = fut.result()
+                except Exception as e:
+                    logger.error(f"Batch classification failed: {e}")
+                    parsed = {}
+                for idx, item, _ in batch:
+                    if idx in parsed:
+                        results[idx] = parsed[idx]
+                    else:
+                        retries[idx] = pool.submit(classify_one, item, chat_contexts)
+            if retries:
+                logger.warning(f"Retrying {len(retries)} {kind}s individually")
+            for idx, fut in retries.items():
+                results[idx] = fut.result()
+        return results
+
+    def _use_bulk(self, bulk: Optional[bool], count: int) -> bool:
+        if bulk is None:
+            bulk = os.getenv("CLASSIFY_BULK", "1").lower() not in ("0", "false", "no")
+        return bulk and count > 1
+
+    def _classify_clip_item(self, clip_data: Dict,
+                            chat_contexts: Optional[Dict[Path, List[Dict]]] = None) -> Dict:
+        """Classify one clip entry, returning an error result instead of raising"""
+        try:
+            # Get chat context if available
+            chat_snippet = []
+            if chat_contexts:
+                clip_path_str = clip_data['clip_path']
+                chat_snippet = chat_contexts.get(clip_path_str, [])
+            
+            return self.classify_clip(
+                clip_path=Path(clip_data['clip_path']),
+                transcript=clip_data['transcript'],
+                chat_snippet=chat_snippet,
+                clip_start=clip_data['start_time'],
+                clip_end=clip_data['end_time'],
+                vod_id=clip_data['vod_id']
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to classify clip: {e}")
+            return {
+                "start": "00:00:00",
+                "end": "00:00:00", 
+                "label": "other",
+                "score": 0.0,
+                "clip_title": "Classification Error",
+                "transcript": "",
+                "keep": False,
+                "tags": ["error"],
+                "reasoning": f"Classification failed: {e}",
+                "clip_path": clip_data.get('clip_path', ''),
+                "vod_id": clip_data.get('vod_id', ''),
+                "classification_model": self.model
+            }
+
+    def _classify_chunk_item(self, chunk_data: Dict,
+                             chat_contexts: Optional[Dict[Path, List[Dict]]] = None) -> Dict:
+        """Classify one chunk entry, returning an error result instead of raising"""
+        try:
+            # Get chat context if available
+            chat_snippet = []
+            if chat_contexts:
+                chunk_path_str = chunk_data['chunk_path']
+                chat_snippet = chat_contexts.get(chunk_path_str, [])
+            
+            return self.classify_chunk(
+                chunk_path=Path(chunk_data['chunk_path']),
+                transcript=chunk_data['transcript'],
+                chat_snippet=chat_snippet,
+                chunk_start=chunk_data['start_time'],
+                chunk_end=chunk_data['end_time'],
+                vod_id=chunk_data['vod_id']
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to classify chunk: {e}")
+            return {
+                "start": "00:00:00",
+                "end": "00:00:00", 
+                "label": "other",
+                "score": 0.0,
+                "narrative_role": "filler",
+                "story_arc": "standalone",
+                "character_moments": [],
+                "transcript": "",
+                "keep": False,
+                "tags": ["error"],
+                "reasoning": f"Classification failed: {e}",
+                "chunk_path": chunk_data.get('chunk_path', ''),
+                "vod_id": chunk_data.get('vod_id', ''),
+                "classification_model": self.model
+            }
     
     def classify_clips(self, 
                       clips_data: List[Dict],
-                      chat_contexts: Optional[Dict[Path, List[Dict]]] = None) -> List[Dict]:
+                      chat_contexts: Optional[Dict[Path, List[Dict]]] = None,
+                      bulk: Optional[bool] = None) -> List[Dict]:
         """
         Classify multiple clips (Phase 1)
         
         Args:
             clips_data: List of clip data with transcript and chat info
             chat_contexts: Optional dict mapping clip paths to chat snippets
+            bulk: Batch several clips per request (default: CLASSIFY_BULK, on)
             
         Returns:
             List of classification results
         """
+        if self._use_bulk(bulk, len(clips_data)):
+            return self._classify_bulk("clip", clips_data, chat_contexts, self._classify_clip_item)
+
         results = []
         
         for i, clip_data in enumerate(clips_data, 1):
             logger.info(f"Classifying clip {i}/{len(clips_data)}: {clip_data['clip_path']}")
-            
-            try:
-                # Get chat context if available
-                chat_snippet = []
-                if chat_contexts:
-                    clip_path_str = clip_data['clip_path']
-                    chat_snippet = chat_contexts.get(clip_path_str, [])
-                
-                classification = self.classify_clip(
-                    clip_path=Path(clip_data['clip_path']),
-                    transcript=clip_data['transcript'],
-                    chat_snippet=chat_snippet,
-                    clip_start=clip_data['start_time'],
-                    clip_end=clip_data['end_time'],
-                    vod_id=clip_data['vod_id']
-                )
-                results.append(classification)
-                
-            except Exception as e:
-                logger.error(f"Failed to classify clip: {e}")
-                results.append({
-                    "start": "00:00:00",
-                    "end": "00:00:00", 
-                    "label": "other",
-                    "score": 0.0,
-                    "clip_title": "Classification Error",
-                    "transcript": "",
-                    "keep": False,
-                    "tags": ["error"],
-                    "reasoning": f"Classification failed: {e}",
-                    "clip_path": clip_data.get('clip_path', ''),
-                    "vod_id": clip_data.get('vod_id', ''),
-                    "classification_model": self.model
-                })
+            results.append(self._classify_clip_item(clip_data, chat_contexts))
         
         return results
     
     def classify_chunks(self,
                        chunks_data: List[Dict],
-                       chat_contexts: Optional[Dict[Path, List[Dict]]] = None) -> List[Dict]:
+                       chat_contexts: Optional[Dict[Path, List[Dict]]] = None,
+                       bulk: Optional[bool] = None) -> List[Dict]:
         """
         Classify multiple chunks (Phase 2)
         
         Args:
             chunks_data: List of chunk data with transcript and chat info
             chat_contexts: Optional dict mapping chunk paths to chat snippets
+            bulk: Batch several chunks per request (default: CLASSIFY_BULK, on)
             
         Returns:
             List of classification results
         """
+        if self._use_bulk(bulk, len(chunks_data)):
+            return self._classify_bulk("chunk", chunks_data, chat_contexts, self._classify_chunk_item)
+
         results = []
         
         for i, chunk_data in enumerate(chunks_data, 1):
             logger.info(f"Classifying chunk {i}/{len(chunks_data)}: {chunk_data['chunk_path']}")
-            
-            try:
-                # Get chat context if available
-                chat_snippet = []
-                if chat_contexts:
-                    chunk_path_str = chunk_data['chunk_path']
-                    chat_snippet = chat_contexts.get(chunk_path_str, [])
-                
-                classification = self.classify_chunk(
-                    chunk_path=Path(chunk_data['chunk_path']),
-                    transcript=chunk_data['transcript'],
-                    chat_snippet=chat_snippet,
-                    chunk_start=chunk_data['start_time'],
-                    chunk_end=chunk_data['end_time'],
-                    vod_id=chunk_data['vod_id']
-                )
-                results.append(classification)
-                
-            except Exception as e:
-                logger.error(f"Failed to classify chunk: {e}")
-                results.append({
-                    "start": "00:00:00",
-                    "end": "00:00:00", 
-                    "label": "other",
-                    "score": 0.0,
-                    "narrative_role": "filler",
-                    "story_arc": "standalone",
-                    "character_moments": [],
-                    "transcript": "",
-                    "keep": False,
-                    "tags": ["error"],
-                    "reasoning": f"Classification failed: {e}",
-                    "chunk_path": chunk_data.get('chunk_path', ''),
-                    "vod_id": chunk_data.get('vod_id', ''),
-                    "classification_model": self.model
-                })
+            results.append(self._classify_chunk_item(chunk_data, chat_contexts))
         
         return results
 
 
 # Backward compatibility alias
-ClipClassifier = ContentClassifier 
\ No newline at end of file
+ClipClassifier = ContentClassifier
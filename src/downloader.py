@@ -13,6 +13,8 @@ from urllib.parse import urlparse
 import requests
 from loguru import logger
 
+from utils import metrics
+
 from .config import config
 
 
@@ -125,7 +127,7 @@ class TwitchDownloader:
         logger.info(f"Downloading VOD {video_id} to {output_path}")
         
         try:
-            result = subprocess.run(
+            result = metrics.run_subprocess(
                 cmd,
                 capture_output=True,
                 text=True,
@@ -168,7 +170,7 @@ class TwitchDownloader:
         logger.info(f"Downloading chat for VOD {video_id} to {output_path}")
         
         try:
-            result = subprocess.run(
+            result = metrics.run_subprocess(
                 cmd,
                 capture_output=True,
                 text=True,
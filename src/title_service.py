@@ -12,22 +12,43 @@ Usage:
     clip_title = service.generate_clip_title(transcript, streamer_name)
     arc_title = service.generate_arc_title(arc_summary, streamer_name)
     timestamps = service.generate_timestamps(ranges)
+
+    # Many items at once (numbered items per request, see below)
+    clip_titles = service.generate_clip_titles_for_ranges([(start, end), ...])
+    arc_titles = service.generate_arc_titles(summaries)
+
+Batched generation deduplicates near-identical inputs (same text after
+lowercasing and dropping punctuation/extra whitespace), packs the rest into
+numbered multi-item prompts under a token budget, validates every returned
+title with the same _clean_title/_is_invalid_title rules as the single-item
+methods, and re-sends only the rejected or missing items. Stream context is
+loaded once per VOD and reused until the context file changes.
+
+Environment:
+  TITLE_BATCH_TOKENS   estimated prompt tokens per batch (default 12000)
+  TITLE_BATCH_ITEMS    max items per batch (default 20)
+  TITLE_WORKERS        concurrent batch requests (default 4)
+  TITLE_BATCH_RETRIES  rounds re-sending rejected items before fallbacks (default 1)
 """
 
 from __future__ import annotations
 
 import json
+import os
 import re
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 # Add project root to path for utils import
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Import the Gemini 3 Flash caller
 from src.ai_client import call_gemini_3_flash
+from utils.env import env_int, estimate_tokens
 
 # Import transcript loader utility
 try:
@@ -66,6 +87,9 @@ SAMPLE_TITLES = [
     "talking about the future of otv",
 ]
 
+# Rough output allowance per item in a batched request
+_BATCH_TOKENS_PER_ITEM = 60
+
 
 # -----------------------------------------------------------------------------
 # Data Classes
@@ -160,19 +184,59 @@ def _format_hms(seconds: float) -> str:
     return f"{h:02d}:{m:02d}:{s2:02d}"
 
 
+def _dedupe_key(text: str) -> str:
+    """Normalized text used to spot near-identical inputs."""
+    text = re.sub(r"[^\w\s]", "", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _clean_thumbnail_text(result: str) -> str:
+    """Clean raw thumbnail text; returns "" if it is unusable."""
+    text = (result or "").strip().strip('"\'').upper()
+    # Remove emojis (range of common emojis)
+    text = re.sub(r'[\U00010000-\U0010ffff]', '', text)
+    # Remove trailing punctuation
+    text = re.sub(r'[.,:;!?]+$', '', text)
+    # Remove newlines
+    text = text.replace('\n', ' ')
+    
+    if _is_invalid_title(text) or len(text) < 2:
+        return ""
+    return text.strip()
+
+
+# vod_id -> (context file mtime_ns or None if missing, context)
+_CONTEXT_CACHE: Dict[str, Tuple[Optional[int], StreamContext]] = {}
+_CONTEXT_LOCK = threading.Lock()
+
+
 def _load_stream_context(vod_id: str) -> StreamContext:
-    """Load stream context from saved files."""
+    """Load stream context from saved files (cached per VOD until the file changes)."""
     try:
         from src.config import config
         sc_path = config.get_ai_data_dir(vod_id) / f"{vod_id}_stream_context.json"
-        if sc_path.exists():
+        try:
+            mtime_ns: Optional[int] = sc_path.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        
+        with _CONTEXT_LOCK:
+            cached = _CONTEXT_CACHE.get(vod_id)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        
+        context = StreamContext()
+        if mtime_ns is not None:
             data = json.loads(sc_path.read_text(encoding="utf-8"))
             cats = data.get("chapter_categories", [])
-            return StreamContext(
+            context = StreamContext(
                 streamer=str(data.get("streamer") or "").strip(),
                 vod_title=str(data.get("vod_title") or "").strip(),
                 categories=[str(c).strip() for c in cats if str(c).strip()][:5] if isinstance(cats, list) else [],
             )
+        with _CONTEXT_LOCK:
+            _CONTEXT_CACHE[vod_id] = (mtime_ns, context)
+        return context
     except Exception:
         pass
     return StreamContext()
@@ -182,15 +246,8 @@ def _load_stream_context(vod_id: str) -> StreamContext:
 # Core Prompts (Simplified and Optimized for Gemini 3)
 # -----------------------------------------------------------------------------
 
-CLIP_TITLE_PROMPT = """Generate a short, high-click-through YouTube title for a clip.
-
-CONTEXT:
-{context}
-
-TRANSCRIPT:
-{transcript}
-
-STYLE GUIDELINES:
+# Guidelines shared by the single-item and batched prompts
+CLIP_TITLE_GUIDELINES = """STYLE GUIDELINES:
 - Use lowercase for a casual/modern feel (unless emphasizing a word).
 - AVOID the "[Streamer] [Verbs] [Subject]" format. (e.g., No "Masayoshi plays Club Penguin")
 - DYNAMIC PERSPECTIVE: Choose the most viral framing. Can be descriptive, use the streamer's name, or a direct quote.
@@ -202,20 +259,22 @@ PICK ONE ARCHETYPE (Mix it up):
 2. THE POV: "{streamer} actually can't believe this happened"
 3. THE QUOTE: "my brain just completely broke"
 4. THE DESCRIPTIVE: "the worst luck in the history of the game"
-5. THE COMMENTARY: "club penguin is actually a horror game"
+5. THE COMMENTARY: "club penguin is actually a horror game\""""
 
-Return ONLY the title. No quotes."""
-
-
-ARC_TITLE_PROMPT = """Generate a compelling YouTube video title for this segment.
+CLIP_TITLE_PROMPT = """Generate a short, high-click-through YouTube title for a clip.
 
 CONTEXT:
 {context}
 
-CONTENT SUMMARY:
-{summary}
+TRANSCRIPT:
+{transcript}
 
-RULES:
+""" + CLIP_TITLE_GUIDELINES + """
+
+Return ONLY the title. No quotes."""
+
+
+ARC_TITLE_GUIDELINES = """RULES:
 - Focus on the SPECIFIC story, event, or game match.
 - IF GAMEPLAY: Mention the specific game, opponent, or key champion/strategy if relevant (e.g. "Game 3 vs Sentinels", "The 700 Stack Nasus").
 - IF REACTION: Mention WHAT is being watched/reacted to (e.g. "Reacting to X", "Watching Y").
@@ -236,7 +295,17 @@ GOOD EXAMPLES (Specific & Clickable):
 - {streamer} Reacts to "The Fall of 100 Thieves"
 - How {streamer} accidentally leaked the roster
 - We built a cult in Lethal Company (Modded)
-- {streamer} tried to become a club penguin god
+- {streamer} tried to become a club penguin god"""
+
+ARC_TITLE_PROMPT = """Generate a compelling YouTube video title for this segment.
+
+CONTEXT:
+{context}
+
+CONTENT SUMMARY:
+{summary}
+
+""" + ARC_TITLE_GUIDELINES + """
 
 Return ONLY the title."""
 
@@ -279,6 +348,52 @@ STRICT OUTPUT RULES:
 Final Output:"""
 
 
+THUMBNAIL_TEXT_BATCH_RULES = """RULES:
+- shorter is better, max 6 words.
+- UPPERCASE ONLY.
+- NO PUNCTUATION (remove all periods, commas, exclamations).
+- NO EMOJIS."""
+
+
+BATCH_PROMPT = """Generate {task} for EACH numbered item below. Items are independent; give each its own answer.
+
+CONTEXT:
+{context}
+
+{guidelines}
+
+ITEMS:
+{items}
+
+Return JSON only: {{"results": [{{"id": 1, "text": "..."}}, ...]}} with exactly one entry per item id."""
+
+
+# kind -> batch task text, guidelines, input truncation, temperature, request tag
+_BATCH_KINDS: Dict[str, Dict] = {
+    "clip": {
+        "task": "a short, high-click-through YouTube title for a clip (from its transcript)",
+        "guidelines": CLIP_TITLE_GUIDELINES,
+        "input_chars": 3000,
+        "temperature": 0.9,
+        "tag": "clip_titles",
+    },
+    "arc": {
+        "task": "a compelling YouTube video title for a segment (from its content summary)",
+        "guidelines": ARC_TITLE_GUIDELINES,
+        "input_chars": 2000,
+        "temperature": 0.6,
+        "tag": "arc_titles",
+    },
+    "thumbnail": {
+        "task": "ONE short, viral thumbnail text (hook) for a video (from its content summary)",
+        "guidelines": THUMBNAIL_TEXT_BATCH_RULES,
+        "input_chars": 2000,
+        "temperature": 0.7,
+        "tag": "thumb_texts",
+    },
+}
+
+
 DIRECTORS_CUT_PROMPT = """Generate a Director's Cut YouTube title.
 
 STREAMER: {streamer}
@@ -559,24 +674,239 @@ class TitleService:
                 request_tag=f"thumb_text_{self.vod_id}",
             )
             
-            # Cleanup
-            text = result.strip().strip('"\'').upper()
-            # Remove emojis (range of common emojis)
-            text = re.sub(r'[\U00010000-\U0010ffff]', '', text)
-            # Remove trailing punctuation
-            text = re.sub(r'[.,:;!?]+$', '', text)
-            # Remove newlines
-            text = text.replace('\n', ' ')
-            
-            if _is_invalid_title(text) or len(text) < 2:
-                return "HIGHLIGHTS"
-                
-            return text.strip()
+            return _clean_thumbnail_text(result) or "HIGHLIGHTS"
             
         except Exception as e:
             print(f"⚠️ Thumbnail text generation failed: {e}")
             return "HIGHLIGHTS"
     
+    # ---- batched generation ----
+    
+    def generate_clip_titles_for_ranges(
+        self,
+        ranges: Sequence[Tuple[float, float]],
+        streamer_name: Optional[str] = None,
+        max_chars: int = CLIP_TITLE_MAX_CHARS,
+    ) -> List[str]:
+        """Batched generate_clip_title_for_range: one title per (start_seconds, end_seconds), in order."""
+        if not HAS_TRANSCRIPT_LOADER or load_transcript_for_range is None:
+            print("⚠️ Transcript loader not available")
+            return ["Highlight Clip"] * len(ranges)
+        transcripts = [load_transcript_for_range(self.vod_id, start, end) for start, end in ranges]
+        return self.generate_clip_titles(transcripts, streamer_name, max_chars)
+    
+    def generate_clip_titles(
+        self,
+        transcripts: Sequence[str],
+        streamer_name: Optional[str] = None,
+        max_chars: int = CLIP_TITLE_MAX_CHARS,
+    ) -> List[str]:
+        """Batched generate_clip_title: one title per transcript, in order."""
+        return self._generate_batch(
+            "clip", transcripts, streamer_name, max_chars,
+            short_fallback="Highlight Clip",
+            fallback=lambda text: "Highlight Clip",
+        )
+    
+    def generate_arc_titles_for_ranges(
+        self,
+        ranges: Sequence[Tuple[float, float]],
+        streamer_name: Optional[str] = None,
+        max_chars: int = ARC_TITLE_MAX_CHARS,
+    ) -> List[str]:
+        """Batched generate_arc_title_for_range: one title per (start_seconds, end_seconds), in order."""
+        if not HAS_TRANSCRIPT_LOADER or load_transcript_for_range is None:
+            print("⚠️ Transcript loader not available")
+            return ["Highlights"] * len(ranges)
+        transcripts = [load_transcript_for_range(self.vod_id, start, end) for start, end in ranges]
+        return self.generate_arc_titles(transcripts, streamer_name, max_chars)
+    
+    def generate_arc_titles(
+        self,
+        summaries: Sequence[str],
+        streamer_name: Optional[str] = None,
+        max_chars: int = ARC_TITLE_MAX_CHARS,
+    ) -> List[str]:
+        """Batched generate_arc_title: one title per summary, in order."""
+        return self._generate_batch(
+            "arc", summaries, streamer_name, max_chars,
+            short_fallback="Highlights",
+            # Same fallback as generate_arc_title: first part of the summary
+            fallback=lambda text: text[:max_chars].rsplit(' ', 1)[0],
+        )
+    
+    def generate_thumbnail_texts(
+        self,
+        summaries: Sequence[str],
+        streamer_name: Optional[str] = None,
+    ) -> List[str]:
+        """Batched generate_thumbnail_text: one uppercase hook per summary, in order."""
+        return self._generate_batch(
+            "thumbnail", summaries, streamer_name, 0,
+            short_fallback="HIGHLIGHTS",
+            fallback=lambda text: "HIGHLIGHTS",
+        )
+    
+    def _generate_batch(
+        self,
+        kind: str,
+        texts: Sequence[str],
+        streamer_name: Optional[str],
+        max_chars: int,
+        short_fallback: str,
+        fallback: Callable[[str], str],
+    ) -> List[str]:
+        """Dedupe inputs, generate in batches, re-send rejected items, then apply fallbacks."""
+        spec = _BATCH_KINDS[kind]
+        streamer = streamer_name or self.context.streamer or "Streamer"
+        results: List[str] = [short_fallback] * len(texts)
+        
+        # Near-identical inputs share one generated title
+        unique: List[str] = []
+        members: List[List[int]] = []
+        by_key: Dict[str, int] = {}
+        for i, text in enumerate(texts):
+            if not text or len(text.strip()) < 10:
+                continue
+            text = text[:spec["input_chars"]]
+            key = _dedupe_key(text)
+            u = by_key.get(key)
+            if u is None:
+                u = by_key[key] = len(unique)
+                unique.append(text)
+                members.append([])
+            members[u].append(i)
+        if not unique:
+            return results
+        
+        titles: Dict[int, str] = {}
+        pending = list(range(len(unique)))
+        requests = 0
+        rounds = 1 + max(0, env_int("TITLE_BATCH_RETRIES", 1))
+        for attempt in range(rounds):
+            if attempt:
+                print(f"🔁 Regenerating {len(pending)} rejected {kind} title(s)")
+            accepted, sent = self._run_title_batches(kind, [(u, unique[u]) for u in pending], streamer, max_chars)
+            titles.update(accepted)
+            requests += sent
+            pending = [u for u in pending if u not in titles]
+            if not pending:
+                break
+        
+        if pending:
+            print(f"⚠️ Using fallback for {len(pending)} {kind} title(s)")
+        for u, idxs in enumerate(members):
+            title = titles[u] if u in titles else fallback(unique[u])
+            for i in idxs:
+                results[i] = title
+        print(f"🏷️ Generated {len(texts)} {kind} title(s) from {len(unique)} unique input(s) in {requests} request(s)")
+        return results
+    
+    def _build_batch_prompt(self, kind: str, streamer: str, max_chars: int, blocks: List[str]) -> str:
+        spec = _BATCH_KINDS[kind]
+        return BATCH_PROMPT.format(
+            task=spec["task"],
+            context=self.context.to_prompt_text(),
+            guidelines=spec["guidelines"].format(streamer=streamer, max_chars=max_chars),
+            items="\n\n".join(blocks),
+        )
+    
+    def _plan_title_batches(
+        self,
+        kind: str,
+        items: List[Tuple[int, str]],
+        streamer: str,
+        max_chars: int,
+    ) -> List[Tuple[str, List[int]]]:
+        """Pack (key, text) items in order into prompts under the token budget; items are numbered 1..n per prompt."""
+        token_budget = env_int("TITLE_BATCH_TOKENS", 12000)
+        max_items = max(1, env_int("TITLE_BATCH_ITEMS", 20))
+        base_tokens = estimate_tokens(self._build_batch_prompt(kind, streamer, max_chars, []))
+        
+        batches: List[Tuple[List[str], List[int]]] = []
+        blocks: List[str] = []
+        keys: List[int] = []
+        used = base_tokens
+        for key, text in items:
+            cost = estimate_tokens(text) + 5  # + item header
+            if keys and (used + cost > token_budget or len(keys) >= max_items):
+                batches.append((blocks, keys))
+                blocks, keys, used = [], [], base_tokens
+            blocks.append(f"=== ITEM {len(keys) + 1} ===\n{text}")
+            keys.append(key)
+            used += cost
+        if keys:
+            batches.append((blocks, keys))
+        return [(self._build_batch_prompt(kind, streamer, max_chars, b), k) for b, k in batches]
+    
+    def _run_title_batches(
+        self,
+        kind: str,
+        items: List[Tuple[int, str]],
+        streamer: str,
+        max_chars: int,
+    ) -> Tuple[Dict[int, str], int]:
+        """Send batches concurrently; returns ({key: accepted title}, number of requests)."""
+        spec = _BATCH_KINDS[kind]
+        batches = self._plan_title_batches(kind, items, streamer, max_chars)
+        workers = max(1, env_int("TITLE_WORKERS", 4))
+        
+        def run_batch(prompt: str, keys: List[int]) -> Dict[int, str]:
+            try:
+                result = call_gemini_3_flash(
+                    prompt,
+                    max_tokens=4096 + _BATCH_TOKENS_PER_ITEM * len(keys),
+                    temperature=spec["temperature"],
+                    request_tag=f"{spec['tag']}_{self.vod_id}",
+                )
+            except Exception as e:
+                print(f"⚠️ Batched {kind} title generation failed: {e}")
+                return {}
+            accepted: Dict[int, str] = {}
+            for n, raw in self._parse_batch_results(result).items():
+                if not 1 <= n <= len(keys):
+                    continue
+                if kind == "thumbnail":
+                    title = _clean_thumbnail_text(raw)
+                else:
+                    title = _clean_title(raw, max_chars, streamer)
+                    if _is_invalid_title(title):
+                        title = ""
+                if title:
+                    accepted[keys[n - 1]] = title
+            return accepted
+        
+        accepted: Dict[int, str] = {}
+        with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            for part in pool.map(lambda b: run_batch(*b), batches):
+                accepted.update(part)
+        return accepted, len(batches)
+    
+    def _parse_batch_results(self, response: str) -> Dict[int, str]:
+        """Parse {"results": [{"id": n, "text": "..."}]} from a batched response into {n: text}."""
+        parsed: Dict[int, str] = {}
+        try:
+            text = (response or "").strip()
+            start = text.find("{")
+            end = text.rfind("}")
+            if start == -1 or end <= start:
+                return parsed
+            obj = json.loads(text[start:end+1])
+            entries = obj.get("results", []) if isinstance(obj, dict) else []
+            for entry in entries if isinstance(entries, list) else []:
+                if not isinstance(entry, dict):
+                    continue
+                try:
+                    n = int(entry.get("id"))
+                except (TypeError, ValueError):
+                    continue
+                value = str(entry.get("text") or "").strip()
+                if value and n not in parsed:
+                    parsed[n] = value
+        except Exception:
+            pass
+        return parsed
+    
     def generate_timestamps(
         self,
         ranges: List[Dict],
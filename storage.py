@@ -4,6 +4,7 @@ Storage abstraction layer for StreamSniped
 Handles local files and S3 with unified interface
 """
 
+import hashlib
 import json
 import os
 import tempfile
@@ -21,6 +22,8 @@ try:
 except ImportError:
     S3_AVAILABLE = False
 
+from utils.batch_transfer import BatchStorageMixin
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,8 +32,10 @@ class StorageError(Exception):
     pass
 
 
-class StorageManager:
+class StorageManager(BatchStorageMixin):
     """Unified storage interface for local files and S3"""
+
+    _batch_error = StorageError
     
     def __init__(self, temp_dir: str = "/tmp"):
         self.temp_dir = Path(temp_dir)
@@ -246,11 +251,13 @@ class StorageManager:
         content = json.dumps(data, indent=2, ensure_ascii=False)
         
         try:
+            body = content.encode('utf-8')
             self.s3_client.put_object(
                 Bucket=bucket,
                 Key=key,
-                Body=content.encode('utf-8'),
-                ContentType='application/json'
+                Body=body,
+                ContentType='application/json',
+                Metadata={'file-hash': hashlib.sha256(body).hexdigest()}
             )
         except ClientError as e:
             raise StorageError(f"S3 write failed for {uri}: {e}")
@@ -263,11 +270,13 @@ class StorageManager:
         bucket, key = self._parse_s3_uri(uri)
         
         try:
+            body = text.encode('utf-8')
             self.s3_client.put_object(
                 Bucket=bucket,
                 Key=key,
-                Body=text.encode('utf-8'),
-                ContentType='text/plain'
+                Body=body,
+                ContentType='text/plain',
+                Metadata={'file-hash': hashlib.sha256(body).hexdigest()}
             )
         except ClientError as e:
             raise StorageError(f"S3 write failed for {uri}: {e}")
@@ -298,21 +307,35 @@ class StorageManager:
         file_size = os.path.getsize(local_path)
         content_type = self._get_content_type(uri)
         
+        # Stamp the content hash so cache checks need only a HEAD
+        metadata = self._hash_metadata(local_path)
+        
         try:
             # Use multipart upload for files > 100MB
             if file_size > 100 * 1024 * 1024:  # 100MB
-                self._multipart_upload(local_path, bucket, key, content_type)
+                self._multipart_upload(local_path, bucket, key, content_type, metadata)
             else:
                 self.s3_client.upload_file(
                     local_path,
                     bucket,
                     key,
-                    ExtraArgs={'ContentType': content_type}
+                    ExtraArgs={'ContentType': content_type, 'Metadata': metadata}
                 )
         except ClientError as e:
             raise StorageError(f"S3 upload failed for {local_path} to {uri}: {e}")
     
-    def _multipart_upload(self, local_path: str, bucket: str, key: str, content_type: str) -> None:
+    def _hash_metadata(self, local_path: str) -> Dict[str, str]:
+        """S3 object metadata carrying the file's SHA-256 (memoized per stat tuple)"""
+        try:
+            from utils.fingerprint import HASH_METADATA_KEY, file_fingerprint
+            digest = file_fingerprint(local_path)
+            return {HASH_METADATA_KEY: digest} if digest else {}
+        except Exception as e:
+            logger.warning(f"Could not fingerprint {local_path}: {e}")
+            return {}
+    
+    def _multipart_upload(self, local_path: str, bucket: str, key: str, content_type: str,
+                          metadata: Optional[Dict[str, str]] = None) -> None:
         """Upload large file using multipart upload"""
         try:
             self.s3_client.upload_file(
@@ -321,7 +344,8 @@ class StorageManager:
                 key,
                 ExtraArgs={
                     'ContentType': content_type,
-                    'ServerSideEncryption': 'AES256'
+                    'ServerSideEncryption': 'AES256',
+                    'Metadata': metadata or {}
                 },
                 Config=boto3.s3.transfer.TransferConfig(
                     multipart_threshold=1024 * 25,  # 25MB
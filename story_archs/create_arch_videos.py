@@ -230,19 +230,10 @@ def _overlay_chat_for_segments(vod_id: str, segments: List[Path], canvas_w: int,
     # Probe the first segment resolution if canvas not provided
     def _probe_resolution(p: Path) -> Tuple[int, int]:
         try:
-            ffprobe = 'ffprobe'
-            if os.name == 'nt' and (Path('executables/ffmpeg.exe')).exists():
-                ffprobe = str(Path('executables/ffmpeg.exe')).replace('ffmpeg.exe', 'ffprobe.exe')
-            result = __import__('subprocess').run([
-                ffprobe, '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=width,height',
-                '-of', 'csv=p=0:s=x', str(segments[0])
-            ], capture_output=True, text=True, timeout=10)
-            out = (result.stdout or '').strip()
-            if 'x' in out:
-                w_str, h_str = out.split('x')
-                w = max(2, int(w_str))
-                h = max(2, int(h_str))
-                return (w, h)
+            from utils.media_probe import probe_media  # type: ignore
+            info = probe_media(p)
+            if info.width and info.height:
+                return (max(2, info.width), max(2, info.height))
         except Exception:
             pass
         return (1920, 1080)
@@ -11,7 +11,9 @@ gameplay-like rounds with a climax.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
+
+from utils.interval_nms import nms
 
 
 @dataclass
@@ -473,31 +475,22 @@ def compute_arc_score(
 
 
 def nms_by_score(arcs: List[List[Dict[str, Any]]], scores: List[float]) -> List[List[Dict[str, Any]]]:
+    """
+    Greedy start-ordered suppression: keep an arc unless it overlaps one already kept.
+
+    An arc whose last segment ends before its first starts (segments out of
+    order) is treated as spanning the two times in ascending order.
+    """
     if not arcs:
         return []
-    items = []
-    for arc, sc in zip(arcs, scores):
-        s = float(arc[0].get("start", 0.0))
-        e = float(arc[-1].get("end", 0.0))
-        items.append((s, e, sc, arc))
-    # Sort by start then by score desc
-    items.sort(key=lambda t: (t[0], -t[2]))
-    out: List[List[Dict[str, Any]]] = []
-    kept_intervals: List[Tuple[float, float]] = []
-    for s, e, sc, arc in items:
-        overlapped = False
-        for ks, ke in kept_intervals:
-            if not (e <= ks or s >= ke):
-                # overlap
-                overlapped = True
-                break
-        if overlapped:
-            # Compare with the last kept if overlapping only with last; else skip
-            # Simple policy: skip lower-scored overlapping arcs
-            continue
-        out.append(arc)
-        kept_intervals.append((s, e))
-    return out
+    pairs = list(zip(arcs, scores))
+    intervals = []
+    for arc, _ in pairs:
+        s, e = float(arc[0].get("start", 0.0)), float(arc[-1].get("end", 0.0))
+        intervals.append((s, e) if s <= e else (e, s))
+    # Sort by start then by score desc; skip lower-scored overlapping arcs
+    keep = nms(intervals, [sc for _, sc in pairs], rule="overlap", order="start")
+    return [arcs[i] for i in keep]
 
 
 def _arc_span_seconds(arc: List[Dict[str, Any]]) -> float:
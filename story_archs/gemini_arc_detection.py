@@ -11,6 +11,13 @@ Processes transcript chunk-by-chunk (30 min) to detect narrative arcs:
 This module replaces rag.narrative_analyzer for video creation,
 providing more accurate arc boundaries using Gemini's language understanding.
 
+Chunks are sent to Gemini concurrently (GEMINI_ARC_WORKERS, default 4) and
+reassembled in chunk order. Each parsed response is checkpointed under
+data/ai_data/<vod_id>/gemini_arc_chunks/ keyed by the prompt hash, so a rerun
+only calls Gemini for chunks that did not finish (GEMINI_ARC_RESUME=0 to
+disable). With GEMINI_ARC_WORKERS=1 chunks run sequentially and each prompt
+carries the previous chunk's summary and incomplete arc.
+
 Usage:
     python -m story_archs.gemini_arc_detection <vod_id> [--model MODEL] [--save]
 """
@@ -18,10 +25,13 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import bisect
+import hashlib
 import json
 import os
 import sqlite3
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -205,21 +215,44 @@ def _format_duration_display(sec: float) -> str:
 # -----------------------------------------------------------------------------
 
 
-def load_segments_for_chunk(
-    vod_id: str, chunk_index: int, chunk_duration_seconds: int = 1800, overlap_seconds: int = 900
-) -> Tuple[List[Dict], float, float]:
-    """Load segments for a specific 30-min chunk (plus optional overlap)."""
+_SEGMENT_CACHE: Dict[str, Tuple[int, List[Dict], List[float]]] = {}
+
+
+def _ai_data_path(vod_id: str) -> Path:
     ai_data_path = Path(f"data/ai_data/{vod_id}/{vod_id}_filtered_ai_data.json")
     if not ai_data_path.exists():
         ai_data_path = Path(f"data/ai_data/{vod_id}/{vod_id}_ai_data.json")
+    return ai_data_path
 
+
+def _load_all_segments(vod_id: str) -> Tuple[List[Dict], List[float]]:
+    """Transcript segments and their start times, read once per file version."""
+    ai_data_path = _ai_data_path(vod_id)
     if not ai_data_path.exists():
         raise FileNotFoundError(f"AI data not found: {ai_data_path}")
 
+    mtime = ai_data_path.stat().st_mtime_ns
+    cached = _SEGMENT_CACHE.get(str(ai_data_path))
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+
     with open(ai_data_path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    all_segments = data.get("segments", [])
+    segments = data.get("segments", [])
+    starts = [seg.get("start_time", 0) for seg in segments]
+    if any(starts[i] > starts[i + 1] for i in range(len(starts) - 1)):
+        segments = sorted(segments, key=lambda seg: seg.get("start_time", 0))
+        starts = [seg.get("start_time", 0) for seg in segments]
+    _SEGMENT_CACHE[str(ai_data_path)] = (mtime, segments, starts)
+    return segments, starts
+
+
+def load_segments_for_chunk(
+    vod_id: str, chunk_index: int, chunk_duration_seconds: int = 1800, overlap_seconds: int = 900
+) -> Tuple[List[Dict], float, float]:
+    """Load segments for a specific 30-min chunk (plus optional overlap)."""
+    all_segments, starts = _load_all_segments(vod_id)
     if not all_segments:
         raise ValueError("No segments found in AI data")
 
@@ -228,26 +261,16 @@ def load_segments_for_chunk(
     chunk_end = chunk_start + chunk_duration_seconds
     fetch_end = chunk_end + overlap_seconds
 
-    chunk_segments = [
-        seg
-        for seg in all_segments
-        if seg.get("start_time", 0) >= chunk_start
-        and seg.get("start_time", 0) < fetch_end
-    ]
+    lo = bisect.bisect_left(starts, chunk_start)
+    hi = bisect.bisect_left(starts, fetch_end)
+    chunk_segments = all_segments[lo:hi]
 
     return chunk_segments, chunk_start, chunk_end
 
 
 def get_total_chunks(vod_id: str, chunk_duration_seconds: int = 1800) -> int:
     """Get total number of 30-min chunks in the VOD."""
-    ai_data_path = Path(f"data/ai_data/{vod_id}/{vod_id}_filtered_ai_data.json")
-    if not ai_data_path.exists():
-        ai_data_path = Path(f"data/ai_data/{vod_id}/{vod_id}_ai_data.json")
-
-    with open(ai_data_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    segments = data.get("segments", [])
+    segments, _ = _load_all_segments(vod_id)
     if not segments:
         return 0
 
@@ -473,9 +496,33 @@ class ArcDetectionAgent:
         self.state = AgentState()
         self.chapters = load_chapters(vod_id)
         self.all_results: List[ChunkResult] = []
+        self.checkpoint_dir = Path(f"data/ai_data/{vod_id}/gemini_arc_chunks")
+        self.resume = os.getenv("GEMINI_ARC_RESUME", "1").lower() in ("1", "true", "yes")
 
-    def process_chunk(self, chunk_index: int, dry_run: bool = False) -> ChunkResult:
-        """Process a single 30-min chunk of the VOD."""
+    def _sequential_context(self) -> str:
+        if self.state.previous_chunk_summary:
+            previous_context = (
+                f"Previous chunk summary: {self.state.previous_chunk_summary}"
+            )
+            if self.state.incomplete_arc:
+                previous_context += f"\n\n**INCOMPLETE ARC from previous chunk** (PRIORITY): \n{json.dumps(self.state.incomplete_arc, indent=2)}"
+        else:
+            previous_context = "This is the first chunk of the stream."
+        return previous_context
+
+    @staticmethod
+    def _parallel_context(chunk_index: int, chunk_start: float) -> str:
+        if chunk_index == 0:
+            return "This is the first chunk of the stream."
+        return (
+            "Chunks are analyzed in parallel, so no summary of the previous chunk is available. "
+            f"This chunk starts at {chunk_start:.0f} seconds; the previous chunk's overlap already "
+            "claimed arcs that resolve shortly after that point. If the transcript opens mid-arc, "
+            "report it only if its climax falls inside this transcript; duplicates are merged later."
+        )
+
+    def _prepare_chunk(self, chunk_index: int, parallel: bool = False) -> Optional[Dict]:
+        """Load the chunk's segments and build its prompt; None if the chunk is empty."""
         print(f"\n{'=' * 60}")
         print(f"Processing Chunk {chunk_index + 1}")
         print(f"{'=' * 60}")
@@ -487,7 +534,7 @@ class ArcDetectionAgent:
 
         if not segments:
             print(f"  No segments found for chunk {chunk_index + 1}")
-            return ChunkResult(chunk_index=chunk_index)
+            return None
 
         print(f"  Time range: {_format_hms(chunk_start)} - {_format_hms(chunk_end)}")
         print(f"  Segments: {len(segments)}")
@@ -501,14 +548,10 @@ class ArcDetectionAgent:
         print(f"  Transcript length: {len(transcript)} chars")
         print(f"  Chat peaks: {len(chat_peaks)}")
 
-        if self.state.previous_chunk_summary:
-            previous_context = (
-                f"Previous chunk summary: {self.state.previous_chunk_summary}"
-            )
-            if self.state.incomplete_arc:
-                previous_context += f"\n\n**INCOMPLETE ARC from previous chunk** (PRIORITY): \n{json.dumps(self.state.incomplete_arc, indent=2)}"
+        if parallel:
+            previous_context = self._parallel_context(chunk_index, chunk_start)
         else:
-            previous_context = "This is the first chunk of the stream."
+            previous_context = self._sequential_context()
 
         prompt = CHUNK_ARC_DETECTION_PROMPT.format(
             previous_context=previous_context,
@@ -518,26 +561,55 @@ class ArcDetectionAgent:
         )
 
         print(f"  Prompt length: {len(prompt)} chars (~{len(prompt) // 4} tokens)")
+        return {"prompt": prompt, "current_game": current_game}
+
+    def _checkpoint_path(self, chunk_index: int) -> Path:
+        return self.checkpoint_dir / f"chunk_{chunk_index:03d}.json"
+
+    def _fetch_chunk(self, chunk_index: int, prompt: str) -> Optional[Dict]:
+        """Parsed Gemini response for a prompt, served from the chunk checkpoint when it matches."""
+        label = f"  [chunk {chunk_index + 1}]"
+        prompt_hash = hashlib.sha256(f"{self.model}\n{prompt}".encode("utf-8")).hexdigest()
+        ckpt = self._checkpoint_path(chunk_index)
+        if self.resume and ckpt.exists():
+            try:
+                saved = json.loads(ckpt.read_text(encoding="utf-8"))
+                if saved.get("prompt_sha256") == prompt_hash and isinstance(saved.get("result"), dict):
+                    print(f"{label} Reusing checkpoint {ckpt.name}")
+                    return saved["result"]
+            except Exception:
+                pass
 
-        if dry_run:
-            print("\n  [DRY RUN] Would send prompt to Gemini")
-            return ChunkResult(chunk_index=chunk_index)
-
-        print("\n  Calling Gemini API...")
+        print(f"{label} Calling Gemini API...")
         try:
             response_text = call_gemini(prompt, model=self.model)
-            print(f"  Response length: {len(response_text)} chars")
+            print(f"{label} Response length: {len(response_text)} chars")
         except Exception as e:
-            print(f"  ERROR calling Gemini: {e}")
-            return ChunkResult(chunk_index=chunk_index)
+            print(f"{label} ERROR calling Gemini: {e}")
+            return None
 
         try:
             result_data = parse_gemini_response(response_text)
         except json.JSONDecodeError as e:
-            print(f"  ERROR parsing response: {e}")
-            print(f"  Raw response: {response_text[:500]}...")
-            return ChunkResult(chunk_index=chunk_index)
+            print(f"{label} ERROR parsing response: {e}")
+            print(f"{label} Raw response: {response_text[:500]}...")
+            return None
 
+        try:
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            tmp = ckpt.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(
+                json.dumps({"chunk_index": chunk_index, "model": self.model,
+                            "prompt_sha256": prompt_hash, "result": result_data}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            os.replace(tmp, ckpt)
+        except Exception as e:
+            print(f"{label} WARNING could not write checkpoint: {e}")
+        return result_data
+
+    def _apply_result(self, chunk_index: int, result_data: Dict, current_game: str) -> ChunkResult:
+        """Turn a parsed response into a ChunkResult, numbering arcs after the ones already kept."""
         result = ChunkResult(chunk_index=chunk_index)
 
         for i, arc_data in enumerate(result_data.get("arcs", [])):
@@ -567,7 +639,7 @@ class ArcDetectionAgent:
             )
             result.filler_segments.append(filler)
 
-        incomplete = result_data.get("incomplete_arc", {})
+        incomplete = result_data.get("incomplete_arc") or {}
         if incomplete.get("exists"):
             result.incomplete_arc = incomplete
 
@@ -583,15 +655,52 @@ class ArcDetectionAgent:
 
         return result
 
-    def process_all_chunks(self, dry_run: bool = False) -> List[ChunkResult]:
-        """Process all chunks of the VOD."""
-        total_chunks = get_total_chunks(self.vod_id)
-        print(f"\nProcessing {total_chunks} chunks (30-min) for VOD {self.vod_id}")
+    def process_chunk(self, chunk_index: int, dry_run: bool = False) -> ChunkResult:
+        """Process a single 30-min chunk of the VOD."""
+        prepared = self._prepare_chunk(chunk_index)
+        if prepared is None:
+            return ChunkResult(chunk_index=chunk_index)
 
-        for chunk_index in range(total_chunks):
-            self.process_chunk(chunk_index, dry_run=dry_run)
-            if dry_run:
-                break
+        if dry_run:
+            print("\n  [DRY RUN] Would send prompt to Gemini")
+            return ChunkResult(chunk_index=chunk_index)
+
+        result_data = self._fetch_chunk(chunk_index, prepared["prompt"])
+        if result_data is None:
+            return ChunkResult(chunk_index=chunk_index)
+        return self._apply_result(chunk_index, result_data, prepared["current_game"])
+
+    def process_all_chunks(self, dry_run: bool = False, max_workers: Optional[int] = None) -> List[ChunkResult]:
+        """Process all chunks of the VOD, concurrently unless max_workers is 1."""
+        total_chunks = get_total_chunks(self.vod_id)
+        if max_workers is None:
+            try:
+                max_workers = int(os.getenv("GEMINI_ARC_WORKERS", "4"))
+            except ValueError:
+                max_workers = 4
+        max_workers = max(1, min(max_workers, total_chunks or 1))
+        print(f"\nProcessing {total_chunks} chunks (30-min) for VOD {self.vod_id} ({max_workers} concurrent)")
+
+        if dry_run or max_workers == 1:
+            for chunk_index in range(total_chunks):
+                self.process_chunk(chunk_index, dry_run=dry_run)
+                if dry_run:
+                    break
+            return self.all_results
+
+        # Prompts no longer depend on the previous chunk's answer, so build them all up front
+        prepared = {i: self._prepare_chunk(i, parallel=True) for i in range(total_chunks)}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini-arc") as pool:
+            futures = {
+                i: pool.submit(self._fetch_chunk, i, p["prompt"])
+                for i, p in prepared.items() if p is not None
+            }
+            # Apply in chunk order so arc ids stay sequential and all_results is ordered. The arcs
+            # themselves can differ from a sequential run: these prompts had no previous-chunk context.
+            for i in sorted(futures):
+                result_data = futures[i].result()
+                if result_data is not None:
+                    self._apply_result(i, result_data, prepared[i]["current_game"])
 
         return self.all_results
 
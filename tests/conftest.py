@@ -0,0 +1,16 @@
+"""Shared pytest setup: make the repo root and the script folders importable."""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for sub in ('', 'aws-scripts', 'processing-scripts'):
+    path = str(ROOT / sub) if sub else str(ROOT)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Spans recorded by code under test must not land in the repo's logs/traces
+os.environ.setdefault("METRICS_TRACE_DIR", tempfile.mkdtemp(prefix="metrics-traces-"))
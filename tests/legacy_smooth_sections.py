@@ -0,0 +1,267 @@
+"""
+smooth_segments_one_chapter as it was before the linear-time rewrite.
+
+Kept verbatim as the reference for tests/test_smooth_sections.py; the
+unchanged helpers are imported from the live module.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from vector_store.smooth_sections import (
+    compute_adjacent_gaps,
+    local_max_salience,
+    merge_chunk,
+    quantile,
+    rank_to_unit,
+    suppress_dense_anchors,
+    topic_sim,
+)
+
+
+def smooth_segments_one_chapter(segments: List[Dict]) -> List[Dict]:
+    if not segments:
+        return []
+
+    # 0) Stats & helpers
+    durations = [s["end_time"] - s["start_time"] for s in segments]
+    q25, q50, q75 = quantile(durations, 0.25), quantile(durations, 0.50), quantile(durations, 0.75)
+    is_short = lambda d: d <= q25
+
+    gaps = compute_adjacent_gaps(segments)
+    gap_p90 = quantile(gaps, 0.90) if gaps else 0.0
+    is_gap_ok = lambda gap: gap <= gap_p90
+
+    norm_burst = rank_to_unit([s.get("burst_score",0.0) for s in segments])
+    norm_chat  = rank_to_unit([max(0.0, s.get("chat_rate_z",0.0)) for s in segments])
+    norm_react = rank_to_unit([sum((s.get("reaction_hits") or {}).values()) for s in segments])
+    norm_conf  = rank_to_unit([s.get("confidence",0.0) for s in segments])
+
+    for i, s in enumerate(segments):
+        s["_salience"] = 0.45*norm_burst[i] + 0.25*norm_chat[i] + 0.20*norm_react[i] + 0.10*norm_conf[i]
+
+    # Adaptive anchor percentile in [0.70, 0.90]
+    def pick_anchor_cut():
+        total_minutes = (segments[-1]["end_time"] - segments[0]["start_time"]) / 60.0
+        target_min = max(1, int(total_minutes // 5))        # ~1 per 5m
+        target_max = max(2, int(total_minutes // 5) * 3)    # up to ~3 per 5m
+        for p in [0.70, 0.75, 0.80, 0.85, 0.90]:
+            cut = quantile([s["_salience"] for s in segments], p)
+            cand = [i for i in range(len(segments)) if segments[i]["_salience"] >= cut or local_max_salience(segments, i)]
+            if target_min <= len(cand) <= max(target_max, target_min):
+                return cut
+        # fallback to 0.80
+        return quantile([s["_salience"] for s in segments], 0.80)
+
+    anchor_cut = pick_anchor_cut()
+
+    # 1) Mark anchors
+    anchor_idxs = [i for i in range(len(segments)) if segments[i]["_salience"] >= anchor_cut or local_max_salience(segments, i)]
+    # NMS with min separation = median duration
+    anchor_idxs = suppress_dense_anchors(segments, sorted(anchor_idxs, key=lambda i: segments[i]["start_time"]), q50)
+
+    for s in segments:
+        s["_anchor"] = False
+    for i in anchor_idxs:
+        segments[i]["_anchor"] = True
+
+    # 2) Grow each anchor into a segment (symmetric greedy)
+    used = [False]*len(segments)
+    groups: List[Tuple[int,int]] = []
+
+    def seg_sim(a: Dict, b: Dict) -> float:
+        # topic_key fuzzy or same_topic_prev as a boost
+        sim = topic_sim(a, b)
+        if b.get("same_topic_prev") and a.get("id") == b.get("id"):  # trivial
+            pass
+        return sim
+
+    def estimate_gap_threshold() -> float:
+        return gap_p90
+
+    for i, s in enumerate(segments):
+        if used[i] or not s["_anchor"]:
+            continue
+        left = right = i
+        used[i] = True
+        # Expand until no candidate meets criteria
+        while True:
+            best_dir = None
+            best_score = -1.0
+
+            # check left
+            j = left - 1
+            if j >= 0 and not used[j] and not segments[j]["_anchor"]:
+                gap_ok = is_gap_ok(max(0.0, segments[left]["start_time"] - segments[j]["end_time"]))
+                if gap_ok:
+                    dur = segments[j]["end_time"] - segments[j]["start_time"]
+                    low_sal = segments[j]["_salience"] < anchor_cut
+                    sim = seg_sim(segments[j], segments[left])
+                    good_sim = sim >= 0.5 or segments[left].get("same_topic_prev", False)
+                    strong_boundary = (not good_sim and sim < 0.3) or (segments[j]["_salience"] >= anchor_cut)
+                    if is_short(dur) and low_sal and not strong_boundary:
+                        score = 0.6*sim + 0.3*(1.0/(1.0 + max(1e-6, segments[left]["start_time"] - segments[j]["end_time"]))) + 0.1*segments[left]["_salience"]
+                        best_dir = ("left", j, score) if score > best_score else best_dir
+                        best_score = max(best_score, score)
+
+            # check right
+            k = right + 1
+            if k < len(segments) and not used[k] and not segments[k]["_anchor"]:
+                gap_ok = is_gap_ok(max(0.0, segments[k]["start_time"] - segments[right]["end_time"]))
+                if gap_ok:
+                    dur = segments[k]["end_time"] - segments[k]["start_time"]
+                    low_sal = segments[k]["_salience"] < anchor_cut
+                    sim = seg_sim(segments[right], segments[k])
+                    good_sim = sim >= 0.5 or segments[k].get("same_topic_prev", False)
+                    strong_boundary = (not good_sim and sim < 0.3) or (segments[k]["_salience"] >= anchor_cut)
+                    if is_short(dur) and low_sal and not strong_boundary:
+                        score = 0.6*sim + 0.3*(1.0/(1.0 + max(1e-6, segments[k]["start_time"] - segments[right]["end_time"]))) + 0.1*segments[right]["_salience"]
+                        if score > best_score or (abs(score - best_score) < 1e-6 and best_dir and best_dir[0] == "right"):
+                            best_dir = ("right", k, score)
+                            best_score = score
+
+            if best_dir is None:
+                break
+
+            direction, idx_cand, _ = best_dir
+            used[idx_cand] = True
+            if direction == "left":
+                left = idx_cand
+            else:
+                right = idx_cand
+
+            # soft max segment length cap (p95) to avoid over-merge
+            curr_duration = segments[right]["end_time"] - segments[left]["start_time"]
+            if curr_duration > quantile(durations, 0.95) or curr_duration > 8*60:
+                break
+
+        groups.append((left, right))
+
+    # 3) Assign remaining orphans
+    def nearest_used_left(i: int) -> Optional[int]:
+        j = i - 1
+        while j >= 0:
+            if any(l <= j <= r for (l, r) in groups):
+                return j
+            j -= 1
+        return None
+
+    def nearest_used_right(i: int) -> Optional[int]:
+        j = i + 1
+        while j < len(segments):
+            if any(l <= j <= r for (l, r) in groups):
+                return j
+            j += 1
+        return None
+
+    def group_of_index(idx: int) -> Optional[int]:
+        for gi, (l, r) in enumerate(groups):
+            if l <= idx <= r:
+                return gi
+        return None
+
+    def attach_score(anchor_idx: int, free_idx: int) -> float:
+        # anchor index denotes a member of a group; use its neighbors for salience
+        sim = seg_sim(segments[anchor_idx], segments[free_idx])
+        gap = 0.0
+        if anchor_idx < free_idx:
+            gap = max(0.0, segments[free_idx]["start_time"] - segments[anchor_idx]["end_time"]) 
+        else:
+            gap = max(0.0, segments[anchor_idx]["start_time"] - segments[free_idx]["end_time"]) 
+        return 0.6*sim + 0.3*(1.0/(1.0 + gap)) + 0.1*segments[anchor_idx]["_salience"]
+
+    for i, s in enumerate(segments):
+        if any(l <= i <= r for (l, r) in groups):
+            continue
+        left_idx = nearest_used_left(i)
+        right_idx = nearest_used_right(i)
+        best = None
+        best_sc = -1.0
+        if left_idx is not None:
+            gi = group_of_index(left_idx)
+            if gi is not None:
+                sc = attach_score(left_idx, i)
+                best = (gi, sc, left_idx)
+                best_sc = sc
+        if right_idx is not None:
+            gi = group_of_index(right_idx)
+            if gi is not None:
+                sc = attach_score(right_idx, i)
+                if sc > best_sc:
+                    best = (gi, sc, right_idx)
+                    best_sc = sc
+        if best is not None:
+            gi, _, _ = best
+            l, r = groups[gi]
+            if i < l:
+                groups[gi] = (i, r)
+            elif i > r:
+                groups[gi] = (l, i)
+            else:
+                # inside range, ignore
+                pass
+        else:
+            groups.append((i, i))
+
+    # 3.5) Absorb remaining short singletons into stronger neighbor (final cleanup)
+    def group_rep_index(gr: Tuple[int,int]) -> int:
+        l, r = gr
+        best_idx = l
+        best_sal = segments[l]["_salience"]
+        for t in range(l, r+1):
+            if segments[t]["_salience"] > best_sal:
+                best_sal = segments[t]["_salience"]
+                best_idx = t
+        return best_idx
+
+    groups = sorted(groups, key=lambda g: segments[g[0]]["start_time"])
+    changed = True
+    while changed:
+        changed = False
+        i = 0
+        while i < len(groups):
+            l, r = groups[i]
+            if l == r:
+                s = segments[l]
+                dur = s["end_time"] - s["start_time"]
+                if is_short(dur) and s["_salience"] < anchor_cut:
+                    # evaluate left/right attach
+                    best_side = None
+                    best_sc = -1.0
+                    # left
+                    if i - 1 >= 0:
+                        left_rep = group_rep_index(groups[i-1])
+                        sc = attach_score(left_rep, l)
+                        best_side = ("left", i-1, sc)
+                        best_sc = sc
+                    # right
+                    if i + 1 < len(groups):
+                        right_rep = group_rep_index(groups[i+1])
+                        sc = attach_score(right_rep, l)
+                        if sc > best_sc:
+                            best_side = ("right", i+1, sc)
+                            best_sc = sc
+                    if best_side is not None and best_sc > 0:
+                        side, idx_neighbor, _ = best_side
+                        if side == "left":
+                            nl, nr = groups[idx_neighbor]
+                            groups[idx_neighbor] = (min(nl, l), max(nr, r))
+                            groups.pop(i)
+                        else:
+                            nl, nr = groups[idx_neighbor]
+                            groups[idx_neighbor] = (min(l, nl), max(r, nr))
+                            groups.pop(i)
+                        changed = True
+                        continue  # do not increment i; list shrunk
+            i += 1
+
+    # 4) Materialize merged segments
+    merged: List[Dict] = []
+    for (l, r) in sorted(groups, key=lambda g: segments[g[0]]["start_time"]):
+        chunk = [segments[x] for x in range(l, r+1)]
+        merged.append(merge_chunk(chunk))
+
+    # 5) Recompute continuity
+    for idx in range(1, len(merged)):
+        merged[idx]["same_topic_prev"] = topic_sim(merged[idx-1], merged[idx]) >= 0.5
+
+    return merged
@@ -0,0 +1,110 @@
+"""BatchTransfer / StorageManager batch methods against a moto S3."""
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+import storage as root_storage
+from utils import batch_transfer, fingerprint
+
+BUCKET = "batch-test"
+
+
+@pytest.fixture
+def s3(monkeypatch, tmp_path):
+    monkeypatch.setattr(fingerprint, "_default", fingerprint.FingerprintStore(tmp_path / "fp.json"))
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def manager(s3, tmp_path):
+    m = root_storage.StorageManager(temp_dir=str(tmp_path / "tmp"))
+    yield m
+    m.close_batches()
+
+
+def _files(root, n):
+    root.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(n):
+        p = root / f"sub{i % 2}" / f"f{i}.json"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(f'{{"i": {i}}}')
+        paths.append(p)
+    return paths
+
+
+def test_upload_directory_then_skip_unchanged(manager, s3, tmp_path):
+    _files(tmp_path / "src", 6)
+    report = manager.upload_directory(str(tmp_path / "src"), f"s3://{BUCKET}/out")
+    assert report.count("uploaded") == 6 and report.ok
+    head = s3.head_object(Bucket=BUCKET, Key="out/sub0/f0.json")
+    assert head["Metadata"][batch_transfer.HASH_METADATA_KEY] == batch_transfer.file_sha256(tmp_path / "src/sub0/f0.json")
+
+    (tmp_path / "src/sub1/f1.json").write_text('{"i": "changed"}')
+    again = manager.upload_directory(str(tmp_path / "src"), f"s3://{BUCKET}/out")
+    assert again.count("skipped") == 5 and again.count("uploaded") == 1
+
+
+def test_download_batch_and_missing_object_leaves_no_part_files(manager, s3, tmp_path):
+    s3.put_object(Bucket=BUCKET, Key="a.json", Body=b"{}")
+    dst = tmp_path / "dl"
+    report = manager.download_batch([
+        (f"s3://{BUCKET}/a.json", str(dst / "a.json")),
+        (f"s3://{BUCKET}/missing.json", str(dst / "missing.json")),
+    ])
+    assert report.count("downloaded") == 1 and report.count("failed") == 1
+    assert (dst / "a.json").read_bytes() == b"{}"
+    assert not list(dst.glob("*.part"))
+
+
+def test_failed_download_removes_part_file(s3, tmp_path):
+    class Flaky:
+        """Writes half a file, then fails, like a dropped connection mid-transfer."""
+        meta = s3.meta
+
+        def head_object(self, **kw):
+            return s3.head_object(**kw)
+
+        def download_file(self, bucket, key, filename, Config=None):
+            with open(filename, "wb") as f:
+                f.write(b"partial")
+            raise ConnectionError("reset by peer")
+
+    s3.put_object(Bucket=BUCKET, Key="big.bin", Body=b"x" * 1024)
+    m = root_storage.StorageManager(temp_dir=str(tmp_path / "tmp"))
+    with batch_transfer.BatchTransfer(Flaky(), m._parse_s3_uri, m._get_content_type, max_workers=2) as bt:
+        report = bt.download([(f"s3://{BUCKET}/big.bin", str(tmp_path / "big.bin"))])
+    assert report.count("failed") == 1
+    assert not (tmp_path / "big.bin").exists()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_batches_reuse_one_executor_and_pooled_client(manager, s3, tmp_path):
+    _files(tmp_path / "src", 3)
+    first = manager._batch(4)
+    manager.upload_directory(str(tmp_path / "src"), f"s3://{BUCKET}/x", max_workers=4)
+    pool = first._executor
+    manager.upload_directory(str(tmp_path / "src"), f"s3://{BUCKET}/y", max_workers=4)
+    assert manager._batch(4) is first and first._executor is pool
+
+    # The resized client keeps the shared client's endpoint and config, only the pool grows
+    assert first.s3.meta.endpoint_url == manager.s3_client.meta.endpoint_url
+    assert first.s3.meta.config.max_pool_connections == 4 * 4
+    assert first.s3.meta.config.retries == manager.s3_client.meta.config.retries
+    # A pool that is already large enough is used as is
+    assert batch_transfer.pooled_client(manager.s3_client, 5) is manager.s3_client
+
+
+def test_batch_without_client_raises_storage_error(s3, tmp_path):
+    m = root_storage.StorageManager(temp_dir=str(tmp_path / "tmp"))
+    m.s3_client = None
+    with pytest.raises(root_storage.StorageError):
+        m.upload_batch([(str(tmp_path / "x"), f"s3://{BUCKET}/x")])
@@ -0,0 +1,63 @@
+"""BurstTimeline range queries with dense and position-list category counts."""
+
+import random
+
+import pytest
+
+from rag import burst_timeline
+from rag.burst_timeline import BurstTimeline, CategoryColumn
+
+ROLES = ["peak", "conflict", "build_up", "resolution", "", "filler"]
+
+
+def _bursts(rng, n, topic_cardinality):
+    out = []
+    t = 0.0
+    for i in range(n):
+        t += rng.choice([2.0, 5.0, 10.0])
+        out.append({
+            "start_time": t,
+            "end_time": t + 10.0,  # fixed length keeps ends monotone (the prefix-count path)
+            "chat_rate_z": rng.uniform(-1, 3),
+            "role": rng.choice(ROLES),
+            "topic_key": f"topic{rng.randrange(topic_cardinality)}" if rng.random() < 0.8 else "",
+            "topic_thread": rng.randrange(topic_cardinality) if rng.random() < 0.7 else None,
+        })
+    return out
+
+
+@pytest.mark.parametrize("seed", range(15))
+@pytest.mark.parametrize("cardinality", [3, 500])
+def test_range_stats_match_scan(seed, cardinality):
+    rng = random.Random(seed)
+    tl = BurstTimeline(_bursts(rng, 300, cardinality))
+    assert tl.contiguous and tl.in_order
+    assert (tl.topic_keys._cum is None) == (cardinality > burst_timeline.DENSE_MAX_CATEGORIES)
+    for _ in range(60):
+        a = rng.uniform(-10, 2400)
+        b = a + rng.uniform(0, 200)
+        fast, scan = tl.range_stats(a, b), tl._range_stats_scan(a, b)
+        # Prefix-sum mean vs summed mean differ in the last bits only
+        assert fast.pop("avg_chat_z") == pytest.approx(scan.pop("avg_chat_z"))
+        assert fast == scan
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_sparse_column_matches_dense(seed):
+    rng = random.Random(seed)
+    values = [rng.choice(["a", "b", "c", "d", None]) for _ in range(200)]
+    dense, sparse = CategoryColumn(values, dense=True), CategoryColumn(values, dense=False)
+    for _ in range(200):
+        lo = rng.randrange(0, 201)
+        hi = rng.randrange(lo, 201)
+        assert dense.majority(lo, hi) == sparse.majority(lo, hi)
+        for label in ("a", "d", "zzz"):
+            assert dense.count(label, lo, hi) == sparse.count(label, lo, hi)
+
+
+def test_high_cardinality_column_stays_sparse():
+    values = [f"k{i}" for i in range(50_000)]
+    col = CategoryColumn(values)
+    assert col._cum is None
+    assert col.count("k123", 100, 200) == 1
+    assert col.majority(10, 20) == "k10"
@@ -0,0 +1,114 @@
+"""chat_overlay.render_cache: private copies, source keys, concurrent index updates."""
+
+import multiprocessing
+import os
+import subprocess
+
+import pytest
+
+from chat_overlay import render_cache, renderer
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    root = tmp_path / "cache"
+    monkeypatch.setenv("CHAT_RENDER_CACHE_DIR", str(root))
+    monkeypatch.setenv("CHAT_RENDER_CACHE", "1")
+    return root
+
+
+def _render(tmp_path, name="r_raw.mp4", body=b"color"):
+    out = tmp_path / name
+    out.write_bytes(body)
+    mask = out.with_name(out.stem + "_mask" + out.suffix)
+    mask.write_bytes(body + b"-mask")
+    return out, mask
+
+
+def test_materialize_hands_out_private_copies(tmp_path, cache_dir):
+    raw, mask = _render(tmp_path)
+    render_cache.store("k1", "v1", "p", 0.0, 10.0, raw, mask)
+    out = tmp_path / "dst" / "clip_raw.mp4"
+    assert render_cache.materialize("k1", out)
+    assert out.read_bytes() == b"color"
+    assert not os.path.samefile(out, cache_dir / "k1.mp4")
+    # Writing through the caller's file must not corrupt the cache entry
+    out.write_bytes(b"overwritten")
+    assert (cache_dir / "k1.mp4").read_bytes() == b"color"
+    assert (out.parent / "clip_raw_mask.mp4").read_bytes() == b"color-mask"
+
+
+def test_source_key_lookup_depends_on_version(tmp_path, cache_dir, monkeypatch):
+    raw, mask = _render(tmp_path)
+    skey = render_cache.source_key("v1", 10, 70, "p")
+    render_cache.store("content", "v1", "p", 10.0, 70.0, raw, mask, skey=skey)
+    assert render_cache.find_source(skey) == "content"
+    # Re-storing under the same content key keeps the source alias
+    render_cache.store("content", "v1", "p", 10.0, 70.0, raw, mask)
+    assert render_cache.find_source(skey) == "content"
+    monkeypatch.setenv("CHAT_SOURCE_VERSION", "2")
+    assert render_cache.source_key("v1", 10, 70, "p") != skey
+
+
+def test_store_prunes_least_recently_used(tmp_path, cache_dir, monkeypatch):
+    monkeypatch.setenv("CHAT_RENDER_CACHE_MAX_GB", str(50 / 1024 ** 3))  # 50 bytes
+    raw, mask = _render(tmp_path, body=b"x" * 10)  # 10 + 15 bytes per entry
+    render_cache.store("old", "v1", "p", 0.0, 10.0, raw, mask)
+    os.utime(cache_dir / "old.mp4", (1, 1))
+    render_cache.store("used", "v1", "p", 10.0, 20.0, raw, mask)
+    os.utime(cache_dir / "used.mp4", (1, 1))
+    # A hit refreshes "used", so "old" is the one to go
+    assert render_cache.materialize("used", tmp_path / "out" / "a_raw.mp4")
+    render_cache.store("new", "v1", "p", 20.0, 30.0, raw, mask)
+    entries = render_cache._load_index()
+    assert set(entries) == {"used", "new"}
+    assert not (cache_dir / "old.mp4").exists() and not (cache_dir / "old_mask.mp4").exists()
+    assert not render_cache.materialize("old", tmp_path / "out" / "b_raw.mp4")
+
+
+def test_zero_cap_keeps_everything(tmp_path, cache_dir, monkeypatch):
+    monkeypatch.setenv("CHAT_RENDER_CACHE_MAX_GB", "0")
+    raw, mask = _render(tmp_path)
+    for i in range(5):
+        render_cache.store(f"k{i}", "v1", "p", float(i), float(i + 1), raw, mask)
+    assert len(render_cache._load_index()) == 5
+
+
+def _store_worker(root, tmp, idx):
+    os.environ["CHAT_RENDER_CACHE_DIR"] = root
+    src = os.path.join(tmp, f"src_{idx}.mp4")
+    with open(src, "wb") as f:
+        f.write(b"x" * 64)
+    from pathlib import Path
+    for j in range(10):
+        render_cache.store(f"k{idx}_{j}", "v", "p", 0.0, 1.0, Path(src), None)
+
+
+def test_concurrent_processes_do_not_lose_index_entries(tmp_path, cache_dir):
+    ctx = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    procs = [ctx.Process(target=_store_worker, args=(str(cache_dir), str(tmp_path), i)) for i in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    entries = render_cache._load_index()
+    assert len(entries) == 40
+
+
+def test_cached_render_skips_chatdownload(tmp_path, cache_dir, monkeypatch):
+    monkeypatch.setattr(renderer, "_cli_path", "TwitchDownloaderCLI")
+    calls = []
+    monkeypatch.setattr(subprocess, "run", lambda cmd, **kw: calls.append(cmd))
+    raw, mask = _render(tmp_path)
+    pkey = render_cache.params_key({
+        "w": 300, "h": 600, "font": 14, "fps": 30, "update": 0.5, "bg": "#00000000",
+        "alt_bg": "#00000000", "msg": "#FFFFFFFF", "outline": False, "mask": True,
+    })
+    monkeypatch.delenv("CHAT_FONT_PX", raising=False)
+    skey = render_cache.source_key("123", 90, 160, pkey)
+    render_cache.store("content", "123", pkey, 90.0, 160.0, raw, mask, skey=skey)
+
+    out = tmp_path / "seg" / "chat.mp4"
+    assert renderer.render_chat_segment("123", 100, 160, out, chat_w=300, chat_h=600, head_start_sec=10)
+    assert calls == []
+    assert (out.parent / "chat_raw.mp4").read_bytes() == b"color"
@@ -0,0 +1,130 @@
+"""ContentClassifier bulk mode against a stub LLM: batch parsing, targeted retries, output order."""
+
+import json
+import re
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("loguru")
+pytest.importorskip("pydantic")
+pytest.importorskip("dotenv")
+
+from src.classifier import ContentClassifier
+
+
+class StubClassifier(ContentClassifier):
+    """_call_gpt answers from a script instead of OpenAI and records every prompt."""
+
+    def __init__(self, batch_reply=None, delay=None):
+        super().__init__()
+        self.batch_reply = batch_reply or (lambda ids: [_judgement(i) for i in ids])
+        self.delay = delay or (lambda ids: 0)
+        self.batch_calls = []
+        self.single_calls = []
+        self._lock = threading.Lock()
+
+    def _call_gpt(self, prompt, max_tokens=1000):
+        ids = [int(i) for i in re.findall(r"=== ITEM (\d+) ===", prompt)]
+        if not ids:
+            transcript = re.search(r'"transcript": "([^"]*)"', prompt).group(1)
+            with self._lock:
+                self.single_calls.append(transcript)
+            return json.dumps({"start": "00:00:00", "end": "00:00:20", "label": "banter", "score": 1.0,
+                               "clip_title": f"single {transcript}", "transcript": transcript, "keep": False,
+                               "tags": [], "reasoning": "single"})
+        with self._lock:
+            self.batch_calls.append(ids)
+        time.sleep(self.delay(ids))
+        reply = self.batch_reply(ids)
+        return reply if isinstance(reply, str) else json.dumps(reply)
+
+
+def _judgement(i, **extra):
+    return {"item_id": i, "label": "reaction", "score": 8.0, "clip_title": f"batch t{i}", "keep": True,
+            "tags": ["x"], "reasoning": "batched", **extra}
+
+
+def _clips(n):
+    return [{"clip_path": f"clips/c{i}.mp4", "transcript": f"t{i}", "start_time": i * 30, "end_time": i * 30 + 20,
+             "vod_id": "v1"} for i in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def batch_env(monkeypatch):
+    monkeypatch.setenv("CLASSIFY_BATCH_ITEMS", "3")
+    monkeypatch.setenv("CLASSIFY_BATCH_TOKENS", "100000")
+    monkeypatch.setenv("CLASSIFY_WORKERS", "3")
+
+
+def test_batch_response_maps_back_per_item():
+    c = StubClassifier()
+    clips = _clips(3)
+    batch = [(i, clip, clip["transcript"]) for i, clip in enumerate(clips)]
+    reply = json.dumps([_judgement(2, extra_field=1), _judgement(0)])
+    parsed = c._parse_batch_classification("clip", reply, batch)
+    assert sorted(parsed) == [0, 2]
+    r = parsed[2]
+    # Timing and transcript come from the input, the judgement from the model
+    assert (r["start"], r["end"], r["transcript"]) == ("00:01:00", "00:01:20", "t2")
+    assert (r["label"], r["score"], r["keep"]) == ("reaction", 8.0, True)
+    assert r["content_path"] == "clips/c2.mp4" and r["vod_id"] == "v1"
+    assert r["extra_field"] == 1 and "item_id" not in r
+    assert list(r)[:9] == ["start", "end", "label", "score", "clip_title", "transcript", "keep", "tags", "reasoning"]
+
+
+@pytest.mark.parametrize("reply", [
+    [_judgement(7), _judgement("x"), {"label": "reaction"}],         # out-of-range, bad and missing ids
+    [{"item_id": 0, "label": "reaction", "score": None, "keep": True}],  # required field missing
+    "not json at all",
+    {"unexpected": "shape"},
+])
+def test_bad_entries_are_left_out(reply):
+    c = StubClassifier()
+    batch = [(0, _clips(1)[0], "t0")]
+    raw = reply if isinstance(reply, str) else json.dumps(reply)
+    assert c._parse_batch_classification("clip", raw, batch) == {}
+
+
+def test_duplicate_ids_keep_first_and_wrapper_is_accepted():
+    c = StubClassifier()
+    batch = [(0, _clips(1)[0], "t0")]
+    reply = json.dumps({"items": [_judgement(0, score=9.0), _judgement(0, score=1.0)]})
+    assert c._parse_batch_classification("clip", reply, batch)[0]["score"] == 9.0
+
+
+def test_only_failed_items_are_retried():
+    # Items 1 and 4 are dropped from their batch responses
+    c = StubClassifier(batch_reply=lambda ids: [_judgement(i) for i in ids if i not in (1, 4)])
+    results = c.classify_clips(_clips(6))
+    assert sorted(map(sorted, c.batch_calls)) == [[0, 1, 2], [3, 4, 5]]
+    assert sorted(c.single_calls) == ["t1", "t4"]
+    assert [r["reasoning"] for r in results] == ["batched", "single", "batched", "batched", "single", "batched"]
+
+
+def test_unparseable_batch_retries_all_its_items():
+    c = StubClassifier(batch_reply=lambda ids: "oops" if 0 in ids else [_judgement(i) for i in ids])
+    results = c.classify_clips(_clips(5))
+    assert sorted(c.single_calls) == ["t0", "t1", "t2"]
+    assert [r["reasoning"] for r in results] == ["single"] * 3 + ["batched"] * 2
+
+
+def test_output_order_matches_input_when_batches_finish_out_of_order():
+    # The first batch answers last, and the model shuffles items inside each batch
+    c = StubClassifier(batch_reply=lambda ids: [_judgement(i) for i in reversed(ids)],
+                       delay=lambda ids: 0.05 if 0 in ids else 0)
+    clips = _clips(8)
+    results = c.classify_clips(clips)
+    assert [r["transcript"] for r in results] == [clip["transcript"] for clip in clips]
+    assert [r["content_path"] for r in results] == [clip["clip_path"] for clip in clips]
+    assert c.single_calls == []
+
+
+def test_single_item_batches_use_the_single_prompt(monkeypatch):
+    monkeypatch.setenv("CLASSIFY_BATCH_ITEMS", "1")
+    c = StubClassifier()
+    results = c.classify_clips(_clips(2))
+    assert c.batch_calls == []
+    assert sorted(c.single_calls) == ["t0", "t1"]
+    assert [r["clip_title"] for r in results] == ["single t0", "single t1"]
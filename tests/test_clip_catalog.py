@@ -0,0 +1,81 @@
+"""ClipCatalog record/lookup/save round trips and the rebuild fallback."""
+
+import hashlib
+import json
+
+import pytest
+
+from utils import fingerprint
+from utils.clip_catalog import CATALOG_FILENAME, ClipCatalog, clip_file_stem
+
+
+@pytest.fixture(autouse=True)
+def fingerprint_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(fingerprint, "_default", fingerprint.FingerprintStore(tmp_path / "fingerprints.json"))
+
+
+@pytest.fixture
+def clips_dir(tmp_path):
+    d = tmp_path / "clips" / "v1"
+    d.mkdir(parents=True)
+    return d
+
+
+def _clip(clips_dir, title, data=b"clip"):
+    path = clips_dir / f"{clip_file_stem(title)}.mp4"
+    path.write_bytes(data)
+    return path
+
+
+def test_record_without_save_writes_once(clips_dir):
+    catalog = ClipCatalog("v1", clips_dir)
+    paths = [_clip(clips_dir, f"Clip number {i}", bytes([i]) * 10) for i in range(3)]
+    for i, path in enumerate(paths):
+        catalog.record(path, f"Clip number {i} #shorts", i, save=False)
+    assert not (clips_dir / CATALOG_FILENAME).exists()
+    catalog.save()
+
+    on_disk = json.loads((clips_dir / CATALOG_FILENAME).read_text())
+    assert [e["path"] for e in on_disk["clips"]] == sorted(p.name for p in paths)
+    assert on_disk["clips"][0]["sha256"] == hashlib.sha256(bytes([0]) * 10).hexdigest()
+
+
+def test_round_trip_lookups(clips_dir):
+    catalog = ClipCatalog("v1", clips_dir)
+    boss = _clip(clips_dir, "Boss fight goes wrong")
+    chat = _clip(clips_dir, "Chat resets the run")
+    catalog.record(boss, "Boss fight goes wrong #gaming", 0, save=False)
+    catalog.record(chat, "Chat resets the run", 1, save=False)
+    catalog.save()
+
+    loaded = ClipCatalog.load("v1", clips_dir)
+    assert len(loaded) == 2
+    assert loaded.find("Boss fight goes wrong #other") == boss
+    assert loaded.find("boss fight") == boss  # shortened title still matches its file
+    assert loaded.find(clip_index=1) == chat
+    assert not loaded.rebuilt
+
+
+def test_stale_entry_triggers_one_rebuild(clips_dir):
+    catalog = ClipCatalog("v1", clips_dir)
+    path = _clip(clips_dir, "Speedrun record")
+    catalog.record(path, "Speedrun record", 0)
+    path.write_bytes(b"re-rendered, different size")
+    _clip(clips_dir, "temp_partial")
+
+    loaded = ClipCatalog.load("v1", clips_dir)
+    assert loaded.find("Speedrun record") == path
+    assert loaded.rebuilt
+    # Title and index survive the rebuild; temp_ files are never catalogued
+    assert loaded.find(clip_index=0) == path
+    assert len(loaded) == 1
+    assert loaded.find("nothing like this") is None
+
+
+def test_discard_drops_lookups(clips_dir):
+    catalog = ClipCatalog("v1", clips_dir)
+    path = _clip(clips_dir, "Uploaded clip")
+    catalog.record(path, "Uploaded clip", 3)
+    catalog.discard(path)
+    assert json.loads((clips_dir / CATALOG_FILENAME).read_text())["clips"] == []
+    assert catalog._lookup("Uploaded clip", 3) is None
@@ -0,0 +1,65 @@
+"""ConversionScheduler: dependency gating, in-flight window, shutdown behaviour."""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from clip_creation.conversion_pool import ConversionScheduler
+
+
+def test_convert_runs_after_deps_and_gate_failure_skips():
+    sched = ConversionScheduler(convert_workers=2)
+    try:
+        ok = sched.submit("download", lambda: True)
+        bad = sched.submit("download", lambda: False)
+        assert sched.submit_when_ready("convert", [ok], lambda: "converted").result(timeout=5) == "converted"
+        ran = []
+        assert sched.submit_when_ready("convert", [bad], ran.append, 1).result(timeout=5) is False
+        assert ran == []
+    finally:
+        sched.shutdown()
+
+
+def test_window_bounds_clips_in_flight():
+    sched = ConversionScheduler(convert_workers=4, download_workers=4, max_inflight=2)
+    active = [0]
+    peak = [0]
+    lock = threading.Lock()
+
+    def download():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        return True
+
+    def convert():
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return True
+
+    futs = []
+    try:
+        for _ in range(8):
+            sched.wait_for_slot()
+            dl = sched.submit("download", download)
+            conv = sched.submit_when_ready("convert", [dl], convert)
+            sched.release_slot_when_done(conv)
+            futs.append(conv)
+        assert all(f.result(timeout=5) for f in futs)
+    finally:
+        sched.shutdown()
+    assert peak[0] <= 2
+
+
+def test_dependency_finishing_after_shutdown_fails_proxy():
+    sched = ConversionScheduler(convert_workers=1)
+    dep: Future = Future()
+    proxy = sched.submit_when_ready("convert", [dep], lambda: True)
+    sched.shutdown()
+    dep.set_result(True)
+    with pytest.raises(RuntimeError):
+        proxy.result(timeout=5)
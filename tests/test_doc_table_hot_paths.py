@@ -0,0 +1,68 @@
+"""Column-reading hot paths give the same results on a DocTable and a WindowDoc list."""
+
+import random
+
+import pytest
+
+from clip_generation.doc_table import DocTable
+from clip_generation.gemini_refiner import _format_transcript_window
+from clip_generation.grouping import extend_group_by_semantics
+from clip_generation.interval_index import index_for
+from clip_generation.scoring import looks_like_goodbye
+from clip_generation.title_llm import build_clip_context
+from clip_generation.types import WindowDoc
+
+
+def _docs(n=80, seed=3):
+    rng = random.Random(seed)
+    words = ["gg", "lol", "bye chat", "see you", "nice", "", "goodnight", "what"]
+    docs = []
+    t = 0.0
+    for i in range(n):
+        t += rng.uniform(2, 12)
+        docs.append(WindowDoc(
+            id=f"w{i}", start=t, end=t + rng.uniform(5, 30), chapter_id=f"c{i // 30}",
+            mode=rng.choice(["chat", "game"]), excluded=False, chat_rate=1.0, chat_rate_z=rng.uniform(-1, 3),
+            burst_score=0.0, reaction_hits={}, energy="high", role=rng.choice(["", "", "", "outro"]) if i > 70 else "",
+            same_topic_prev=False, topic_thread=None, text=rng.choice(words) + f" {i}",
+            chat_text="\n".join(rng.choice(words) for _ in range(3)), peak_block_id=None,
+        ))
+    return docs
+
+
+class _Retriever:
+    have_index = True
+
+    def sim(self, a, b):
+        return 1.0 if (int(a[1:]) + int(b[1:])) % 3 == 0 else 0.0
+
+
+@pytest.fixture
+def both():
+    docs = _docs()
+    return docs, DocTable.from_docs(docs)
+
+
+def test_looks_like_goodbye_on_indices(both):
+    docs, table = both
+    for start in range(0, 700, 25):
+        rows = index_for(table).indices(start, start + 40)
+        overlap = [docs[i] for i in rows]
+        assert looks_like_goodbye(table, rows) == looks_like_goodbye(overlap) == looks_like_goodbye(docs, rows)
+    assert looks_like_goodbye(table, []) is False
+
+
+def test_extend_group_by_semantics_matches_list(both):
+    docs, table = both
+    for group in ([3, 4], [10], [40, 41, 42]):
+        assert extend_group_by_semantics(table, group, _Retriever()) == extend_group_by_semantics(docs, group, _Retriever())
+
+
+def test_transcript_window_and_clip_context_match_list(both):
+    docs, table = both
+    for start in (0.0, 100.0, 333.0):
+        assert _format_transcript_window(table, start, start + 120) == _format_transcript_window(docs, start, start + 120)
+        ctx_table = build_clip_context(table, start, start + 45, "v1", context_padding_s=30)
+        ctx_list = build_clip_context(docs, start, start + 45, "v1", context_padding_s=30)
+        assert ctx_table == ctx_list
+        assert ctx_table["transcript"], "window should not be empty"
@@ -0,0 +1,19 @@
+"""utils.env: typed knobs fall back to the default on unset, empty or bad values."""
+
+from utils.env import env_flag, env_float, env_int, estimate_tokens
+
+
+def test_env_helpers(monkeypatch):
+    monkeypatch.setenv("X_INT", "7")
+    monkeypatch.setenv("X_BAD", "seven")
+    monkeypatch.setenv("X_EMPTY", " ")
+    monkeypatch.setenv("X_FLOAT", "2.5")
+    monkeypatch.setenv("X_ON", "Yes")
+    monkeypatch.setenv("X_OFF", "0")
+    monkeypatch.delenv("X_UNSET", raising=False)
+    assert env_int("X_INT", 1) == 7
+    assert env_int("X_BAD", 1) == env_int("X_EMPTY", 1) == env_int("X_UNSET", 1) == 1
+    assert env_float("X_FLOAT", 0.0) == 2.5 and env_float("X_BAD", 1.5) == 1.5
+    assert env_flag("X_ON", False) and not env_flag("X_OFF", True)
+    assert env_flag("X_UNSET", True) and env_flag("X_EMPTY", True)
+    assert estimate_tokens("a" * 40) == 11
@@ -0,0 +1,77 @@
+"""FingerprintStore batching and cross-process merge precedence."""
+
+import hashlib
+import json
+import os
+
+from utils.fingerprint import FingerprintStore
+
+
+def _store(path, monkeypatch, every="3", seconds="3600"):
+    monkeypatch.setenv("FILE_FINGERPRINT_FLUSH_EVERY", every)
+    monkeypatch.setenv("FILE_FINGERPRINT_FLUSH_SECONDS", seconds)
+    return FingerprintStore(path)
+
+
+def _disk(path):
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def test_writes_are_batched(tmp_path, monkeypatch):
+    memo = tmp_path / "fp.json"
+    store = _store(memo, monkeypatch)
+    files = []
+    for i in range(4):
+        f = tmp_path / f"f{i}.bin"
+        f.write_bytes(bytes([i]) * 100)
+        files.append(f)
+    for f in files[:2]:
+        store.sha256(f)
+    assert _disk(memo) == {}  # still buffered
+    store.sha256(files[2])
+    assert len(_disk(memo)) == 3  # third entry hit the batch size
+    store.sha256(files[3])
+    assert len(_disk(memo)) == 3
+    store.flush()
+    assert len(_disk(memo)) == 4
+    assert store.sha256(files[0]) == hashlib.sha256(bytes([0]) * 100).hexdigest()
+
+
+def test_stale_process_does_not_overwrite_newer_hash(tmp_path, monkeypatch):
+    memo = tmp_path / "fp.json"
+    f = tmp_path / "clip.mp4"
+    f.write_bytes(b"old")
+    stale = _store(memo, monkeypatch, every="100")
+    stale.sha256(f)  # buffered with the old mtime
+
+    f.write_bytes(b"new content")
+    st = os.stat(f)
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    fresh = _store(memo, monkeypatch, every="1")
+    new_digest = fresh.sha256(f)  # flushed immediately
+
+    stale.flush()
+    entry = _disk(memo)[str(f.resolve())]
+    assert entry["sha256"] == new_digest
+    # The stale store adopted the newer entry on merge
+    assert stale.lookup(f) == new_digest
+
+
+def test_merge_keeps_other_processes_entries_and_forget_sticks(tmp_path, monkeypatch):
+    memo = tmp_path / "fp.json"
+    a, b = tmp_path / "a.bin", tmp_path / "b.bin"
+    a.write_bytes(b"a")
+    b.write_bytes(b"b")
+    one = _store(memo, monkeypatch, every="100")
+    two = _store(memo, monkeypatch, every="100")
+    one.sha256(a)
+    two.sha256(b)
+    one.flush()
+    two.flush()
+    assert set(_disk(memo)) == {str(a.resolve()), str(b.resolve())}
+
+    one.forget(a)
+    one.flush()
+    two.sha256(b)  # already memoized: nothing new to write
+    two.flush()
+    assert set(_disk(memo)) == {str(b.resolve())}
@@ -0,0 +1,117 @@
+"""ArcDetectionAgent.process_all_chunks with a stub call_gemini: ordering and checkpoint resume."""
+
+import json
+import re
+import threading
+import time
+
+import pytest
+
+from story_archs import gemini_arc_detection as gad
+
+CHUNK = 1800
+
+
+@pytest.fixture
+def vod(tmp_path, monkeypatch):
+    """Three 30-min chunks of transcript; every line names the chunk it belongs to."""
+    monkeypatch.chdir(tmp_path)  # the agent reads and writes under data/ai_data/<vod_id>
+    monkeypatch.setenv("GEMINI_ARC_RESUME", "1")
+    monkeypatch.setattr(gad, "_SEGMENT_CACHE", {})
+    segments = [{"start_time": t, "end_time": t + 60, "transcript": f"chunkmark{t // CHUNK}"}
+                for t in range(0, 3 * CHUNK, 60)]
+    root = tmp_path / "data" / "ai_data" / "v1"
+    root.mkdir(parents=True)
+    (root / "v1_ai_data.json").write_text(json.dumps({"segments": segments}))
+    return "v1"
+
+
+def _chunk_of(prompt):
+    # The transcript opens with the chunk's own lines; the overlap (next chunk) comes after
+    return int(re.search(r"chunkmark(\d+)", prompt).group(1))
+
+
+def _response(chunk, n_arcs=2):
+    base = chunk * CHUNK
+    return json.dumps({
+        "arcs": [{"arc_type": "story", "intro_start_seconds": base + 100 * j, "intro_end_seconds": base + 100 * j + 10,
+                  "climax_start_seconds": base + 100 * j + 50, "climax_end_seconds": base + 100 * j + 60,
+                  "summary": f"chunk {chunk} arc {j}"} for j in range(n_arcs)],
+        "filler_segments": [],
+        "incomplete_arc": {"exists": chunk == 2, "phase": "climax"},
+        "chunk_summary": f"summary {chunk}",
+    })
+
+
+def test_parallel_results_are_applied_in_chunk_order(vod, monkeypatch):
+    finished = []
+    lock = threading.Lock()
+
+    def stub(prompt, model=None):
+        chunk = _chunk_of(prompt)
+        time.sleep(0.05 * (2 - chunk))  # later chunks answer first
+        with lock:
+            finished.append(chunk)
+        return _response(chunk)
+
+    monkeypatch.setattr(gad, "call_gemini", stub)
+    agent = gad.ArcDetectionAgent(vod)
+    results = agent.process_all_chunks(max_workers=3)
+
+    assert finished == [2, 1, 0]
+    assert [r.chunk_index for r in results] == [0, 1, 2]
+    arcs = [a for r in results for a in r.arcs]
+    assert [a.arc_id for a in arcs] == list(range(6))
+    assert [a.summary for a in arcs][:2] == ["chunk 0 arc 0", "chunk 0 arc 1"]
+    # State ends on the last chunk, as after a sequential run
+    assert agent.state.previous_chunk_summary == "summary 2"
+    assert agent.state.incomplete_arc == {"exists": True, "phase": "climax"}
+
+
+def test_parallel_prompts_do_not_carry_previous_summary(vod, monkeypatch):
+    prompts = {}
+
+    def stub(prompt, model=None):
+        prompts[_chunk_of(prompt)] = prompt
+        return _response(_chunk_of(prompt))
+
+    monkeypatch.setattr(gad, "call_gemini", stub)
+    gad.ArcDetectionAgent(vod).process_all_chunks(max_workers=2)
+    assert "summary 0" not in prompts[1]
+    assert "analyzed in parallel" in prompts[1]
+
+    prompts.clear()
+    gad.ArcDetectionAgent(vod).process_all_chunks(max_workers=1)
+    assert "Previous chunk summary: summary 0" in prompts[1]
+
+
+def test_rerun_resumes_from_checkpoints(vod, monkeypatch):
+    calls = []
+
+    def flaky(prompt, model=None):
+        chunk = _chunk_of(prompt)
+        calls.append(chunk)
+        if chunk == 1:
+            raise RuntimeError("503 overloaded")
+        return _response(chunk)
+
+    monkeypatch.setattr(gad, "call_gemini", flaky)
+    first = gad.ArcDetectionAgent(vod).process_all_chunks(max_workers=3)
+    assert [r.chunk_index for r in first] == [0, 2]
+    assert sorted(calls) == [0, 1, 2]
+
+    calls.clear()
+    monkeypatch.setattr(gad, "call_gemini", lambda p, model=None: calls.append(_chunk_of(p)) or _response(_chunk_of(p)))
+    agent = gad.ArcDetectionAgent(vod)
+    second = agent.process_all_chunks(max_workers=3)
+    assert calls == [1]  # only the chunk that failed goes back to Gemini
+    assert [r.chunk_index for r in second] == [0, 1, 2]
+    assert [a.arc_id for r in second for a in r.arcs] == list(range(6))
+
+
+def test_changed_model_invalidates_checkpoint(vod, monkeypatch):
+    calls = []
+    monkeypatch.setattr(gad, "call_gemini", lambda p, model=None: calls.append(model) or _response(_chunk_of(p)))
+    gad.ArcDetectionAgent(vod, model="a").process_all_chunks(max_workers=3)
+    gad.ArcDetectionAgent(vod, model="b").process_all_chunks(max_workers=3)
+    assert calls.count("a") == 3 and calls.count("b") == 3
@@ -0,0 +1,80 @@
+"""DocIndex queries and index_for cache invalidation."""
+
+import gc
+import random
+import weakref
+
+from clip_generation.doc_table import DocTable
+from clip_generation.interval_index import index_for, invalidate
+from clip_generation.types import WindowDoc
+
+
+def _doc(i, start, end, z=0.0):
+    return WindowDoc(
+        id=f"w{i}", start=start, end=end, chapter_id="c1", mode="chat", excluded=False,
+        chat_rate=1.0, chat_rate_z=z, burst_score=0.0, reaction_hits={}, energy="high", role="",
+        same_topic_prev=False, topic_thread=None, text="", chat_text="", peak_block_id=None,
+    )
+
+
+def _docs(n=60, seed=7):
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n):
+        start = i * 10.0 + rng.uniform(0, 3)
+        docs.append(_doc(i, start, start + rng.uniform(5, 40), z=rng.uniform(-1, 3)))
+    return docs
+
+
+def _brute(docs, start, end):
+    return [d for d in sorted(docs, key=lambda d: d.start) if d.start < end and d.end > start]
+
+
+def test_overlapping_matches_scan():
+    docs = _docs()
+    idx = index_for(docs)
+    rng = random.Random(1)
+    for _ in range(200):
+        a = rng.uniform(-20, 650)
+        b = a + rng.uniform(0, 80)
+        assert [d.id for d in idx.overlapping(a, b)] == [d.id for d in _brute(docs, a, b)]
+        assert idx.count(a, b) == len(_brute(docs, a, b))
+
+
+def test_same_length_replacement_rebuilds():
+    docs = _docs(10)
+    first = index_for(docs)
+    assert index_for(docs) is first
+    docs[3] = _doc(99, 1000.0, 1010.0)
+    rebuilt = index_for(docs)
+    assert rebuilt is not first
+    assert [d.id for d in rebuilt.overlapping(1000.0, 1001.0)] == ["w99"]
+
+
+def test_pop_then_append_rebuilds_even_if_id_is_recycled():
+    docs = _docs(10)
+    first = index_for(docs)
+    docs.pop()
+    gc.collect()
+    docs.append(_doc(42, 2000.0, 2005.0))
+    assert index_for(docs) is not first
+    assert [d.id for d in index_for(docs).overlapping(2001.0, 2002.0)] == ["w42"]
+
+
+def test_invalidate_after_in_place_field_edit():
+    docs = _docs(10)
+    first = index_for(docs)
+    docs[0].start, docs[0].end = 5000.0, 5001.0
+    assert index_for(docs) is first  # element identities unchanged: caller must invalidate
+    invalidate(docs)
+    assert [d.id for d in index_for(docs).overlapping(5000.0, 5000.5)] == ["w0"]
+
+
+def test_doc_table_index_is_cached_and_freed_with_table():
+    table = DocTable.from_docs(_docs(20))
+    idx = index_for(table)
+    assert index_for(table) is idx
+    ref = weakref.ref(table)
+    del table, idx
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,140 @@
+"""interval_nms against the quadratic implementations it replaced."""
+
+import random
+
+import pytest
+
+from directors_cut.manifest import _merge_overlaps
+from story_archs.detectors import nms_by_score
+from utils.interval_nms import merge_runs, nms
+
+
+def _old_nms_by_score(arcs, scores):
+    # story_archs.detectors.nms_by_score before the bisect rewrite
+    items = []
+    for arc, sc in zip(arcs, scores):
+        s = float(arc[0].get("start", 0.0))
+        e = float(arc[-1].get("end", 0.0))
+        items.append((s, e, sc, arc))
+    items.sort(key=lambda t: (t[0], -t[2]))
+    out = []
+    kept_intervals = []
+    for s, e, sc, arc in items:
+        overlapped = False
+        for ks, ke in kept_intervals:
+            if not (e <= ks or s >= ke):
+                overlapped = True
+                break
+        if overlapped:
+            continue
+        out.append(arc)
+        kept_intervals.append((s, e))
+    return out
+
+
+def _old_merge_overlaps(ranges):
+    # directors_cut.manifest._merge_overlaps before merge_runs
+    if not ranges or len(ranges) <= 1:
+        return ranges
+    merged = []
+    for i, r in enumerate(ranges):
+        cur = dict(r)
+        if i > 0:
+            prev = merged[-1]
+            if float(cur["start"]) < float(prev["end"]):
+                prev["end"] = max(float(prev["end"]), float(cur["end"]))
+                prev["duration"] = float(prev["end"]) - float(prev["start"])
+                if prev.get("summary") and cur.get("summary"):
+                    prev["summary"] = f"{prev['summary']} → {cur['summary']}"
+                if prev.get("burst_ids") and cur.get("burst_ids"):
+                    prev["burst_ids"] = list(prev["burst_ids"]) + list(cur["burst_ids"])
+                continue
+        merged.append(cur)
+    return merged
+
+
+def _random_arcs(rng, n):
+    arcs, scores = [], []
+    for _ in range(n):
+        # Integer grid so ties, shared edges and zero-length spans are common
+        s = rng.randint(0, 60)
+        e = s + rng.choice([0, 0, 1, 2, 5, 10, 30])
+        mid = {"start": s, "end": e}
+        arcs.append([{"start": s, "end": s}, mid, {"start": e, "end": e}] if rng.random() < 0.5 else [mid])
+        scores.append(rng.choice([0.1, 0.5, 0.5, 0.9, rng.random()]))
+    return arcs, scores
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_nms_by_score_matches_old(seed):
+    rng = random.Random(seed)
+    arcs, scores = _random_arcs(rng, rng.randint(0, 80))
+    assert [id(a) for a in nms_by_score(arcs, scores)] == [id(a) for a in _old_nms_by_score(arcs, scores)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_merge_overlaps_matches_old(seed):
+    rng = random.Random(seed)
+    ranges = []
+    t = 0.0
+    for i in range(rng.randint(0, 40)):
+        t += rng.choice([0.0, 1.0, 3.0, 8.0])
+        ranges.append({"start": t, "end": t + rng.choice([0.0, 2.0, 5.0, 20.0]), "summary": f"s{i}", "burst_ids": [i]})
+    assert _merge_overlaps(ranges) == _old_merge_overlaps(ranges)
+
+
+def _brute(intervals, scores, rule, threshold, order):
+    idx = sorted(range(len(intervals)), key=(lambda i: (-scores[i], intervals[i][0])) if order == "score"
+                 else (lambda i: (intervals[i][0], -scores[i])))
+    kept = []
+    for i in idx:
+        s, e = intervals[i]
+        bad = False
+        for j in kept:
+            ks, ke = intervals[j]
+            inter = max(0.0, min(e, ke) - max(s, ks))
+            if rule == "overlap":
+                bad = ks < e and ke > s
+            elif rule == "gap":
+                bad = ks < e + threshold and ke > s - threshold
+            elif rule == "iou":
+                bad = ks < e and ke > s and inter / max(1e-9, max(e, ke) - min(s, ks)) >= threshold
+            else:
+                bad = ks < e and ke > s and inter / max(1e-9, e - s) >= threshold
+            if bad:
+                break
+        if not bad:
+            kept.append(i)
+    return kept
+
+
+@pytest.mark.parametrize("rule,threshold", [("overlap", 0.0), ("gap", 3.0), ("iou", 0.3), ("fraction", 0.5)])
+@pytest.mark.parametrize("order", ["score", "start"])
+def test_rules_match_pairwise_scan(rule, threshold, order):
+    rng = random.Random(f"{rule}-{order}")
+    for _ in range(25):
+        n = rng.randint(0, 60)
+        intervals = []
+        for _ in range(n):
+            s = float(rng.randint(0, 200))
+            intervals.append((s, s + rng.choice([0.0, 1.0, 4.0, 15.0, 60.0])))
+        scores = [rng.choice([0.2, 0.5, rng.random()]) for _ in range(n)]
+        assert nms(intervals, scores, rule, threshold, order) == _brute(intervals, scores, rule, threshold, order)
+
+
+def test_reversed_interval_is_rejected():
+    with pytest.raises(ValueError):
+        nms([(0.0, 5.0), (9.0, 3.0)], [1.0, 1.0])
+
+
+def test_nms_by_score_normalises_reversed_arcs():
+    # Segments out of order: last segment ends before the first starts
+    reversed_arc = [{"start": 20.0, "end": 22.0}, {"start": 5.0, "end": 8.0}]
+    inside = [{"start": 10.0, "end": 12.0}]
+    kept = nms_by_score([reversed_arc, inside], [0.9, 0.5])
+    # Spans (8, 20) and (10, 12) overlap: only the earlier-starting arc survives
+    assert kept == [reversed_arc]
+
+
+def test_merge_runs_gap():
+    assert merge_runs([(0, 5), (6, 8), (20, 21)], gap=2.0) == [[0, 1], [2]]
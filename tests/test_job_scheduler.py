@@ -0,0 +1,128 @@
+"""job_scheduler tokens/in-memory queue and per-job warm worker leases."""
+
+import threading
+import time
+
+import pytest
+
+import job_scheduler
+import pipeline_runner
+
+
+def test_demand_for_matches_stage_and_defaults():
+    assert job_scheduler.demand_for(["python", "-m", "clip_generation.cli_generate", "1"])["memory_mb"] == 2000
+    assert job_scheduler.demand_for(["python", "unknown.py"]) == job_scheduler.DEFAULT_DEMAND
+
+
+def test_tokens_are_all_or_nothing_and_clamped():
+    tokens = job_scheduler.ResourceTokens({"cpu": 4, "encoder": 1, "download": 1, "llm": 1, "memory_mb": 1000})
+    order = []
+
+    def second():
+        with tokens.acquire({"encoder": 1, "cpu": 1}, "b"):
+            order.append("b")
+
+    with tokens.acquire({"encoder": 1, "cpu": 1}, "a"):
+        t = threading.Thread(target=second)
+        t.start()
+        time.sleep(0.2)
+        assert order == []  # encoder busy: b holds nothing, not even its free cpu token
+        assert tokens.snapshot()["cpu"] == "1/4"
+        order.append("a-done")
+    t.join(10)
+    assert order == ["a-done", "b"]
+    assert tokens.snapshot()["encoder"] == "0/1"
+    # Demand above capacity is clamped instead of waiting forever
+    t2 = job_scheduler.ResourceTokens({"cpu": 2})
+    with t2.acquire({"cpu": 8}, "big"):
+        assert t2.snapshot()["cpu"] == "2/2"
+
+
+def test_in_memory_queue_visibility_and_delete():
+    q = job_scheduler.InMemoryQueue()
+    q.send_message(QueueUrl="full", MessageBody="m1")
+    q.send_message(QueueUrl="full", MessageBody="m2")
+    first = q.receive_message(QueueUrl="full", VisibilityTimeout=30)["Messages"][0]
+    assert first["Body"] == "m1"
+    attrs = q.get_queue_attributes(QueueUrl="full")["Attributes"]
+    assert attrs == {"ApproximateNumberOfMessages": "1", "ApproximateNumberOfMessagesNotVisible": "1"}
+    # Expiring the visibility makes it receivable again with a new receipt
+    q.change_message_visibility(QueueUrl="full", ReceiptHandle=first["ReceiptHandle"], VisibilityTimeout=0)
+    again = q.receive_message(QueueUrl="full", MaxNumberOfMessages=2)["Messages"]
+    assert [m["Body"] for m in again] == ["m1", "m2"]
+    for m in again:
+        q.delete_message(QueueUrl="full", ReceiptHandle=m["ReceiptHandle"])
+    # The stale receipt no longer deletes anything and the queue is empty
+    assert q.receive_message(QueueUrl="full") == {}
+
+
+def test_worker_share_partitions_pool():
+    assert job_scheduler.worker_share(4, 2) == 2
+    assert job_scheduler.worker_share(2, 3) == 1
+
+
+@pytest.fixture
+def pool():
+    p = pipeline_runner.WarmWorkerPool(size=2, warm_imports=[])
+    yield p
+    p.shutdown()
+
+
+def _spec(tmp_path, body):
+    script = tmp_path / f"step_{abs(hash(body))}.py"
+    script.write_text(body)
+    return {"kind": "script", "target": str(script), "args": [], "log_path": str(tmp_path / "log.txt")}
+
+
+def test_lease_caps_one_jobs_workers(tmp_path, pool):
+    lease_a = pool.lease("job-a", 1)
+    lease_b = pool.lease("job-b", 1)
+    spec = _spec(tmp_path, "import time\ntime.sleep(1.0)\n")
+    peak = {"job-a": 0}
+    lock = threading.Lock()
+
+    def run(lease):
+        code = lease.run(spec, 30)
+        return code
+
+    def watch():
+        for _ in range(40):
+            with lock:
+                peak["job-a"] = max(peak["job-a"], len(lease_a.pids()))
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=run, args=(lease_a,)) for _ in range(2)]
+    threads.append(threading.Thread(target=run, args=(lease_b,)))
+    watcher = threading.Thread(target=watch)
+    for t in threads + [watcher]:
+        t.start()
+    time.sleep(0.5)
+    # job-b got the second worker even though job-a queued two steps
+    assert len(lease_b.pids()) == 1
+    for t in threads + [watcher]:
+        t.join(30)
+    assert peak["job-a"] == 1
+
+
+def test_lease_kill_only_stops_own_workers(tmp_path, pool):
+    lease_a = pool.lease("job-a", 1)
+    lease_b = pool.lease("job-b", 1)
+    slow = _spec(tmp_path, "import time\ntime.sleep(3)\n")
+    results = {}
+
+    def run(name, lease):
+        try:
+            results[name] = lease.run(slow, 30)
+        except pipeline_runner.StepCrashed:
+            results[name] = "crashed"
+
+    threads = [threading.Thread(target=run, args=("a", lease_a)), threading.Thread(target=run, args=("b", lease_b))]
+    for t in threads:
+        t.start()
+    deadline = time.time() + 10
+    while (not lease_a.pids() or not lease_b.pids()) and time.time() < deadline:
+        time.sleep(0.05)
+    lease_a.kill()
+    for t in threads:
+        t.join(30)
+    assert results == {"a": "crashed", "b": 0}
@@ -0,0 +1,77 @@
+"""AsyncJobTracker against an in-memory DynamoDB table: timer heartbeats and terminal writes."""
+
+import time
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from utils.job_tracker import AsyncJobTracker, JobStatus, JobStep, JobTracker
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        sync = JobTracker(table_name="jobs", region="us-east-1")
+        assert sync.create_table()
+        with AsyncJobTracker(sync, heartbeat_interval=0.02) as t:
+            yield t
+
+
+def _wait_for(pred, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if pred():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_timer_heartbeat_extends_lease(tracker):
+    assert tracker.acquire_lock("v1", lease_seconds=60)
+    short = tracker.get_job("v1")["lease_expires_at"]
+    tracker.track_heartbeat("v1", lease_seconds=5000)
+    assert _wait_for(lambda: tracker.get_job("v1")["lease_expires_at"] > short + 1000)
+
+
+def test_release_is_last_write_and_stops_heartbeats(tracker):
+    for i in range(20):
+        vod = f"v{i}"
+        assert tracker.acquire_lock(vod)
+        tracker.track_heartbeat(vod, lease_seconds=5000)
+        time.sleep(0.005 * (i % 4))
+        assert tracker.release_and_mark(vod, JobStatus.COMPLETED)
+    time.sleep(0.1)  # several heartbeat ticks
+    for i in range(20):
+        job = tracker.get_job(f"v{i}")
+        assert job["status"] == JobStatus.COMPLETED.value
+        assert "lease_expires_at" not in job and "heartbeat_at" not in job
+
+
+def test_terminal_writes_are_synchronous(tracker):
+    assert tracker.start_job("v1")
+    assert tracker.update_step("v1", JobStep.RENDER)
+    assert tracker.get_job("v1")["step"] == JobStep.RENDER.value
+    tracker.track_heartbeat("v1")
+    assert tracker.fail_job("v1", "boom")
+    # Visible without any flush, and no later write overrides it
+    job = tracker.get_job("v1")
+    assert job["status"] == JobStatus.FAILED.value and job["error_message"] == "boom"
+    time.sleep(0.1)
+    assert tracker.get_job("v1")["status"] == JobStatus.FAILED.value
+    assert "v1" not in tracker._heartbeats
+
+    assert tracker.start_job("v2")
+    assert tracker.complete_job("v2", "s3://bucket/v2.mp4")
+    assert tracker.get_job("v2")["final_s3"] == "s3://bucket/v2.mp4"
+
+
+def test_close_stops_heartbeat_thread(tracker):
+    tracker.track_heartbeat("v1")
+    tracker.close()
+    assert not tracker._heartbeater.is_alive()
+    assert tracker._heartbeats == {}
@@ -0,0 +1,105 @@
+"""media_probe: one stream probe per file, video-only keyframe probe, append-only cache log."""
+
+import json
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from utils import media_probe
+
+STREAMS = {
+    'format': {'duration': '12.0', 'start_time': '1.4'},
+    'streams': [
+        {'index': 0, 'codec_type': 'video', 'codec_name': 'h264', 'profile': 'High', 'level': 41,
+         'pix_fmt': 'yuv420p', 'width': 1920, 'height': 1080, 'avg_frame_rate': '30/1',
+         'r_frame_rate': '30/1', 'duration': '12.0'},
+        {'index': 1, 'codec_type': 'audio', 'codec_name': 'aac', 'sample_rate': '48000',
+         'channels': 2, 'duration': '11.9'},
+    ],
+}
+PACKETS = "1.400000,K__\n1.433333,___\n3.400000,K__\n5.400000,K_\n"
+
+
+@pytest.fixture
+def probe(tmp_path, monkeypatch):
+    monkeypatch.setenv('MEDIA_PROBE_CACHE', str(tmp_path / 'cache' / 'probe.jsonl'))
+    monkeypatch.setattr(media_probe, '_memory', {})
+    monkeypatch.setattr(media_probe, '_dirty', {})
+    monkeypatch.setattr(media_probe, '_loaded', False)
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        if '-select_streams' in cmd:
+            return SimpleNamespace(returncode=0, stdout=PACKETS, stderr='')
+        return SimpleNamespace(returncode=0, stdout=json.dumps(STREAMS), stderr='')
+
+    monkeypatch.setattr(subprocess, 'run', fake_run)
+    return calls
+
+
+def _media(tmp_path, name='a.mp4'):
+    path = tmp_path / name
+    path.write_bytes(b'x' * 16)
+    return path
+
+
+def test_probe_reads_streams_once_and_caches(tmp_path, probe):
+    path = _media(tmp_path)
+    info = media_probe.probe_media(path)
+    assert (info.width, info.height, info.profile, info.level, info.start_time) == (1920, 1080, 'High', 41, 1.4)
+    assert info.keyframes is None
+    media_probe.probe_media(path)
+    assert len(probe) == 1
+    assert 'packet' not in ' '.join(probe[0])
+
+
+def test_keyframes_come_from_video_only_probe(tmp_path, probe):
+    path = _media(tmp_path)
+    media_probe.probe_media(path)
+    info = media_probe.probe_media(path, keyframes=True)
+    assert info.keyframes == [1.4, 3.4, 5.4]
+    # Upgrading a cached entry only runs the keyframe probe
+    assert len(probe) == 2
+    kf_cmd = probe[1]
+    assert kf_cmd[kf_cmd.index('-select_streams') + 1] == 'v:0'
+
+
+def test_cache_log_is_appended_and_reloaded(tmp_path, probe, monkeypatch):
+    paths = [_media(tmp_path, f"{i}.mp4") for i in range(3)]
+    media_probe.probe_many(paths)
+    log = tmp_path / 'cache' / 'probe.jsonl'
+    assert len(log.read_text().splitlines()) == 3
+    media_probe.probe_media(paths[0])  # cached: nothing new to append
+    assert len(log.read_text().splitlines()) == 3
+
+    # A fresh process loads the log instead of probing again
+    monkeypatch.setattr(media_probe, '_memory', {})
+    monkeypatch.setattr(media_probe, '_loaded', False)
+    probe.clear()
+    assert media_probe.probe_media(paths[2]).width == 1920
+    assert probe == []
+
+
+def test_bloated_log_is_compacted_on_load(tmp_path, probe, monkeypatch):
+    monkeypatch.setattr(media_probe, 'COMPACT_MIN_LINES', 2)
+    live = _media(tmp_path, 'live.mp4')
+    media_probe.probe_media(live)
+    gone = _media(tmp_path, 'gone.mp4')
+    media_probe.probe_media(gone)
+    media_probe.probe_media(gone)  # cached, no new line
+    gone.unlink()
+    log = tmp_path / 'cache' / 'probe.jsonl'
+    # Superseded duplicates of the live entry plus a torn line
+    with log.open('a') as f:
+        f.write(log.read_text().splitlines()[0] + '\n')
+        f.write(log.read_text().splitlines()[0] + '\n')
+        f.write('{"v": 2, "key"\n')
+
+    monkeypatch.setattr(media_probe, '_memory', {})
+    monkeypatch.setattr(media_probe, '_loaded', False)
+    media_probe.probe_media(live)
+    lines = log.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])['key'].startswith(str(live.resolve()))
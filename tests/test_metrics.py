@@ -0,0 +1,105 @@
+"""Spans, trace files, Prometheus rendering and the critical-path report."""
+
+import json
+
+import pytest
+
+from utils import metrics
+
+
+@pytest.fixture
+def traces(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_TRACE_DIR", str(tmp_path))
+    monkeypatch.setenv("METRICS_TRACE", "1")
+    monkeypatch.setenv("METRICS_ENABLED", "1")
+    monkeypatch.delenv("TRACE_PARENT", raising=False)
+    monkeypatch.delenv("VOD_ID", raising=False)
+    monkeypatch.delenv("JOB_RUN_ID", raising=False)
+    return tmp_path
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_nested_spans_link_parent_and_child(traces):
+    with metrics.bind(vod_id="v1", run_id="r1"):
+        with metrics.span("outer") as outer:
+            assert metrics.current_span_id() == outer.id
+            with metrics.span("inner", k=1):
+                pass
+            assert metrics.current_span_id() == outer.id
+    assert metrics.current_span_id() is None
+    recs = {r["name"]: r for r in _records(traces / "v1.jsonl")}
+    assert recs["inner"]["parent_id"] == recs["outer"]["span_id"]
+    assert recs["outer"]["parent_id"] is None
+    assert recs["inner"]["run_id"] == "r1" and recs["inner"]["attrs"] == {"k": 1}
+
+
+def test_trace_parent_env_links_child_process_spans(traces, monkeypatch):
+    monkeypatch.setenv("TRACE_PARENT", "abc123")
+    with metrics.span("step"):
+        pass
+    assert _records(traces / "global.jsonl")[0]["parent_id"] == "abc123"
+
+
+def test_error_marks_span_and_propagates(traces):
+    with pytest.raises(ValueError):
+        with metrics.span("boom"):
+            raise ValueError("bad")
+    rec = _records(traces / "global.jsonl")[0]
+    assert rec["status"] == "error" and rec["attrs"]["error"] == "ValueError: bad"
+
+
+def test_global_trace_is_rotated(traces, monkeypatch):
+    monkeypatch.setenv("METRICS_GLOBAL_TRACE_MB", "0.0005")  # ~500 bytes
+    for _ in range(10):
+        with metrics.span("tick"):
+            pass
+    assert (traces / "global.jsonl.1").exists()
+    assert (traces / "global.jsonl").stat().st_size < 2000
+
+
+def test_render_prometheus():
+    c = metrics.counter("test_render_total", "Things counted")
+    c.inc(2, kind='a"b')
+    h = metrics.histogram("test_render_seconds", "Durations", buckets=(0.1, 1.0))
+    h.observe(0.5)
+    h.observe(5)
+    text = metrics.render_prometheus()
+    assert "# TYPE test_render_total counter" in text
+    assert 'test_render_total{kind="a\\"b"} 2' in text
+    assert "# TYPE test_render_seconds histogram" in text
+    assert 'test_render_seconds_bucket{le="0.1"} 0' in text
+    assert 'test_render_seconds_bucket{le="1"} 1' in text
+    assert 'test_render_seconds_bucket{le="+Inf"} 2' in text
+    assert "test_render_seconds_count 2" in text
+
+
+def _step(name, start, end, deps=(), span_id=None, parent=None):
+    return {"name": "dag.step", "span_id": span_id or name, "parent_id": parent, "start": start, "end": end,
+            "dur_s": end - start, "status": "ok", "run_id": "r1", "attrs": {"step": name, "deps": list(deps)}}
+
+
+def test_critical_path_report(traces):
+    records = [
+        {"name": "job", "span_id": "job", "parent_id": None, "start": 0, "end": 100, "dur_s": 100,
+         "status": "ok", "run_id": "r1", "attrs": {}},
+        _step("download", 0, 30),
+        _step("transcript", 30, 40, deps=["download"]),
+        _step("chat", 30, 80, deps=["download"]),
+        _step("render", 80, 100, deps=["transcript", "chat"]),
+        {"name": "llm.call", "span_id": "l1", "parent_id": "chat", "start": 31, "end": 41, "dur_s": 10,
+         "status": "ok", "run_id": "r1", "attrs": {}},
+        {"name": "ffmpeg.run", "span_id": "f1", "parent_id": "render", "start": 81, "end": 96, "dur_s": 15,
+         "status": "ok", "run_id": "r1", "attrs": {}},
+    ]
+    (traces / "v9.jsonl").write_text("".join(json.dumps(r) + "\n" for r in records))
+    report = metrics.critical_path_report("v9")
+    assert [s["step"] for s in report["critical_path"]] == ["download", "chat", "render"]
+    assert report["critical_path_s"] == 100 and report["wall_s"] == 100
+    by_step = {s["step"]: s for s in report["critical_path"]}
+    assert by_step["chat"]["breakdown"]["llm"] == {"count": 1, "seconds": 10, "cpu_s": 0}
+    assert by_step["render"]["breakdown"]["ffmpeg"]["seconds"] == 15
+    assert report["steps"]["transcript"]["on_critical_path"] is False
+    assert (traces / "v9_summary.json").exists()
@@ -0,0 +1,126 @@
+"""run_dag failure gating and warm worker module reset."""
+
+import pytest
+
+import pipeline_runner
+from pipeline_runner import Step
+
+
+def _full_graph(fail, ran):
+    def step(name, deps=(), required=True):
+        def run():
+            ran.append(name)
+            return name not in fail
+        return Step(name, run, deps=deps, required=required)
+
+    # Same shape as the orchestrator's full-job graph
+    return [
+        step('filter_transcript_boundaries'),
+        step('full_vod_documenter', ['filter_transcript_boundaries']),
+        step('vod_quality_gate', ['full_vod_documenter']),
+        step('burst_summarize', ['full_vod_documenter']),
+        step('gemini_arc_detection', ['vod_quality_gate'], required=False),
+        step('arc_manifests', ['gemini_arc_detection'], required=False),
+        step('clips', ['vod_quality_gate', 'burst_summarize']),
+        step('clip_publish', ['clips']),
+        step('arch_videos', ['clips', 'arc_manifests', 'burst_summarize'], required=False),
+        step('cleanup_after_upload', ['clip_publish', 'arch_videos']),
+    ]
+
+
+def test_failed_burst_summarize_stops_clips_and_uploads():
+    ran = []
+    results = pipeline_runner.run_dag(_full_graph({'burst_summarize'}, ran), max_parallel=2)
+    assert results['burst_summarize'].status == 'failed'
+    for name in ('clips', 'clip_publish', 'arch_videos', 'cleanup_after_upload'):
+        assert results[name].status == 'skipped'
+        assert name not in ran
+    # Arc detection only needs the quality gate, so it still runs
+    assert results['arc_manifests'].status == 'ok'
+
+
+def test_skip_propagates_through_optional_steps():
+    ran = []
+    results = pipeline_runner.run_dag(_full_graph({'vod_quality_gate'}, ran), max_parallel=2)
+    assert results['gemini_arc_detection'].status == 'skipped'
+    assert results['arc_manifests'].status == 'skipped'
+    assert 'arc_manifests' not in ran
+
+
+def test_optional_failure_does_not_block():
+    ran = []
+    results = pipeline_runner.run_dag(_full_graph({'gemini_arc_detection'}, ran), max_parallel=2)
+    assert results['arc_manifests'].status == 'ok'
+    assert results['clip_publish'].status == 'ok'
+    assert results['arch_videos'].status == 'ok'
+
+
+def _counter_step(tmp_path):
+    (tmp_path / 'stepstate.py').write_text("COUNT = 0\n")
+    script = tmp_path / 'bump.py'
+    script.write_text(
+        "import sys, stepstate\n"
+        "stepstate.COUNT += 1\n"
+        "open(sys.argv[1], 'a').write(f'{stepstate.COUNT}\\n')\n"
+    )
+    out = tmp_path / 'counts.txt'
+    spec = {"kind": "script", "target": str(script), "args": [str(out)], "log_path": str(tmp_path / "log.txt")}
+    return spec, out
+
+
+@pytest.mark.parametrize("keep, expected", [("", ["1", "1"]), ("stepstate", ["1", "2"])])
+def test_worker_reimports_repo_modules_between_steps(tmp_path, monkeypatch, keep, expected):
+    monkeypatch.chdir(tmp_path)  # the worker treats its cwd as the repo root
+    monkeypatch.setenv("PIPELINE_KEEP_MODULES", keep)
+    spec, out = _counter_step(tmp_path)
+    pool = pipeline_runner.WarmWorkerPool(size=1, warm_imports=[])
+    try:
+        assert pool.run(spec, 30) == 0
+        assert pool.run(spec, 30) == 0
+    finally:
+        pool.shutdown()
+    assert out.read_text().split() == expected
+
+
+def test_logging_handlers_do_not_outlive_their_step(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    script = tmp_path / 'logstep.py'
+    script.write_text(
+        "import logging, sys\n"
+        "logging.basicConfig(level=logging.INFO, format='%(message)s')\n"
+        "logging.getLogger('step').addHandler(logging.StreamHandler(sys.stdout))\n"
+        "logging.getLogger('step').info('hello %s', sys.argv[1])\n"
+    )
+    pool = pipeline_runner.WarmWorkerPool(size=1, warm_imports=[])
+    logs = [tmp_path / 'first.log', tmp_path / 'second.log']
+    try:
+        for i, log in enumerate(logs):
+            spec = {"kind": "script", "target": str(script), "args": [str(i)], "log_path": str(log)}
+            assert pool.run(spec, 30) == 0
+    finally:
+        pool.shutdown()
+    second = logs[1].read_text()
+    assert "hello 1" in second
+    assert "closed file" not in second
+    assert "hello 1" not in logs[0].read_text()
+
+
+def test_reserved_worker_runs_the_next_step(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    spec, out = _counter_step(tmp_path)
+    pool = pipeline_runner.WarmWorkerPool(size=2, warm_imports=[])
+    lease = pool.lease("job", 1)
+    started = []
+    try:
+        with lease.reserved():
+            held = lease.pids()
+            assert len(held) == 1
+            assert lease.run(spec, 30, on_start=started.append) == 0
+        assert started == held
+        assert lease.pids() == []
+        # An unused reservation goes back to the pool
+        with lease.reserved():
+            pass
+        assert lease.pids() == [] and pool.busy_pids() == []
+    finally:
+        pool.shutdown()
@@ -0,0 +1,134 @@
+"""thumbnail.rate_cams: pre-gate, content-hash score cache and the warm worker pool."""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from thumbnail import rate_cams
+
+
+class FakeFer:
+    def __init__(self, calls=None):
+        self.calls = calls if calls is not None else []
+
+    def detect_emotions(self, rgb):
+        self.calls.append(rgb.shape)
+        return [{"emotions": {"happy": 0.8, "neutral": 0.1}}]
+
+
+class FakeMesh:
+    """Finds no face; close() drops a marker so the test can see it ran."""
+
+    def __init__(self, marker_dir=None, **kwargs):
+        self.marker_dir = marker_dir
+
+    def process(self, rgb):
+        return SimpleNamespace(multi_face_landmarks=None)
+
+    def close(self):
+        if self.marker_dir:
+            open(os.path.join(self.marker_dir, f"closed_{os.getpid()}"), "w").close()
+
+
+def _face_like(seed=0):
+    """Textured skin-toned frame: bright, sharp and with plenty of skin pixels."""
+    rng = np.random.default_rng(seed)
+    img = np.zeros((96, 96, 3), dtype=np.uint8)
+    img[:] = (120, 150, 200)
+    img[rng.random((96, 96)) < 0.5] = (100, 130, 180)
+    return img
+
+
+def _write(path, img):
+    ok, buf = cv2.imencode(".png", img)
+    assert ok
+    path.write_bytes(buf.tobytes())
+
+
+@pytest.fixture(autouse=True)
+def fresh_models(monkeypatch):
+    monkeypatch.setattr(rate_cams, "_WORKER_MODELS", {})
+    for var in ("CAM_GATE_MIN_BRIGHTNESS", "CAM_GATE_MIN_BLUR", "CAM_GATE_MIN_SKIN"):
+        monkeypatch.delenv(var, raising=False)
+
+
+def test_gate_skips_models_without_extra_penalty():
+    thresholds = rate_cams._gate_thresholds()
+    dark = np.full((96, 96, 3), 5, dtype=np.uint8)
+    _, buf = cv2.imencode(".png", dark)
+    calls = []
+    fields, gated = rate_cams._rate_image(buf.tobytes(), thresholds, FakeFer(calls), FakeMesh())
+    assert gated and calls == []
+    assert "gate_dark" in fields["penalties"]
+    # Scored like a faceless frame (no_mp_face + blurry), not pushed below closed eyes
+    no_face, _ = rate_cams._calculate_score({}, {"has_face": False}, fields["blur"], fields["size_bonus"])
+    assert fields["score"] == pytest.approx(no_face)
+    assert fields["score"] > -10
+
+
+def test_survivor_is_rated_from_the_same_bytes():
+    _, buf = cv2.imencode(".png", _face_like())
+    calls = []
+    fields, gated = rate_cams._rate_image(buf.tobytes(), rate_cams._gate_thresholds(), FakeFer(calls), FakeMesh())
+    assert not gated and calls == [(96, 96, 3)]
+    assert fields["happy"] == pytest.approx(0.8)
+
+
+def test_score_cache_skips_known_images(tmp_path, monkeypatch):
+    cams = tmp_path / "cams"
+    cams.mkdir()
+    for i in range(3):
+        _write(cams / f"cam_arc_00{i}_{i * 100}ms_a.jpg", _face_like(i))
+    calls = []
+    cache = {}
+    first = rate_cams._rate_directory("v1", cams, FakeFer(calls), FakeMesh(), cache=cache)
+    assert len(first) == 3 and len(calls) == 3 and len(cache) == 3
+
+    # A renamed copy has the same content hash
+    (cams / "cam_arc_000_0ms_a.jpg").rename(cams / "cam_arc_009_900ms_b.jpg")
+    again = rate_cams._rate_directory("v1", cams, FakeFer(calls), FakeMesh(), cache=cache)
+    assert len(calls) == 3
+    assert sorted(r["score"] for r in again) == sorted(r["score"] for r in first)
+    assert {r["rel_ms"] for r in again} == {100, 200, 900}
+
+    # Gate thresholds are part of the key
+    monkeypatch.setenv("CAM_GATE_MIN_BLUR", "16")
+    rate_cams._rate_directory("v1", cams, FakeFer(calls), FakeMesh(), cache=cache)
+    assert len(calls) == 6
+
+
+def test_pool_matches_in_process_and_closes_face_mesh(tmp_path, monkeypatch):
+    cams = tmp_path / "cams"
+    cams.mkdir()
+    for i in range(6):
+        _write(cams / f"cam_arc_00{i}_{i}ms_a.jpg", _face_like(i))
+    _write(cams / "cam_arc_009_9ms_dark.jpg", np.zeros((96, 96, 3), dtype=np.uint8))
+    markers = tmp_path / "markers"
+    markers.mkdir()
+    fake_mp = SimpleNamespace(solutions=SimpleNamespace(face_mesh=SimpleNamespace(
+        FaceMesh=lambda **kw: FakeMesh(str(markers), **kw))))
+    monkeypatch.setattr(rate_cams, "_try_import_fer", lambda: (lambda mtcnn=False: FakeFer()))
+    monkeypatch.setattr(rate_cams, "_try_import_mediapipe", lambda: fake_mp)
+
+    pooled = rate_cams._rate_directory("v1", cams, workers=2)
+    serial = rate_cams._rate_directory("v1", cams, FakeFer(), FakeMesh())
+    assert pooled == serial
+    assert pooled[-1]["filename"] == "cam_arc_009_9ms_dark.jpg"
+    # Each worker closed its Face Mesh on exit
+    assert len(list(markers.iterdir())) >= 1
+
+
+def test_close_models_closes_face_mesh(tmp_path, monkeypatch):
+    fake_mp = SimpleNamespace(solutions=SimpleNamespace(face_mesh=SimpleNamespace(
+        FaceMesh=lambda **kw: FakeMesh(str(tmp_path), **kw))))
+    monkeypatch.setattr(rate_cams, "_try_import_fer", lambda: (lambda mtcnn=False: FakeFer()))
+    monkeypatch.setattr(rate_cams, "_try_import_mediapipe", lambda: fake_mp)
+    rate_cams._init_models()
+    assert "mesh" in rate_cams._WORKER_MODELS
+    rate_cams._close_models()
+    assert rate_cams._WORKER_MODELS == {}
+    assert (tmp_path / f"closed_{os.getpid()}").exists()
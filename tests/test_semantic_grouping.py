@@ -0,0 +1,87 @@
+"""find_semantic_clusters (sparse neighbor graph) against the dense pairwise version it replaced."""
+
+import random
+
+import numpy as np
+import pytest
+
+from rag.retrieval import Retriever
+from rag.semantic_grouping import find_semantic_clusters, semantic_neighbor_graph
+
+
+def _old_find_semantic_clusters(bursts, retriever, similarity_threshold=0.4, min_cluster_size=2):
+    # rag.semantic_grouping.find_semantic_clusters before the neighbor-graph rewrite
+    if not retriever.have_index or len(bursts) < 2:
+        return []
+    n = len(bursts)
+    sim_matrix = np.zeros((n, n))
+    for i in range(n):
+        for j in range(n):
+            sim_matrix[i, j] = 1.0 if i == j else retriever.sim(bursts[i]["id"], bursts[j]["id"])
+    visited = set()
+    clusters = []
+    for i in range(n):
+        if i in visited:
+            continue
+        cluster = [i]
+        visited.add(i)
+        for j in range(i + 1, n):
+            if j in visited:
+                continue
+            if any(sim_matrix[j, k] >= similarity_threshold for k in cluster):
+                cluster.append(j)
+                visited.add(j)
+        if len(cluster) >= min_cluster_size:
+            clusters.append(cluster)
+    return clusters
+
+
+def _retriever(rng, n, dim=6):
+    # A few topic directions plus noise so clusters form and chain
+    centers = np.array([[rng.gauss(0, 1) for _ in range(dim)] for _ in range(4)])
+    ids, rows = [], []
+    for i in range(n):
+        if rng.random() < 0.1:
+            continue  # burst with no vector
+        vec = centers[rng.randrange(4)] + np.array([rng.gauss(0, 0.6) for _ in range(dim)])
+        if rng.random() < 0.05:
+            vec = np.zeros(dim)  # zero vector: sim -1 against everything
+        ids.append(f"b{i}")
+        rows.append(vec)
+    vecs = np.array(rows, dtype=np.float32) if rows else np.zeros((0, dim), dtype=np.float32)
+    return Retriever(True, ids, {bid: k for k, bid in enumerate(ids)}, vecs)
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("threshold", [-0.5, 0.0, 0.4, 0.8])
+def test_clusters_match_dense_version(seed, threshold):
+    rng = random.Random(seed)
+    n = rng.choice([0, 1, 2, 5, 30, 120])
+    bursts = [{"id": f"b{i}"} for i in range(n)]
+    retriever = _retriever(rng, n)
+    for min_size in (1, 2, 3):
+        assert find_semantic_clusters(bursts, retriever, threshold, min_size) == \
+            _old_find_semantic_clusters(bursts, retriever, threshold, min_size)
+
+
+def test_threshold_ties_use_pairwise_similarity():
+    # Identical directions: cosine is 1.0 up to float32 rounding, threshold sits exactly on it
+    vecs = np.array([[1, 2, 3], [2, 4, 6], [3, 6, 9.0000001]], dtype=np.float32)
+    retriever = Retriever(True, ["a", "b", "c"], {"a": 0, "b": 1, "c": 2}, vecs)
+    bursts = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+    threshold = retriever.sim("a", "b")
+    assert find_semantic_clusters(bursts, retriever, threshold) == \
+        _old_find_semantic_clusters(bursts, retriever, threshold)
+
+
+def test_small_blocks_give_same_graph():
+    rng = random.Random(5)
+    bursts = [{"id": f"b{i}"} for i in range(50)]
+    retriever = _retriever(rng, 50)
+    assert semantic_neighbor_graph(bursts, retriever, 0.3, block_rows=7) == \
+        semantic_neighbor_graph(bursts, retriever, 0.3)
+
+
+def test_no_index_returns_no_clusters():
+    retriever = Retriever(False, [], {}, None)
+    assert find_semantic_clusters([{"id": "a"}, {"id": "b"}], retriever) == []
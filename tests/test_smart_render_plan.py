@@ -0,0 +1,95 @@
+"""plan_pieces: which parts of each input are stream-copied vs re-encoded."""
+
+from pathlib import Path
+
+from directors_cut.ffmpeg_graph import calculate_proper_offsets
+from directors_cut.smart_render import _compatible, plan_pieces
+
+
+def _keys(duration, gop=2.0):
+    return [round(i * gop, 3) for i in range(int(duration / gop) + 1)]
+
+
+def _covered(pieces):
+    """input idx -> list of (start, end) parts, in output order."""
+    out = {}
+    for piece in pieces:
+        for part in piece.parts:
+            out.setdefault(part.idx, []).append((round(part.start, 3), round(part.end, 3)))
+    return out
+
+
+def test_interiors_are_copied_between_keyframes():
+    pieces = plan_pieces([20.0, 20.0], [_keys(20), _keys(20)], 1.0, min_copy=1.0)
+    kinds = [p.kind for p in pieces]
+    assert kinds == ['encode', 'copy', 'encode', 'copy']
+    # head of input 0 up to the first keyframe at/after td
+    assert _covered(pieces[:1]) == {0: [(1.0, 2.0)]}
+    # copy stops at the last keyframe before the outgoing transition (20 - 1)
+    assert (pieces[1].parts[0].start, pieces[1].parts[0].end) == (2.0, 18.0)
+    # transition chunk: tail of 0, head of 1 (incoming transition ends at td + td)
+    assert _covered(pieces[2:3]) == {0: [(18.0, 20.0)], 1: [(1.0, 2.0)]}
+    # last input copies to its end
+    assert (pieces[3].parts[0].start, pieces[3].parts[0].end) == (2.0, 20.0)
+
+
+def test_every_input_is_covered_contiguously():
+    durations = [15.0, 30.0, 12.5]
+    pieces = plan_pieces(durations, [_keys(d, 4.0) for d in durations], 1.0)
+    covered = _covered(pieces)
+    for idx, d in enumerate(durations):
+        spans = covered[idx]
+        assert spans[0][0] == 1.0
+        assert spans[-1][1] == d
+        for (_, e), (s, _) in zip(spans, spans[1:]):
+            assert e == s
+
+
+def test_missing_keyframes_fall_back_to_encoding_whole_input():
+    pieces = plan_pieces([10.0, 10.0], [[], _keys(10)], 1.0)
+    assert pieces[0].kind == 'encode'
+    assert _covered(pieces[:1]) == {0: [(1.0, 10.0)], 1: [(1.0, 2.0)]}
+
+
+def test_short_interior_is_folded_into_transition_chunk():
+    pieces = plan_pieces([5.0, 10.0], [[0.0, 2.0, 3.0], _keys(10)], 1.0, min_copy=2.0)
+    assert pieces[0].kind == 'encode'
+    assert _covered(pieces[:1])[0] == [(1.0, 5.0)]
+
+
+def test_too_short_input_returns_none():
+    assert plan_pieces([10.0, 2.5, 10.0], [_keys(10), _keys(2.5), _keys(10)], 1.0) is None
+
+
+def test_proper_offset_ends_input_early():
+    # The full path starts transition 1 at output time 7 -> input 0 is visible up to 7 + td (+ td trimmed head)
+    pieces = plan_pieces([20.0, 20.0], [_keys(20), _keys(20)], 1.0, offsets=[7.0])
+    assert _covered(pieces)[0][-1][1] == 9.0
+    # Negative offsets keep cumulative timing
+    pieces = plan_pieces([20.0, 20.0], [_keys(20), _keys(20)], 1.0, offsets=[-1.0])
+    assert _covered(pieces)[0][-1][1] == 20.0
+
+
+def test_offset_past_input_end_is_rejected():
+    assert plan_pieces([20.0, 20.0], [_keys(20), _keys(20)], 1.0, offsets=[25.0]) is None
+
+
+def test_calculate_proper_offsets_for_gapped_segments():
+    inputs = [Path('seg_0001_100-160.mp4'), Path('seg_0002_300-360.mp4'), Path('seg_0003_365-400.mp4')]
+    assert calculate_proper_offsets(inputs, 1.0) == [59.0, -1.0]
+
+
+def _layout(**video):
+    base = {'codec': 'h264', 'profile': 'High', 'level': 41, 'pix_fmt': 'yuv420p',
+            'width': 1920, 'height': 1080, 'fps': '30/1'}
+    base.update(video)
+    return {'video': base, 'audio': {'codec': 'aac', 'sample_rate': '48000', 'channels': 2}}
+
+
+def test_compatible_requires_matching_profile_and_full_path_format():
+    assert _compatible([_layout(), _layout()])
+    assert not _compatible([_layout(), _layout(level=40)])
+    assert not _compatible([_layout(), _layout(profile='Main')])
+    assert not _compatible([_layout(fps='60/1'), _layout(fps='60/1')])
+    assert not _compatible([_layout(profile='High 10'), _layout(profile='High 10')])
+    assert not _compatible([_layout(width=1280, height=720), _layout()])
@@ -0,0 +1,47 @@
+"""smooth_segments_one_chapter against the implementation it replaced."""
+
+import copy
+import random
+
+import pytest
+
+from legacy_smooth_sections import smooth_segments_one_chapter as old_smooth
+from vector_store.smooth_sections import smooth_segments_one_chapter
+
+TOPICS = ["boss fight", "boss fights", "chat banter", "shop", "shopping run", "lore", ""]
+
+
+def _chapter(rng, n):
+    segs = []
+    t = rng.uniform(0, 30)
+    for i in range(n):
+        dur = rng.choice([4.0, 8.0, 15.0, 30.0, rng.uniform(2, 120)])
+        topic = rng.choice(TOPICS)
+        segs.append({
+            "id": f"b{i}",
+            "start_time": t,
+            "end_time": t + dur,
+            # Repeated values so rank ties and equal saliences are common
+            "burst_score": rng.choice([0.0, 0.5, 1.0, rng.random()]),
+            "chat_rate_z": rng.choice([-1.0, 0.0, 0.0, 2.0, rng.uniform(-1, 4)]),
+            "reaction_hits": {"KEKW": rng.randint(0, 3)} if rng.random() < 0.5 else {},
+            "confidence": rng.choice([0.5, 0.9, rng.random()]),
+            "topic_key": topic.replace(" ", "_") if rng.random() < 0.5 else "",
+            "topic": topic,
+            "energy": rng.choice(["low", "medium", "high", None]),
+            "summary": f"segment {i}",
+            "same_topic_prev": rng.random() < 0.3,
+        })
+        t += dur + rng.choice([0.0, 0.0, 1.0, 5.0, 40.0])
+    return segs
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_matches_previous_implementation(seed):
+    rng = random.Random(seed)
+    segs = _chapter(rng, rng.choice([1, 2, 3, 5, 12, 40, 150]))
+    assert smooth_segments_one_chapter(copy.deepcopy(segs)) == old_smooth(copy.deepcopy(segs))
+
+
+def test_empty_chapter():
+    assert smooth_segments_one_chapter([]) == [] == old_smooth([])
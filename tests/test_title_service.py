@@ -0,0 +1,106 @@
+"""TitleService batched generation against a stub Gemini client: dedupe, batch splitting, re-sends."""
+
+import json
+import re
+import threading
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("pydantic")
+pytest.importorskip("requests")
+
+from src import title_service
+
+
+class StubGemini:
+    """Answers numbered-item prompts; `reply(text, attempt)` decides each item's raw title."""
+
+    def __init__(self, reply=None):
+        self.reply = reply or (lambda text, attempt: f"title about {text.split()[0]}")
+        self.prompts = []
+        self.seen = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, **kwargs):
+        items = re.findall(r"=== ITEM (\d+) ===\n(.*?)(?=\n\n=== ITEM|\n\n[A-Z]|\Z)", prompt, re.S)
+        results = []
+        with self._lock:
+            self.prompts.append([text for _, text in items])
+            for n, text in items:
+                attempt = self.seen.get(text, 0)
+                self.seen[text] = attempt + 1
+                raw = self.reply(text, attempt)
+                if raw is not None:
+                    results.append({"id": int(n), "text": raw})
+        return json.dumps({"results": results})
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    s = StubGemini()
+    monkeypatch.setattr(title_service, "call_gemini_3_flash", s)
+    monkeypatch.setattr(title_service, "_load_stream_context", lambda vod_id: title_service.StreamContext())
+    monkeypatch.setenv("TITLE_BATCH_ITEMS", "20")
+    monkeypatch.setenv("TITLE_BATCH_TOKENS", "100000")
+    monkeypatch.setenv("TITLE_BATCH_RETRIES", "1")
+    return s
+
+
+def _texts(*words):
+    return [f"{w} happened during the stream today" for w in words]
+
+
+def test_near_identical_inputs_share_one_title(stub):
+    texts = ["Boss fight went horribly wrong!!", "boss fight  went horribly wrong", "Chat voted to reset the run"]
+    titles = title_service.TitleService("v1").generate_clip_titles(texts)
+    assert sum(len(p) for p in stub.prompts) == 2
+    assert titles[0] == titles[1] == "title about Boss"
+    assert titles[2] == "title about Chat"
+
+
+def test_short_inputs_get_the_fallback_without_a_request(stub):
+    titles = title_service.TitleService("v1").generate_clip_titles(["", "too short"])
+    assert titles == ["Highlight Clip", "Highlight Clip"]
+    assert stub.prompts == []
+
+
+def test_items_are_split_by_count_and_token_budget(stub, monkeypatch):
+    monkeypatch.setenv("TITLE_BATCH_ITEMS", "3")
+    words = [f"w{i}" for i in range(7)]
+    titles = title_service.TitleService("v1").generate_clip_titles(_texts(*words))
+    assert sorted(len(p) for p in stub.prompts) == [1, 3, 3]
+    assert titles == [f"title about {w}" for w in words]
+
+    stub.prompts.clear()
+    monkeypatch.setenv("TITLE_BATCH_ITEMS", "20")
+    service = title_service.TitleService("v1")
+    base = title_service.estimate_tokens(service._build_batch_prompt("clip", "Streamer", 50, []))
+    per_item = title_service.estimate_tokens(_texts("w0")[0]) + 5
+    monkeypatch.setenv("TITLE_BATCH_TOKENS", str(base + 2 * per_item))
+    service.generate_clip_titles(_texts(*words))
+    assert [len(p) for p in sorted(stub.prompts, key=len)] == [1, 2, 2, 2]
+
+
+def test_only_rejected_items_are_resent(stub):
+    def reply(text, attempt):
+        if text.startswith("bad") and attempt == 0:
+            return "As an AI I cannot title this"
+        if text.startswith("gone") and attempt == 0:
+            return None  # missing from the response
+        return f"title about {text.split()[0]}"
+
+    stub.reply = reply
+    titles = title_service.TitleService("v1").generate_clip_titles(_texts("ok", "bad", "gone", "fine"))
+    assert len(stub.prompts) == 2
+    assert sorted(stub.prompts[1]) == sorted(_texts("bad", "gone"))
+    assert titles == ["title about ok", "title about bad", "title about gone", "title about fine"]
+
+
+def test_fallback_after_retries_run_out(stub):
+    stub.reply = lambda text, attempt: "title" if text.startswith("bad") else f"title about {text.split()[0]}"
+    titles = title_service.TitleService("v1").generate_arc_titles(_texts("ok", "bad"), max_chars=20)
+    assert stub.seen[_texts("bad")[0]] == 2  # first try + one re-send
+    assert titles[0] == "title about ok"
+    # generate_arc_title's fallback: the start of the summary
+    assert titles[1] == "bad happened during"
@@ -0,0 +1,322 @@
+"""Batched Helix/DynamoDB reads (twitch_batch) and the watcher Lambda paths that use them.
+
+Helix is stubbed with `responses`, DynamoDB is moto's in-memory backend.
+"""
+
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+responses = pytest.importorskip("responses")
+
+import twitch_batch
+from twitch_batch import HelixBatchClient, batch_get_items
+
+HELIX = "https://helix.test"
+TOKEN_URL = "https://id.test/oauth2/token"
+
+
+class FakeHelix:
+    """Helix users/streams/videos backed by dicts; records every request's query."""
+
+    def __init__(self, rsps, users=None, streams=None, videos=None):
+        self.users = users or {}      # login -> id
+        self.streams = streams or {}  # user id -> stream
+        self.videos = videos or {}    # video id -> video
+        self.calls = []
+        self.tokens_issued = 0
+        self.valid_token = None
+        rsps.add_callback(responses.POST, TOKEN_URL, callback=self._token)
+        for path in ("users", "streams", "videos"):
+            rsps.add_callback(responses.GET, f"{HELIX}/{path}", callback=getattr(self, f"_{path}"))
+
+    def _token(self, request):
+        self.tokens_issued += 1
+        self.valid_token = f"tok{self.tokens_issued}"
+        return 200, {}, f'{{"access_token": "{self.valid_token}", "expires_in": 3600}}'
+
+    def _query(self, request, path):
+        q = parse_qs(urlparse(request.url).query)
+        self.calls.append((path, q))
+        return q
+
+    def _reply(self, request, data):
+        if request.headers.get("Authorization") != f"Bearer {self.valid_token}":
+            return 401, {}, "{}"
+        return 200, {}, json.dumps({"data": data})
+
+    def _users(self, request):
+        q = self._query(request, "users")
+        return self._reply(request, [{"login": l, "id": self.users[l]} for l in q.get("login", []) if l in self.users])
+
+    def _streams(self, request):
+        q = self._query(request, "streams")
+        return self._reply(request, [self.streams[u] for u in q.get("user_id", []) if u in self.streams])
+
+    def _videos(self, request):
+        q = self._query(request, "videos")
+        if request.headers.get("Authorization") == f"Bearer {self.valid_token}" and \
+                any(v not in self.videos for v in q.get("id", [])):
+            return 404, {}, '{"error": "Not Found"}'
+        return self._reply(request, [self.videos[v] for v in q.get("id", [])])
+
+    def count(self, path):
+        return sum(1 for p, _ in self.calls if p == path)
+
+
+@pytest.fixture(autouse=True)
+def clean_caches(monkeypatch):
+    monkeypatch.setattr(twitch_batch, "_TOKEN_CACHE", {})
+    monkeypatch.setattr(twitch_batch, "_USER_ID_CACHE", {})
+
+
+@pytest.fixture
+def rsps():
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as r:
+        yield r
+
+
+def _client():
+    return HelixBatchClient("cid", "secret", base_url=HELIX, token_url=TOKEN_URL)
+
+
+def test_user_ids_batch_100_per_request_and_cache(rsps):
+    helix = FakeHelix(rsps, users={f"user{i}": str(1000 + i) for i in range(230)})
+    logins = [f"User{i}" for i in range(240)] + ["user5"]  # mixed case, unknown logins, duplicate
+    ids = _client().user_ids(logins)
+    assert ids == {f"user{i}": str(1000 + i) for i in range(230)}
+    assert helix.count("users") == 3
+    assert [len(q["login"]) for _, q in helix.calls] == [100, 100, 40]
+
+    # Warm container: cached logins need no request, new client reuses the token
+    assert _client().user_ids(["user1", "USER2"]) == {"user1": "1001", "user2": "1002"}
+    assert helix.count("users") == 3
+    assert helix.tokens_issued == 1
+
+
+def test_expired_token_is_refreshed_on_401(rsps):
+    helix = FakeHelix(rsps, streams={"1": {"id": "s1", "user_id": "1"}})
+    client = _client()
+    assert client.live_streams(["1", "2"]) == {"1": {"id": "s1", "user_id": "1"}}
+    helix.valid_token = "rotated"  # server revoked the cached token
+    assert client.live_streams(["1"]) == {"1": {"id": "s1", "user_id": "1"}}
+    assert helix.tokens_issued == 2
+
+
+def test_live_streams_params(rsps):
+    helix = FakeHelix(rsps, streams={str(i): {"id": f"s{i}", "user_id": str(i)} for i in range(0, 150, 3)})
+    live = _client().live_streams(str(i) for i in range(150))
+    assert set(live) == {str(i) for i in range(0, 150, 3)}
+    assert [len(q["user_id"]) for _, q in helix.calls] == [100, 50]
+    assert all(q["type"] == ["live"] and q["first"] == ["100"] for _, q in helix.calls)
+
+
+def test_videos_404_is_split_to_isolate_deleted_ids(rsps):
+    videos = {str(v): {"id": str(v), "duration": "1h"} for v in range(16) if v not in (3, 11)}
+    helix = FakeHelix(rsps, videos=videos)
+    out = _client().videos_by_id(str(v) for v in range(16))
+    assert out == videos
+    # 1 + 2 halves + quarters/eighths down to the two deleted ids; far fewer than 16 singles
+    assert helix.count("videos") < 16
+
+
+@pytest.fixture
+def dynamo(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        resource.create_table(
+            TableName="sessions",
+            KeySchema=[{"AttributeName": "streamer_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "streamer_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield resource
+
+
+def test_batch_get_items_chunks_and_skips_missing(dynamo):
+    table = dynamo.Table("sessions")
+    with table.batch_writer() as w:
+        for i in range(0, 250, 2):
+            w.put_item(Item={"streamer_id": str(i), "status": "RECORDING"})
+    out = batch_get_items(dynamo, "sessions", "streamer_id", [str(i) for i in range(250)] + ["0"])
+    assert set(out) == {str(i) for i in range(0, 250, 2)}
+    assert out["4"]["status"] == "RECORDING"
+
+
+class _Throttled:
+    """BatchGetItem that leaves some keys unprocessed for the first `stalls` calls."""
+
+    def __init__(self, stalls):
+        self.stalls = stalls
+        self.requests = []
+
+    def batch_get_item(self, RequestItems):
+        self.requests.append(RequestItems)
+        keys = RequestItems["t"]["Keys"]
+        if len(self.requests) <= self.stalls:
+            return {"Responses": {"t": [dict(keys[0], v=1)]},
+                    "UnprocessedKeys": {"t": dict(RequestItems["t"], Keys=keys[1:])} if keys[1:] else {}}
+        return {"Responses": {"t": [dict(k, v=1) for k in keys]}}
+
+
+def test_unprocessed_keys_are_retried(monkeypatch):
+    monkeypatch.setattr(twitch_batch.time, "sleep", lambda s: None)
+    fake = _Throttled(stalls=2)
+    out = batch_get_items(fake, "t", "k", ["a", "b", "c", "d"])
+    assert set(out) == {"a", "b", "c", "d"}
+    assert [len(r["t"]["Keys"]) for r in fake.requests] == [4, 3, 2]
+
+
+def test_unprocessed_keys_give_up(monkeypatch):
+    monkeypatch.setattr(twitch_batch.time, "sleep", lambda s: None)
+    with pytest.raises(RuntimeError):
+        batch_get_items(_Throttled(stalls=99), "t", "k", [str(i) for i in range(10)], max_attempts=3)
+
+
+# ---- watcher Lambda: batched prefetch vs the sequential fallback ----
+
+USERS = {"alice": "1", "bob": "2", "carol": "3", "erin": "5"}
+STREAMERS = ["alice", "Bob", "carol", "dave", "erin"]
+
+
+def _parse_duration(text):
+    total, num = 0, ""
+    for ch in text or "":
+        if ch.isdigit():
+            num += ch
+        else:
+            total += int(num or 0) * {"h": 3600, "m": 60, "s": 1}.get(ch, 0)
+            num = ""
+    return total
+
+
+class FakeMonitor:
+    """TwitchMonitor stand-in over the same data as FakeHelix; counts per-streamer calls."""
+
+    def __init__(self, helix):
+        self.helix = helix
+        self.calls = []
+
+    def get_user_id(self, login):
+        self.calls.append("get_user_id")
+        return self.helix.users.get(login.lower())
+
+    def get_stream(self, user_id):
+        self.calls.append("get_stream")
+        return self.helix.streams.get(user_id)
+
+    def get_video_by_id(self, vod_id):
+        self.calls.append("get_video_by_id")
+        return self.helix.videos.get(vod_id)
+
+    def get_latest_archive_video(self, user_id):
+        return {"id": f"v{user_id}", "duration": "1h0m0s"} if user_id in self.helix.streams else None
+
+    def parse_duration_to_seconds(self, text):
+        return _parse_duration(text)
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    import threading
+    import time
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("HELIX_BASE_URL", HELIX)
+    monkeypatch.setenv("TWITCH_TOKEN_URL", TOKEN_URL)
+    # moto patches requests through `responses` too: start the Helix stub inside it
+    with moto.mock_aws(), responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        import twitch_watcher_lambda as lam
+
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        for name, key in ((lam.DYNAMODB_TABLE, "vod_id"), (lam.STATE_TABLE_NAME, "streamer_id"),
+                          (lam.SESSION_TABLE_NAME, "streamer_id")):
+            resource.create_table(
+                TableName=name,
+                KeySchema=[{"AttributeName": key, "KeyType": "HASH"}],
+                AttributeDefinitions=[{"AttributeName": key, "AttributeType": "S"}],
+                BillingMode="PAY_PER_REQUEST",
+            )
+        monkeypatch.setattr(lam, "dynamodb", resource)
+        monkeypatch.setattr(lam, "_thread_local", threading.local())
+        monkeypatch.setattr(lam, "STREAMERS", STREAMERS)
+
+        helix = FakeHelix(
+            rsps, users=dict(USERS),
+            streams={"1": {"id": "s1", "user_id": "1"}},
+            videos={"v2": {"id": "v2", "duration": "1h40m0s"}},  # v5 was deleted
+        )
+        monitor = FakeMonitor(helix)
+        monkeypatch.setattr(lam, "TwitchMonitor", lambda: monitor)
+
+        now = int(time.time())
+        sessions = resource.Table(lam.SESSION_TABLE_NAME)
+        sessions.put_item(Item={"streamer_id": "2", "stream_id": "old", "vod_id": "v2", "status": "RECORDING",
+                                "created_at": now, "last_seen_live_at": now, "last_checked_at": now,
+                                "last_vod_duration_seconds": 6000, "stable_checks": 0})
+        sessions.put_item(Item={"streamer_id": "5", "stream_id": "old5", "vod_id": "v5", "status": "FINALIZING",
+                                "created_at": now, "last_seen_live_at": now, "last_checked_at": now,
+                                "last_vod_duration_seconds": 10, "stable_checks": 0})
+        yield lam, helix, monitor, sessions
+
+
+def _session_states(table):
+    skip = {"created_at", "last_seen_live_at", "last_checked_at"}
+    items = table.scan()["Items"]
+    return {it["streamer_id"]: {k: v for k, v in it.items() if k not in skip} for it in items}
+
+
+def test_handler_without_app_credentials_uses_sequential_loop(watcher, monkeypatch):
+    lam, helix, monitor, sessions = watcher
+    monkeypatch.delenv("TWITCH_CLIENT_ID", raising=False)
+    monkeypatch.delenv("TWITCH_CLIENT_SECRET", raising=False)
+    assert lam.lambda_handler({}, None)["statusCode"] == 200
+    assert helix.calls == []
+    assert monitor.calls.count("get_user_id") == len(STREAMERS)
+    assert monitor.calls.count("get_stream") == 4  # dave has no user id
+    states = _session_states(sessions)
+    assert states["1"]["status"] == "RECORDING" and states["1"]["vod_id"] == "v1"
+    assert states["2"]["status"] == "FINALIZING" and states["2"]["stable_checks"] == 1
+    assert states["5"]["status"] == "FINALIZING" and states["5"]["stable_checks"] == 0
+    assert "3" not in states
+
+
+def test_batched_prefetch_matches_sequential(watcher, monkeypatch):
+    lam, helix, monitor, sessions = watcher
+    before = sessions.scan()["Items"]
+    monkeypatch.delenv("TWITCH_CLIENT_ID", raising=False)
+    lam.lambda_handler({}, None)
+    sequential = _session_states(sessions)
+
+    # Same starting rows, batched path this time
+    for it in sessions.scan()["Items"]:
+        sessions.delete_item(Key={"streamer_id": it["streamer_id"]})
+    for it in before:
+        sessions.put_item(Item=it)
+    monitor.calls.clear()
+    monkeypatch.setenv("TWITCH_CLIENT_ID", "cid")
+    monkeypatch.setenv("TWITCH_CLIENT_SECRET", "secret")
+    lam.lambda_handler({}, None)
+
+    assert _session_states(sessions) == sequential
+    # One users, one streams and one videos request for the whole watch list
+    assert (helix.count("users"), helix.count("streams")) == (1, 1)
+    assert helix.count("videos") == 3  # [v2, v5] 404s, then [v2] and [v5] on their own
+    # Only the deleted video falls back to a per-streamer lookup
+    assert monitor.calls == ["get_video_by_id"]
+
+
+def test_prefetch_failure_falls_back(watcher, monkeypatch):
+    lam, helix, monitor, sessions = watcher
+    monkeypatch.setenv("TWITCH_CLIENT_ID", "cid")
+    monkeypatch.setenv("TWITCH_CLIENT_SECRET", "secret")
+    helix.streams = None  # the streams request now raises mid-prefetch
+    assert lam.prefetch_watch_list(["alice"]) is None
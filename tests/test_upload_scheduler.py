@@ -0,0 +1,130 @@
+"""UploadScheduler retry loop: one lease per attempt, failures rescheduled, no double bumps."""
+
+import sqlite3
+
+import pytest
+
+from utils.upload_scheduler import UploadScheduler
+
+
+@pytest.fixture
+def sched(tmp_path):
+    with UploadScheduler(db_path=str(tmp_path / "q.db"), json_file=str(tmp_path / "none.json")) as s:
+        yield s
+
+
+def _ready(s, *keys):
+    for vod, arc, ch in keys:
+        s.add_failed_upload(vod, arc, "quota", channel=ch, retry_after_hours=0)
+
+
+def _row(s, vod, arc, ch):
+    rows = [r for r in s.get_pending_for_vod(vod) if r["arc_index"] == arc and r["channel"] == ch]
+    return rows[0] if rows else None
+
+
+def test_claims_one_row_per_attempt(sched, tmp_path):
+    _ready(sched, ("v1", 1, "a"), ("v1", 2, "a"), ("v2", None, "b"))
+    other = UploadScheduler(db_path=str(tmp_path / "q.db"), json_file=str(tmp_path / "none.json"))
+    stolen = []
+
+    def attempt(entry):
+        # While this row runs, the rest of the queue is still claimable by another daemon
+        got = other.claim_ready_uploads(limit=1, worker="other")
+        stolen.extend(got)
+        for g in got:
+            other.release_upload(g["vod_id"], g["arc_index"], g["channel"], worker="other")
+        assert (entry["vod_id"], entry["arc_index"]) not in [(g["vod_id"], g["arc_index"]) for g in got]
+        sched.mark_upload_completed(entry["vod_id"], entry["arc_index"], entry["channel"])
+        return True
+
+    assert sched.drain_ready_uploads(attempt, worker="me") == 3
+    assert len(stolen) == 2  # nothing left to steal during the last attempt
+    assert sched.get_pending_count() == 0
+    other.close()
+
+
+def test_failed_attempt_is_rescheduled(sched):
+    _ready(sched, ("v1", 1, "a"))
+    assert sched.drain_ready_uploads(lambda e: False, retry_after_hours=6, worker="me") == 0
+    row = _row(sched, "v1", 1, "a")
+    assert row["retry_count"] == 1
+    assert sched.get_ready_uploads() == []  # pushed into the future, lease dropped
+    assert sched.claim_ready_uploads(worker="x") == []
+
+
+def test_exception_is_rescheduled(sched):
+    _ready(sched, ("v1", 1, "a"))
+
+    def boom(entry):
+        raise RuntimeError("subprocess timed out")
+
+    assert sched.drain_ready_uploads(boom, worker="me") == 0
+    assert _row(sched, "v1", 1, "a")["retry_count"] == 1
+
+
+def test_attempt_that_rescheduled_itself_is_not_bumped_twice(sched):
+    _ready(sched, ("v1", 1, "a"))
+
+    def attempt(entry):
+        # The upload subprocess hit quota and put the row back for 24h itself
+        sched.add_failed_upload("v1", 1, "quota exceeded", channel="a", retry_after_hours=24)
+        return False
+
+    sched.drain_ready_uploads(attempt, worker="me")
+    row = _row(sched, "v1", 1, "a")
+    assert row["retry_count"] == 1
+    assert row["reason"] == "quota exceeded"
+
+
+def test_last_retry_marks_permanently_failed(sched):
+    _ready(sched, ("v1", 1, "a"))
+    for _ in range(2):
+        sched.add_failed_upload("v1", 1, "again", channel="a", retry_after_hours=0)
+    sched.drain_ready_uploads(lambda e: False, max_retries=3, worker="me")
+    assert sched.get_pending_count() == 0
+    failed = sched._conn.execute("SELECT final_reason FROM history WHERE status = 'failed'").fetchall()
+    assert [r[0] for r in failed] == ["Failed after 3 retry attempts"]
+
+
+def test_success_without_completion_does_not_spin(sched):
+    _ready(sched, ("v1", 1, "a"))
+    calls = []
+    assert sched.drain_ready_uploads(lambda e: calls.append(e) or True, worker="me") == 1
+    assert len(calls) == 1
+    # Lease dropped, so the next pass can see it again
+    assert len(sched.get_ready_uploads()) == 1
+
+
+def test_interrupt_releases_lease(sched):
+    _ready(sched, ("v1", 1, "a"))
+
+    def interrupted(entry):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        sched.drain_ready_uploads(interrupted, worker="me")
+    row = _row(sched, "v1", 1, "a")
+    assert row["retry_count"] == 0
+    assert len(sched.get_ready_uploads()) == 1
+
+
+def test_lease_covers_one_attempt(sched):
+    _ready(sched, ("v1", 1, "a"), ("v1", 2, "a"))
+    leases = []
+
+    def attempt(entry):
+        leases.append(sched._conn.execute(
+            "SELECT COUNT(*) FROM pending WHERE lease_owner IS NOT NULL").fetchone()[0])
+        sched.mark_upload_completed(entry["vod_id"], entry["arc_index"], entry["channel"])
+        return True
+
+    sched.drain_ready_uploads(attempt, lease_seconds=60, worker="me")
+    assert leases == [1, 1]
+
+
+def test_context_manager_closes(tmp_path):
+    with UploadScheduler(db_path=str(tmp_path / "q.db"), json_file=str(tmp_path / "none.json")) as s:
+        s.get_pending_count()
+    with pytest.raises(sqlite3.ProgrammingError):
+        s.get_pending_count()
@@ -0,0 +1,186 @@
+"""UploadPipeline against a fake YouTube uploader: quota accounting, resume, failure reasons."""
+
+import json
+import os
+
+import pytest
+
+from utils.upload_scheduler import is_quota_exceeded_error
+from youtube_upload_pipeline import QUOTA_COST, QuotaLedger, UploadJob, UploadPipeline
+
+INSERT = QUOTA_COST["videos.insert"]
+
+
+class FakeHttpError(Exception):
+    """Shaped like googleapiclient.errors.HttpError: resp.status plus a JSON body in content."""
+
+    def __init__(self, status, reason, message):
+        super().__init__(f"<HttpError {status} returned \"{message}\">")
+        self.resp = type("Resp", (), {"status": status})()
+        self.content = json.dumps({"error": {"code": status, "message": message,
+                                             "errors": [{"reason": reason, "message": message}]}}).encode()
+
+
+class FakeServer:
+    """Scripted per-job behaviour; records every upload call."""
+
+    def __init__(self):
+        self.calls = []
+        self.script = {}  # job key -> callable(session_file) returning a video id or raising
+        self.thumbnail_ok = True
+
+    def run(self, session_file):
+        key = session_file.rsplit("/", 1)[-1][:-len(".json")]
+        self.calls.append(key)
+        return self.script.get(key, lambda sf: f"vid-{key}")(session_file)
+
+
+class FakeUploader:
+    def __init__(self, server):
+        self.server = server
+        self.service = object()
+        self.last_error = None
+
+    def clone(self):
+        return type(self)(self.server)
+
+    def upload_video(self, video_path, metadata, *, session_file=None, limiter=None):
+        return self.server.run(session_file)
+
+    def set_thumbnail(self, video_id, thumbnail_path):
+        return self.server.thumbnail_ok
+
+
+@pytest.fixture
+def env(tmp_path):
+    server = FakeServer()
+    ledger = QuotaLedger(path=str(tmp_path / "quota.json"), daily_units=10000)
+    pipeline = UploadPipeline({"main": FakeUploader(server)}, sessions=2, quota=ledger)
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"x")
+
+    def job(key, channel="main", **kw):
+        return UploadJob(key=key, channel=channel, video_path=video, metadata={},
+                         session_dir=tmp_path / "sessions", **kw)
+
+    yield server, ledger, pipeline, job
+    pipeline.close()
+
+
+def test_success_charges_insert(env):
+    server, ledger, pipeline, job = env
+    out = pipeline.submit(job("a")).result()
+    assert out.ok and out.video_id == "vid-a"
+    assert ledger.used("main") == INSERT
+
+
+def test_api_quota_error_exhausts_channel(env):
+    server, ledger, pipeline, job = env
+    # The real API message does not contain the phrase "quota exceeded"
+    msg = "The request cannot be completed because you have exceeded your quota."
+
+    def quota(sf):
+        raise FakeHttpError(403, "quotaExceeded", msg)
+
+    server.script["a"] = quota
+    out = pipeline.submit(job("a")).result()
+    assert out.error_type == "quota_exceeded"
+    assert ledger.remaining("main") == 0
+    # Later jobs for the channel are not started
+    assert pipeline.submit(job("b")).result().error_type == "quota_exceeded"
+    assert server.calls == ["a"]
+
+
+def test_failure_without_session_refunds(env):
+    server, ledger, pipeline, job = env
+
+    def rejected(sf):
+        raise FakeHttpError(400, "invalidTitle", "Invalid video title")
+
+    server.script["a"] = rejected
+    out = pipeline.submit(job("a")).result()
+    assert out.error_type == "permanent"
+    assert ledger.used("main") == 0
+
+
+def test_failure_with_session_keeps_charge_and_resume_is_free(env, tmp_path):
+    server, ledger, pipeline, job = env
+
+    def partial(sf):
+        # Upload got half way: the session file stays for the next run
+        with open(sf, "w") as f:
+            json.dump({"resumable_uri": "https://upload/x", "file_size": 1, "uploaded_bytes": 0}, f)
+        raise TimeoutError("network timeout")
+
+    server.script["a"] = partial
+    out = pipeline.submit(job("a")).result()
+    assert out.error_type == "retriable"
+    assert ledger.used("main") == INSERT
+
+    def finish(sf):
+        os.remove(sf)
+        return "vid-resumed"
+
+    server.script["a"] = finish
+    out = pipeline.submit(job("a")).result()
+    assert out.video_id == "vid-resumed"
+    assert ledger.used("main") == INSERT  # resumed session not charged twice
+
+
+def test_none_result_reports_uploader_reason(env):
+    server, ledger, pipeline, job = env
+
+    class StalledUploader(FakeUploader):
+        def upload_video(self, *a, **kw):
+            self.last_error = "Upload stalled - no progress for 20 minutes"
+            return None
+
+    pipeline.uploaders["slow"] = StalledUploader(server)
+    out = pipeline.submit(job("a", channel="slow")).result()
+    assert out.error_type == "retriable"
+    assert "stalled" in out.error
+    assert ledger.used("slow") == 0
+
+
+def test_thumbnail_failure_refunds(env, tmp_path):
+    server, ledger, pipeline, job = env
+    thumb = tmp_path / "thumb.jpg"
+    thumb.write_bytes(b"j")
+    server.thumbnail_ok = False
+    seen = []
+    out = pipeline.submit(job("a", thumbnail_path=thumb, on_uploaded=lambda j, v: seen.append(v))).result()
+    assert out.ok and seen == ["vid-a"]
+    assert ledger.used("main") == INSERT
+
+
+def test_unauthenticated_channel_is_not_charged(env):
+    server, ledger, pipeline, job = env
+    out = pipeline.submit(job("a", channel="missing")).result()
+    assert out.error_type == "auth"
+    assert ledger.used("missing") == 0
+
+
+def test_quota_error_strings():
+    assert is_quota_exceeded_error("<HttpError 403 ... Details: \"[{'reason': 'quotaExceeded'}]\">")
+    assert is_quota_exceeded_error("you have exceeded your quota")
+    assert not is_quota_exceeded_error("Invalid video title")
+
+
+def _reserve_many(path, n):
+    ledger = QuotaLedger(path=path, daily_units=10000)
+    for _ in range(n):
+        assert ledger.reserve("main", 1)
+
+
+def test_ledger_charges_from_several_processes_all_land(tmp_path):
+    import multiprocessing
+
+    path = str(tmp_path / "quota.json")
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_reserve_many, args=(path, 25)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+    assert QuotaLedger(path=path, daily_units=10000).used("main") == 100
@@ -13,6 +13,19 @@ Scoring:
   Bonuses:
   - Size bonus: +0.2 * (area / 720^2)
 
+Pre-gate (cheap numpy checks, run before FER/MediaPipe):
+  - Dark frames (mean luma < CAM_GATE_MIN_BRIGHTNESS)
+  - Very blurry frames (Laplacian var < CAM_GATE_MIN_BLUR)
+  - Faceless frames (skin-tone pixel fraction < CAM_GATE_MIN_SKIN)
+  Rejected frames skip FER/Face Mesh and are scored as frames in which no
+  face was found (no emotion, no_mp_face), tagged with the gate reason.
+
+Each image is decoded once; misses are gated and rated in-process or across
+a process pool (CAM_RATE_WORKERS) whose workers load FER and Face Mesh once
+and close Face Mesh on exit. Scores are cached by image content hash in
+data/thumbnails/<vod_id>/cams_score_cache.json, so re-rating a directory only
+pays for new crops.
+
 Outputs:
   - JSON: data/thumbnails/<vod_id>/cams_index.json
   - CSV:  data/thumbnails/<vod_id>/cams_index.csv
@@ -22,9 +35,12 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
 import json
 import os
 import math
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 
@@ -46,16 +62,12 @@ def _try_import_mediapipe():
     except ImportError:
         return None
 
-def _load_image(path: Path):
-    """Robust Unicode-safe image loader using imdecode."""
+def _decode_image(data: bytes):
+    """Decode image bytes with imdecode (Unicode-safe: the caller reads the file)."""
     try:
         import cv2
         import numpy as np
-        with open(path, 'rb') as f:
-            data = f.read()
-        arr = np.frombuffer(data, dtype=np.uint8)
-        img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-        return img
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
     except Exception:
         return None
 
@@ -214,59 +226,256 @@ def _parse_rel_ms(name: str) -> Optional[int]:
             return None
     return None
 
+# -----------------------------------------------------------------------------
+# Pre-gate (cheap numpy checks)
+# -----------------------------------------------------------------------------
+
+CACHE_VERSION = 2
+
+
+def _gate_thresholds() -> Dict[str, float]:
+    return {
+        "min_brightness": float(os.getenv("CAM_GATE_MIN_BRIGHTNESS", "30")),
+        "min_blur": float(os.getenv("CAM_GATE_MIN_BLUR", "15")),
+        "min_skin": float(os.getenv("CAM_GATE_MIN_SKIN", "0.01")),
+    }
+
+
+def _skin_fraction(img) -> float:
+    """
+    Fraction of skin-toned pixels (YCrCb box) on a 4x-decimated copy.
+    Cheap stand-in for "is there a face at all".
+    """
+    import numpy as np
+    small = img[::4, ::4].astype(np.float32)
+    if small.size == 0:
+        return 0.0
+    b, g, r = small[..., 0], small[..., 1], small[..., 2]
+    y = 0.299 * r + 0.587 * g + 0.114 * b
+    cr = (r - y) * 0.713 + 128.0
+    cb = (b - y) * 0.564 + 128.0
+    mask = (cr >= 133.0) & (cr <= 173.0) & (cb >= 77.0) & (cb <= 127.0)
+    return float(mask.mean())
+
+
+def _pregate(img, blur: float, thresholds: Dict[str, float]) -> List[str]:
+    """
+    Return gate rejection reasons (empty list = survivor).
+    """
+    import numpy as np
+    reasons: List[str] = []
+    brightness = float(np.mean(img[::4, ::4]))
+    if brightness < thresholds["min_brightness"]:
+        reasons.append("gate_dark")
+    if blur < thresholds["min_blur"]:
+        reasons.append("gate_blurry")
+    if thresholds["min_skin"] > 0 and _skin_fraction(img) < thresholds["min_skin"]:
+        reasons.append("gate_no_face")
+    return reasons
+
+
+# -----------------------------------------------------------------------------
+# Score cache (keyed by image content hash)
+# -----------------------------------------------------------------------------
+
+_CACHED_FIELDS = ("score", "happy", "surprise", "neutral", "ear", "blur", "penalties", "size_bonus", "width", "height")
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _cache_key(content_hash: str, thresholds: Dict[str, float]) -> str:
+    # Gate thresholds change the stored score, so they are part of the key
+    tag = ",".join(f"{thresholds[k]:g}" for k in sorted(thresholds))
+    return f"v{CACHE_VERSION}:{tag}:{content_hash}"
+
+
+def _load_score_cache(path: Path) -> Dict[str, Dict]:
+    try:
+        obj = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(obj, dict) and isinstance(obj.get("entries"), dict):
+            return obj["entries"]
+    except Exception:
+        pass
+    return {}
+
+
+def _save_score_cache(path: Path, entries: Dict[str, Dict]) -> None:
+    try:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": CACHE_VERSION, "entries": entries}), encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"Warning: could not write score cache {path}: {e}")
+
+
+# -----------------------------------------------------------------------------
+# Rating (in-process or warm worker pool)
+# -----------------------------------------------------------------------------
+
+_WORKER_MODELS: Dict[str, Any] = {}
+
+
+def _init_models() -> None:
+    """Load FER + Face Mesh once per process (closed again when the process exits)."""
+    if _WORKER_MODELS:
+        return
+    FER_cls = _try_import_fer()
+    mp = _try_import_mediapipe()
+    _WORKER_MODELS["fer"] = FER_cls(mtcnn=False)
+    _WORKER_MODELS["mesh"] = mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=True,
+        max_num_faces=1,
+        refine_landmarks=True,
+        min_detection_confidence=0.5
+    )
+    # Runs at exit in the main process and in pool workers (which skip plain atexit)
+    multiprocessing.util.Finalize(None, _close_models, exitpriority=10)
+
+
+def _close_models() -> None:
+    mesh = _WORKER_MODELS.pop("mesh", None)
+    _WORKER_MODELS.clear()
+    if mesh is not None:
+        try:
+            mesh.close()
+        except Exception:
+            pass
+
+
+def _score_fields(img, emos: Dict[str, float], quality: Dict[str, Any], blur: float, extra_penalties: List[str]) -> Dict[str, Any]:
+    size_b = _size_bonus(img)
+    score, penalties = _calculate_score(emos, quality, blur, size_b)
+    if extra_penalties:
+        penalties = penalties + extra_penalties
+    h, w = img.shape[:2]
+    return {
+        "score": round(float(score), 6),
+        "happy": round(float(emos.get('happy', 0.0)), 6),
+        "surprise": round(float(emos.get('surprise', 0.0)), 6),
+        "neutral": round(float(emos.get('neutral', 0.0)), 6),
+        "ear": round(float(quality.get("avg_ear", 0.0)), 4),
+        "blur": round(float(blur), 2),
+        "penalties": ",".join(penalties),
+        "size_bonus": round(float(size_b), 6),
+        "width": int(w),
+        "height": int(h),
+    }
+
+
+def _rate_image(data: bytes, thresholds: Dict[str, float], fer_detector=None,
+                mp_face_mesh=None) -> Optional[Tuple[Dict[str, Any], bool]]:
+    """
+    Decode, pre-gate and (for survivors) run the expensive models on one image.
+
+    Returns (fields, gated), or None if the bytes do not decode. Falls back to
+    the per-process warm models when detectors are not given.
+    """
+    img = _decode_image(data)
+    if img is None:
+        return None
+    blur = _calculate_blur(img)
+    gate = _pregate(img, blur, thresholds)
+    if gate:
+        # Not shown to the models: scored like a frame in which no face was found
+        no_emos = {k: 0.0 for k in ['happy', 'surprise', 'neutral']}
+        return _score_fields(img, no_emos, {"has_face": False}, blur, gate), True
+    if fer_detector is None or mp_face_mesh is None:
+        _init_models()
+        fer_detector = _WORKER_MODELS["fer"]
+        mp_face_mesh = _WORKER_MODELS["mesh"]
+    emos = _analyze_emotion(fer_detector, img)
+    quality = _analyze_face_quality(mp_face_mesh, img)
+    return _score_fields(img, emos, quality, blur, []), False
+
+
+def _default_workers() -> int:
+    try:
+        return max(1, int(os.getenv("CAM_RATE_WORKERS", "0")) or min(4, os.cpu_count() or 1))
+    except ValueError:
+        return 1
+
+
 # -----------------------------------------------------------------------------
 # Main Processing
 # -----------------------------------------------------------------------------
 
-def _rate_directory(vod_id: str, cams_dir: Path, fer_detector, mp_face_mesh) -> List[Dict]:
-    rows: List[Dict] = []
-    
-    # Pre-check files
+def _rate_directory(
+    vod_id: str,
+    cams_dir: Path,
+    fer_detector=None,
+    mp_face_mesh=None,
+    cache: Optional[Dict[str, Dict]] = None,
+    workers: int = 1,
+) -> List[Dict]:
+    """
+    Rate every JPG in cams_dir.
+
+    Pass 1 reads and hashes every image; cache hits stop there. Pass 2 decodes
+    each miss once, pre-gates it and rates survivors, in-process when detectors
+    are given or workers <= 1, otherwise across a pool of warm worker processes.
+    """
     files = sorted(list(cams_dir.glob("*.jpg")))
     print(f"Rating {len(files)} images in {cams_dir}...")
-    
-    for i, p in enumerate(files):
-        img = _load_image(p)
-        if img is None:
+    thresholds = _gate_thresholds()
+    cache = cache if cache is not None else {}
+
+    fields_by_path: Dict[str, Dict[str, Any]] = {}
+    pending: List[Tuple[str, str, bytes]] = []  # (path, cache_key, image bytes)
+    hits = 0
+
+    for p in files:
+        try:
+            data = p.read_bytes()
+        except Exception:
             continue
-            
-        # 1. Emotion (FER)
-        emos = _analyze_emotion(fer_detector, img)
-        
-        # 2. Quality (MediaPipe)
-        quality = _analyze_face_quality(mp_face_mesh, img)
-        
-        # 3. Blur
-        blur = _calculate_blur(img)
-        
-        # 4. Size
-        size_b = _size_bonus(img)
-        
-        # 5. Final Score
-        score, penalties = _calculate_score(emos, quality, blur, size_b)
-        
-        h, w = img.shape[:2]
-        rows.append({
-            "vod_id": vod_id,
-            "path": str(p),
-            "filename": p.name,
-            "score": round(float(score), 6),
-            "happy": round(float(emos.get('happy', 0.0)), 6),
-            "surprise": round(float(emos.get('surprise', 0.0)), 6),
-            "neutral": round(float(emos.get('neutral', 0.0)), 6),
-            "ear": round(float(quality.get("avg_ear", 0.0)), 4),
-            "blur": round(float(blur), 2),
-            "penalties": ",".join(penalties),
-            "size_bonus": round(float(size_b), 6),
-            "width": int(w),
-            "height": int(h),
-            "rel_ms": _parse_rel_ms(p.name),
-        })
-        
-        if i % 10 == 0:
-            print(f"Processed {i}/{len(files)}...", end="\r")
-            
-    print(f"Processed {len(files)}/{len(files)} done.")
+        key = _cache_key(_content_hash(data), thresholds)
+        cached = cache.get(key)
+        if cached is not None:
+            fields_by_path[str(p)] = dict(cached)
+            hits += 1
+            continue
+        pending.append((str(p), key, data))
+
+    print(f"  cache hits: {hits}, to rate: {len(pending)}")
+    rejected = 0
+
+    def _store(item: Tuple[str, str, bytes], result: Optional[Tuple[Dict[str, Any], bool]]) -> None:
+        nonlocal rejected
+        if result is None:
+            return
+        fields, gated = result
+        rejected += int(gated)
+        fields_by_path[item[0]] = fields
+        cache[item[1]] = fields
+
+    in_process = (fer_detector is not None and mp_face_mesh is not None) or workers <= 1 or len(pending) < 2
+    if in_process:
+        for i, item in enumerate(pending):
+            _store(item, _rate_image(item[2], thresholds, fer_detector, mp_face_mesh))
+            if i % 10 == 0:
+                print(f"Processed {i}/{len(pending)}...", end="\r")
+    else:
+        n = min(workers, len(pending))
+        with ProcessPoolExecutor(max_workers=n, initializer=_init_models) as pool:
+            results = pool.map(_rate_image, [it[2] for it in pending], [thresholds] * len(pending), chunksize=4)
+            for i, (item, result) in enumerate(zip(pending, results)):
+                _store(item, result)
+                if i % 10 == 0:
+                    print(f"Processed {i}/{len(pending)}...", end="\r")
+
+    print(f"Processed {len(files)}/{len(files)} done (gate rejects: {rejected}).")
+
+    rows: List[Dict] = []
+    for p in files:
+        fields = fields_by_path.get(str(p))
+        if fields is None:
+            continue
+        row = {"vod_id": vod_id, "path": str(p), "filename": p.name}
+        row.update({k: fields.get(k) for k in _CACHED_FIELDS})
+        row["rel_ms"] = _parse_rel_ms(p.name)
+        rows.append(row)
     rows.sort(key=lambda r: r["score"], reverse=True)
     return rows
 
@@ -276,38 +485,33 @@ def main() -> None:
     parser.add_argument("--dir", dest="cams_dir", default=None, help="Directory of cam JPGs")
     parser.add_argument("--top-k", type=int, default=12)
     parser.add_argument("--copy", action="store_true", help="Copy top-K to data/thumbnails/<vod_id>/best")
+    parser.add_argument("--workers", type=int, default=_default_workers(), help="Rating worker processes (env CAM_RATE_WORKERS)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the score cache")
     args = parser.parse_args()
 
     vod_id = str(args.vod_id)
     
-    # Init FER
-    FER_cls = _try_import_fer()
-    if FER_cls is None:
+    # Check FER
+    if _try_import_fer() is None:
         print("FER library not found. Install with: pip install fer")
         return
-    fer_detector = FER_cls(mtcnn=False)
     
-    # Init MediaPipe
-    mp = _try_import_mediapipe()
-    if mp is None:
+    # Check MediaPipe
+    if _try_import_mediapipe() is None:
         print("MediaPipe not found. Install with: pip install mediapipe")
         return
-    
-    mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
-        static_image_mode=True,
-        max_num_faces=1,
-        refine_landmarks=True,
-        min_detection_confidence=0.5
-    )
 
     out_dir = Path(f"data/thumbnails/{vod_id}")
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    cache_path = out_dir / "cams_score_cache.json"
+    cache: Dict[str, Dict] = {} if args.no_cache else _load_score_cache(cache_path)
+
     def process_dir(target_dir: Path, name_suffix: str = ""):
         if not target_dir.exists():
             return False
             
-        rows = _rate_directory(vod_id, target_dir, fer_detector, mp_face_mesh)
+        rows = _rate_directory(vod_id, target_dir, cache=cache, workers=args.workers)
         
         prefix = "jc_" if "jc" in name_suffix else ""
         json_path = out_dir / f"{prefix}cams_index.json"
@@ -351,7 +555,8 @@ def main() -> None:
         if processed == 0:
             print("No cam directories found.")
 
-    mp_face_mesh.close()
+    if not args.no_cache:
+        _save_score_cache(cache_path, cache)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Batch S3 transfers for StorageManager.
+
+Runs many object uploads/downloads concurrently on one thread pool instead of
+one blocking call per file, so syncing hundreds of small clips, thumbnails
+and JSON files is no longer dominated by per-request latency.
+
+- Part size adapts to the object size (single PUT below the multipart
+  threshold, larger parts for larger files so big uploads stay well under
+  the 10,000-part limit) and large files get a few parallel part threads.
+- Unchanged files are skipped: the local SHA-256 is compared with the
+  `file-hash` metadata stamped on upload, falling back to the object ETag
+  (plain MD5, or the multipart MD5-of-MD5s for the part size we would use).
+- Every transfer yields an outcome (uploaded/downloaded/skipped/failed,
+  bytes, seconds) and the batch reports aggregate throughput.
+
+storage.StorageManager gets upload_batch, download_batch and upload_directory
+from BatchStorageMixin. Each manager keeps one BatchTransfer per worker
+count, and that BatchTransfer keeps one thread pool for its lifetime.
+
+Environment:
+  S3_TRANSFER_WORKERS            concurrent object transfers (default 16)
+  S3_TRANSFER_PART_CONCURRENCY   part threads per large object (default 4)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+MULTIPART_THRESHOLD = 8 * MB
+MIN_PART_SIZE = 8 * MB
+MAX_PARTS = 1000  # well below S3's 10,000 so part count stays small on long VODs
+HASH_METADATA_KEY = "file-hash"
+_READ_BLOCK = 4 * MB
+
+
+def part_size_for(size: int) -> int:
+    """Adaptive multipart chunk size: 8MB minimum, grown in whole MB to keep <= MAX_PARTS parts."""
+    if size <= MIN_PART_SIZE * MAX_PARTS:
+        return MIN_PART_SIZE
+    return int(math.ceil(size / MAX_PARTS / MB)) * MB
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _md5_hex(path: Path) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _multipart_etag(path: Path, part_size: int) -> str:
+    """ETag S3 reports for a multipart upload of this file with part_size parts."""
+    digests = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(part_size), b""):
+            digests.append(hashlib.md5(chunk).digest())
+    return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+def local_matches_remote(path: Path, head: Dict, sha256: Optional[str] = None) -> bool:
+    """True if the local file has the same content as the object described by a HEAD response."""
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return False
+    if int(head.get("ContentLength", -1)) != size:
+        return False
+    remote_hash = (head.get("Metadata") or {}).get(HASH_METADATA_KEY)
+    if remote_hash:
+        return (sha256 or file_sha256(path)) == remote_hash
+    etag = str(head.get("ETag", "")).strip('"')
+    if not etag:
+        return False
+    if "-" not in etag:
+        return _md5_hex(path) == etag
+    # Multipart: try our adaptive part size and the common 8MB default
+    for ps in dict.fromkeys((part_size_for(size), MIN_PART_SIZE)):
+        if _multipart_etag(path, ps) == etag:
+            return True
+    return False
+
+
+@dataclass
+class TransferOutcome:
+    """Result of one object transfer."""
+    source: str
+    destination: str
+    status: str  # uploaded | downloaded | copied | skipped | failed
+    bytes: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchReport:
+    """Per-file outcomes plus aggregate throughput for one batch."""
+    outcomes: List[TransferOutcome] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def bytes_transferred(self) -> int:
+        return sum(o.bytes for o in self.outcomes if o.status not in ("skipped", "failed"))
+
+    @property
+    def throughput_mbps(self) -> float:
+        """Megabits per second over the batch wall time (skipped files excluded)."""
+        return (self.bytes_transferred * 8 / 1e6) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for o in self.outcomes if o.status == status)
+
+    @property
+    def failed(self) -> List[TransferOutcome]:
+        return [o for o in self.outcomes if o.status == "failed"]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def summary(self) -> str:
+        moved = len(self.outcomes) - self.count("skipped") - self.count("failed")
+        return (
+            f"{moved} transferred, {self.count('skipped')} skipped, {self.count('failed')} failed; "
+            f"{self.bytes_transferred / MB:.1f} MB in {self.elapsed:.1f}s ({self.throughput_mbps:.1f} Mbps)"
+        )
+
+
+def pooled_client(client, connections: int):
+    """client itself if its connection pool is big enough, else a twin with a larger pool.
+
+    The twin keeps the original's config (retries, signature, timeouts), region
+    and endpoint; only max_pool_connections changes.
+    """
+    if client is None:
+        return None
+    config = client.meta.config
+    if (config.max_pool_connections or 10) >= connections:
+        return client
+    try:
+        import boto3
+        from botocore.config import Config
+        return boto3.client(
+            "s3",
+            region_name=client.meta.region_name,
+            endpoint_url=client.meta.endpoint_url,
+            config=config.merge(Config(max_pool_connections=connections)),
+        )
+    except Exception as e:
+        logger.warning(f"Could not resize S3 connection pool; using the shared client: {e}")
+        return client
+
+
+class BatchTransfer:
+    """Concurrent uploads/downloads against one S3 client, on one long-lived thread pool."""
+
+    def __init__(self, s3_client, parse_uri: Callable[[str], Tuple[str, str]],
+                 content_type: Callable[[str], str], max_workers: Optional[int] = None):
+        self.s3 = s3_client
+        self.parse_uri = parse_uri
+        self.content_type = content_type
+        self.max_workers = max(1, int(max_workers or os.getenv("S3_TRANSFER_WORKERS", "16")))
+        self.part_concurrency = max(1, int(os.getenv("S3_TRANSFER_PART_CONCURRENCY", "4")))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="s3-batch")
+            return self._executor
+
+    def close(self) -> None:
+        """Shut the thread pool down; a later batch starts a new one."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> "BatchTransfer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _config(self, size: int):
+        from boto3.s3.transfer import TransferConfig
+        large = size >= MULTIPART_THRESHOLD
+        return TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=part_size_for(size),
+            max_concurrency=self.part_concurrency if large else 1,
+            use_threads=large,
+        )
+
+    def _head(self, bucket: str, key: str) -> Optional[Dict]:
+        try:
+            return self.s3.head_object(Bucket=bucket, Key=key)
+        except Exception:
+            return None
+
+    def _upload_one(self, local_path: str, uri: str, skip_unchanged: bool, extra_args: Optional[Dict]) -> TransferOutcome:
+        t0 = time.monotonic()
+        path = Path(local_path)
+        try:
+            size = path.stat().st_size
+            if not uri.startswith("s3://"):
+                dst = Path(uri)
+                if skip_unchanged and dst.exists() and dst.stat().st_size == size and file_sha256(dst) == file_sha256(path):
+                    return TransferOutcome(local_path, uri, "skipped", size, time.monotonic() - t0)
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(path, dst)
+                return TransferOutcome(local_path, uri, "copied", size, time.monotonic() - t0)
+
+            bucket, key = self.parse_uri(uri)
+            from utils.fingerprint import file_fingerprint
+            sha = file_fingerprint(path) or file_sha256(path)
+            if skip_unchanged:
+                head = self._head(bucket, key)
+                if head is not None and local_matches_remote(path, head, sha):
+                    return TransferOutcome(local_path, uri, "skipped", size, time.monotonic() - t0)
+            args = {"ContentType": self.content_type(uri), "Metadata": {HASH_METADATA_KEY: sha}}
+            if extra_args:
+                args.update(extra_args)
+            self.s3.upload_file(str(path), bucket, key, ExtraArgs=args, Config=self._config(size))
+            return TransferOutcome(local_path, uri, "uploaded", size, time.monotonic() - t0)
+        except Exception as e:
+            return TransferOutcome(local_path, uri, "failed", 0, time.monotonic() - t0, str(e))
+
+    def _download_one(self, uri: str, local_path: str, skip_unchanged: bool) -> TransferOutcome:
+        t0 = time.monotonic()
+        path = Path(local_path)
+        try:
+            if not uri.startswith("s3://"):
+                src = Path(uri)
+                size = src.stat().st_size
+                if skip_unchanged and path.exists() and path.stat().st_size == size and file_sha256(src) == file_sha256(path):
+                    return TransferOutcome(uri, local_path, "skipped", size, time.monotonic() - t0)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(src, path)
+                return TransferOutcome(uri, local_path, "copied", size, time.monotonic() - t0)
+
+            bucket, key = self.parse_uri(uri)
+            head = self._head(bucket, key)
+            if head is None:
+                return TransferOutcome(uri, local_path, "failed", 0, time.monotonic() - t0, "object not found")
+            size = int(head.get("ContentLength", 0))
+            if skip_unchanged and path.exists() and local_matches_remote(path, head):
+                return TransferOutcome(uri, local_path, "skipped", size, time.monotonic() - t0)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Download beside the target and rename so readers never see a partial file
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.part")
+            try:
+                self.s3.download_file(bucket, key, str(tmp), Config=self._config(size))
+                os.replace(tmp, path)
+            finally:
+                try:
+                    tmp.unlink()
+                except FileNotFoundError:
+                    pass
+            return TransferOutcome(uri, local_path, "downloaded", size, time.monotonic() - t0)
+        except Exception as e:
+            return TransferOutcome(uri, local_path, "failed", 0, time.monotonic() - t0, str(e))
+
+    def _run(self, jobs: List[Callable[[], TransferOutcome]], label: str) -> BatchReport:
+        report = BatchReport()
+        if not jobs:
+            return report
+        t0 = time.monotonic()
+        pool = self._pool()
+        futures = [pool.submit(job) for job in jobs]
+        for fut in as_completed(futures):
+            outcome = fut.result()
+            report.outcomes.append(outcome)
+            if outcome.status == "failed":
+                logger.warning(f"{label} failed: {outcome.source} -> {outcome.destination}: {outcome.error}")
+        report.elapsed = time.monotonic() - t0
+        logger.info(f"Batch {label}: {report.summary()}")
+        return report
+
+    def upload(self, pairs: Iterable[Tuple[str, str]], skip_unchanged: bool = True,
+               extra_args: Optional[Dict] = None) -> BatchReport:
+        jobs = [
+            (lambda s=str(src), d=str(dst): self._upload_one(s, d, skip_unchanged, extra_args))
+            for src, dst in pairs
+        ]
+        return self._run(jobs, "upload")
+
+    def download(self, pairs: Iterable[Tuple[str, str]], skip_unchanged: bool = True) -> BatchReport:
+        jobs = [
+            (lambda s=str(src), d=str(dst): self._download_one(s, d, skip_unchanged))
+            for src, dst in pairs
+        ]
+        return self._run(jobs, "download")
+
+
+class BatchStorageMixin:
+    """
+    Batch methods for StorageManager.
+
+    The host class provides s3_client, _is_s3_uri, _parse_s3_uri and
+    _get_content_type, and sets _batch_error to its StorageError.
+    """
+
+    _batch_error = RuntimeError
+
+    def _batch(self, max_workers: Optional[int] = None) -> BatchTransfer:
+        """BatchTransfer (cached per worker count) on a client whose pool fits the worker count."""
+        workers = max(1, int(max_workers or os.getenv("S3_TRANSFER_WORKERS", "16")))
+        lock = self.__dict__.setdefault("_batch_lock", threading.Lock())
+        with lock:
+            batches: Dict[int, BatchTransfer] = self.__dict__.setdefault("_batches", {})
+            batch = batches.get(workers)
+            if batch is None or (batch.s3 is None and self.s3_client is not None):
+                part_threads = max(1, int(os.getenv("S3_TRANSFER_PART_CONCURRENCY", "4")))
+                client = pooled_client(self.s3_client, workers * part_threads)
+                batch = batches[workers] = BatchTransfer(client, self._parse_s3_uri, self._get_content_type,
+                                                         max_workers=workers)
+            return batch
+
+    def upload_batch(self, pairs, max_workers: Optional[int] = None, skip_unchanged: bool = True) -> BatchReport:
+        """
+        Upload many (local_path, uri) pairs concurrently.
+
+        Files whose content already matches the destination are skipped.
+        Returns a BatchReport with per-file outcomes and throughput; failures
+        are reported per file rather than raised.
+        """
+        pairs = list(pairs)
+        if any(self._is_s3_uri(str(dst)) for _, dst in pairs) and not self.s3_client:
+            raise self._batch_error("S3 client not available")
+        return self._batch(max_workers).upload(pairs, skip_unchanged=skip_unchanged)
+
+    def download_batch(self, pairs, max_workers: Optional[int] = None, skip_unchanged: bool = True) -> BatchReport:
+        """Download many (uri, local_path) pairs concurrently; see upload_batch."""
+        pairs = list(pairs)
+        if any(self._is_s3_uri(str(src)) for src, _ in pairs) and not self.s3_client:
+            raise self._batch_error("S3 client not available")
+        return self._batch(max_workers).download(pairs, skip_unchanged=skip_unchanged)
+
+    def upload_directory(self, local_dir: str, uri_prefix: str, pattern: str = "**/*",
+                         max_workers: Optional[int] = None, skip_unchanged: bool = True) -> BatchReport:
+        """Upload every file under local_dir matching pattern to uri_prefix, keeping relative paths."""
+        root = Path(local_dir)
+        prefix = uri_prefix.rstrip("/")
+        pairs = [
+            (str(p), f"{prefix}/{p.relative_to(root).as_posix()}")
+            for p in sorted(root.glob(pattern)) if p.is_file()
+        ]
+        return self.upload_batch(pairs, max_workers=max_workers, skip_unchanged=skip_unchanged)
+
+    def close_batches(self) -> None:
+        """Shut down the thread pools of every cached BatchTransfer."""
+        for batch in list(self.__dict__.get("_batches", {}).values()):
+            batch.close()
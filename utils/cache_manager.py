@@ -5,7 +5,6 @@ Handles caching logic to prevent redundant data generation
 """
 
 import json
-import hashlib
 import os
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -18,6 +17,12 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from storage import StorageManager
 from src.config import config
+try:
+    from utils.fingerprint import HASH_METADATA_KEY, default_store
+    from utils.batch_transfer import local_matches_remote
+except Exception:
+    from fingerprint import HASH_METADATA_KEY, default_store
+    from batch_transfer import local_matches_remote
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +39,10 @@ class CacheManager:
         # Cache metadata file
         self.metadata_file = self.cache_dir / "cache_metadata.json"
         self.metadata = self._load_metadata()
+        
+        # Local hashes are memoized on (size, mtime_ns, inode); S3 HEADs per instance
+        self.fingerprints = default_store()
+        self._head_memo: Dict[str, Dict] = {}
     
     def _load_metadata(self) -> Dict:
         """Load cache metadata from file"""
@@ -54,7 +63,7 @@ class CacheManager:
             logger.error(f"Failed to save cache metadata: {e}")
     
     def _get_file_hash(self, file_path: Path) -> Optional[str]:
-        """Calculate SHA256 hash of file"""
+        """SHA256 of file, reused while its (size, mtime_ns, inode) is unchanged"""
         try:
             if not file_path.exists():
                 return None
@@ -64,68 +73,69 @@ class CacheManager:
                 logger.warning(f"Skipping directory hash calculation: {file_path}")
                 return None
             
-            hash_sha256 = hashlib.sha256()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+            return self.fingerprints.sha256(file_path)
         except Exception as e:
             logger.error(f"Failed to calculate hash for {file_path}: {e}")
             return None
     
-    def _get_s3_file_hash(self, s3_uri: str) -> Optional[str]:
-        """Get file hash from S3 metadata or calculate it"""
-        if not s3_uri:
+    def _head_s3(self, s3_uri: str) -> Optional[Dict]:
+        """HEAD an S3 object once per manager; misses are not memoized"""
+        if s3_uri in self._head_memo:
+            return self._head_memo[s3_uri]
+        s3_client = self.storage.s3_client
+        if not s3_client:
             return None
-            
         try:
-            # Try to get hash from S3 metadata first
             bucket, key = self.storage._parse_s3_uri(s3_uri)
-            s3_client = self.storage.s3_client
-            
-            if s3_client:
-                response = s3_client.head_object(Bucket=bucket, Key=key)
-                metadata = response.get('Metadata', {})
-                if 'file-hash' in metadata:
-                    return metadata['file-hash']
-                
-                # If no hash in metadata, download and calculate
-                temp_file = self.cache_dir / f"temp_{Path(key).name}"
-                self.storage.download_file(s3_uri, str(temp_file))
-                file_hash = self._get_file_hash(temp_file)
-                temp_file.unlink()  # Clean up
-                return file_hash
-        except Exception as e:
-            logger.warning(f"Failed to get S3 file hash for {s3_uri}: {e}")
-        return None
+            head = s3_client.head_object(Bucket=bucket, Key=key)
+        except Exception:
+            return None
+        self._head_memo[s3_uri] = head
+        return head
+    
+    def _get_s3_file_hash(self, s3_uri: str) -> Optional[str]:
+        """Get file hash from S3 metadata with a single HEAD (never downloads)"""
+        if not s3_uri:
+            return None
+        
+        head = self._head_s3(s3_uri)
+        if head is None:
+            return None
+        metadata = head.get('Metadata') or {}
+        if HASH_METADATA_KEY in metadata:
+            return metadata[HASH_METADATA_KEY]
+        
+        # Unstamped object: use the local copy's hash if its content matches the ETag
+        local_equivalent = Path(f"data/{self._normalize_path_for_comparison(s3_uri)}")
+        local_hash = self.fingerprints.lookup(local_equivalent)
+        if local_hash and local_matches_remote(local_equivalent, head, local_hash):
+            return local_hash
+        
+        etag = str(head.get('ETag', '')).strip('"')
+        return f"etag:{etag}" if etag else None
     
     def _check_file_exists(self, file_path: Path, s3_uri: Optional[str] = None) -> bool:
-        """Check if file exists locally or in S3"""
-        # Check local file first
+        """Check if file exists locally or in S3 (at most one HEAD)"""
+        # Local checks first; they cost no request
         if file_path.exists():
             return True
         
-        # Check S3 if URI provided
-        if s3_uri and self.storage.exists(s3_uri):
-            return True
-        
-        # For local paths, also check equivalent S3 location
-        if not s3_uri and not file_path.is_absolute():
-            # Convert local path to S3 equivalent
-            s3_key = self._normalize_path_for_comparison(str(file_path))
-            s3_equivalent = f"s3://{os.getenv('S3_BUCKET', 'streamsniped-dev-videos')}/{s3_key}"
-            if self.storage.exists(s3_equivalent):
-                return True
-        
-        # For S3 paths, also check equivalent local location
         if s3_uri and s3_uri.startswith('s3://'):
             # Convert S3 path to local equivalent
             s3_key = self._normalize_path_for_comparison(s3_uri)
-            local_equivalent = Path(f"data/{s3_key}")
-            if local_equivalent.exists():
+            if Path(f"data/{s3_key}").exists():
                 return True
         
-        return False
+        if not s3_uri and not file_path.is_absolute():
+            # For local paths, check the equivalent S3 location
+            s3_key = self._normalize_path_for_comparison(str(file_path))
+            s3_uri = f"s3://{os.getenv('S3_BUCKET', 'streamsniped-dev-videos')}/{s3_key}"
+        
+        if not s3_uri:
+            return False
+        if s3_uri.startswith('s3://'):
+            return self._head_s3(s3_uri) is not None
+        return self.storage.exists(s3_uri)
     
     def _normalize_path_for_comparison(self, file_path: str) -> str:
         """Convert S3 and local paths to comparable format"""
@@ -155,11 +165,9 @@ class CacheManager:
         
         if s3_uri:
             try:
-                bucket, key = self.storage._parse_s3_uri(s3_uri)
-                s3_client = self.storage.s3_client
-                if s3_client:
-                    response = s3_client.head_object(Bucket=bucket, Key=key)
-                    return response['LastModified'].timestamp()
+                head = self._head_s3(s3_uri)
+                if head is not None:
+                    return head['LastModified'].timestamp()
             except Exception as e:
                 logger.warning(f"Failed to get S3 timestamp for {s3_uri}: {e}")
         
@@ -330,7 +338,12 @@ class CacheManager:
                     current_hash = self._get_file_hash(file_path) or self._get_s3_file_hash(s3_uri)
                     cached_hash = dep_hashes.get(dep_file)
                     
-                    if current_hash and cached_hash and current_hash != cached_hash:
+                    # ETag stand-ins are only comparable with other ETag stand-ins
+                    comparable = (
+                        current_hash and cached_hash
+                        and current_hash.startswith('etag:') == cached_hash.startswith('etag:')
+                    )
+                    if comparable and current_hash != cached_hash:
                         return False, f"Dependency changed: {dep_file}"
         
         return True, "All outputs exist and dependencies unchanged"
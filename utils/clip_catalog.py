@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Per-VOD catalog of rendered clip files.
+
+Uploads used to resolve every clip by walking data/clips/<vod> with rglob and
+substring-matching normalized titles, which is O(clips x files) and depends on
+filesystem ordering. ClipCatalog keeps data/clips/<vod>/.clip_catalog.json
+instead: one entry per processed clip (relative path, size, SHA-256, title,
+clip index), indexed by normalized title and by clip index.
+
+create_individual_clips records each clip as it is written. Lookups are
+dict hits verified against the file's current size; if the catalog is missing
+or stale it is rebuilt once from a sorted directory walk (temp_ files are
+never catalogued), so resolution is deterministic either way.
+
+Checksums come from utils.fingerprint, so rebuilding does not rehash files
+whose (size, mtime, inode) are unchanged.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["ClipCatalog", "CATALOG_FILENAME", "clip_file_stem", "normalize_clip_title"]
+
+CATALOG_FILENAME = ".clip_catalog.json"
+
+
+def clip_file_stem(title: str) -> str:
+    """Filename stem used for a clip title (same rule as create_individual_clips)."""
+    safe = "".join(c for c in title if c.isalnum() or c in (" ", "_", "-")).rstrip()
+    return safe.replace(" ", "_")
+
+
+def normalize_clip_title(title: str) -> str:
+    """Lookup key for a clip title or file stem: hashtag suffix dropped, filename-safe, lowercased."""
+    if "#" in title:
+        title = title.split("#", 1)[0].strip()
+    return clip_file_stem(title).lower()
+
+
+def _clips_root(vod_id: str) -> Path:
+    return Path(f"data/clips/{vod_id}")
+
+
+class ClipCatalog:
+    """Thread-safe title/index -> clip file map for one VOD, persisted as JSON."""
+
+    def __init__(self, vod_id: str, clips_dir: Optional[Union[str, Path]] = None):
+        self.vod_id = vod_id
+        self.clips_dir = Path(clips_dir) if clips_dir is not None else _clips_root(vod_id)
+        self.path = self.clips_dir / CATALOG_FILENAME
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}  # relative path -> entry
+        self._by_key: Dict[str, str] = {}
+        self._by_index: Dict[int, str] = {}
+        self.rebuilt = False
+
+    @classmethod
+    def load(cls, vod_id: str, clips_dir: Optional[Union[str, Path]] = None) -> "ClipCatalog":
+        catalog = cls(vod_id, clips_dir)
+        try:
+            obj = json.loads(catalog.path.read_text(encoding="utf-8"))
+            entries = obj.get("clips", []) if isinstance(obj, dict) else []
+        except Exception:
+            entries = []
+        for entry in entries:
+            if isinstance(entry, dict) and entry.get("path"):
+                catalog._put(entry)
+        return catalog
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---- index maintenance (caller holds the lock) ----
+
+    def _put(self, entry: Dict) -> None:
+        rel = entry["path"]
+        old = self._entries.get(rel)
+        if old is not None:
+            self._unindex(rel, old)
+        self._entries[rel] = entry
+        key = entry.get("key")
+        # Same title twice: keep the lexicographically first path so lookups don't depend on write order
+        if key and (key not in self._by_key or rel < self._by_key[key]):
+            self._by_key[key] = rel
+        idx = entry.get("clip_index")
+        if isinstance(idx, int):
+            self._by_index[idx] = rel
+
+    def _unindex(self, rel: str, entry: Dict) -> None:
+        key = entry.get("key")
+        if key and self._by_key.get(key) == rel:
+            del self._by_key[key]
+            others = sorted(r for r, e in self._entries.items() if r != rel and e.get("key") == key)
+            if others:
+                self._by_key[key] = others[0]
+        idx = entry.get("clip_index")
+        if isinstance(idx, int) and self._by_index.get(idx) == rel:
+            del self._by_index[idx]
+
+    def _entry_for(self, file_path: Path, title: Optional[str], clip_index: Optional[int]) -> Optional[Dict]:
+        from utils.fingerprint import file_fingerprint
+
+        try:
+            st = file_path.stat()
+        except OSError:
+            return None
+        return {
+            "path": file_path.relative_to(self.clips_dir).as_posix(),
+            "key": normalize_clip_title(title if title else file_path.stem),
+            "title": title or "",
+            "clip_index": clip_index,
+            "size": int(st.st_size),
+            "sha256": file_fingerprint(file_path),
+        }
+
+    def save(self) -> None:
+        with self._lock:
+            data = {
+                "vod_id": self.vod_id,
+                "clips": [self._entries[rel] for rel in sorted(self._entries)],
+            }
+        try:
+            self.clips_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save clip catalog {self.path}: {e}")
+
+    # ---- updates ----
+
+    def record(self, file_path: Union[str, Path], title: Optional[str] = None,
+               clip_index: Optional[int] = None, save: bool = True) -> Optional[Dict]:
+        """Add or refresh the entry for a rendered clip; returns it (None if the file is missing)."""
+        entry = self._entry_for(Path(file_path), title, clip_index)
+        if entry is None:
+            return None
+        with self._lock:
+            self._put(entry)
+        if save:
+            self.save()
+        return entry
+
+    def discard(self, file_path: Union[str, Path], save: bool = True) -> None:
+        rel = Path(file_path).relative_to(self.clips_dir).as_posix()
+        with self._lock:
+            entry = self._entries.pop(rel, None)
+            if entry is not None:
+                self._unindex(rel, entry)
+        if entry is not None and save:
+            self.save()
+
+    def rebuild(self) -> None:
+        """Re-scan clips_dir (sorted, temp_ files excluded), keeping titles/indices of files still present."""
+        previous = dict(self._entries)
+        entries: List[Dict] = []
+        if self.clips_dir.exists():
+            for file_path in sorted(self.clips_dir.rglob("*.mp4")):
+                if file_path.stem.startswith("temp_"):
+                    continue
+                rel = file_path.relative_to(self.clips_dir).as_posix()
+                old = previous.get(rel, {})
+                entry = self._entry_for(file_path, old.get("title") or None, old.get("clip_index"))
+                if entry is not None:
+                    entries.append(entry)
+        with self._lock:
+            self._entries, self._by_key, self._by_index = {}, {}, {}
+            for entry in entries:
+                self._put(entry)
+        self.rebuilt = True
+        logger.info(f"Rebuilt clip catalog for {self.vod_id}: {len(entries)} clips")
+        self.save()
+
+    # ---- lookups ----
+
+    def _valid(self, rel: Optional[str]) -> Optional[Path]:
+        if rel is None:
+            return None
+        entry = self._entries.get(rel)
+        p = self.clips_dir / rel
+        try:
+            if entry is not None and p.stat().st_size == entry.get("size"):
+                return p
+        except OSError:
+            pass
+        return None
+
+    def _lookup(self, title: Optional[str], clip_index: Optional[int]) -> Optional[Path]:
+        with self._lock:
+            if title:
+                key = normalize_clip_title(title)
+                hit = self._valid(self._by_key.get(key))
+                if hit is not None:
+                    return hit
+                # Titles shortened for metadata still match their file (prefix/substring of the stem)
+                if key:
+                    for k in sorted((k for k in self._by_key if key in k), key=lambda k: (len(k), k)):
+                        hit = self._valid(self._by_key[k])
+                        if hit is not None:
+                            return hit
+            if clip_index is not None:
+                return self._valid(self._by_index.get(clip_index))
+        return None
+
+    def find(self, title: Optional[str] = None, clip_index: Optional[int] = None) -> Optional[Path]:
+        """Processed clip file for a title (or, failing that, a clip index).
+
+        Exact normalized-title hits are O(1); a miss falls back to a substring
+        match over catalogued titles, then to one rebuild of the catalog per
+        instance in case it was missing or stale.
+        """
+        hit = self._lookup(title, clip_index)
+        if hit is None and not self.rebuilt:
+            self.rebuild()
+            hit = self._lookup(title, clip_index)
+        return hit
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Typed environment knobs shared by the pipeline modules.
+
+Each helper reads one variable and falls back to the default when it is
+unset, empty or does not parse, so a typo in a tuning knob never stops a job.
+
+`estimate_tokens()` is the rough prompt-size estimate (4 characters per
+token) that the batched LLM callers use to pack prompts under a budget.
+"""
+
+from __future__ import annotations
+
+import os
+
+__all__ = ["env_flag", "env_float", "env_int", "estimate_tokens"]
+
+_TRUE = ("1", "true", "yes")
+
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name, "").strip().lower()
+    return raw in _TRUE if raw else default
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Cross-process advisory file lock for the on-disk caches under data/cache.
+
+Several pipeline processes (clip creation, arc videos, the GPU daemon's
+children) read-modify-write the same cache index files. A thread lock only
+covers one process, so index updates take this lock around the whole
+read-merge-replace cycle.
+
+Usage:
+  from utils.file_lock import file_lock
+  with file_lock(index_path.with_suffix(".lock")):
+      entries = load(); entries.update(mine); save(entries)
+
+Uses fcntl.flock on POSIX and msvcrt.locking on Windows. The lock file is
+left in place (it is empty); only the lock on it is released.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+# flock is per open file description, so threads of one process need their own mutex
+_thread_locks: dict = {}
+_registry_lock = threading.Lock()
+
+
+def _thread_lock(path: Path) -> threading.Lock:
+    key = str(path.resolve())
+    with _registry_lock:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = _thread_locks[key] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def file_lock(path: Union[str, Path], timeout: float = 60.0) -> Iterator[None]:
+    """Hold an exclusive lock on path (created if missing) for the duration of the block."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _thread_lock(path):
+        with open(path, "a+b") as fh:
+            _acquire(fh, timeout)
+            try:
+                yield
+            finally:
+                _release(fh)
+
+
+if os.name == "nt":
+    import msvcrt
+
+    def _acquire(fh, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock {fh.name}")
+                time.sleep(0.05)
+
+    def _release(fh) -> None:
+        try:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+else:
+    import fcntl
+
+    def _acquire(fh, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock {fh.name}")
+                time.sleep(0.05)
+
+    def _release(fh) -> None:
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
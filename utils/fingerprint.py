@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Content fingerprints for local files, memoized on (size, mtime_ns, inode).
+
+Hashing a multi-gigabyte VOD artifact on every cache check dominates cache
+validation. FingerprintStore remembers the SHA-256 of each file together
+with the stat tuple it was computed for and only rehashes when that tuple
+changes (rewrite, truncate, replace-by-rename). Memo entries are persisted
+so later processes on the same host skip the hash as well.
+
+New entries are written in batches (every FILE_FINGERPRINT_FLUSH_EVERY
+hashes or FILE_FINGERPRINT_FLUSH_SECONDS, and at exit) rather than one file
+rewrite per hash. A flush merges with the file under a cross-process lock;
+when both sides have an entry for a path, the one computed for the newer
+mtime wins, so a stale process cannot overwrite a fresher hash.
+
+SHA-256 is kept (rather than a faster non-cryptographic hash) because the
+value is also stamped into S3 object metadata under `file-hash`, which
+CacheManager and BatchTransfer already compare against.
+
+Environment:
+  FILE_FINGERPRINT_CACHE   memo file (default data/cache/file_fingerprints.json)
+  FILE_FINGERPRINT_MEMO    set to 0 to always rehash
+  FILE_FINGERPRINT_FLUSH_EVERY    new entries buffered before a write (default 64)
+  FILE_FINGERPRINT_FLUSH_SECONDS  max age of buffered entries before a write (default 5)
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple, Union
+
+from utils.batch_transfer import HASH_METADATA_KEY, file_sha256
+from utils.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["FingerprintStore", "HASH_METADATA_KEY", "default_store", "file_fingerprint"]
+
+StatKey = Tuple[int, int, int]
+
+
+def _stat_key(st: os.stat_result) -> StatKey:
+    return (int(st.st_size), int(st.st_mtime_ns), int(st.st_ino))
+
+
+def _supersedes(mine: Dict, theirs: Dict) -> bool:
+    """True if mine should replace theirs: computed for a newer (or the same) mtime."""
+    try:
+        return int(mine["stat"][1]) >= int(theirs["stat"][1])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return True
+
+
+# Stores with unflushed entries are flushed once at interpreter exit
+_live_stores: "weakref.WeakSet[FingerprintStore]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for store in list(_live_stores):
+        store.flush()
+
+
+class FingerprintStore:
+    """Thread-safe path -> (stat tuple, sha256) memo backed by a JSON file."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path or os.getenv("FILE_FINGERPRINT_CACHE", "data/cache/file_fingerprints.json"))
+        self.enabled = os.getenv("FILE_FINGERPRINT_MEMO", "1").lower() in ("1", "true", "yes")
+        self.flush_every = max(1, int(os.getenv("FILE_FINGERPRINT_FLUSH_EVERY", "64")))
+        self.flush_seconds = float(os.getenv("FILE_FINGERPRINT_FLUSH_SECONDS", "5"))
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._dirty: Dict[str, Dict] = {}
+        self._forgotten: Set[str] = set()
+        self._last_flush = time.monotonic()
+        _live_stores.add(self)
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                obj = json.loads(self.path.read_text(encoding="utf-8"))
+                self._entries = obj if isinstance(obj, dict) else {}
+            except Exception:
+                self._entries = {}
+        return self._entries
+
+    def _read_disk(self) -> Dict[str, Dict]:
+        try:
+            obj = json.loads(self.path.read_text(encoding="utf-8"))
+            return obj if isinstance(obj, dict) else {}
+        except Exception:
+            return {}
+
+    def _due(self) -> bool:
+        pending = len(self._dirty) + len(self._forgotten)
+        return pending >= self.flush_every or (pending and time.monotonic() - self._last_flush >= self.flush_seconds)
+
+    def flush(self) -> None:
+        """Merge buffered entries into the memo file (newer mtime wins) and pick up other processes' entries."""
+        with self._lock:
+            dirty, forgotten = self._dirty, self._forgotten
+            self._dirty, self._forgotten = {}, set()
+            self._last_flush = time.monotonic()
+        if not dirty and not forgotten:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(self.path.with_name(self.path.name + ".lock")):
+                disk = self._read_disk()
+                for key, entry in dirty.items():
+                    if key not in disk or _supersedes(entry, disk[key]):
+                        disk[key] = entry
+                for key in forgotten:
+                    disk.pop(key, None)
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_text(json.dumps(disk), encoding="utf-8")
+                os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save file fingerprints: {e}")
+            return
+        with self._lock:
+            entries = self._load()
+            for key, entry in disk.items():
+                if key in self._forgotten:
+                    continue
+                mine = self._dirty.get(key) or entries.get(key)
+                if mine is None or not _supersedes(mine, entry):
+                    entries[key] = entry
+
+    def lookup(self, file_path: Union[str, Path]) -> Optional[str]:
+        """Memoized hash if the file's stat tuple is unchanged, else None (never hashes)."""
+        try:
+            p = Path(file_path).resolve()
+            key = _stat_key(p.stat())
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._load().get(str(p))
+        if entry and tuple(entry.get("stat", ())) == key:
+            return entry.get("sha256")
+        return None
+
+    def sha256(self, file_path: Union[str, Path]) -> Optional[str]:
+        """SHA-256 of a regular file, rehashing only when (size, mtime_ns, inode) changed."""
+        p = Path(file_path)
+        try:
+            p = p.resolve()
+            st = p.stat()
+        except OSError:
+            return None
+        if not p.is_file():
+            return None
+        if not self.enabled:
+            return file_sha256(p)
+        key = _stat_key(st)
+        with self._lock:
+            entry = self._load().get(str(p))
+        if entry and tuple(entry.get("stat", ())) == key and entry.get("sha256"):
+            return entry["sha256"]
+
+        digest = file_sha256(p)
+        try:
+            # File changed while we read it: return the hash but do not memoize it
+            if _stat_key(p.stat()) != key:
+                return digest
+        except OSError:
+            return digest
+        entry = {"stat": list(key), "sha256": digest}
+        with self._lock:
+            self._load()[str(p)] = entry
+            self._dirty[str(p)] = entry
+            self._forgotten.discard(str(p))
+            due = self._due()
+        if due:
+            self.flush()
+        return digest
+
+    def forget(self, file_path: Union[str, Path]) -> None:
+        key = str(Path(file_path).resolve())
+        with self._lock:
+            self._load().pop(key, None)
+            self._dirty.pop(key, None)
+            self._forgotten.add(key)
+            due = self._due()
+        if due:
+            self.flush()
+
+
+_default: Optional[FingerprintStore] = None
+_default_lock = threading.Lock()
+
+
+def default_store() -> FingerprintStore:
+    """Process-wide store shared by CacheManager and StorageManager."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = FingerprintStore()
+        return _default
+
+
+def file_fingerprint(file_path: Union[str, Path]) -> Optional[str]:
+    return default_store().sha256(file_path)
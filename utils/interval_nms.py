@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Interval non-maximum suppression and run merging.
+
+`nms()` visits candidates in score (or start) order and keeps one only if no
+already-kept interval suppresses it. Kept intervals live in a list sorted by
+(start, end) and maintained with bisect. With n kept intervals:
+
+- "overlap" (any intersection) and "gap" (closer than `threshold` seconds)
+  keep a pairwise-disjoint set, whose ends are then sorted too, so a
+  conflict check is one binary search: O(log n).
+- "iou" and "fraction" may keep partially overlapping intervals. A check
+  costs O(log n + k), where k is the number of kept intervals starting
+  within the longest kept length before the candidate's end. k counts
+  scanned intervals, not just overlapping ones: one very long kept
+  interval widens the scan for every later candidate.
+- Accepting an interval is a bisect plus a list insert, O(n) element moves
+  in the worst case (a memmove, cheap next to the checks in practice).
+
+Intervals must satisfy start <= end; nms() raises ValueError otherwise.
+Callers with possibly reversed spans normalise them first.
+
+`merge_runs()` groups consecutive intervals whose start falls before the
+running end of the current group (plus an optional gap), for callers that
+merge sorted ranges.
+"""
+
+from __future__ import annotations
+
+import bisect
+from typing import Iterator, List, Sequence, Tuple
+
+Interval = Tuple[float, float]
+
+RULES = ("overlap", "gap", "iou", "fraction")
+
+
+class KeptIntervals:
+    """Kept intervals sorted by (start, end), with overlap queries by binary search."""
+
+    def __init__(self, disjoint: bool):
+        self.disjoint = disjoint
+        self._keys: List[Interval] = []
+        self._max_len = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, start: float, end: float) -> None:
+        bisect.insort(self._keys, (start, end))
+        self._max_len = max(self._max_len, end - start)
+
+    def any_overlap(self, start: float, end: float) -> bool:
+        """True if some kept (ks, ke) satisfies ks < end and ke > start."""
+        pos = bisect.bisect_left(self._keys, (end, float("-inf")))
+        if pos == 0:
+            return False
+        if self.disjoint:
+            # Disjoint set sorted by start also has sorted ends: the last one reaches furthest
+            return self._keys[pos - 1][1] > start
+        return any(True for _ in self.overlapping(start, end))
+
+    def overlapping(self, start: float, end: float) -> Iterator[Interval]:
+        lo = bisect.bisect_left(self._keys, (start - self._max_len, float("-inf")))
+        hi = bisect.bisect_left(self._keys, (end, float("-inf")))
+        for ks, ke in self._keys[lo:hi]:
+            if ke > start:
+                yield ks, ke
+
+
+def _intersection(a: Interval, b: Interval) -> float:
+    return max(0.0, min(a[1], b[1]) - max(a[0], b[0]))
+
+
+def nms(
+    intervals: Sequence[Interval],
+    scores: Sequence[float],
+    rule: str = "overlap",
+    threshold: float = 0.0,
+    order: str = "score",
+) -> List[int]:
+    """
+    Indices of intervals kept by greedy suppression, in the order they were visited.
+
+    Every interval must have start <= end (ValueError otherwise).
+
+    rule:
+      overlap   suppress if it intersects any kept interval (threshold unused)
+      gap       suppress if it lies closer than `threshold` seconds to a kept interval
+      iou       suppress if IoU with a kept interval >= threshold
+      fraction  suppress if the intersection covers >= threshold of its own length
+    order:
+      score     highest score first (ties by earlier start)
+      start     earliest start first (ties by higher score)
+    """
+    if rule not in RULES:
+        raise ValueError(f"Unknown NMS rule: {rule}")
+    n = len(intervals)
+    for i, (s, e) in enumerate(intervals):
+        # A reversed span would break the sorted-ends invariant of the disjoint rules
+        if float(e) < float(s):
+            raise ValueError(f"Interval {i} ends before it starts: ({s}, {e})")
+    if order == "score":
+        visit = sorted(range(n), key=lambda i: (-scores[i], intervals[i][0]))
+    elif order == "start":
+        visit = sorted(range(n), key=lambda i: (intervals[i][0], -scores[i]))
+    else:
+        raise ValueError(f"Unknown NMS order: {order}")
+
+    kept = KeptIntervals(disjoint=rule in ("overlap", "gap"))
+    pad = max(0.0, float(threshold)) if rule == "gap" else 0.0
+    out: List[int] = []
+    for i in visit:
+        s, e = float(intervals[i][0]), float(intervals[i][1])
+        if rule in ("overlap", "gap"):
+            suppressed = kept.any_overlap(s - pad, e + pad)
+        elif rule == "iou":
+            suppressed = any(
+                _intersection((s, e), k) / max(1e-9, max(e, k[1]) - min(s, k[0])) >= threshold
+                for k in kept.overlapping(s, e)
+            )
+        else:
+            length = max(1e-9, e - s)
+            suppressed = any(_intersection((s, e), k) / length >= threshold for k in kept.overlapping(s, e))
+        if suppressed:
+            continue
+        out.append(i)
+        kept.add(s, e)
+    return out
+
+
+def merge_runs(intervals: Sequence[Interval], gap: float = 0.0) -> List[List[int]]:
+    """
+    Group consecutive intervals (in the given order) into runs.
+
+    An interval joins the current run when its start is before the run's
+    furthest end plus `gap`; otherwise it starts a new run.
+    """
+    runs: List[List[int]] = []
+    run_end = float("-inf")
+    for i, (s, e) in enumerate(intervals):
+        if runs and float(s) < run_end + gap:
+            runs[-1].append(i)
+            run_end = max(run_end, float(e))
+        else:
+            runs.append([i])
+            run_end = float(e)
+    return runs
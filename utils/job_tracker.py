@@ -2,8 +2,21 @@
 """
 Job tracking system for StreamSniped
 Uses DynamoDB to track VOD processing jobs
+
+JobTracker makes one synchronous DynamoDB call per operation. AsyncJobTracker
+wraps it so lease heartbeats for VODs registered with track_heartbeat() come
+from a timer thread instead of the caller's loop. Every write still goes
+straight through: terminal writes (complete_job, fail_job, release_and_mark)
+stop the VOD's heartbeats first and share a per-VOD lock with the timer, so
+the final status is always the last write.
+
+Environment:
+  JOB_TRACKER_HEARTBEAT_SECONDS  heartbeat timer interval (default 60)
 """
 
+import atexit
+import os
+import threading
 import time
 import uuid
 from datetime import datetime
@@ -102,6 +115,49 @@ class JobTracker:
                 logger.error(f"Failed to create table: {e}")
                 return False
     
+    @staticmethod
+    def _start_item(vod_id: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Full job record written by start_job"""
+        job_data = {
+            'vod_id': vod_id,
+            'status': JobStatus.RUNNING.value,
+            'step': JobStep.INGEST.value,
+            'started_at': int(time.time()),
+            'started_at_iso': datetime.utcnow().isoformat(),
+            'updated_at': int(time.time()),
+            'updated_at_iso': datetime.utcnow().isoformat(),
+            'audio_minutes': 0,
+            'compute_seconds': 0,
+            'gpu_seconds': 0,
+            'stt_provider': 'whisper',
+            'error_message': '',
+            'trace_id': str(uuid.uuid4()),
+            'final_s3': '',
+            'log_group': f"/aws/batch/job/{vod_id}"
+        }
+        if metadata:
+            job_data.update(metadata)
+        return job_data
+
+    def _write_start(self, vod_id: str, job_data: Dict[str, Any]) -> bool:
+        """Put the job record unless the job already completed; True if written"""
+        table = self.dynamodb.Table(self.table_name)
+        
+        # Check if job already exists
+        response = table.get_item(Key={'vod_id': vod_id})
+        
+        if 'Item' in response:
+            existing_job = response['Item']
+            if existing_job.get('status') == JobStatus.COMPLETED.value:
+                logger.info(f"Job {vod_id} already completed, skipping")
+                return False
+            elif existing_job.get('status') == JobStatus.RUNNING.value:
+                logger.info(f"Job {vod_id} already running, resuming")
+        
+        table.put_item(Item=job_data)
+        logger.info(f"Started job tracking for VOD: {vod_id}")
+        return True
+
     def start_job(self, vod_id: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
         """Start a new job or resume existing job"""
         if not self.dynamodb:
@@ -109,43 +165,7 @@ class JobTracker:
             return True
         
         try:
-            table = self.dynamodb.Table(self.table_name)
-            
-            # Check if job already exists
-            response = table.get_item(Key={'vod_id': vod_id})
-            
-            if 'Item' in response:
-                existing_job = response['Item']
-                if existing_job.get('status') == JobStatus.COMPLETED.value:
-                    logger.info(f"Job {vod_id} already completed, skipping")
-                    return True
-                elif existing_job.get('status') == JobStatus.RUNNING.value:
-                    logger.info(f"Job {vod_id} already running, resuming")
-            
-            # Create or update job record
-            job_data = {
-                'vod_id': vod_id,
-                'status': JobStatus.RUNNING.value,
-                'step': JobStep.INGEST.value,
-                'started_at': int(time.time()),
-                'started_at_iso': datetime.utcnow().isoformat(),
-                'updated_at': int(time.time()),
-                'updated_at_iso': datetime.utcnow().isoformat(),
-                'audio_minutes': 0,
-                'compute_seconds': 0,
-                'gpu_seconds': 0,
-                'stt_provider': 'whisper',
-                'error_message': '',
-                'trace_id': str(uuid.uuid4()),
-                'final_s3': '',
-                'log_group': f"/aws/batch/job/{vod_id}"
-            }
-            
-            if metadata:
-                job_data.update(metadata)
-            
-            table.put_item(Item=job_data)
-            logger.info(f"Started job tracking for VOD: {vod_id}")
+            self._write_start(vod_id, self._start_item(vod_id, metadata))
             return True
             
         except Exception as e:
@@ -266,42 +286,76 @@ class JobTracker:
             logger.error(f"Failed to release/mark job {vod_id}: {e}")
             return False
     
+    def _set_attributes(self, vod_id: str, update_data: Dict[str, Any]) -> None:
+        """Unconditional `SET #k = :k, ...` update of one job item"""
+        # Build update expression
+        update_expr = "SET "
+        expr_attrs = {}
+        expr_names = {}
+        
+        for key, value in update_data.items():
+            update_expr += f"#{key} = :{key}, "
+            expr_attrs[f":{key}"] = value
+            expr_names[f"#{key}"] = key
+        
+        update_expr = update_expr.rstrip(", ")
+        
+        table = self.dynamodb.Table(self.table_name)
+        table.update_item(
+            Key={'vod_id': vod_id},
+            UpdateExpression=update_expr,
+            ExpressionAttributeValues=expr_attrs,
+            ExpressionAttributeNames=expr_names
+        )
+
+    @staticmethod
+    def _step_update(step: JobStep, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        update_data = {
+            'step': step.value,
+            'updated_at': int(time.time()),
+            'updated_at_iso': datetime.utcnow().isoformat()
+        }
+        if metadata:
+            update_data.update(metadata)
+        return update_data
+
+    @staticmethod
+    def _completion_update(final_s3_uri: str = "", metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        update_data = {
+            'status': JobStatus.COMPLETED.value,
+            'step': JobStep.PUBLISH.value,
+            'ended_at': int(time.time()),
+            'ended_at_iso': datetime.utcnow().isoformat(),
+            'updated_at': int(time.time()),
+            'updated_at_iso': datetime.utcnow().isoformat(),
+            'final_s3': final_s3_uri
+        }
+        if metadata:
+            update_data.update(metadata)
+        return update_data
+
+    @staticmethod
+    def _failure_update(error_message: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        update_data = {
+            'status': JobStatus.FAILED.value,
+            'ended_at': int(time.time()),
+            'ended_at_iso': datetime.utcnow().isoformat(),
+            'updated_at': int(time.time()),
+            'updated_at_iso': datetime.utcnow().isoformat(),
+            'error_message': error_message[:500],  # Limit error message length
+            'trace_id': str(uuid.uuid4())
+        }
+        if metadata:
+            update_data.update(metadata)
+        return update_data
+    
     def update_step(self, vod_id: str, step: JobStep, metadata: Optional[Dict[str, Any]] = None) -> bool:
         """Update job step and metadata"""
         if not self.dynamodb:
             return True
         
         try:
-            table = self.dynamodb.Table(self.table_name)
-            
-            update_data = {
-                'step': step.value,
-                'updated_at': int(time.time()),
-                'updated_at_iso': datetime.utcnow().isoformat()
-            }
-            
-            if metadata:
-                update_data.update(metadata)
-            
-            # Build update expression
-            update_expr = "SET "
-            expr_attrs = {}
-            expr_names = {}
-            
-            for key, value in update_data.items():
-                update_expr += f"#{key} = :{key}, "
-                expr_attrs[f":{key}"] = value
-                expr_names[f"#{key}"] = key
-            
-            update_expr = update_expr.rstrip(", ")
-            
-            table.update_item(
-                Key={'vod_id': vod_id},
-                UpdateExpression=update_expr,
-                ExpressionAttributeValues=expr_attrs,
-                ExpressionAttributeNames=expr_names
-            )
-            
+            self._set_attributes(vod_id, self._step_update(step, metadata))
             logger.info(f"Updated job {vod_id} step to: {step.value}")
             return True
             
@@ -315,40 +369,7 @@ class JobTracker:
             return True
         
         try:
-            table = self.dynamodb.Table(self.table_name)
-            
-            update_data = {
-                'status': JobStatus.COMPLETED.value,
-                'step': JobStep.PUBLISH.value,
-                'ended_at': int(time.time()),
-                'ended_at_iso': datetime.utcnow().isoformat(),
-                'updated_at': int(time.time()),
-                'updated_at_iso': datetime.utcnow().isoformat(),
-                'final_s3': final_s3_uri
-            }
-            
-            if metadata:
-                update_data.update(metadata)
-            
-            # Build update expression
-            update_expr = "SET "
-            expr_attrs = {}
-            expr_names = {}
-            
-            for key, value in update_data.items():
-                update_expr += f"#{key} = :{key}, "
-                expr_attrs[f":{key}"] = value
-                expr_names[f"#{key}"] = key
-            
-            update_expr = update_expr.rstrip(", ")
-            
-            table.update_item(
-                Key={'vod_id': vod_id},
-                UpdateExpression=update_expr,
-                ExpressionAttributeValues=expr_attrs,
-                ExpressionAttributeNames=expr_names
-            )
-            
+            self._set_attributes(vod_id, self._completion_update(final_s3_uri, metadata))
             logger.info(f"Completed job: {vod_id}")
             return True
             
@@ -362,40 +383,7 @@ class JobTracker:
             return True
         
         try:
-            table = self.dynamodb.Table(self.table_name)
-            
-            update_data = {
-                'status': JobStatus.FAILED.value,
-                'ended_at': int(time.time()),
-                'ended_at_iso': datetime.utcnow().isoformat(),
-                'updated_at': int(time.time()),
-                'updated_at_iso': datetime.utcnow().isoformat(),
-                'error_message': error_message[:500],  # Limit error message length
-                'trace_id': str(uuid.uuid4())
-            }
-            
-            if metadata:
-                update_data.update(metadata)
-            
-            # Build update expression
-            update_expr = "SET "
-            expr_attrs = {}
-            expr_names = {}
-            
-            for key, value in update_data.items():
-                update_expr += f"#{key} = :{key}, "
-                expr_attrs[f":{key}"] = value
-                expr_names[f"#{key}"] = key
-            
-            update_expr = update_expr.rstrip(", ")
-            
-            table.update_item(
-                Key={'vod_id': vod_id},
-                UpdateExpression=update_expr,
-                ExpressionAttributeValues=expr_attrs,
-                ExpressionAttributeNames=expr_names
-            )
-            
+            self._set_attributes(vod_id, self._failure_update(error_message, metadata))
             logger.error(f"Failed job: {vod_id} - {error_message}")
             return True
             
@@ -446,6 +434,116 @@ class JobTracker:
             return []
 
 
+class AsyncJobTracker:
+    """JobTracker with lease heartbeats on a timer thread (see module docstring)"""
+
+    def __init__(self, tracker: Optional[JobTracker] = None, heartbeat_interval: Optional[float] = None):
+        self.tracker = tracker if tracker is not None else JobTracker()
+        self.heartbeat_interval = float(heartbeat_interval if heartbeat_interval is not None else os.getenv('JOB_TRACKER_HEARTBEAT_SECONDS', '60'))
+        self._lock = threading.Lock()
+        self._heartbeats: Dict[str, int] = {}  # vod_id -> lease_seconds
+        self._vod_locks: Dict[str, threading.Lock] = {}
+        self._stop = threading.Event()
+        self._heartbeater = threading.Thread(target=self._heartbeat_loop, name="job-tracker-heartbeat", daemon=True)
+        self._heartbeater.start()
+        atexit.register(self.close)
+
+    def __enter__(self) -> "AsyncJobTracker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def dynamodb(self):
+        return self.tracker.dynamodb
+
+    def _vod_lock(self, vod_id: str) -> threading.Lock:
+        """Orders one VOD's writes between the caller and the heartbeat thread"""
+        with self._lock:
+            lock = self._vod_locks.get(vod_id)
+            if lock is None:
+                lock = self._vod_locks[vod_id] = threading.Lock()
+            return lock
+
+    # ---- heartbeats ----
+
+    def track_heartbeat(self, vod_id: str, lease_seconds: int = 900) -> None:
+        """Heartbeat this RUNNING job from the timer thread until it is finished or untracked"""
+        with self._lock:
+            self._heartbeats[vod_id] = lease_seconds
+
+    def untrack_heartbeat(self, vod_id: str) -> None:
+        with self._lock:
+            self._heartbeats.pop(vod_id, None)
+
+    def heartbeat(self, vod_id: str, lease_seconds: int = 900) -> bool:
+        """Synchronous conditional heartbeat (same as JobTracker.heartbeat)"""
+        with self._vod_lock(vod_id):
+            return self.tracker.heartbeat(vod_id, lease_seconds=lease_seconds)
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._lock:
+                due = list(self._heartbeats.items())
+            for vod_id, lease_seconds in due:
+                with self._vod_lock(vod_id):
+                    # Skip VODs finished while waiting for the lock
+                    with self._lock:
+                        if vod_id not in self._heartbeats:
+                            continue
+                    self.tracker.heartbeat(vod_id, lease_seconds=lease_seconds)
+
+    # ---- writes (synchronous) ----
+
+    def start_job(self, vod_id: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        with self._vod_lock(vod_id):
+            return self.tracker.start_job(vod_id, metadata)
+
+    def update_step(self, vod_id: str, step: JobStep, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        with self._vod_lock(vod_id):
+            return self.tracker.update_step(vod_id, step, metadata)
+
+    def acquire_lock(self, vod_id: str, job_type: str = "full", lease_seconds: int = 900,
+                     metadata: Optional[Dict[str, Any]] = None) -> bool:
+        with self._vod_lock(vod_id):
+            return self.tracker.acquire_lock(vod_id, job_type=job_type, lease_seconds=lease_seconds, metadata=metadata)
+
+    def complete_job(self, vod_id: str, final_s3_uri: str = "", metadata: Optional[Dict[str, Any]] = None) -> bool:
+        self.untrack_heartbeat(vod_id)
+        with self._vod_lock(vod_id):
+            return self.tracker.complete_job(vod_id, final_s3_uri, metadata)
+
+    def fail_job(self, vod_id: str, error_message: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        self.untrack_heartbeat(vod_id)
+        with self._vod_lock(vod_id):
+            return self.tracker.fail_job(vod_id, error_message, metadata)
+
+    def release_and_mark(self, vod_id: str, status: JobStatus, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        self.untrack_heartbeat(vod_id)
+        with self._vod_lock(vod_id):
+            return self.tracker.release_and_mark(vod_id, status, metadata=metadata)
+
+    # ---- reads ----
+
+    def get_job(self, vod_id: str) -> Optional[Dict[str, Any]]:
+        return self.tracker.get_job(vod_id)
+
+    def list_jobs(self, status: Optional[JobStatus] = None, limit: int = 100) -> list:
+        return self.tracker.list_jobs(status, limit)
+
+    def create_table(self) -> bool:
+        return self.tracker.create_table()
+
+    def close(self) -> None:
+        """Stop the heartbeat thread"""
+        with self._lock:
+            self._heartbeats.clear()
+        self._stop.set()
+        if self._heartbeater is not threading.current_thread():
+            self._heartbeater.join(timeout=5)
+
+
 # Global job tracker instance
 job_tracker = JobTracker()
 
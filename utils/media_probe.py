@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Persistent ffprobe metadata cache shared by the render paths.
+
+One combined ffprobe call per file returns format duration and per-stream
+codec/profile/size/fps/duration; video keyframe positions, when asked for,
+come from a second demux-only probe restricted to v:0. Results are keyed by
+(path, size, mtime_ns) so an edited or re-downloaded file is probed again,
+and appended to data/cache/media_probe.jsonl (override with MEDIA_PROBE_CACHE)
+so later processes in the same run skip the probe entirely. The log is
+compacted (stale files dropped) when a process loads it and finds it mostly
+superseded.
+
+Usage:
+  from utils.media_probe import probe_media, probe_many
+  info = probe_media(path)
+  info.width, info.height, info.fps, info.has_audio, info.best_duration()
+  infos = probe_many(paths, keyframes=True)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+CACHE_VERSION = 2
+
+_lock = threading.Lock()
+_memory: Dict[str, Dict] = {}
+_dirty: Dict[str, Dict] = {}  # probed since the last append to disk
+_loaded = False
+
+# Compact the append-only log once it holds this many lines and mostly superseded entries
+COMPACT_MIN_LINES = 256
+
+
+@dataclass
+class MediaInfo:
+    """Probed metadata for one media file. Zero/empty values mean unknown."""
+    format_duration: float = 0.0
+    start_time: float = 0.0
+    video_codec: str = ""
+    profile: str = ""
+    level: int = 0
+    pix_fmt: str = ""
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    fps_rational: str = ""
+    video_duration: float = 0.0
+    audio_codec: str = ""
+    sample_rate: str = ""
+    channels: int = 0
+    audio_duration: float = 0.0
+    has_audio: bool = False
+    keyframes: Optional[List[float]] = field(default=None)
+
+    def best_duration(self) -> float:
+        """Prefer audio stream duration, then video stream, then container format duration."""
+        for d in (self.audio_duration, self.video_duration, self.format_duration):
+            if d and d > 0:
+                return d
+        return 0.0
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "MediaInfo":
+        known = {k: d[k] for k in cls.__dataclass_fields__ if k in d}
+        return cls(**known)
+
+
+def _resolve_ffprobe() -> str:
+    try:
+        exe = Path('executables/ffprobe.exe')
+        if os.name == 'nt' and exe.exists():
+            return str(exe)
+    except Exception:
+        pass
+    return 'ffprobe'
+
+
+def _cache_path() -> Path:
+    return Path(os.getenv('MEDIA_PROBE_CACHE', 'data/cache/media_probe.jsonl'))
+
+
+def _file_key(path: Path) -> Optional[str]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return f"{path.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def _load_disk() -> None:
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    path = _cache_path()
+    entries: Dict[str, Dict] = {}
+    lines = 0
+    try:
+        with path.open('r', encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a concurrent appender
+                if isinstance(rec, dict) and rec.get('v') == CACHE_VERSION and rec.get('key'):
+                    entries[rec['key']] = rec.get('info') or {}
+    except OSError:
+        return
+    if lines > max(COMPACT_MIN_LINES, 2 * len(entries)):
+        entries = _compact(path, entries)
+    for key, val in entries.items():
+        _memory.setdefault(key, val)
+
+
+def _compact(path: Path, entries: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Rewrite the log with one line per live entry (files that are gone or changed are dropped)."""
+    live = {k: v for k, v in entries.items() if _file_key(Path(k.split('|', 1)[0])) == k}
+    try:
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(''.join(_record(k, v) for k, v in live.items()), encoding='utf-8')
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return live
+
+
+def _record(key: str, info: Dict) -> str:
+    return json.dumps({'v': CACHE_VERSION, 'key': key, 'info': info}) + '\n'
+
+
+def _save_disk() -> None:
+    """Append entries probed since the last save; other processes append to the same log."""
+    if not _dirty:
+        return
+    path = _cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One append per batch: no re-read, no re-stat of older entries (pruned on compaction)
+        with path.open('a', encoding='utf-8') as f:
+            f.write(''.join(_record(k, v) for k, v in _dirty.items()))
+        _dirty.clear()
+    except OSError:
+        pass
+
+
+def _to_float(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _rate_to_float(s: str) -> float:
+    if not s:
+        return 0.0
+    if '/' in s:
+        num, den = s.split('/', 1)
+        try:
+            return float(num) / float(den) if float(den) else 0.0
+        except ValueError:
+            return 0.0
+    return _to_float(s)
+
+
+def _run_probe(path: Path, keyframes: bool) -> Optional[MediaInfo]:
+    entries = ('format=duration,start_time:stream=index,codec_type,codec_name,profile,level,pix_fmt,'
+               'width,height,avg_frame_rate,r_frame_rate,duration,sample_rate,channels')
+    try:
+        res = subprocess.run(
+            [_resolve_ffprobe(), '-v', 'error', '-show_entries', entries, '-of', 'json=c=1', str(path)],
+            capture_output=True, text=True, timeout=15,
+        )
+        obj = json.loads(res.stdout or '{}')
+    except Exception:
+        return None
+    streams = obj.get('streams') or []
+    if not streams and not obj.get('format'):
+        return None
+
+    fmt = obj.get('format') or {}
+    info = MediaInfo(format_duration=_to_float(fmt.get('duration')), start_time=_to_float(fmt.get('start_time')))
+    for st in streams:
+        kind = st.get('codec_type')
+        if kind == 'video' and not info.video_codec:
+            info.video_codec = st.get('codec_name') or ''
+            info.profile = st.get('profile') or ''
+            info.level = int(st.get('level') or 0)
+            info.pix_fmt = st.get('pix_fmt') or ''
+            info.width = int(st.get('width') or 0)
+            info.height = int(st.get('height') or 0)
+            info.fps_rational = st.get('r_frame_rate') or ''
+            avg = _rate_to_float(st.get('avg_frame_rate') or '')
+            rf = _rate_to_float(info.fps_rational)
+            info.fps = avg if avg > 0.1 else (rf if rf > 0.1 else 0.0)
+            info.video_duration = _to_float(st.get('duration'))
+        elif kind == 'audio' and not info.has_audio:
+            info.has_audio = True
+            info.audio_codec = st.get('codec_name') or ''
+            info.sample_rate = str(st.get('sample_rate') or '')
+            info.channels = int(st.get('channels') or 0)
+            info.audio_duration = _to_float(st.get('duration'))
+
+    if keyframes and info.video_codec:
+        info.keyframes = _probe_keyframes(path)
+        if info.keyframes is None:
+            return None
+    elif keyframes:
+        info.keyframes = []
+    return info
+
+
+def _probe_keyframes(path: Path) -> Optional[List[float]]:
+    """Keyframe pts of the first video stream (demux only; audio packets are never listed)."""
+    try:
+        res = subprocess.run(
+            [_resolve_ffprobe(), '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', str(path)],
+            capture_output=True, text=True, timeout=300,
+        )
+    except Exception:
+        return None
+    if res.returncode != 0:
+        return None
+    keys: List[float] = []
+    for line in (res.stdout or '').splitlines():
+        pts, _, flags = line.partition(',')
+        if 'K' in flags and pts and pts != 'N/A':
+            keys.append(_to_float(pts))
+    keys.sort()
+    return keys
+
+
+def probe_media(path: Path, keyframes: bool = False, persist: bool = True) -> MediaInfo:
+    """
+    Return cached metadata for path, probing once if the (path, size, mtime)
+    key is new. keyframes=True also lists video keyframe times (demux only,
+    slower on long files), upgrading an existing cache entry if needed.
+
+    Unknown/unreadable files return an empty MediaInfo (not cached).
+    """
+    path = Path(path)
+    key = _file_key(path)
+    if key is None:
+        return MediaInfo()
+    with _lock:
+        _load_disk()
+        cached = _memory.get(key)
+    if cached is not None and (not keyframes or cached.get('keyframes') is not None):
+        return MediaInfo.from_dict(cached)
+
+    if cached is not None:
+        # Stream info is already known; only the keyframe listing is missing
+        info = MediaInfo.from_dict(cached)
+        info.keyframes = _probe_keyframes(path) if info.video_codec else []
+        if info.keyframes is None:
+            return MediaInfo.from_dict(cached)
+    else:
+        info = _run_probe(path, keyframes)
+        if info is None:
+            return MediaInfo()
+    with _lock:
+        _memory[key] = _dirty[key] = asdict(info)
+        if persist:
+            _save_disk()
+    return info
+
+
+def probe_many(paths: Iterable[Path], keyframes: bool = False, max_workers: Optional[int] = None) -> Dict[Path, MediaInfo]:
+    """Probe several files concurrently; the cache is written once at the end."""
+    unique = list(dict.fromkeys(Path(p) for p in paths))
+    if not unique:
+        return {}
+    workers = max(1, int(max_workers or os.getenv('MEDIA_PROBE_WORKERS', '4')))
+    with ThreadPoolExecutor(max_workers=min(workers, len(unique))) as executor:
+        infos = list(executor.map(lambda p: probe_media(p, keyframes=keyframes, persist=False), unique))
+    with _lock:
+        _save_disk()
+    return dict(zip(unique, infos))
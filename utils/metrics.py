@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+"""
+Lightweight instrumentation: spans, counters, histograms and gauges.
+
+- `span(name, **attrs)` (context manager) and `traced(name)` (decorator)
+  time a block and record wall time, thread CPU time, CPU of child
+  processes reaped meanwhile (ffmpeg, TwitchDownloaderCLI) and RSS.
+  Every finished span feeds the `span_duration_seconds` histogram and
+  is appended as one JSON line to the VOD's trace file.
+- Spans are attributed to a VOD/run via `bind(vod_id=..., run_id=...)`,
+  falling back to the VOD_ID / JOB_RUN_ID env the orchestrator sets for
+  its steps. The current span id is exported to child steps as
+  TRACE_PARENT, so spans recorded in subprocesses and warm workers hang
+  under the orchestrator step that launched them.
+- `run_subprocess(cmd)` is subprocess.run inside a `<tool>.<op>` span
+  (twitch_downloader.videodownload, ffmpeg.run, ...).
+- `start_http_server()` serves the in-process registry in Prometheus text
+  format on /metrics.
+- `critical_path_report(vod_id)` reads a VOD trace and summarises the
+  chain of DAG steps that bounded its wall time, with the time spent in
+  LLM calls, ffmpeg and downloads under each of those steps.
+
+CLI:
+  python -m utils.metrics report <vod_id>     # print + write <vod_id>_summary.json
+  python -m utils.metrics serve [--port N]
+
+Environment:
+  METRICS_ENABLED    set to 0 to make spans/metrics no-ops (default 1)
+  METRICS_TRACE_DIR  JSONL trace directory (default logs/traces); one <vod_id>.jsonl per VOD
+  METRICS_TRACE      set to 0 to keep metrics but skip trace files (default 1)
+  METRICS_GLOBAL_TRACE_MB  rotate global.jsonl (spans with no VOD) to global.jsonl.1 past this size (default 50)
+  METRICS_PORT       port for start_http_server() when none is passed (default 0 = disabled)
+  METRICS_HOST       bind address for the endpoint (default 127.0.0.1)
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "Span", "bind", "counter", "critical_path_report", "current_span_id", "format_report",
+    "gauge", "histogram", "load_trace", "render_prometheus", "run_subprocess", "span", "start_http_server",
+    "traced",
+]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _enabled() -> bool:
+    return os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+# -------------------- Metric types --------------------
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help or self.name}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_fmt_labels(k)} {v:g}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (per-bucket counts + overflow, sum, count)
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        pos = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, acc = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0.0]))
+            counts[pos] += 1
+            acc[0] += value
+            acc[1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            series = sorted((k, (list(c), list(a))) for k, (c, a) in self._series.items())
+        for key, (counts, (total, n)) in series:
+            running = 0
+            for bound, c in zip(self.buckets, counts):
+                running += c
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, [('le', f'{bound:g}')])} {running}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(key, [('le', '+Inf')])} {int(n)}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {int(n)}")
+        return lines
+
+
+_REGISTRY: Dict[str, _Metric] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _get_or_create(cls, name: str, help: str, **kwargs) -> Any:
+    with _REGISTRY_LOCK:
+        metric = _REGISTRY.get(name)
+        if metric is None:
+            metric = cls(name, help, **kwargs)
+            _REGISTRY[name] = metric
+        elif type(metric) is not cls:
+            raise ValueError(f"Metric {name} already registered as {metric.kind}")
+        return metric
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return _get_or_create(Counter, name, help)
+
+
+def gauge(name: str, help: str = "") -> Gauge:
+    return _get_or_create(Gauge, name, help)
+
+
+def histogram(name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, help, buckets=buckets)
+
+
+def render_prometheus() -> str:
+    with _REGISTRY_LOCK:
+        metrics = list(_REGISTRY.values())
+    lines: List[str] = []
+    for m in metrics:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+SPAN_SECONDS = histogram("span_duration_seconds", "Wall time of instrumented spans")
+SPAN_CPU = counter("span_cpu_seconds_total", "Thread plus reaped child-process CPU time inside spans")
+SPAN_TOTAL = counter("span_total", "Finished spans by outcome")
+
+
+# -------------------- Spans --------------------
+
+_CONTEXT: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("metrics_context", default={})
+_CURRENT: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("metrics_span", default=None)
+
+
+@contextmanager
+def bind(**attrs: Any) -> Iterator[None]:
+    """Attach attributes (vod_id, run_id, ...) to every span started in this context."""
+    token = _CONTEXT.set({**_CONTEXT.get(), **{k: str(v) for k, v in attrs.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _CONTEXT.reset(token)
+
+
+def current_span_id() -> Optional[str]:
+    return _CURRENT.get()
+
+
+def _child_cpu() -> float:
+    try:
+        import resource
+        ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return ru.ru_utime + ru.ru_stime
+    except Exception:
+        return 0.0
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+class Span:
+    """A timed block; attributes can be added while it runs via set()."""
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.status = "ok"
+        self.id = uuid.uuid4().hex[:16]
+        self.parent_id = _CURRENT.get() or os.getenv("TRACE_PARENT") or None
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.thread_time()
+        self._child0 = _child_cpu()
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def finish(self) -> Dict[str, Any]:
+        ctx = _CONTEXT.get()
+        dur = time.perf_counter() - self._t0
+        record = {
+            "name": self.name,
+            "span_id": self.id,
+            "parent_id": self.parent_id,
+            "start": round(self.start, 6),
+            "end": round(self.start + dur, 6),
+            "dur_s": round(dur, 6),
+            "cpu_s": round(time.thread_time() - self._cpu0, 6),
+            # RUSAGE_CHILDREN is process-wide: concurrent spans can see each other's children
+            "child_cpu_s": round(max(0.0, _child_cpu() - self._child0), 6),
+            "rss_mb": _rss_mb(),
+            "status": self.status,
+            "vod_id": ctx.get("vod_id") or os.getenv("VOD_ID") or None,
+            "run_id": ctx.get("run_id") or os.getenv("JOB_RUN_ID") or None,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "attrs": {**{k: v for k, v in ctx.items() if k not in ("vod_id", "run_id")}, **self.attrs},
+        }
+        SPAN_SECONDS.observe(record["dur_s"], span=self.name)
+        SPAN_CPU.inc(record["cpu_s"] + record["child_cpu_s"], span=self.name)
+        SPAN_TOTAL.inc(span=self.name, status=self.status)
+        _write_trace(record)
+        return record
+
+
+class _NullSpan:
+    id = None
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Any]:
+    """Time a block as one span; exceptions mark it status=error and propagate."""
+    if not _enabled():
+        yield _NullSpan()
+        return
+    s = Span(name, dict(attrs))
+    token = _CURRENT.set(s.id)
+    try:
+        yield s
+    except BaseException as e:
+        s.status = "error"
+        s.attrs.setdefault("error", f"{type(e).__name__}: {e}"[:200])
+        raise
+    finally:
+        _CURRENT.reset(token)
+        try:
+            s.finish()
+        except Exception as e:
+            logger.debug(f"span {name} not recorded: {e}")
+
+
+def traced(name: Optional[str] = None, ok: Optional[Callable[[Any], bool]] = None, **attrs: Any):
+    """Decorator form of span(); `ok(result)` returning False marks the span failed."""
+    def wrap(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(span_name, **attrs) as s:
+                result = fn(*args, **kwargs)
+                if ok is not None and not ok(result):
+                    s.status = "failed"
+                return result
+        return inner
+    return wrap
+
+
+def _tool_of(cmd: Sequence[str]) -> Tuple[str, str]:
+    exe = os.path.basename(str(cmd[0])).lower() if cmd else ""
+    if "twitchdownloader" in exe or "twitch-downloader" in exe:
+        return "twitch_downloader", str(cmd[1]) if len(cmd) > 1 else "run"
+    for tool in ("ffprobe", "ffmpeg"):
+        if exe.startswith(tool):
+            return tool, "run"
+    return exe.rsplit(".", 1)[0] or "subprocess", "run"
+
+
+def run_subprocess(cmd: Sequence[str], tool: Optional[str] = None, op: Optional[str] = None, **kwargs: Any):
+    """subprocess.run inside a `<tool>.<op>` span (status failed on non-zero exit)."""
+    import subprocess
+
+    guessed_tool, guessed_op = _tool_of(cmd)
+    with span(f"{tool or guessed_tool}.{op or guessed_op}") as s:
+        res = subprocess.run(cmd, **kwargs)
+        s.set(returncode=res.returncode)
+        if res.returncode != 0:
+            s.status = "failed"
+        return res
+
+
+# -------------------- Trace files --------------------
+
+_TRACE_LOCK = threading.Lock()
+
+
+def _trace_dir() -> Path:
+    return Path(os.getenv("METRICS_TRACE_DIR", "logs/traces"))
+
+
+def _trace_path(vod_id: Optional[str]) -> Path:
+    return _trace_dir() / f"{vod_id or 'global'}.jsonl"
+
+
+def _rotate_global(path: Path) -> None:
+    """Per-VOD files end with their VOD; global.jsonl would grow forever, so keep one rolled copy."""
+    try:
+        cap = float(os.getenv("METRICS_GLOBAL_TRACE_MB", "50")) * 1024 * 1024
+    except ValueError:
+        cap = 50 * 1024 * 1024
+    try:
+        if cap > 0 and path.stat().st_size >= cap:
+            os.replace(path, path.with_name(path.name + ".1"))
+    except FileNotFoundError:
+        pass
+
+
+def _write_trace(record: Dict[str, Any]) -> None:
+    if os.getenv("METRICS_TRACE", "1").lower() not in ("1", "true", "yes"):
+        return
+    path = _trace_path(record.get("vod_id"))
+    line = json.dumps(record, default=str) + "\n"
+    with _TRACE_LOCK:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not record.get("vod_id"):
+                _rotate_global(path)
+            # One short O_APPEND write per span, so lines from concurrent processes do not interleave
+            fd = os.open(str(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+        except Exception as e:
+            logger.debug(f"trace write failed: {e}")
+
+
+def load_trace(vod_id: str, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Span records for a VOD; by default only those of its most recent run."""
+    records: List[Dict[str, Any]] = []
+    try:
+        with open(_trace_path(vod_id), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return []
+    if run_id is None:
+        runs = [r for r in records if r.get("name") == "job" and r.get("run_id")]
+        run_id = max(runs, key=lambda r: r["start"])["run_id"] if runs else None
+    if run_id is None:
+        return records
+    # Child steps carry the orchestrator's run id through JOB_RUN_ID
+    return [r for r in records if r.get("run_id") == run_id]
+
+
+# -------------------- Critical path report --------------------
+
+def _category(name: str) -> str:
+    for prefix in ("llm", "ffmpeg", "twitch_downloader", "download", "s3"):
+        if name.startswith(prefix):
+            return prefix
+    return name
+
+
+def critical_path_report(vod_id: str, run_id: Optional[str] = None, write: bool = True) -> Dict[str, Any]:
+    """
+    Critical path through the VOD's DAG steps plus per-step breakdown.
+
+    Walks back from the step that finished last, each time to the dependency
+    that finished last (the one that gated its start). Descendant spans of
+    each step (found through parent ids, across processes) are totalled by
+    category: llm, ffmpeg, twitch_downloader, ...
+    """
+    records = load_trace(vod_id, run_id)
+    steps = {r["attrs"].get("step"): r for r in records if r.get("name") == "dag.step" and r.get("attrs", {}).get("step")}
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    for r in records:
+        if r.get("parent_id"):
+            children.setdefault(r["parent_id"], []).append(r)
+
+    def _breakdown(root: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        # (record, category of its nearest counted ancestor): nested spans of one category count once
+        stack = [(r, None) for r in children.get(root["span_id"], [])]
+        while stack:
+            r, outer = stack.pop()
+            cat = _category(r["name"])
+            wrapper = r["name"].startswith(("pipeline.", "dag.", "worker."))
+            stack.extend((c, outer if wrapper else cat) for c in children.get(r["span_id"], []))
+            if wrapper or cat == outer:
+                continue
+            agg = out.setdefault(cat, {"count": 0, "seconds": 0.0, "cpu_s": 0.0})
+            agg["count"] += 1
+            agg["seconds"] = round(agg["seconds"] + r["dur_s"], 3)
+            agg["cpu_s"] = round(agg["cpu_s"] + r.get("cpu_s", 0.0) + r.get("child_cpu_s", 0.0), 3)
+        return out
+
+    path: List[Dict[str, Any]] = []
+    if steps:
+        cur = max(steps.values(), key=lambda r: r["end"])
+        while cur is not None:
+            path.append(cur)
+            deps = [steps[d] for d in cur["attrs"].get("deps") or [] if d in steps]
+            cur = max(deps, key=lambda r: r["end"]) if deps else None
+        path.reverse()
+
+    job = next((r for r in records if r.get("name") == "job"), None)
+    if job:
+        wall = job["dur_s"]
+    elif records:
+        wall = max(r["end"] for r in records) - min(r["start"] for r in records)
+    else:
+        wall = 0.0
+    crit_s = sum(r["dur_s"] for r in path)
+    totals: Dict[str, Dict[str, float]] = {}
+    for r in records:
+        agg = totals.setdefault(r["name"], {"count": 0, "seconds": 0.0})
+        agg["count"] += 1
+        agg["seconds"] = round(agg["seconds"] + r["dur_s"], 3)
+
+    report = {
+        "vod_id": vod_id,
+        "run_id": (job or {}).get("run_id") or run_id,
+        "wall_s": round(wall, 3),
+        "critical_path_s": round(crit_s, 3),
+        "critical_path": [
+            {
+                "step": r["attrs"]["step"],
+                "seconds": round(r["dur_s"], 3),
+                "share": round(r["dur_s"] / wall, 3) if wall else None,
+                "status": r["status"],
+                "breakdown": _breakdown(r),
+            }
+            for r in path
+        ],
+        "steps": {name: {"seconds": round(r["dur_s"], 3), "status": r["status"], "on_critical_path": r in path}
+                  for name, r in sorted(steps.items(), key=lambda kv: kv[1]["start"])},
+        "span_totals": dict(sorted(totals.items(), key=lambda kv: -kv[1]["seconds"])),
+    }
+    if write:
+        try:
+            out = _trace_dir() / f"{vod_id}_summary.json"
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"Failed to write trace summary: {e}")
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"Critical path for VOD {report['vod_id']}: {report['critical_path_s']:.1f}s of {report['wall_s']:.1f}s wall"]
+    for s in report["critical_path"]:
+        parts = ", ".join(f"{k} {v['seconds']:.1f}s x{int(v['count'])}" for k, v in
+                          sorted(s["breakdown"].items(), key=lambda kv: -kv[1]["seconds"])[:4])
+        share = f"{s['share'] * 100:5.1f}%" if s["share"] is not None else "    -"
+        lines.append(f"   {s['step']:<28} {s['seconds']:8.1f}s {share}  {parts}")
+    return "\n".join(lines)
+
+
+# -------------------- Exporter --------------------
+
+_SERVER = None
+
+
+def start_http_server(port: Optional[int] = None, host: Optional[str] = None):
+    """Serve /metrics in Prometheus text format from a daemon thread; returns the server or None."""
+    global _SERVER
+    if _SERVER is not None:
+        return _SERVER
+    port = int(os.getenv("METRICS_PORT", "0")) if port is None else int(port)
+    if port <= 0 or not _enabled():
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        _SERVER = ThreadingHTTPServer((host or os.getenv("METRICS_HOST", "127.0.0.1"), port), _Handler)
+    except OSError as e:
+        logger.warning(f"Metrics endpoint not started on port {port}: {e}")
+        return None
+    threading.Thread(target=_SERVER.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"📈 Metrics endpoint on http://{_SERVER.server_address[0]}:{port}/metrics")
+    return _SERVER
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Trace reports and metrics endpoint")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rep = sub.add_parser("report", help="Critical-path summary for a VOD trace")
+    rep.add_argument("vod_id")
+    rep.add_argument("--run-id")
+    rep.add_argument("--json", action="store_true", help="Print the full JSON report")
+    srv = sub.add_parser("serve", help="Serve this process's registry (mostly for testing)")
+    srv.add_argument("--port", type=int, default=int(os.getenv("METRICS_PORT", "9464")))
+    args = parser.parse_args(argv)
+
+    if args.cmd == "report":
+        report = critical_path_report(args.vod_id, args.run_id)
+        if not report["steps"] and not report["span_totals"]:
+            print(f"❌ No trace records for VOD {args.vod_id} in {_trace_dir()}")
+            return 1
+        print(json.dumps(report, indent=2) if args.json else format_report(report))
+        return 0
+    if start_http_server(args.port) is None:
+        return 1
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
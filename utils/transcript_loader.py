@@ -4,13 +4,17 @@ Transcript loader utility for title/timestamp generation.
 
 Loads transcript data from _filtered_ai_data.json for specific time ranges.
 Does NOT include chat messages - only the spoken transcript text.
+
+The parsed segment list is cached per file (until its mtime changes), so
+titling every clip of a VOD parses the file once rather than once per range.
 """
 
 from __future__ import annotations
 
 import json
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 # Try to import config for path resolution
 try:
@@ -27,6 +31,38 @@ def _get_ai_data_path(vod_id: str) -> Path:
     return Path(f"data/ai_data/{vod_id}/{vod_id}_filtered_ai_data.json")
 
 
+_SEGMENTS_CACHE: Dict[Path, Tuple[int, List[dict]]] = {}
+_SEGMENTS_LOCK = threading.Lock()
+
+
+def _load_segments(vod_id: str) -> Optional[List[dict]]:
+    """Parsed segment list for a VOD, or None if the file is missing/unreadable."""
+    ai_data_path = _get_ai_data_path(vod_id)
+    try:
+        mtime_ns = ai_data_path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+    with _SEGMENTS_LOCK:
+        cached = _SEGMENTS_CACHE.get(ai_data_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    try:
+        data = json.loads(ai_data_path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+    # Handle both formats: {"segments": [...]} or just [...]
+    segments = data.get("segments", data) if isinstance(data, dict) else data
+    if not isinstance(segments, list):
+        return None
+    segments = [seg for seg in segments if isinstance(seg, dict)]
+    with _SEGMENTS_LOCK:
+        _SEGMENTS_CACHE[ai_data_path] = (mtime_ns, segments)
+    return segments
+
+
 def _hms_to_seconds(hms: str) -> float:
     """Convert HH:MM:SS or H:MM:SS to seconds."""
     parts = hms.split(":")
@@ -57,19 +93,8 @@ def load_transcript_for_range(
         Concatenated transcript text for segments in the time range.
         Returns empty string if file doesn't exist or no segments found.
     """
-    ai_data_path = _get_ai_data_path(vod_id)
-    
-    if not ai_data_path.exists():
-        return ""
-    
-    try:
-        data = json.loads(ai_data_path.read_text(encoding="utf-8"))
-    except Exception:
-        return ""
-    
-    # Handle both formats: {"segments": [...]} or just [...]
-    segments = data.get("segments", data) if isinstance(data, dict) else data
-    if not isinstance(segments, list):
+    segments = _load_segments(vod_id)
+    if segments is None:
         return ""
     
     # Apply padding
@@ -79,9 +104,6 @@ def load_transcript_for_range(
     # Filter segments by time range
     transcripts: List[str] = []
     for seg in segments:
-        if not isinstance(seg, dict):
-            continue
-        
         seg_start = seg.get("start_time", 0)
         seg_end = seg.get("end_time", seg_start)
         
@@ -127,18 +149,8 @@ def load_segments_for_range(
     Returns list of segment dicts with start_time, end_time, transcript, etc.
     Useful when you need more than just the transcript text.
     """
-    ai_data_path = _get_ai_data_path(vod_id)
-    
-    if not ai_data_path.exists():
-        return []
-    
-    try:
-        data = json.loads(ai_data_path.read_text(encoding="utf-8"))
-    except Exception:
-        return []
-    
-    segments = data.get("segments", data) if isinstance(data, dict) else data
-    if not isinstance(segments, list):
+    segments = _load_segments(vod_id)
+    if segments is None:
         return []
     
     range_start = start_seconds - padding_seconds
@@ -146,14 +158,12 @@ def load_segments_for_range(
     
     result: List[dict] = []
     for seg in segments:
-        if not isinstance(seg, dict):
-            continue
-        
         seg_start = seg.get("start_time", 0)
         seg_end = seg.get("end_time", seg_start)
         
         if seg_start < range_end and seg_end > range_start:
-            result.append(seg)
+            # Copy so callers can't mutate the cached segments
+            result.append(dict(seg))
     
     return result
 
@@ -2,43 +2,195 @@
 """
 Upload Scheduler - Track failed uploads and retry them later
 Handles YouTube quota limits and other temporary failures
+
+Pending uploads live in a SQLite database (WAL mode) keyed by
+(vod_id, arc_index, channel), with an index on next_attempt_at. Every update
+touches only the affected rows in one short BEGIN IMMEDIATE transaction, so
+concurrent processes (the orchestrator daemon, upload subprocesses, cleanup
+scripts) never overwrite each other's changes.
+
+Workers drain the queue with claim_ready_uploads(), which atomically leases
+ready rows (BEGIN IMMEDIATE + UPDATE). A leased row is hidden from other
+claimers until it is completed, rescheduled by add_failed_upload, released
+(release_upload), or its lease expires (so a crashed worker's uploads come back on their own).
+drain_ready_uploads() is the retry loop built on that: it claims one row at a
+time, so a lease only has to outlive a single attempt, and reschedules a row
+whose attempt failed without rescheduling it itself.
+
+An existing data/pending_uploads.json is imported once, on first open of a
+fresh database, and renamed to pending_uploads.json.migrated.
+
+Environment:
+  UPLOAD_SCHEDULER_DB   database path (default data/pending_uploads.db)
 """
 
 import json
 import os
+import sqlite3
+import threading
+import time
+import uuid
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Completed / failed history rows kept per status (same as the old JSON lists)
+HISTORY_LIMIT = 100
+# Default lease: longer than one upload subprocess (1h timeout) plus slack
+DEFAULT_LEASE_SECONDS = 2 * 3600
+
+# arc_index None (whole-VOD upload) is stored as -1 so it takes part in the primary key
+_NO_ARC = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    vod_id TEXT NOT NULL,
+    arc_index INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    reason TEXT,
+    failed_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    retry_count INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    PRIMARY KEY (vod_id, arc_index, channel)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_pending_next_attempt ON pending(next_attempt_at);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL,
+    vod_id TEXT NOT NULL,
+    arc_index INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    reason TEXT,
+    failed_at REAL,
+    retry_count INTEGER NOT NULL DEFAULT 0,
+    finished_at REAL NOT NULL,
+    final_reason TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_status ON history(status, id);
+CREATE INDEX IF NOT EXISTS idx_history_finished ON history(finished_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _arc_key(arc_index: Optional[int]) -> int:
+    return _NO_ARC if arc_index is None else int(arc_index)
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts).isoformat() if ts is not None else None
+
+
+def _ts(value, default: float) -> float:
+    """ISO string from the old JSON file -> epoch seconds."""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except Exception:
+        return default
+
 
 class UploadScheduler:
     """Manage pending uploads and retry scheduling"""
     
-    def __init__(self, scheduler_file: str = "data/pending_uploads.json"):
-        self.scheduler_file = Path(scheduler_file)
-        self.scheduler_file.parent.mkdir(parents=True, exist_ok=True)
-        
-    def _load_pending(self) -> Dict:
-        """Load pending uploads from file"""
-        if not self.scheduler_file.exists():
-            return {"pending": [], "completed": [], "failed": []}
-        try:
-            with open(self.scheduler_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.warning(f"Failed to load pending uploads: {e}")
-            return {"pending": [], "completed": [], "failed": []}
+    def __init__(self, db_path: Optional[str] = None, json_file: str = "data/pending_uploads.json"):
+        self.db_path = Path(db_path or os.getenv("UPLOAD_SCHEDULER_DB", "data/pending_uploads.db"))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.json_file = Path(json_file)
+        self._lock = threading.Lock()
+        # Autocommit mode; writes open their own BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(_SCHEMA)
+        self._migrate_json()
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "UploadScheduler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
     
-    def _save_pending(self, data: Dict) -> None:
-        """Save pending uploads to file"""
+    def _write(self):
+        """Exclusive write transaction (serialised across processes by SQLite)."""
+        return _WriteTxn(self)
+    
+    def _trim_history(self, status: str) -> None:
+        self._conn.execute(
+            "DELETE FROM history WHERE status = ? AND id <= "
+            "(SELECT id FROM history WHERE status = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (status, status, HISTORY_LIMIT),
+        )
+    
+    @staticmethod
+    def _pending_dict(row: sqlite3.Row) -> Dict:
+        """Row -> the entry shape the JSON scheduler returned."""
+        return {
+            "vod_id": row["vod_id"],
+            "arc_index": None if row["arc_index"] == _NO_ARC else row["arc_index"],
+            "channel": row["channel"],
+            "reason": row["reason"],
+            "failed_at": _iso(row["failed_at"]),
+            "retry_after": _iso(row["next_attempt_at"]),
+            "retry_count": row["retry_count"],
+        }
+    
+    def _migrate_json(self) -> None:
+        """Import the legacy JSON queue once into a database that has not seen it."""
+        if not self.json_file.exists():
+            return
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+                return
+            try:
+                with open(self.json_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                logger.warning(f"Failed to load pending uploads for migration: {e}")
+                return
+            now = time.time()
+            pending = data.get("pending", []) if isinstance(data, dict) else []
+            for item in pending:
+                if not item.get("vod_id"):
+                    continue
+                failed_at = _ts(item.get("failed_at"), now)
+                conn.execute(
+                    "INSERT OR REPLACE INTO pending (vod_id, arc_index, channel, reason, failed_at, next_attempt_at, retry_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (item["vod_id"], _arc_key(item.get("arc_index")), item.get("channel") or "default",
+                     item.get("reason"), failed_at, _ts(item.get("retry_after"), now), int(item.get("retry_count", 0) or 0)),
+                )
+            for status, list_key, done_key in (("completed", "completed", "completed_at"), ("failed", "failed", "permanently_failed_at")):
+                items = data.get(list_key, []) if isinstance(data, dict) else []
+                for item in items:
+                    if not item.get("vod_id"):
+                        continue
+                    conn.execute(
+                        "INSERT INTO history (status, vod_id, arc_index, channel, reason, failed_at, retry_count, finished_at, final_reason) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (status, item["vod_id"], _arc_key(item.get("arc_index")), item.get("channel") or "default",
+                         item.get("reason"), _ts(item.get("failed_at"), now), int(item.get("retry_count", 0) or 0),
+                         _ts(item.get(done_key), now), item.get("final_reason")),
+                    )
+                self._trim_history(status)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (str(self.json_file),))
         try:
-            with open(self.scheduler_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Failed to save pending uploads: {e}")
+            self.json_file.rename(self.json_file.with_name(self.json_file.name + ".migrated"))
+        except OSError as e:
+            logger.warning(f"Migrated {self.json_file} but could not rename it: {e}")
+        logger.info(f"Migrated {len(pending)} pending uploads from {self.json_file} to {self.db_path}")
     
     def add_failed_upload(
         self, 
@@ -48,198 +200,251 @@ class UploadScheduler:
         channel: str = "default",
         retry_after_hours: int = 24
     ) -> None:
-        """Add a failed upload to the pending queue"""
-        data = self._load_pending()
-        
-        # Calculate retry time
-        retry_after = (datetime.now() + timedelta(hours=retry_after_hours)).isoformat()
-        
-        # Create upload entry
-        entry = {
-            "vod_id": vod_id,
-            "arc_index": arc_index,
-            "channel": channel,
-            "reason": reason,
-            "failed_at": datetime.now().isoformat(),
-            "retry_after": retry_after,
-            "retry_count": 0
-        }
-        
-        # Check if already exists
-        existing = None
-        for i, item in enumerate(data["pending"]):
-            if (item.get("vod_id") == vod_id and 
-                item.get("arc_index") == arc_index and
-                item.get("channel") == channel):
-                existing = i
-                break
-        
-        if existing is not None:
-            # Update retry count
-            data["pending"][existing]["retry_count"] = data["pending"][existing].get("retry_count", 0) + 1
-            data["pending"][existing]["retry_after"] = retry_after
-            data["pending"][existing]["failed_at"] = datetime.now().isoformat()
-            data["pending"][existing]["reason"] = reason
-            logger.info(f"Updated pending upload for VOD {vod_id} arc {arc_index} (retry #{data['pending'][existing]['retry_count']})")
+        """Add a failed upload to the pending queue (or bump its retry count), releasing any lease"""
+        now = time.time()
+        retry_after = now + retry_after_hours * 3600
+        key = (vod_id, _arc_key(arc_index), channel)
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT retry_count FROM pending WHERE vod_id = ? AND arc_index = ? AND channel = ?", key
+            ).fetchone()
+            if row is None:
+                retry_count = 0
+                conn.execute(
+                    "INSERT INTO pending (vod_id, arc_index, channel, reason, failed_at, next_attempt_at, retry_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    key + (reason, now, retry_after),
+                )
+            else:
+                retry_count = row[0] + 1
+                conn.execute(
+                    "UPDATE pending SET retry_count = ?, next_attempt_at = ?, failed_at = ?, reason = ?, "
+                    "lease_owner = NULL, lease_until = NULL WHERE vod_id = ? AND arc_index = ? AND channel = ?",
+                    (retry_count, retry_after, now, reason) + key,
+                )
+        if retry_count:
+            logger.info(f"Updated pending upload for VOD {vod_id} arc {arc_index} (retry #{retry_count})")
         else:
-            # Add new entry
-            data["pending"].append(entry)
-            logger.info(f"Added pending upload for VOD {vod_id} arc {arc_index}, retry after {retry_after}")
-        
-        self._save_pending(data)
+            logger.info(f"Added pending upload for VOD {vod_id} arc {arc_index}, retry after {_iso(retry_after)}")
     
     def get_ready_uploads(self, max_retries: int = 3) -> List[Dict]:
-        """Get uploads that are ready to retry"""
-        data = self._load_pending()
-        now = datetime.now()
-        
-        ready = []
-        for item in data["pending"]:
-            # Skip if max retries exceeded
-            if item.get("retry_count", 0) >= max_retries:
-                continue
-            
-            # Check if retry time has passed
+        """Get uploads that are ready to retry (not claimed by a live lease); does not claim them"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM pending WHERE next_attempt_at <= ? AND retry_count < ? "
+                "AND (lease_until IS NULL OR lease_until <= ?) ORDER BY next_attempt_at",
+                (now, max_retries, now),
+            ).fetchall()
+        return [self._pending_dict(r) for r in rows]
+    
+    def claim_ready_uploads(
+        self,
+        max_retries: int = 3,
+        limit: Optional[int] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        worker: Optional[str] = None,
+    ) -> List[Dict]:
+        """Atomically lease ready uploads for this worker.
+
+        Claimed rows are invisible to other claimers until completed, rescheduled,
+        released, or the lease runs out. Entries carry "lease_owner".
+        """
+        worker = worker or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        now = time.time()
+        with self._write() as conn:
+            rows = conn.execute(
+                "SELECT * FROM pending WHERE next_attempt_at <= ? AND retry_count < ? "
+                "AND (lease_until IS NULL OR lease_until <= ?) ORDER BY next_attempt_at LIMIT ?",
+                (now, max_retries, now, -1 if limit is None else int(limit)),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE pending SET lease_owner = ?, lease_until = ? WHERE vod_id = ? AND arc_index = ? AND channel = ?",
+                [(worker, now + lease_seconds, r["vod_id"], r["arc_index"], r["channel"]) for r in rows],
+            )
+        claimed = []
+        for r in rows:
+            item = self._pending_dict(r)
+            item["lease_owner"] = worker
+            claimed.append(item)
+        return claimed
+    
+    def release_upload(self, vod_id: str, arc_index: Optional[int], channel: str, worker: Optional[str] = None) -> None:
+        """Drop a lease without changing the schedule (only the owner's lease, if worker is given)"""
+        with self._write() as conn:
+            sql = "UPDATE pending SET lease_owner = NULL, lease_until = NULL WHERE vod_id = ? AND arc_index = ? AND channel = ?"
+            args = [vod_id, _arc_key(arc_index), channel]
+            if worker is not None:
+                sql += " AND lease_owner = ?"
+                args.append(worker)
+            conn.execute(sql, args)
+    
+    def reschedule_upload(self, vod_id: str, arc_index: Optional[int], channel: str, reason: str,
+                          retry_after_hours: float = 6, worker: Optional[str] = None) -> bool:
+        """Bump the retry count and push the next attempt out, dropping the lease.
+
+        With worker, only a row still leased by that worker is touched. False if
+        nothing was updated (row finished, or already rescheduled by someone else).
+        """
+        now = time.time()
+        with self._write() as conn:
+            sql = ("UPDATE pending SET retry_count = retry_count + 1, next_attempt_at = ?, failed_at = ?, reason = ?, "
+                   "lease_owner = NULL, lease_until = NULL WHERE vod_id = ? AND arc_index = ? AND channel = ?")
+            args = [now + retry_after_hours * 3600, now, reason, vod_id, _arc_key(arc_index), channel]
+            if worker is not None:
+                sql += " AND lease_owner = ?"
+                args.append(worker)
+            return conn.execute(sql, args).rowcount > 0
+
+    def drain_ready_uploads(
+        self,
+        attempt: Callable[[Dict], bool],
+        max_retries: int = 3,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        retry_after_hours: float = 6,
+        worker: Optional[str] = None,
+    ) -> int:
+        """Claim ready uploads one at a time and run attempt(entry) on each; returns the success count.
+
+        lease_seconds only has to cover one attempt. A successful attempt normally
+        completes its row; any lease left over is dropped. After a failed attempt
+        (False or an exception) the row is marked permanently failed once it has
+        used max_retries, otherwise rescheduled retry_after_hours out unless the
+        attempt already rescheduled or finished it.
+        """
+        worker = worker or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        seen = set()
+        successes = 0
+        while True:
+            claimed = self.claim_ready_uploads(max_retries=max_retries, limit=1, lease_seconds=lease_seconds, worker=worker)
+            if not claimed:
+                return successes
+            entry = claimed[0]
+            key = (entry["vod_id"], entry["arc_index"], entry["channel"])
+            if key in seen:
+                # Succeeded earlier in this pass but was not completed: leave it for the next pass
+                self.release_upload(*key, worker=worker)
+                return successes
+            seen.add(key)
             try:
-                retry_after = datetime.fromisoformat(item["retry_after"])
-                if now >= retry_after:
-                    ready.append(item)
-            except Exception:
-                # Invalid date, skip
+                ok = bool(attempt(entry))
+            except Exception as e:
+                logger.warning(f"Retry of VOD {key[0]} arc {key[1]} on {key[2]} raised: {e}")
+                ok = False
+            except BaseException:
+                self.release_upload(*key, worker=worker)
+                raise
+            if ok:
+                successes += 1
+                self.release_upload(*key, worker=worker)
                 continue
-        
-        return ready
+            tries = int(entry.get("retry_count") or 0) + 1
+            if tries >= max_retries:
+                self.mark_upload_permanently_failed(*key, reason=f"Failed after {tries} retry attempts")
+            elif self.reschedule_upload(*key, reason=f"Retry attempt {tries} failed",
+                                        retry_after_hours=retry_after_hours, worker=worker):
+                logger.info(f"Rescheduled VOD {key[0]} arc {key[1]} on {key[2]} ({tries}/{max_retries})")
+
+    def _finish(self, vod_id: str, arc_index: Optional[int], channel: str, status: str,
+                final_reason: Optional[str] = None) -> bool:
+        """Move one pending row into history; False if it was not pending."""
+        with self._write() as conn:
+            key = (vod_id, _arc_key(arc_index), channel)
+            row = conn.execute("SELECT * FROM pending WHERE vod_id = ? AND arc_index = ? AND channel = ?", key).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM pending WHERE vod_id = ? AND arc_index = ? AND channel = ?", key)
+            conn.execute(
+                "INSERT INTO history (status, vod_id, arc_index, channel, reason, failed_at, retry_count, finished_at, final_reason) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (status, row["vod_id"], row["arc_index"], row["channel"], row["reason"], row["failed_at"],
+                 row["retry_count"], time.time(), final_reason),
+            )
+            self._trim_history(status)
+        return True
     
     def mark_upload_completed(self, vod_id: str, arc_index: Optional[int], channel: str) -> None:
         """Mark an upload as successfully completed"""
-        data = self._load_pending()
-        
-        # Find and remove from pending
-        remaining = []
-        completed_item = None
-        for item in data["pending"]:
-            if (item.get("vod_id") == vod_id and 
-                item.get("arc_index") == arc_index and
-                item.get("channel") == channel):
-                completed_item = item.copy()
-                completed_item["completed_at"] = datetime.now().isoformat()
-            else:
-                remaining.append(item)
-        
-        data["pending"] = remaining
-        if completed_item:
-            data["completed"].append(completed_item)
-            # Keep only last 100 completed
-            data["completed"] = data["completed"][-100:]
+        if self._finish(vod_id, arc_index, channel, "completed"):
             logger.info(f"Marked upload as completed for VOD {vod_id} arc {arc_index}")
-        
-        self._save_pending(data)
     
     def mark_upload_permanently_failed(self, vod_id: str, arc_index: Optional[int], channel: str, reason: str) -> None:
         """Mark an upload as permanently failed (max retries exceeded)"""
-        data = self._load_pending()
-        
-        # Find and remove from pending
-        remaining = []
-        failed_item = None
-        for item in data["pending"]:
-            if (item.get("vod_id") == vod_id and 
-                item.get("arc_index") == arc_index and
-                item.get("channel") == channel):
-                failed_item = item.copy()
-                failed_item["permanently_failed_at"] = datetime.now().isoformat()
-                failed_item["final_reason"] = reason
-            else:
-                remaining.append(item)
-        
-        data["pending"] = remaining
-        if failed_item:
-            data["failed"].append(failed_item)
-            # Keep only last 100 failed
-            data["failed"] = data["failed"][-100:]
+        if self._finish(vod_id, arc_index, channel, "failed", final_reason=reason):
             logger.warning(f"Marked upload as permanently failed for VOD {vod_id} arc {arc_index}: {reason}")
-        
-        self._save_pending(data)
     
     def get_pending_count(self) -> int:
         """Get count of pending uploads"""
-        data = self._load_pending()
-        return len(data["pending"])
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0])
     
     def get_pending_for_vod(self, vod_id: str) -> List[Dict]:
         """Get all pending uploads for a specific VOD"""
-        data = self._load_pending()
-        return [item for item in data["pending"] if item.get("vod_id") == vod_id]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM pending WHERE vod_id = ? ORDER BY arc_index, channel", (vod_id,)
+            ).fetchall()
+        return [self._pending_dict(r) for r in rows]
+    
+    def _move_to_failed(self, conn: sqlite3.Connection, where: str, args: tuple, final_reason: str) -> int:
+        rows = conn.execute(f"SELECT * FROM pending WHERE {where}", args).fetchall()
+        conn.execute(f"DELETE FROM pending WHERE {where}", args)
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO history (status, vod_id, arc_index, channel, reason, failed_at, retry_count, finished_at, final_reason) "
+            "VALUES ('failed', ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(r["vod_id"], r["arc_index"], r["channel"], r["reason"], r["failed_at"], r["retry_count"], now, final_reason)
+             for r in rows],
+        )
+        return len(rows)
     
     def clear_vod_pending(self, vod_id: str, mark_as_failed: bool = True) -> int:
         """Clear all pending uploads for a specific VOD"""
-        data = self._load_pending()
-        
-        # Find all pending for this VOD
-        vod_pending = []
-        remaining_pending = []
-        for item in data["pending"]:
-            if item.get("vod_id") == vod_id:
-                vod_pending.append(item)
+        with self._write() as conn:
+            if mark_as_failed:
+                count = self._move_to_failed(conn, "vod_id = ?", (vod_id,), "Manually cleared/cancelled")
             else:
-                remaining_pending.append(item)
-        
-        if mark_as_failed:
-            # Move to failed list
-            for item in vod_pending:
-                item["permanently_failed_at"] = datetime.now().isoformat()
-                item["final_reason"] = "Manually cleared/cancelled"
-                data["failed"].append(item)
-        
-        data["pending"] = remaining_pending
-        self._save_pending(data)
-        
-        count = len(vod_pending)
+                count = conn.execute("DELETE FROM pending WHERE vod_id = ?", (vod_id,)).rowcount
         if count > 0:
             logger.info(f"Cleared {count} pending uploads for VOD {vod_id}")
         return count
     
     def clear_old_entries(self, days: int = 30) -> None:
         """Clear completed/failed entries older than specified days, and mark old pending as permanently failed"""
-        data = self._load_pending()
-        cutoff = datetime.now() - timedelta(days=days)
-        
-        # Move old pending entries to failed
-        old_pending = []
-        remaining_pending = []
-        for item in data["pending"]:
-            try:
-                failed_at = datetime.fromisoformat(item.get("failed_at", "1970-01-01"))
-                if failed_at < cutoff:
-                    old_pending.append(item)
-                else:
-                    remaining_pending.append(item)
-            except Exception:
-                remaining_pending.append(item)  # Keep if we can't parse date
-        
-        # Mark old pending as permanently failed
-        for item in old_pending:
-            item["permanently_failed_at"] = datetime.now().isoformat()
-            item["final_reason"] = f"Stale upload (failed_at > {days} days ago)"
-            data["failed"].append(item)
-            logger.info(f"Marked stale pending upload as failed: VOD {item.get('vod_id')} arc {item.get('arc_index')}")
-        
-        data["pending"] = remaining_pending
-        
-        # Filter completed
-        data["completed"] = [
-            item for item in data["completed"]
-            if datetime.fromisoformat(item.get("completed_at", "1970-01-01")) > cutoff
-        ]
-        
-        # Filter failed
-        data["failed"] = [
-            item for item in data["failed"]
-            if datetime.fromisoformat(item.get("permanently_failed_at", "1970-01-01")) > cutoff
-        ]
-        
-        self._save_pending(data)
-        logger.info(f"Cleared entries older than {days} days ({len(old_pending)} pending moved to failed)")
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+        with self._write() as conn:
+            moved = self._move_to_failed(
+                conn, "failed_at < ?", (cutoff,), f"Stale upload (failed_at > {days} days ago)"
+            )
+            # Stale pending rows were just added as failed "now", so they survive this pass
+            conn.execute("DELETE FROM history WHERE finished_at <= ?", (cutoff,))
+            self._trim_history("failed")
+        if moved:
+            logger.info(f"Marked {moved} stale pending uploads as failed")
+        logger.info(f"Cleared entries older than {days} days ({moved} pending moved to failed)")
+
+
+class _WriteTxn:
+    """`with scheduler._write() as conn`: thread lock + BEGIN IMMEDIATE, commit or roll back."""
+
+    def __init__(self, scheduler: UploadScheduler):
+        self.scheduler = scheduler
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.scheduler._lock.acquire()
+        try:
+            self.scheduler._conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.scheduler._lock.release()
+            raise
+        return self.scheduler._conn
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        try:
+            self.scheduler._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.scheduler._lock.release()
+        return False
 
 
 def is_quota_exceeded_error(error_message: str) -> bool:
@@ -250,7 +455,10 @@ def is_quota_exceeded_error(error_message: str) -> bool:
     error_lower = str(error_message).lower()
     quota_indicators = [
         "uploadlimitexceeded",
+        "quotaexceeded",  # HttpError reason in the error details
+        "dailylimitexceeded",
         "quota exceeded",
+        "exceeded your quota",
         "exceeded the number of videos",
         "upload limit",
     ]
@@ -9,6 +9,7 @@ Smoothing: Merge small slices into coherent sections per chapter.
 - Export sections to JSON per VOD (and per chapter)
 """
 
+import bisect
 import json
 import math
 import sqlite3
@@ -24,11 +25,15 @@ from vector_store.vector_index import VectorIndex  # for path discovery only
 # ---------- Utilities ----------
 
 def quantile(values: List[float], q: float) -> float:
-    if not values:
+    return quantile_sorted(sorted(values), q)
+
+
+def quantile_sorted(sorted_values: List[float], q: float) -> float:
+    """quantile() on values that are already sorted (no re-sort per lookup)."""
+    if not sorted_values:
         return 0.0
-    v = sorted(values)
-    idx = max(0, min(len(v) - 1, int(q * (len(v) - 1))))
-    return float(v[idx])
+    idx = max(0, min(len(sorted_values) - 1, int(q * (len(sorted_values) - 1))))
+    return float(sorted_values[idx])
 
 
 def rank_to_unit(values: List[float]) -> List[float]:
@@ -166,9 +171,12 @@ def smooth_segments_one_chapter(segments: List[Dict]) -> List[Dict]:
     if not segments:
         return []
 
-    # 0) Stats & helpers
+    # 0) Stats & helpers (order statistics are computed once per chapter)
+    n = len(segments)
     durations = [s["end_time"] - s["start_time"] for s in segments]
-    q25, q50, q75 = quantile(durations, 0.25), quantile(durations, 0.50), quantile(durations, 0.75)
+    durations_sorted = sorted(durations)
+    q25, q50 = quantile_sorted(durations_sorted, 0.25), quantile_sorted(durations_sorted, 0.50)
+    dur_p95 = quantile_sorted(durations_sorted, 0.95)
     is_short = lambda d: d <= q25
 
     gaps = compute_adjacent_gaps(segments)
@@ -183,23 +191,29 @@ def smooth_segments_one_chapter(segments: List[Dict]) -> List[Dict]:
     for i, s in enumerate(segments):
         s["_salience"] = 0.45*norm_burst[i] + 0.25*norm_chat[i] + 0.20*norm_react[i] + 0.10*norm_conf[i]
 
+    salience = [s["_salience"] for s in segments]
+    salience_sorted = sorted(salience)
+    is_local_max = [local_max_salience(segments, i) for i in range(n)]
+    # Local maxima stay candidates at any cut; only those below it add to the >= cut count
+    local_max_sal_sorted = sorted(salience[i] for i in range(n) if is_local_max[i])
+
     # Adaptive anchor percentile in [0.70, 0.90]
     def pick_anchor_cut():
         total_minutes = (segments[-1]["end_time"] - segments[0]["start_time"]) / 60.0
         target_min = max(1, int(total_minutes // 5))        # ~1 per 5m
         target_max = max(2, int(total_minutes // 5) * 3)    # up to ~3 per 5m
         for p in [0.70, 0.75, 0.80, 0.85, 0.90]:
-            cut = quantile([s["_salience"] for s in segments], p)
-            cand = [i for i in range(len(segments)) if segments[i]["_salience"] >= cut or local_max_salience(segments, i)]
-            if target_min <= len(cand) <= max(target_max, target_min):
+            cut = quantile_sorted(salience_sorted, p)
+            n_cand = (n - bisect.bisect_left(salience_sorted, cut)) + bisect.bisect_left(local_max_sal_sorted, cut)
+            if target_min <= n_cand <= max(target_max, target_min):
                 return cut
         # fallback to 0.80
-        return quantile([s["_salience"] for s in segments], 0.80)
+        return quantile_sorted(salience_sorted, 0.80)
 
     anchor_cut = pick_anchor_cut()
 
     # 1) Mark anchors
-    anchor_idxs = [i for i in range(len(segments)) if segments[i]["_salience"] >= anchor_cut or local_max_salience(segments, i)]
+    anchor_idxs = [i for i in range(n) if salience[i] >= anchor_cut or is_local_max[i]]
     # NMS with min separation = median duration
     anchor_idxs = suppress_dense_anchors(segments, sorted(anchor_idxs, key=lambda i: segments[i]["start_time"]), q50)
 
@@ -275,33 +289,27 @@ def smooth_segments_one_chapter(segments: List[Dict]) -> List[Dict]:
 
             # soft max segment length cap (p95) to avoid over-merge
             curr_duration = segments[right]["end_time"] - segments[left]["start_time"]
-            if curr_duration > quantile(durations, 0.95) or curr_duration > 8*60:
+            if curr_duration > dur_p95 or curr_duration > 8*60:
                 break
 
         groups.append((left, right))
 
     # 3) Assign remaining orphans
-    def nearest_used_left(i: int) -> Optional[int]:
-        j = i - 1
-        while j >= 0:
-            if any(l <= j <= r for (l, r) in groups):
-                return j
-            j -= 1
-        return None
-
-    def nearest_used_right(i: int) -> Optional[int]:
-        j = i + 1
-        while j < len(segments):
-            if any(l <= j <= r for (l, r) in groups):
-                return j
-            j += 1
-        return None
-
-    def group_of_index(idx: int) -> Optional[int]:
-        for gi, (l, r) in enumerate(groups):
-            if l <= idx <= r:
-                return gi
-        return None
+    # Groups stay disjoint, so membership is an index -> group array. Orphans are
+    # visited left to right and each one ends up inside a group, so the nearest
+    # grouped index on the left is always the previous one; on the right only the
+    # grown groups matter, found with one backwards sweep.
+    group_of = [-1] * n
+    for gi, (l, r) in enumerate(groups):
+        for t in range(l, r + 1):
+            group_of[t] = gi
+
+    next_used_right: List[Optional[int]] = [None] * n
+    nxt: Optional[int] = None
+    for t in range(n - 1, -1, -1):
+        next_used_right[t] = nxt
+        if group_of[t] >= 0:
+            nxt = t
 
     def attach_score(anchor_idx: int, free_idx: int) -> float:
         # anchor index denotes a member of a group; use its neighbors for salience
@@ -313,57 +321,61 @@ def smooth_segments_one_chapter(segments: List[Dict]) -> List[Dict]:
             gap = max(0.0, segments[anchor_idx]["start_time"] - segments[free_idx]["end_time"]) 
         return 0.6*sim + 0.3*(1.0/(1.0 + gap)) + 0.1*segments[anchor_idx]["_salience"]
 
-    for i, s in enumerate(segments):
-        if any(l <= i <= r for (l, r) in groups):
+    for i in range(n):
+        if group_of[i] >= 0:
             continue
-        left_idx = nearest_used_left(i)
-        right_idx = nearest_used_right(i)
+        left_idx = i - 1 if i > 0 else None
+        right_idx = next_used_right[i]
         best = None
         best_sc = -1.0
         if left_idx is not None:
-            gi = group_of_index(left_idx)
-            if gi is not None:
-                sc = attach_score(left_idx, i)
-                best = (gi, sc, left_idx)
-                best_sc = sc
+            sc = attach_score(left_idx, i)
+            best = (group_of[left_idx], sc, left_idx)
+            best_sc = sc
         if right_idx is not None:
-            gi = group_of_index(right_idx)
-            if gi is not None:
-                sc = attach_score(right_idx, i)
-                if sc > best_sc:
-                    best = (gi, sc, right_idx)
-                    best_sc = sc
+            sc = attach_score(right_idx, i)
+            if sc > best_sc:
+                best = (group_of[right_idx], sc, right_idx)
+                best_sc = sc
         if best is not None:
             gi, _, _ = best
             l, r = groups[gi]
             if i < l:
+                # orphans between i and the group are covered by the extension
                 groups[gi] = (i, r)
-            elif i > r:
-                groups[gi] = (l, i)
+                for t in range(i, l):
+                    group_of[t] = gi
             else:
-                # inside range, ignore
-                pass
+                groups[gi] = (l, i)
+                group_of[i] = gi
         else:
+            group_of[i] = len(groups)
             groups.append((i, i))
 
     # 3.5) Absorb remaining short singletons into stronger neighbor (final cleanup)
+    # Each group carries its representative: the first index of max salience.
     def group_rep_index(gr: Tuple[int,int]) -> int:
         l, r = gr
         best_idx = l
-        best_sal = segments[l]["_salience"]
         for t in range(l, r+1):
-            if segments[t]["_salience"] > best_sal:
-                best_sal = segments[t]["_salience"]
+            if salience[t] > salience[best_idx]:
                 best_idx = t
         return best_idx
 
-    groups = sorted(groups, key=lambda g: segments[g[0]]["start_time"])
+    def merged_rep(a: int, b: int) -> int:
+        if salience[a] != salience[b]:
+            return a if salience[a] > salience[b] else b
+        return min(a, b)
+
+    pending = [(l, r, group_rep_index((l, r))) for (l, r) in sorted(groups, key=lambda g: segments[g[0]]["start_time"])]
     changed = True
     while changed:
+        # One pass: `kept` holds groups already visited (possibly grown by a
+        # singleton merging left); a singleton merging right replaces the next group.
         changed = False
-        i = 0
-        while i < len(groups):
-            l, r = groups[i]
+        kept: List[Tuple[int, int, int]] = []
+        for i in range(len(pending)):
+            l, r, rep = pending[i]
             if l == r:
                 s = segments[l]
                 dur = s["end_time"] - s["start_time"]
@@ -372,31 +384,28 @@ def smooth_segments_one_chapter(segments: List[Dict]) -> List[Dict]:
                     best_side = None
                     best_sc = -1.0
                     # left
-                    if i - 1 >= 0:
-                        left_rep = group_rep_index(groups[i-1])
-                        sc = attach_score(left_rep, l)
-                        best_side = ("left", i-1, sc)
+                    if kept:
+                        sc = attach_score(kept[-1][2], l)
+                        best_side = "left"
                         best_sc = sc
                     # right
-                    if i + 1 < len(groups):
-                        right_rep = group_rep_index(groups[i+1])
-                        sc = attach_score(right_rep, l)
+                    if i + 1 < len(pending):
+                        sc = attach_score(pending[i+1][2], l)
                         if sc > best_sc:
-                            best_side = ("right", i+1, sc)
+                            best_side = "right"
                             best_sc = sc
                     if best_side is not None and best_sc > 0:
-                        side, idx_neighbor, _ = best_side
-                        if side == "left":
-                            nl, nr = groups[idx_neighbor]
-                            groups[idx_neighbor] = (min(nl, l), max(nr, r))
-                            groups.pop(i)
+                        if best_side == "left":
+                            nl, nr, nrep = kept[-1]
+                            kept[-1] = (min(nl, l), max(nr, r), merged_rep(nrep, l))
                         else:
-                            nl, nr = groups[idx_neighbor]
-                            groups[idx_neighbor] = (min(l, nl), max(r, nr))
-                            groups.pop(i)
+                            nl, nr, nrep = pending[i+1]
+                            pending[i+1] = (min(l, nl), max(r, nr), merged_rep(l, nrep))
                         changed = True
-                        continue  # do not increment i; list shrunk
-            i += 1
+                        continue
+            kept.append((l, r, rep))
+        pending = kept
+    groups = [(l, r) for (l, r, _) in pending]
 
     # 4) Materialize merged segments
     merged: List[Dict] = []
@@ -13,11 +13,12 @@ from typing import List, Dict, Optional, Tuple, Any
 import logging
 import os
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 try:
     import faiss
-    import numpy as np
     HAS_FAISS = True
 except ImportError:
     HAS_FAISS = False
@@ -30,6 +31,10 @@ except ImportError:
     HAS_SENTENCE_TRANSFORMERS = False
     logger.warning("sentence-transformers not available. Install with: pip install sentence-transformers")
 
+# Loaded models per (name, device); long-lived processes (the orchestrator's warm
+# pipeline workers) reuse them across VectorIndex instances instead of reloading.
+_MODEL_CACHE: Dict[Tuple[str, str], Any] = {}
+
 
 class VectorIndex:
     """FAISS-based vector index with metadata persistence."""
@@ -80,7 +85,13 @@ class VectorIndex:
             if override:
                 device = override
 
+            cache_key = (self.embedding_model_name, device)
+            if cache_key in _MODEL_CACHE:
+                self.embedding_model = _MODEL_CACHE[cache_key]
+                logger.info(f"Reusing loaded embedding model: {self.embedding_model_name} on {device}")
+                return
             self.embedding_model = SentenceTransformer(self.embedding_model_name, device=device)
+            _MODEL_CACHE[cache_key] = self.embedding_model
             logger.info(f"Loaded embedding model: {self.embedding_model_name} on {device}")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")